@@ -94,7 +94,7 @@ LOCAL_APPS = [
     'datahub.activity_stream.apps.ActivityStreamConfig',
     'datahub.user_event_log',
     'datahub.activity_feed',
-    'datahub.dataset',
+    'datahub.dataset.apps.DatasetConfig',
 ]
 
 MI_APPS = [
@@ -320,18 +320,59 @@ ES_VERIFY_CERTS = env.bool('ES_VERIFY_CERTS', True)
 ES_INDEX_PREFIX = env('ES_INDEX_PREFIX')
 ES_INDEX_SETTINGS = {}
 ES_BULK_MAX_CHUNK_BYTES = 10 * 1024 * 1024  # 10MB
+# Maximum number of documents in each bulk indexing request
+ES_BULK_CHUNK_SIZE = env.int('ES_BULK_CHUNK_SIZE', default=500)
+# Maximum number of bulk indexing requests sent in parallel (by each sync)
+ES_BULK_MAX_IN_FLIGHT_REQUESTS = env.int('ES_BULK_MAX_IN_FLIGHT_REQUESTS', default=2)
+# Retries (with exponential backoff) of bulk requests and documents rejected with a 429 or 503
+ES_BULK_MAX_RETRIES = env.int('ES_BULK_MAX_RETRIES', default=5)
+ES_BULK_INITIAL_BACKOFF_SECS = 2
+ES_BULK_MAX_BACKOFF_SECS = 60
 ES_SEARCH_REQUEST_TIMEOUT = env.int('ES_SEARCH_REQUEST_TIMEOUT', default=20)  # seconds
 ES_SEARCH_REQUEST_WARNING_THRESHOLD = env.int(
     'ES_SEARCH_REQUEST_WARNING_THRESHOLD',
     default=10,  # seconds
 )
-SEARCH_EXPORT_MAX_RESULTS = 5000
+# Proportion of search queries (between 0 and 1) run with the Elasticsearch profile API enabled.
+# The profile output is sent to Sentry for slow queries.
+ES_SEARCH_PROFILE_SAMPLE_RATE = env.float('ES_SEARCH_PROFILE_SAMPLE_RATE', default=0.0)
+# How long search alias state (used when syncing single objects) is cached in each process for
+SEARCH_ALIAS_CACHE_TTL = env.int('SEARCH_ALIAS_CACHE_TTL', default=30)  # seconds
+# Number of sub-tasks (or processes, for sync_es --foreground) used to sync each search app
+SEARCH_SYNC_NUM_PARTITIONS = env.int('SEARCH_SYNC_NUM_PARTITIONS', default=1)
+# When enabled, objects to sync are added to a coalescing Redis set per search app (drained in
+# batches) instead of a Celery task being scheduled per object
+ENABLE_SEARCH_SYNC_QUEUE = env.bool('ENABLE_SEARCH_SYNC_QUEUE', default=False)
+SEARCH_SYNC_QUEUE_BATCH_SIZE = env.int('SEARCH_SYNC_QUEUE_BATCH_SIZE', default=500)
+SEARCH_SYNC_QUEUE_DRAIN_THRESHOLD = env.int('SEARCH_SYNC_QUEUE_DRAIN_THRESHOLD', default=500)
+SEARCH_SYNC_QUEUE_DRAIN_INTERVAL = env.int('SEARCH_SYNC_QUEUE_DRAIN_INTERVAL', default=10)  # secs
+ENABLE_INCREMENTAL_SEARCH_SYNC = env.bool('ENABLE_INCREMENTAL_SEARCH_SYNC', default=False)
+# Extra time (in seconds) to go back when looking for objects modified since the previous
+# incremental sync (to allow for transactions that were still in progress)
+SEARCH_INCREMENTAL_SYNC_OVERLAP = env.int('SEARCH_INCREMENTAL_SYNC_OVERLAP', default=5 * 60)
+SEARCH_RECONCILIATION_CHUNK_SIZE = env.int('SEARCH_RECONCILIATION_CHUNK_SIZE', default=5000)
+ENABLE_SEARCH_RESULT_CACHE = env.bool('ENABLE_SEARCH_RESULT_CACHE', default=False)
+SEARCH_RESULT_CACHE_TTL = env.int('SEARCH_RESULT_CACHE_TTL', default=15)  # seconds
+SEARCH_EXPORT_MAX_RESULTS = env.int('SEARCH_EXPORT_MAX_RESULTS', default=5000)
+# Limit for asynchronous exports (which aren't subject to the request timeout); None means
+# no limit
+SEARCH_EXPORT_ASYNC_MAX_RESULTS = env.int('SEARCH_EXPORT_ASYNC_MAX_RESULTS', default=None)
 SEARCH_EXPORT_SCROLL_CHUNK_SIZE = 1000
 SEARCH_CONFIGURE_CONNECTION_ON_READY = True
 SEARCH_CONNECT_SIGNAL_RECEIVERS_ON_READY = True
 CHAR_FIELD_MAX_LENGTH = 255
 
 AV_V2_SERVICE_URL = env('AV_V2_SERVICE_URL', default=None)
+# Timeouts (in seconds) for connecting to and reading from S3 and the AV service when scanning
+AV_V2_SERVICE_CONNECT_TIMEOUT = env.float('AV_V2_SERVICE_CONNECT_TIMEOUT', default=5)
+AV_V2_SERVICE_READ_TIMEOUT = env.float('AV_V2_SERVICE_READ_TIMEOUT', default=120)
+# Maximum number of documents being virus scanned at the same time (across all workers)
+AV_V2_SERVICE_MAX_CONCURRENT_SCANS = env.int('AV_V2_SERVICE_MAX_CONCURRENT_SCANS', default=4)
+# Number of seconds after which scheduled or in-progress virus scans are considered stuck (and
+# are rescanned by the rescan_documents task)
+AV_V2_SERVICE_STUCK_SCAN_THRESHOLD = env.int('AV_V2_SERVICE_STUCK_SCAN_THRESHOLD', default=60 * 60)
+# Maximum number of times the rescan_documents task reschedules the virus scan of a document
+AV_V2_SERVICE_MAX_RESCANS = env.int('AV_V2_SERVICE_MAX_RESCANS', default=5)
 
 
 def _build_redis_url(base_url, db_number, **query_args):
@@ -392,6 +433,10 @@ if REDIS_BASE_URL:
             'task': 'datahub.dnb_api.tasks.get_company_updates',
             'schedule': crontab(minute=0, hour=0),
         },
+        'delete_expired_search_export_files': {
+            'task': 'datahub.search.tasks.delete_expired_search_export_files',
+            'schedule': crontab(minute=45),
+        },
         'automatic_company_archive': {
             'task': 'datahub.company.tasks.automatic_company_archive',
             'schedule': crontab(minute=0, hour=20, day_of_week='SAT'),
@@ -407,10 +452,33 @@ if REDIS_BASE_URL:
             'schedule': crontab(minute=0, hour=1),
         }
 
+    if ENABLE_INCREMENTAL_SEARCH_SYNC:
+        CELERY_BEAT_SCHEDULE['sync_changed_search_objects'] = {
+            'task': 'datahub.search.tasks.sync_changed_objects_for_all_models',
+            'schedule': crontab(minute='*/15'),
+        }
+        CELERY_BEAT_SCHEDULE['reconcile_search_apps'] = {
+            'task': 'datahub.search.tasks.reconcile_all_models',
+            'schedule': crontab(minute=0, hour=1),
+        }
+
+    if ENABLE_SEARCH_SYNC_QUEUE:
+        CELERY_BEAT_SCHEDULE['drain_search_sync_queues'] = {
+            'task': 'datahub.search.tasks.drain_all_sync_queues',
+            'schedule': float(SEARCH_SYNC_QUEUE_DRAIN_INTERVAL),
+        }
+
     if env.bool('ENABLE_SPI_REPORT_GENERATION', False):
         CELERY_BEAT_SCHEDULE['spi_report'] = {
             'task': 'datahub.investment.project.report.tasks.generate_spi_report',
             'schedule': crontab(minute=0, hour=8),
+            'kwargs': {
+                'full_refresh': True,
+            },
+        }
+        CELERY_BEAT_SCHEDULE['spi_report_incremental'] = {
+            'task': 'datahub.investment.project.report.tasks.generate_spi_report',
+            'schedule': crontab(minute=30),
         }
 
     if env.bool('ENABLE_MI_DASHBOARD_FEED', False):
@@ -418,6 +486,20 @@ if REDIS_BASE_URL:
             'task': 'datahub.mi_dashboard.tasks.mi_investment_project_etl_pipeline',
             'schedule': crontab(minute=0, hour=1),
         }
+        CELERY_BEAT_SCHEDULE['mi_dashboard_feed_incremental'] = {
+            'task': 'datahub.mi_dashboard.tasks.mi_investment_project_etl_pipeline',
+            # Offset so that it does not start at the same time as the full run
+            'schedule': crontab(minute='5-55/10'),
+            'kwargs': {
+                'incremental': True,
+            },
+        }
+
+    if env.bool('ENABLE_DOCUMENT_RESCANNING', False):
+        CELERY_BEAT_SCHEDULE['rescan_documents'] = {
+            'task': 'datahub.documents.tasks.rescan_documents',
+            'schedule': crontab(minute=30),
+        }
 
     if env.bool('ENABLE_EMAIL_INGESTION', False):
         CELERY_BEAT_SCHEDULE['email_ingestion'] = {
@@ -438,6 +520,20 @@ MI_FDI_DASHBOARD_TASK_DURATION_WARNING_THRESHOLD = env.int(
     default=10 * 60,  # seconds
 )
 
+# Number of seconds before the start of the previous refresh from which incremental SPI report
+# row refreshes look for changes (to allow for transactions that were in progress then)
+SPI_REPORT_INCREMENTAL_REFRESH_OVERLAP = env.int(
+    'SPI_REPORT_INCREMENTAL_REFRESH_OVERLAP',
+    default=5 * 60,
+)
+
+# Number of seconds before the start of the previous run from which incremental MI dashboard
+# pipeline runs load modified records (to allow for transactions that were in progress then)
+MI_DASHBOARD_INCREMENTAL_RUN_OVERLAP = env.int(
+    'MI_DASHBOARD_INCREMENTAL_RUN_OVERLAP',
+    default=5 * 60,
+)
+
 MI_FDI_DASHBOARD_COUNTRY_URL_PARAMS = (
     ('sortby', 'estimated_land_date:asc'),
     ('custom', 'true'),
@@ -544,6 +640,16 @@ _add_hawk_credentials(
     (HawkScope.metadata, ),
 )
 
+# Page sizes for NDJSON (keyset-paginated) dataset responses (datahub.dataset)
+DATASET_KEYSET_PAGE_SIZE = env.int('DATASET_KEYSET_PAGE_SIZE', default=10000)
+DATASET_KEYSET_MAX_PAGE_SIZE = env.int('DATASET_KEYSET_MAX_PAGE_SIZE', default=50000)
+
+# How long the last pages of activity stream feeds are cached for (0 disables caching)
+ACTIVITY_STREAM_LAST_PAGE_CACHE_TTL = env.int(
+    'ACTIVITY_STREAM_LAST_PAGE_CACHE_TTL',
+    default=30,
+)  # seconds
+
 # To read data from Activity Stream
 ACTIVITY_STREAM_OUTGOING_URL = env('ACTIVITY_STREAM_OUTGOING_URL', default=None)
 ACTIVITY_STREAM_OUTGOING_ACCESS_KEY_ID = env('ACTIVITY_STREAM_OUTGOING_ACCESS_KEY_ID', default=None)
@@ -612,6 +718,19 @@ DNB_SERVICE_BASE_URL = env('DNB_SERVICE_BASE_URL', default=None)
 DNB_SERVICE_TOKEN = env('DNB_SERVICE_TOKEN', default=None)
 DNB_SERVICE_TIMEOUT = 15
 DNB_AUTOMATIC_UPDATE_LIMIT = env.int('DNB_AUTOMATIC_UPDATE_LIMIT', default=None)
+# Global rate limit for requests to dnb-service (shared by all processes using Redis). The rate
+# limit is disabled if DNB_SERVICE_RATE_LIMIT_QPS is not set.
+DNB_SERVICE_RATE_LIMIT_QPS = env.float('DNB_SERVICE_RATE_LIMIT_QPS', default=None)
+DNB_SERVICE_RATE_LIMIT_BURST = env.int('DNB_SERVICE_RATE_LIMIT_BURST', default=1)
+DNB_SERVICE_RATE_LIMIT_MAX_WAIT = env.int('DNB_SERVICE_RATE_LIMIT_MAX_WAIT', default=30)  # secs
+# Maximum wait for the rate limit while handling a request (so that web workers are not blocked)
+DNB_SERVICE_INTERACTIVE_RATE_LIMIT_MAX_WAIT = env.int(
+    'DNB_SERVICE_INTERACTIVE_RATE_LIMIT_MAX_WAIT',
+    default=1,
+)  # secs
+# How long dnb-service search responses are cached for (0 disables caching)
+DNB_SERVICE_CACHE_TTL = env.int('DNB_SERVICE_CACHE_TTL', default=10 * 60)  # seconds
+DNB_SERVICE_NOT_FOUND_CACHE_TTL = env.int('DNB_SERVICE_NOT_FOUND_CACHE_TTL', default=60)  # seconds
 
 DATAHUB_SUPPORT_EMAIL_ADDRESS = env('DATAHUB_SUPPORT_EMAIL_ADDRESS', default=None)
 
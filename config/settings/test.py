@@ -41,6 +41,9 @@ ES_INDEX_SETTINGS = {
     # This disables automatic refresh in tests to avoid inadvertently relying on it.
     'refresh_interval': -1,
 }
+# Disable caching of search alias state so that tests can't be affected by state cached by
+# earlier tests (tests for the cache itself override this)
+SEARCH_ALIAS_CACHE_TTL = 0
 DOCUMENT_BUCKET = 'test-bucket'
 AV_V2_SERVICE_URL = 'http://av-service/'
 
@@ -5,3 +5,7 @@ class ActivityStreamConfig(AppConfig):
     """Required to register the ActivityStream as a Django app"""
 
     name = 'datahub.activity_stream'
+
+    def ready(self):
+        """Registers the signal receivers for this app."""
+        import datahub.activity_stream.signal_receivers  # noqa: F401
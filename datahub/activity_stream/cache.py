@@ -0,0 +1,59 @@
+"""
+Cache of the last pages of activity stream feeds.
+
+The activity stream service polls the last page of each feed very frequently, and that page
+rarely changes between polls. Pages without a next link are hence cached (keyed on the page
+URL and on a per-feed generation counter).
+
+The generation counter of a feed is incremented (after the transaction is committed) whenever
+an object in that feed is saved or deleted, which makes all previously cached pages of the feed
+unreachable. Changes to other related objects (e.g. a company name) are not tracked, so those
+can take up to settings.ACTIVITY_STREAM_LAST_PAGE_CACHE_TTL seconds to appear.
+"""
+from hashlib import sha256
+
+from django.conf import settings
+from django.core.cache import cache
+
+from datahub.core import statsd
+
+PAGE_CACHE_KEY_PREFIX = 'activity-stream-page'
+GENERATION_CACHE_KEY_PREFIX = 'activity-stream-page-generation'
+
+
+def get_page_cache_key(feed_name, url):
+    """
+    Gets the cache key for a page of a feed.
+
+    This should be called before the page is generated, so that the page is not reachable if
+    the feed is invalidated while it's being generated.
+    """
+    generation = cache.get(_get_generation_cache_key(feed_name), 0)
+    digest = sha256(url.encode('utf-8')).hexdigest()
+    return f'{PAGE_CACHE_KEY_PREFIX}:{feed_name}:{generation}:{digest}'
+
+
+def get_cached_page(key):
+    """Gets the cached response data for a page (or None if not cached)."""
+    data = cache.get(key)
+    statsd.incr(f'activity-stream.page-cache.{"miss" if data is None else "hit"}')
+    return data
+
+
+def cache_page(key, data):
+    """Caches the response data for a page."""
+    cache.set(key, data, timeout=settings.ACTIVITY_STREAM_LAST_PAGE_CACHE_TTL)
+
+
+def invalidate_feed(feed_name):
+    """Makes all cached pages of a feed unreachable."""
+    key = _get_generation_cache_key(feed_name)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def _get_generation_cache_key(feed_name):
+    return f'{GENERATION_CACHE_KEY_PREFIX}:{feed_name}'
@@ -21,6 +21,7 @@ class CompanyReferralActivityViewSet(ActivityViewSet):
     Interaction ViewSet for the activity stream
     """
 
+    feed_name = 'company-referral'
     pagination_class = CompanyReferralCursorPagination
     serializer_class = CompanyReferralActivitySerializer
     queryset = CompanyReferral.objects.select_related(
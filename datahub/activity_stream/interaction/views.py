@@ -22,6 +22,10 @@ class InteractionActivityViewSet(ActivityViewSet):
     Interaction ViewSet for the activity stream
     """
 
+    feed_name = 'interaction'
     pagination_class = InteractionCursorPagination
     serializer_class = InteractionActivitySerializer
-    queryset = get_base_interaction_queryset()
+    queryset = get_base_interaction_queryset().select_related(
+        'event__event_type',
+        'event__lead_team',
+    )
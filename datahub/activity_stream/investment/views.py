@@ -21,6 +21,7 @@ class IProjectCreatedViewSet(ActivityViewSet):
     Investment Project added ViewSet for activity stream
     """
 
+    feed_name = 'investment-project-added'
     pagination_class = IProjectCreatedPagination
     serializer_class = IProjectCreatedSerializer
     queryset = InvestmentProject.objects.select_related(
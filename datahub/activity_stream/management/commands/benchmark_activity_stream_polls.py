@@ -0,0 +1,100 @@
+from logging import getLogger
+from statistics import median, quantiles
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings, RequestFactory
+from django.urls import reverse
+from rest_framework.pagination import Cursor
+
+from datahub.activity_stream.cache import invalidate_feed
+from datahub.activity_stream.company_referral.views import CompanyReferralActivityViewSet
+from datahub.activity_stream.interaction.views import InteractionActivityViewSet
+from datahub.activity_stream.investment.views import IProjectCreatedViewSet
+from datahub.activity_stream.omis.views import OMISOrderAddedViewSet
+
+logger = getLogger(__name__)
+
+VIEWSETS_AND_URL_NAMES = (
+    (CompanyReferralActivityViewSet, 'api-v3:activity-stream:company-referrals'),
+    (InteractionActivityViewSet, 'api-v3:activity-stream:interactions'),
+    (IProjectCreatedViewSet, 'api-v3:activity-stream:investment-project-added'),
+    (OMISOrderAddedViewSet, 'api-v3:activity-stream:omis-order-added'),
+)
+FEEDS = {viewset.feed_name: (viewset, url_name) for viewset, url_name in VIEWSETS_AND_URL_NAMES}
+SERVER_NAME = 'testserver'
+
+
+class Command(BaseCommand):
+    """Command for measuring the latency of polls of the last page of activity stream feeds."""
+
+    help = """Measures the latency of polls of the last page of activity stream feeds, with and
+without the last page cache.
+
+Authentication is skipped, and the newest page of each feed is requested repeatedly (as the
+activity stream service does). For meaningful results, run this against a database with a
+realistic volume of data (e.g. a copy of production).
+"""
+
+    def add_arguments(self, parser):
+        """Define extra arguments."""
+        parser.add_argument(
+            '--feed',
+            action='append',
+            choices=FEEDS,
+            help='Feed to benchmark. If not specified, all feeds are benchmarked.',
+        )
+        parser.add_argument(
+            '--polls',
+            type=int,
+            default=20,
+            help='Number of polls of each feed (with and without the cache).',
+        )
+
+    def handle(self, *args, **options):
+        """Executes the command."""
+        polls = max(options['polls'], 2)
+        cache_ttl = settings.ACTIVITY_STREAM_LAST_PAGE_CACHE_TTL or 30
+
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, SERVER_NAME]):
+            for feed_name in options['feed'] or FEEDS:
+                viewset, url_name = FEEDS[feed_name]
+
+                uncached_timings = _time_polls(viewset, url_name, polls, cache_ttl=0)
+                invalidate_feed(feed_name)
+                cached_timings = _time_polls(viewset, url_name, polls, cache_ttl=cache_ttl)
+
+                logger.info(
+                    f'{feed_name}: without cache {_format_timings(uncached_timings)}, with '
+                    f'cache {_format_timings(cached_timings)} ({polls} polls each)',
+                )
+
+
+def _time_polls(viewset, url_name, polls, cache_ttl):
+    view = viewset.as_view({'get': 'list'}, authentication_classes=(), permission_classes=())
+    url = _get_last_page_url(viewset, url_name)
+    request_factory = RequestFactory()
+    timings = []
+
+    with override_settings(ACTIVITY_STREAM_LAST_PAGE_CACHE_TTL=cache_ttl):
+        for _ in range(polls):
+            request = request_factory.get(url, SERVER_NAME=SERVER_NAME)
+
+            start_time = perf_counter()
+            view(request).render()
+            timings.append((perf_counter() - start_time) * 1000)
+
+    return timings
+
+
+def _get_last_page_url(viewset, url_name):
+    # A reversed cursor without a position points to the newest page of the feed
+    paginator = viewset.pagination_class()
+    paginator.base_url = f'http://{SERVER_NAME}{reverse(url_name)}'
+    return paginator.encode_cursor(Cursor(offset=0, reverse=True, position=None))
+
+
+def _format_timings(timings):
+    p95 = quantiles(timings, n=20)[-1]
+    return f'median {median(timings):.1f} ms, p95 {p95:.1f} ms'
@@ -20,6 +20,7 @@ class OMISOrderAddedViewSet(ActivityViewSet):
     OMIS Order added ViewSet for activity stream.
     """
 
+    feed_name = 'omis-order-added'
     pagination_class = OMISOrderAddedPagination
     serializer_class = OMISOrderAddedSerializer
     queryset = Order.objects.select_related(
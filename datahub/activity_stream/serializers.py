@@ -1,3 +1,5 @@
+from operator import attrgetter
+
 from rest_framework import serializers
 
 
@@ -37,10 +39,13 @@ class ActivitySerializer(serializers.Serializer):
     def _get_contacts(self, contacts):
         """
         Get a serialized representation of a list of Contacts.
+
+        The contacts are sorted in Python (rather than using order_by()) so that any prefetched
+        contacts are used instead of making a query for each object.
         """
         return [
             self._get_contact(contact)
-            for contact in contacts.order_by('pk')
+            for contact in sorted(contacts.all(), key=attrgetter('pk'))
         ]
 
     def _get_adviser(self, adviser):
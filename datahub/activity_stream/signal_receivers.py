@@ -0,0 +1,65 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from datahub.activity_stream.cache import invalidate_feed
+from datahub.company_referral.models import CompanyReferral
+from datahub.interaction.models import Interaction, InteractionDITParticipant
+from datahub.investment.project.models import InvestmentProject
+from datahub.omis.order.models import Order, OrderAssignee
+
+
+def _invalidate_feed_on_commit(feed_name):
+    transaction.on_commit(partial(invalidate_feed, feed_name))
+
+
+@receiver(post_save, sender=CompanyReferral, dispatch_uid='company_referral_feed_post_save')
+@receiver(post_delete, sender=CompanyReferral, dispatch_uid='company_referral_feed_post_delete')
+def invalidate_company_referral_feed(sender, **kwargs):
+    """Invalidates cached pages of the company referral feed."""
+    _invalidate_feed_on_commit('company-referral')
+
+
+@receiver(post_save, sender=Interaction, dispatch_uid='interaction_feed_post_save')
+@receiver(post_delete, sender=Interaction, dispatch_uid='interaction_feed_post_delete')
+@receiver(
+    post_save,
+    sender=InteractionDITParticipant,
+    dispatch_uid='interaction_feed_participant_post_save',
+)
+@receiver(
+    post_delete,
+    sender=InteractionDITParticipant,
+    dispatch_uid='interaction_feed_participant_post_delete',
+)
+@receiver(
+    m2m_changed,
+    sender=Interaction.contacts.through,
+    dispatch_uid='interaction_feed_contacts_m2m_changed',
+)
+def invalidate_interaction_feed(sender, **kwargs):
+    """Invalidates cached pages of the interaction feed."""
+    _invalidate_feed_on_commit('interaction')
+
+
+@receiver(post_save, sender=InvestmentProject, dispatch_uid='project_added_feed_post_save')
+@receiver(post_delete, sender=InvestmentProject, dispatch_uid='project_added_feed_post_delete')
+@receiver(
+    m2m_changed,
+    sender=InvestmentProject.client_contacts.through,
+    dispatch_uid='project_added_feed_client_contacts_m2m_changed',
+)
+def invalidate_investment_project_added_feed(sender, **kwargs):
+    """Invalidates cached pages of the investment project added feed."""
+    _invalidate_feed_on_commit('investment-project-added')
+
+
+@receiver(post_save, sender=Order, dispatch_uid='order_added_feed_post_save')
+@receiver(post_delete, sender=Order, dispatch_uid='order_added_feed_post_delete')
+@receiver(post_save, sender=OrderAssignee, dispatch_uid='order_added_feed_assignee_post_save')
+@receiver(post_delete, sender=OrderAssignee, dispatch_uid='order_added_feed_assignee_post_delete')
+def invalidate_omis_order_added_feed(sender, **kwargs):
+    """Invalidates cached pages of the OMIS order added feed."""
+    _invalidate_feed_on_commit('omis-order-added')
@@ -0,0 +1,29 @@
+import pytest
+from django.core import management
+
+from datahub.activity_stream.management.commands import benchmark_activity_stream_polls
+from datahub.interaction.test.factories import CompanyInteractionFactory
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('local_memory_cache')
+def test_logs_timings(caplog):
+    """Test that timings with and without the cache are logged for the selected feed."""
+    caplog.set_level('INFO')
+    CompanyInteractionFactory.create_batch(2)
+
+    management.call_command(
+        benchmark_activity_stream_polls.Command(),
+        feed=['interaction'],
+        polls=3,
+    )
+
+    messages = [
+        record.message
+        for record in caplog.records
+        if record.name == benchmark_activity_stream_polls.__name__
+    ]
+    assert len(messages) == 1
+    message = messages[0]
+    assert message.startswith('interaction: without cache median ')
+    assert 'with cache median ' in message
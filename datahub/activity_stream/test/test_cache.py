@@ -0,0 +1,71 @@
+from unittest.mock import Mock
+
+import pytest
+from rest_framework import status
+
+from datahub.activity_stream.test import hawk
+from datahub.activity_stream.test.utils import get_url
+from datahub.company_referral.test.factories import CompanyReferralFactory
+from datahub.interaction.test.factories import CompanyInteractionFactory
+from datahub.investment.project.test.factories import InvestmentProjectFactory
+from datahub.omis.order.test.factories import OrderFactory
+
+FEEDS = (
+    (CompanyReferralFactory, 'api-v3:activity-stream:company-referrals'),
+    (CompanyInteractionFactory, 'api-v3:activity-stream:interactions'),
+    (InvestmentProjectFactory, 'api-v3:activity-stream:investment-project-added'),
+    (OrderFactory, 'api-v3:activity-stream:omis-order-added'),
+)
+
+
+@pytest.fixture
+def last_page_cache_enabled(local_memory_cache, synchronous_on_commit, settings):
+    """Enables the last page cache (using a local memory cache)."""
+    settings.ACTIVITY_STREAM_LAST_PAGE_CACHE_TTL = 30
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('last_page_cache_enabled')
+class TestLastPageCache:
+    """Tests for the caching of the last pages of activity stream feeds."""
+
+    @pytest.mark.parametrize('factory,endpoint', FEEDS)
+    def test_caches_last_page(self, api_client, django_assert_num_queries, factory, endpoint):
+        """Test that the last page is served from the cache on subsequent polls."""
+        factory()
+        url = get_url(endpoint)
+        response = hawk.get(api_client, url)
+        assert response.status_code == status.HTTP_200_OK
+
+        with django_assert_num_queries(0):
+            cached_response = hawk.get(api_client, url)
+
+        assert cached_response.status_code == status.HTTP_200_OK
+        assert cached_response.json() == response.json()
+        assert 'Server-Authorization' in cached_response
+
+    @pytest.mark.parametrize('factory,endpoint', FEEDS)
+    def test_invalidates_cache_on_save(self, api_client, factory, endpoint):
+        """Test that cached pages are discarded when an object in the feed is saved."""
+        factory()
+        url = get_url(endpoint)
+        response = hawk.get(api_client, url)
+        assert len(response.json()['orderedItems']) == 1
+
+        factory()
+        response = hawk.get(api_client, url)
+        assert len(response.json()['orderedItems']) == 2
+
+    def test_does_not_cache_pages_with_next_link(self, api_client, monkeypatch):
+        """Test that only the last page (which has no next link) is cached."""
+        monkeypatch.setattr(
+            'datahub.activity_stream.pagination.ActivityCursorPagination.page_size',
+            1,
+        )
+        mock_cache_page = Mock()
+        monkeypatch.setattr('datahub.activity_stream.views.cache_page', mock_cache_page)
+        CompanyInteractionFactory.create_batch(2)
+
+        response = hawk.get(api_client, get_url('api-v3:activity-stream:interactions'))
+        assert response.json()['next'] is not None
+        assert not mock_cache_page.called
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.utils.encoders import JSONEncoder
+
+from datahub.activity_stream.company_referral.serializers import (
+    CompanyReferralActivitySerializer,
+)
+from datahub.activity_stream.interaction.serializers import InteractionActivitySerializer
+from datahub.activity_stream.investment.serializers import IProjectCreatedSerializer
+from datahub.activity_stream.omis.serializers import OMISOrderAddedSerializer
+from datahub.activity_stream.test import hawk
+from datahub.activity_stream.test.utils import get_url
+from datahub.company_referral.test.factories import CompleteCompanyReferralFactory
+from datahub.interaction.test.factories import (
+    CompanyInteractionFactory,
+    EventServiceDeliveryFactory,
+)
+from datahub.investment.project.test.factories import InvestmentProjectFactory
+from datahub.omis.order.test.factories import OrderFactory
+
+FEEDS = (
+    (
+        (CompleteCompanyReferralFactory,),
+        CompanyReferralActivitySerializer,
+        'api-v3:activity-stream:company-referrals',
+    ),
+    (
+        (CompanyInteractionFactory, EventServiceDeliveryFactory),
+        InteractionActivitySerializer,
+        'api-v3:activity-stream:interactions',
+    ),
+    (
+        (InvestmentProjectFactory,),
+        IProjectCreatedSerializer,
+        'api-v3:activity-stream:investment-project-added',
+    ),
+    (
+        (OrderFactory,),
+        OMISOrderAddedSerializer,
+        'api-v3:activity-stream:omis-order-added',
+    ),
+)
+
+
+def _get_page(api_client, endpoint):
+    with CaptureQueriesContext(connection) as queries:
+        response = hawk.get(api_client, get_url(endpoint))
+
+    assert response.status_code == status.HTTP_200_OK
+    return response.json(), len(queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('factories,serializer_class,endpoint', FEEDS)
+def test_number_of_queries_does_not_depend_on_page_size(
+    api_client,
+    factories,
+    serializer_class,
+    endpoint,
+):
+    """
+    Test that the number of queries made does not grow with the number of activities on the
+    page.
+    """
+    for factory in factories:
+        factory()
+    _, num_queries_for_one_of_each = _get_page(api_client, endpoint)
+
+    for factory in factories:
+        factory.create_batch(4)
+    data, num_queries_for_five_of_each = _get_page(api_client, endpoint)
+
+    assert len(data['orderedItems']) == 5 * len(factories)
+    assert num_queries_for_five_of_each == num_queries_for_one_of_each
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('factories,serializer_class,endpoint', FEEDS)
+def test_output_matches_serialising_objects_individually(
+    api_client,
+    factories,
+    serializer_class,
+    endpoint,
+):
+    """
+    Test that the activities are identical to those generated from objects fetched without
+    select_related() or prefetch_related().
+    """
+    objs = [factory() for factory in factories for _ in range(2)]
+    model = objs[0]._meta.model
+    data, _ = _get_page(api_client, endpoint)
+
+    expected_items = {
+        str(obj.pk): json.loads(
+            json.dumps(
+                serializer_class(model.objects.get(pk=obj.pk)).data,
+                cls=JSONEncoder,
+            ),
+        )
+        for obj in objs
+    }
+    actual_items = {item['object']['id'].rsplit(':', 1)[1]: item for item in data['orderedItems']}
+    assert actual_items == expected_items
@@ -1,4 +1,8 @@
+from django.conf import settings
+from rest_framework.response import Response
+
 from config.settings.types import HawkScope
+from datahub.activity_stream.cache import cache_page, get_cached_page, get_page_cache_key
 from datahub.core.auth import PaaSIPAuthentication
 from datahub.core.hawk_receiver import (
     HawkAuthentication,
@@ -13,8 +17,30 @@ class ActivityViewSet(HawkResponseSigningMixin, CoreViewSet):
     Generic view for activities.
 
     Sets up authentication, permission and scope.
+
+    The last page of the feed (i.e. a page without a next link) is cached under feed_name
+    (see datahub.activity_stream.cache), as it is polled very frequently.
     """
 
     authentication_classes = (PaaSIPAuthentication, HawkAuthentication)
     permission_classes = (HawkScopePermission,)
     required_hawk_scope = HawkScope.activity_stream
+    feed_name = None
+
+    def list(self, request, *args, **kwargs):
+        """Lists activities (using the cache for the last page)."""
+        if not (self.feed_name and settings.ACTIVITY_STREAM_LAST_PAGE_CACHE_TTL):
+            return super().list(request, *args, **kwargs)
+
+        key = get_page_cache_key(self.feed_name, request.build_absolute_uri())
+        data = get_cached_page(key)
+
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+
+        if response.data['next'] is None:
+            cache_page(key, response.data)
+
+        return response
@@ -0,0 +1,81 @@
+from contextlib import ExitStack
+from time import sleep
+from typing import Dict, NamedTuple
+
+from django.db.transaction import atomic
+
+from datahub.core.exceptions import SimulationRollback
+from datahub.search.deletion import update_es_after_deletions
+
+
+class DeletedBatch(NamedTuple):
+    """The result of deleting a batch of records."""
+
+    num_deleted: int
+    deletions_by_model: Dict[str, int]
+    # The primary key of the last record in the batch (the deletion can be resumed from here)
+    checkpoint: object
+
+
+def delete_in_batches(queryset, batch_size, sleep_time=0, start_after=None, simulate=False):
+    """
+    Deletes the records matching a query set in batches, in primary key order.
+
+    Each batch (including any records deleted in cascade) is deleted in a separate
+    transaction, so that locks are only held briefly and only one batch of objects is loaded
+    into memory at a time. Once a batch has been committed, the search documents of the deleted
+    objects are deleted from Elasticsearch in bulk.
+
+    This is a generator that yields a DeletedBatch after each batch.
+
+    :param queryset: the records to delete
+    :param batch_size: the maximum number of records (of the query set's model) per batch
+    :param sleep_time: number of seconds to wait between batches
+    :param start_after: if specified, only records with a greater primary key are deleted (the
+        checkpoint of the last completed batch can be passed to resume a previous deletion)
+    :param simulate: if True, each batch is rolled back instead of being committed (and nothing
+        is deleted from Elasticsearch)
+    """
+    queryset = queryset.order_by('pk')
+    checkpoint = start_after
+    is_first_batch = True
+
+    while True:
+        remaining_queryset = queryset if checkpoint is None else queryset.filter(pk__gt=checkpoint)
+        pks = list(remaining_queryset.values_list('pk', flat=True)[:batch_size])
+
+        if not pks:
+            return
+
+        if not is_first_batch and sleep_time:
+            sleep(sleep_time)
+
+        # The query set is filtered again (rather than only filtering by primary key) in case
+        # any of the records have stopped matching it in the meantime
+        num_deleted, deletions_by_model = _delete_batch(
+            queryset.filter(pk__in=pks),
+            simulate,
+        )
+        checkpoint = pks[-1]
+        is_first_batch = False
+
+        yield DeletedBatch(num_deleted, deletions_by_model, checkpoint)
+
+
+def _delete_batch(queryset, simulate):
+    result = None
+
+    try:
+        with ExitStack() as stack:
+            if not simulate:
+                stack.enter_context(update_es_after_deletions())
+
+            stack.enter_context(atomic())
+            result = queryset.delete()
+
+            if simulate:
+                raise SimulationRollback()
+    except SimulationRollback:
+        pass
+
+    return result
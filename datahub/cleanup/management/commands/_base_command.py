@@ -1,4 +1,4 @@
-from contextlib import ExitStack
+from collections import Counter
 from functools import reduce
 from logging import getLogger
 from operator import and_
@@ -6,12 +6,10 @@ from operator import and_
 from django.apps import apps
 from django.core.management import BaseCommand
 from django.db.models import Q, Subquery
-from django.db.transaction import atomic
 from django.template.defaultfilters import capfirst
 
+from datahub.cleanup.deletion import delete_in_batches
 from datahub.cleanup.query_utils import get_relations_to_delete, get_unreferenced_objects_query
-from datahub.core.exceptions import SimulationRollback
-from datahub.search.deletion import update_es_after_deletions
 
 logger = getLogger(__name__)
 
@@ -46,6 +44,24 @@ class BaseCleanupCommand(BaseCommand):
             help='Only prints the SQL query and number of matching records. Does not delete '
                  'records or simulate deletions.',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Maximum number of records to delete per batch (each batch is deleted in a '
+                 'separate transaction).',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0,
+            help='Number of seconds to wait between batches.',
+        )
+        parser.add_argument(
+            '--start-after',
+            help='Resumes a previous run by only deleting records with a primary key greater '
+                 'than this value (the checkpoint logged after each batch).',
+        )
 
     def handle(self, *args, **options):
         """Main logic for the actual command."""
@@ -60,23 +76,30 @@ class BaseCleanupCommand(BaseCommand):
             self._print_queries(model, qs)
             return
 
-        try:
-            with ExitStack() as stack:
-                if not is_simulation:
-                    stack.enter_context(update_es_after_deletions())
+        total_deleted = 0
+        deletions_by_model = Counter()
+        batches = delete_in_batches(
+            qs,
+            options['batch_size'],
+            sleep_time=options['sleep'],
+            start_after=options['start_after'],
+            simulate=is_simulation,
+        )
+
+        for batch in batches:
+            total_deleted += batch.num_deleted
+            deletions_by_model.update(batch.deletions_by_model)
 
-                stack.enter_context(atomic())
-                total_deleted, deletions_by_model = qs.delete()
+            logger.info(
+                f'{batch.num_deleted} records deleted in batch (checkpoint: {batch.checkpoint}).',
+            )
 
-                logger.info(f'{total_deleted} records deleted. Breakdown by model:')
-                for deletion_model, model_deletion_count in deletions_by_model.items():
-                    logger.info(f'{deletion_model}: {model_deletion_count}')
+        logger.info(f'{total_deleted} records deleted. Breakdown by model:')
+        for deletion_model, model_deletion_count in deletions_by_model.items():
+            logger.info(f'{deletion_model}: {model_deletion_count}')
 
-                if is_simulation:
-                    logger.info(f'Rolling back deletions...')
-                    raise SimulationRollback()
-        except SimulationRollback:
-            logger.info(f'Deletions rolled back')
+        if is_simulation:
+            logger.info('Deletions rolled back')
 
     def _print_queries(self, model, qs):
         # relationships that would get deleted in cascade
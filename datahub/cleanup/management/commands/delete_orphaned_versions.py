@@ -1,11 +1,12 @@
+import json
 from collections import Counter
 from logging import getLogger
 
 import reversion
 from django.apps import apps
 from django.core.management import BaseCommand
-from django.db import transaction
-from django.db.models import CharField
+from django.db import connection, transaction
+from django.db.models import Exists, Max, Min, OuterRef
 from django.db.models.functions import Cast
 from reversion.models import Revision, Version
 
@@ -17,7 +18,12 @@ def _get_all_model_labels():
 
 
 class Command(BaseCommand):
-    """Deletes all django versions for models that no longer exist in the database."""
+    """
+    Deletes all django versions for models that no longer exist in the database.
+
+    Versions are deleted one range of version IDs at a time (each in a separate transaction),
+    so that only a bounded number of rows are deleted in each transaction.
+    """
 
     def __repr__(self):
         """Python representation (used for parametrised tests)."""
@@ -32,12 +38,28 @@ class Command(BaseCommand):
             choices=_get_all_model_labels(),
             help='Model of which we want the versions deleted. If empty, it includes all models',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Size of the ranges of version (and revision) IDs to delete in each transaction.',
+        )
+        parser.add_argument(
+            '--simulate',
+            action='store_true',
+            help='Only logs the estimated number of records to delete (using query planner '
+                 'estimates). Does not delete any records.',
+        )
 
-    @transaction.atomic
     def handle(self, *args, **options):
         """Main logic for the actual command."""
         model_labels = options['model_label'] or _get_all_model_labels()
         models = [apps.get_model(model_label) for model_label in model_labels]
+        batch_size = options['batch_size']
+
+        if options['simulate']:
+            _log_estimated_counts(models)
+            return
 
         logger.info(f'Deleting versions for following deleted models: {", ".join(model_labels)}')
 
@@ -45,34 +67,96 @@ class Command(BaseCommand):
         for model in models:
             # The Version's `get_deleted` method was originally used here, but it was not working
             # quickly enough for our use case. The records to be deleted are now being determined
-            # in a way that is easier on the database being used.
-            _, deletions_by_model = _get_orphaned_versions_query(model).delete()
-            counter.update(deletions_by_model)
+            # using an anti-join against the model's table, which can use its primary key index.
+            versions = Version.objects.get_for_model(model)
+            orphaned_versions = versions.filter(~_get_object_exists_expression(model))
+            deleted = _delete_in_id_ranges(versions, orphaned_versions, batch_size, model)
+            counter.update(deleted)
 
         # delete revisions without versions
-        _, deletions_by_model = Revision.objects.filter(version__isnull=True).delete()
-        counter.update(deletions_by_model)
+        deleted = _delete_in_id_ranges(
+            Revision.objects.all(),
+            _get_empty_revisions_query(),
+            batch_size,
+            Revision,
+        )
+        counter.update(deleted)
 
         logger.info(f'{sum(counter.values())} records deleted. Breakdown by model:')
         for deletion_model, model_deletion_count in counter.items():
             logger.info(f'{deletion_model}: {model_deletion_count}')
 
 
-def _get_orphaned_versions_query(model):
-    all_model_ids = model.objects.annotate(
-        object_id=Cast('pk', CharField()),
-    ).values(
-        'object_id',
+def _get_object_exists_expression(model):
+    # object_id is cast to the type of the primary key (rather than the other way around) so
+    # that the primary key index of the model can be used
+    pk_field = type(model._meta.pk)()
+    return Exists(
+        model._base_manager.filter(pk=Cast(OuterRef('object_id'), output_field=pk_field)),
     )
 
-    version_ids_to_delete = Version.objects.get_for_model(
-        model,
-    ).values(
-        'object_id',
-    ).difference(
-        all_model_ids,
-    )
 
-    return Version.objects.get_for_model(model).filter(
-        object_id__in=version_ids_to_delete,
+def _get_empty_revisions_query():
+    return Revision.objects.filter(
+        ~Exists(Version.objects.filter(revision=OuterRef('pk'))),
     )
+
+
+def _delete_in_id_ranges(all_objects, objects_to_delete, batch_size, model):
+    """
+    Deletes objects_to_delete, batch_size IDs at a time.
+
+    The range of IDs is determined from all_objects.
+    """
+    id_range = all_objects.aggregate(min_id=Min('pk'), max_id=Max('pk'))
+    min_id, max_id = id_range['min_id'], id_range['max_id']
+    counter = Counter()
+
+    if min_id is None:
+        return counter
+
+    for start_id in range(min_id, max_id + 1, batch_size):
+        end_id = start_id + batch_size
+
+        with transaction.atomic():
+            _, deletions_by_model = objects_to_delete.filter(
+                pk__gte=start_id,
+                pk__lt=end_id,
+            ).delete()
+
+        counter.update(deletions_by_model)
+
+        progress = min(end_id - min_id, max_id - min_id + 1) / (max_id - min_id + 1)
+        logger.info(
+            f'{model._meta.label}: {sum(counter.values())} records deleted so far '
+            f'({progress:.0%} of IDs processed)',
+        )
+
+    return counter
+
+
+def _log_estimated_counts(models):
+    logger.info('Estimated number of records to delete (based on query planner estimates):')
+
+    for model in models:
+        orphaned_versions = Version.objects.get_for_model(model).filter(
+            ~_get_object_exists_expression(model),
+        )
+        logger.info(f'{model._meta.label} versions: {_get_estimated_count(orphaned_versions)}')
+
+    # Note: this does not include revisions that would be left empty once versions are deleted
+    estimated_empty_revisions = _get_estimated_count(_get_empty_revisions_query())
+    logger.info(f'Empty revisions: {estimated_empty_revisions}')
+
+
+def _get_estimated_count(queryset):
+    sql, params = queryset.values('pk').query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    return plan[0]['Plan']['Plan Rows']
@@ -1,3 +1,5 @@
+from unittest.mock import ANY, Mock
+
 import pytest
 from django.core import management
 from django.core.management import CommandError
@@ -15,3 +17,31 @@ def test_fails_with_invalid_model(cleanup_command_cls):
     """Test that if an invalid value for model is passed in, the command errors."""
     with pytest.raises(CommandError):
         management.call_command(cleanup_command_cls(), 'invalid')
+
+
+@pytest.mark.parametrize('cleanup_command_cls', COMMAND_CLASSES, ids=str)
+@pytest.mark.django_db
+def test_passes_batch_options(cleanup_command_cls, monkeypatch):
+    """Test that the batch options are passed to delete_in_batches()."""
+    delete_in_batches_mock = Mock(return_value=[])
+    monkeypatch.setattr(
+        'datahub.cleanup.management.commands._base_command.delete_in_batches',
+        delete_in_batches_mock,
+    )
+    model_label = next(iter(cleanup_command_cls.CONFIGS))
+
+    management.call_command(
+        cleanup_command_cls(),
+        model_label,
+        batch_size=50,
+        sleep=1.5,
+        start_after='abc',
+    )
+
+    delete_in_batches_mock.assert_called_once_with(
+        ANY,
+        50,
+        sleep_time=1.5,
+        start_after='abc',
+        simulate=False,
+    )
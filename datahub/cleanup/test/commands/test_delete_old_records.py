@@ -757,14 +757,16 @@ def test_run(
             - num_expired_records
         )
 
-    # Check which models were actually deleted
+    # Check which models were actually deleted (nothing is deleted if there are no records to
+    # delete)
     return_values = delete_return_value_tracker.return_values
-    assert len(return_values) == 1
-    _, deletions_by_model = return_values[0]
+    assert len(return_values) == num_expired_records
+    if not is_expired:
+        return
 
-    if is_expired:
-        assert deletions_by_model[model._meta.label] == num_expired_records
-        assert model._meta.label in {model._meta.label}
+    _, deletions_by_model = return_values[0]
+    assert deletions_by_model[model._meta.label] == num_expired_records
+    assert model._meta.label in {model._meta.label}
 
     actual_deleted_models = {  # only include models actually deleted
         deleted_model
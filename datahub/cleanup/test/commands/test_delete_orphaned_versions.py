@@ -145,19 +145,23 @@ def test_delete_revisions_without_versions(caplog):
     assert Version.objects.count() == 0
     assert Revision.objects.count() == 0
 
-    assert f'reversion.Version: 1' in caplog.text
-    assert f'reversion.Revision: 1' in caplog.text
+    assert 'reversion.Version: 1' in caplog.text
+    assert 'reversion.Revision: 1' in caplog.text
 
 
 @pytest.mark.django_db
-def test_rollback_in_case_or_error(monkeypatch):
-    """Test that if there's an exception in the logic, all the changes are rolled back."""
+def test_keeps_completed_batches_in_case_of_error(monkeypatch):
+    """
+    Test that if there's an exception in the logic, deletions in batches that were already
+    completed are kept.
+    """
     objs = []
     for model_factory in MAPPINGS.values():
         with reversion.create_revision():
             objs.append(model_factory())
 
     total_versions = Version.objects.count()
+    total_revisions = Revision.objects.count()
 
     for obj in objs:
         obj.delete()
@@ -167,7 +171,61 @@ def test_rollback_in_case_or_error(monkeypatch):
     with pytest.raises(Exception):
         management.call_command(delete_orphaned_versions.Command())
 
+    assert Version.objects.count() == total_versions - len(MAPPINGS)
+    assert Revision.objects.count() == total_revisions
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('batch_size', (1, 2, 10000))
+def test_with_batch_size(batch_size, caplog):
+    """Test that orphaned versions are deleted regardless of the batch size."""
+    caplog.set_level('INFO')
+    model_label, model_factory = next(iter(MAPPINGS.items()))
+    model = apps.get_model(model_label)
+
+    for _ in range(3):
+        with reversion.create_revision():
+            model_factory()
+
+    with reversion.create_revision():
+        objs = model_factory.create_batch(2)
+
+    objs[0].delete()
+
+    management.call_command(
+        delete_orphaned_versions.Command(),
+        model_label=[model_label],
+        batch_size=batch_size,
+    )
+
+    assert Version.objects.get_for_model(model).count() == 4
+    assert 'reversion.Version: 1' in caplog.text
+    assert f'{model_label}: 1 records deleted so far (100% of IDs processed)' in caplog.text
+
+
+@pytest.mark.django_db
+def test_simulate(caplog):
+    """Test that --simulate logs estimated counts without deleting anything."""
+    caplog.set_level('INFO')
+    model_label, model_factory = next(iter(MAPPINGS.items()))
+
+    with reversion.create_revision():
+        obj = model_factory()
+
+    obj.delete()
+    total_versions = Version.objects.count()
+    total_revisions = Revision.objects.count()
+
+    management.call_command(
+        delete_orphaned_versions.Command(),
+        model_label=[model_label],
+        simulate=True,
+    )
+
     assert Version.objects.count() == total_versions
+    assert Revision.objects.count() == total_revisions
+    assert f'{model_label} versions: ' in caplog.text
+    assert 'Empty revisions: ' in caplog.text
 
 
 def test_fails_with_invalid_model():
@@ -0,0 +1,77 @@
+from unittest.mock import Mock
+
+import pytest
+
+from datahub.cleanup.deletion import delete_in_batches
+from datahub.core.test.support.factories import BookFactory, PersonFactory
+from datahub.core.test.support.models import Book, Person
+
+
+@pytest.mark.django_db
+class TestDeleteInBatches:
+    """Tests delete_in_batches()."""
+
+    def test_deletes_in_batches_in_pk_order(self):
+        """Test that records are deleted in batches ordered by primary key."""
+        people = sorted(PersonFactory.create_batch(5), key=lambda person: person.pk)
+
+        batches = list(delete_in_batches(Person.objects.all(), 2))
+
+        assert [batch.num_deleted for batch in batches] == [2, 2, 1]
+        assert [batch.checkpoint for batch in batches] == [
+            people[1].pk,
+            people[3].pk,
+            people[4].pk,
+        ]
+        assert not Person.objects.exists()
+
+    def test_deletes_related_objects_in_cascade(self):
+        """Test that objects referencing deleted records are deleted along with them."""
+        book = BookFactory()
+
+        batches = list(
+            delete_in_batches(Person.objects.filter(pk=book.proofreader.pk), 10),
+        )
+
+        assert len(batches) == 1
+        assert batches[0].deletions_by_model[Person._meta.label] == 1
+        assert not Book.objects.filter(pk=book.pk).exists()
+
+    def test_only_deletes_matching_records(self):
+        """Test that records that don't match the query set are not deleted."""
+        PersonFactory.create_batch(3, country='France')
+        people_to_keep = PersonFactory.create_batch(2, country='Italy')
+
+        batches = list(delete_in_batches(Person.objects.filter(country='France'), 2))
+
+        assert sum(batch.num_deleted for batch in batches) == 3
+        assert set(Person.objects.all()) == set(people_to_keep)
+
+    def test_resumes_from_checkpoint(self):
+        """Test that only records after start_after are deleted."""
+        people = sorted(PersonFactory.create_batch(4), key=lambda person: person.pk)
+
+        batches = list(delete_in_batches(Person.objects.all(), 10, start_after=people[1].pk))
+
+        assert sum(batch.num_deleted for batch in batches) == 2
+        assert list(Person.objects.order_by('pk')) == people[:2]
+
+    def test_simulate(self):
+        """Test that deletions are rolled back when simulating."""
+        PersonFactory.create_batch(3)
+
+        batches = list(delete_in_batches(Person.objects.all(), 2, simulate=True))
+
+        assert [batch.num_deleted for batch in batches] == [2, 1]
+        assert Person.objects.count() == 3
+
+    def test_sleeps_between_batches(self, monkeypatch):
+        """Test that there is a pause between batches (but not before the first batch)."""
+        sleep_mock = Mock()
+        monkeypatch.setattr('datahub.cleanup.deletion.sleep', sleep_mock)
+        PersonFactory.create_batch(3)
+
+        list(delete_in_batches(Person.objects.all(), 1, sleep_time=0.5))
+
+        assert sleep_mock.call_count == 2
+        sleep_mock.assert_called_with(0.5)
@@ -0,0 +1,21 @@
+# Generated by Django 3.0.3 on 2020-02-17 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company', '0101_companyexportcountryhistory'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['modified_on', 'id'], name='company_com_modifie_16ce27_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['modified_on', 'id'], name='company_con_modifie_c95a28_idx'),
+        ),
+    ]
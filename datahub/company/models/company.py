@@ -288,6 +288,8 @@ class Company(ArchivableModel, BaseModel):
         indexes = [
             # For datasets app which includes API endpoints to be consumed by data-flow
             models.Index(fields=('created_on', 'id')),
+            # For incremental (updated_since) dataset API requests
+            models.Index(fields=('modified_on', 'id')),
         ]
 
     @property
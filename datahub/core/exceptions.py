@@ -39,5 +39,13 @@ class APIUpstreamException(APIException):
     default_code = 'bad_gateway'
 
 
+class APIServiceUnavailableException(APIException):
+    """DRF Exception for the 503 status code."""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Service temporarily unavailable, try again later.')
+    default_code = 'service_unavailable'
+
+
 class SimulationRollback(Exception):
     """Used to roll back deletions during a simulation."""
@@ -50,9 +50,9 @@ class HawkAPITestClient:
         """Set client IP addresses."""
         self.http_x_forwarded_for = http_x_forwarded_for
 
-    def get(self, path, params=None):
-        """Make a GET request (optionally with query params)."""
-        return self.request('get', path, params=params)
+    def get(self, path, params=None, **extra):
+        """Make a GET request (optionally with query params and extra WSGI environ values)."""
+        return self.request('get', path, params=params, **extra)
 
     def post(self, path, json_):
         """Make a POST request with a JSON body."""
@@ -66,7 +66,7 @@ class HawkAPITestClient:
         """Make a PATCH request with a JSON body."""
         return self.request('patch', path, json_=json_)
 
-    def request(self, method, path, params=None, json_=unset, content_type=''):
+    def request(self, method, path, params=None, json_=unset, content_type='', **extra):
         """Make a request with a specified HTTP method."""
         params = urlencode(params) if params else ''
         url = join_truthy_strings(f'http://testserver{path}', params, sep='?')
@@ -92,6 +92,7 @@ class HawkAPITestClient:
             HTTP_X_FORWARDED_FOR=self.http_x_forwarded_for,
             data=body,
             content_type=content_type,
+            **extra,
         )
 
 
@@ -333,14 +334,22 @@ class MockQuerySet:
 
         return matches[0]
 
-    def filter(self, pk__in=()):
+    def filter(self, **lookups):
         """
         Filters the query set.
 
-        Only supports filtering using pk__in at present.
+        Only supports filtering on pk using the in, gt, gte and lt lookups at present.
         """
-        field = self._map_field('pk')
-        filtered_objects = [obj for obj in self._objects if getattr(obj, field) in pk__in]
+        filtered_objects = self._objects
+
+        for lookup, value in lookups.items():
+            field_name, _, operator_name = lookup.partition('__')
+            field = self._map_field(field_name)
+            operator = self._filter_operators[operator_name]
+            filtered_objects = [
+                obj for obj in filtered_objects if operator(getattr(obj, field), value)
+            ]
+
         return self._clone(filtered_objects)
 
     def first(self):
@@ -351,6 +360,19 @@ class MockQuerySet:
         """Returns an iterator over the query set items."""
         return iter(self._results)
 
+    def order_by(self, *fields):
+        """
+        Creates a clone of the query set ordered by the specified fields.
+
+        Only supports ascending order at present.
+        """
+        mapped_fields = [self._map_field(field) for field in fields]
+        ordered_objects = sorted(
+            self._objects,
+            key=lambda obj: tuple(getattr(obj, field) for field in mapped_fields),
+        )
+        return self._clone(ordered_objects)
+
     def values_list(self, *fields, flat=False):
         """Creates a clone of the query set with results returned as tuples."""
         if flat:
@@ -389,6 +411,13 @@ class MockQuerySet:
     def _map_field(field):
         return 'id' if field == 'pk' else field
 
+    _filter_operators = {
+        'in': lambda field_value, value: field_value in value,
+        'gt': lambda field_value, value: field_value > value,
+        'gte': lambda field_value, value: field_value >= value,
+        'lt': lambda field_value, value: field_value < value,
+    }
+
 
 def join_attr_values(iterable, attr='name', separator=', '):
     """
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class DatasetConfig(AppConfig):
+    """Django App Config for the dataset app."""
+
+    name = 'datahub.dataset'
+
+    def ready(self):
+        """Registers the signal receivers for this app."""
+        import datahub.dataset.signal_receivers  # noqa: F401
@@ -9,7 +9,7 @@ from datahub.company.test.factories import (
     SubsidiaryFactory,
 )
 from datahub.core.test_utils import format_date_or_datetime, get_attr_or_none
-from datahub.dataset.core.test import BaseDatasetViewTest
+from datahub.dataset.core.test import BaseDatasetViewTest, IncrementalDatasetViewTestMixin
 
 
 def get_expected_data_from_company(company):
@@ -70,7 +70,7 @@ def get_expected_data_from_company(company):
 
 
 @pytest.mark.django_db
-class TestCompaniesDatasetViewSet(BaseDatasetViewTest):
+class TestCompaniesDatasetViewSet(IncrementalDatasetViewTestMixin, BaseDatasetViewTest):
     """
     Tests for CompaniesDatasetView
     """
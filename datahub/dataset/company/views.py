@@ -11,6 +11,8 @@ class CompaniesDatasetView(BaseDatasetView):
     then be queried to create custom reports for users.
     """
 
+    updated_since_field = 'modified_on'
+
     def get_dataset(self):
         """Returns list of Company records"""
         return Company.objects.annotate(
@@ -12,7 +12,7 @@ from datahub.core.test_utils import (
     format_date_or_datetime,
     get_attr_or_none,
 )
-from datahub.dataset.core.test import BaseDatasetViewTest
+from datahub.dataset.core.test import BaseDatasetViewTest, IncrementalDatasetViewTestMixin
 
 
 def get_expected_data_from_contact(contact):
@@ -44,7 +44,7 @@ def get_expected_data_from_contact(contact):
 
 
 @pytest.mark.django_db
-class TestContactsDatasetViewSet(BaseDatasetViewTest):
+class TestContactsDatasetViewSet(IncrementalDatasetViewTestMixin, BaseDatasetViewTest):
     """
     Tests for ContactsDatasetView
     """
@@ -12,6 +12,8 @@ class ContactsDatasetView(BaseDatasetView):
     table to get more meaningful insight.
     """
 
+    updated_since_field = 'modified_on'
+
     def get_dataset(self):
         """Returns list of Contacts Dataset records"""
         return Contact.objects.annotate(
@@ -0,0 +1,148 @@
+"""
+Utilities for converting dataset records (from values() query sets) to typed Arrow record
+batches.
+
+Column types are derived from the model fields (and annotations) of the query set rather than
+inferred from the values, so that they are consistent between pages (even when all values of a
+column on a page are null).
+"""
+import json
+from datetime import timezone
+
+import pyarrow
+from django.core.exceptions import FieldDoesNotExist, FieldError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.constants import LOOKUP_SEP
+
+from datahub.core.utils import slice_iterable_into_chunks
+
+_ARROW_TYPES_BY_FIELD_TYPE = {
+    'AutoField': pyarrow.int64(),
+    'BigAutoField': pyarrow.int64(),
+    'BigIntegerField': pyarrow.int64(),
+    'BooleanField': pyarrow.bool_(),
+    'CharField': pyarrow.string(),
+    'DateField': pyarrow.date32(),
+    'DateTimeField': pyarrow.timestamp('us', tz='UTC'),
+    'EmailField': pyarrow.string(),
+    'FloatField': pyarrow.float64(),
+    'GenericIPAddressField': pyarrow.string(),
+    'IntegerField': pyarrow.int64(),
+    'NullBooleanField': pyarrow.bool_(),
+    'PositiveIntegerField': pyarrow.int64(),
+    'PositiveSmallIntegerField': pyarrow.int64(),
+    'SlugField': pyarrow.string(),
+    'SmallIntegerField': pyarrow.int64(),
+    'TextField': pyarrow.string(),
+    'URLField': pyarrow.string(),
+    'UUIDField': pyarrow.string(),
+}
+
+
+def get_arrow_schema(queryset):
+    """Gets the Arrow schema for the records of a values() query set."""
+    fields = [
+        pyarrow.field(name, _get_arrow_type(_resolve_lookup(queryset.model, name)))
+        for name in queryset.query.values_select
+    ]
+
+    for name, expression in queryset.query.annotation_select.items():
+        try:
+            output_field = expression.output_field
+        except FieldError:
+            output_field = None
+
+        fields.append(pyarrow.field(name, _get_arrow_type(output_field)))
+
+    return pyarrow.schema(fields)
+
+
+def iter_record_batches(records, schema, batch_size):
+    """Converts records (dicts) to Arrow record batches of up to batch_size rows."""
+    converters = [_get_value_converter(field.type) for field in schema]
+
+    for batch in slice_iterable_into_chunks(records, batch_size):
+        arrays = [
+            pyarrow.array(
+                [converter(record[field.name]) for record in batch],
+                type=field.type,
+            )
+            for field, converter in zip(schema, converters)
+        ]
+        yield pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _resolve_lookup(model, lookup):
+    field = None
+
+    for part in lookup.split(LOOKUP_SEP):
+        if field is not None:
+            model = field.related_model
+
+        if model is None:
+            return None
+
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+
+    return field
+
+
+def _get_arrow_type(field):
+    if field is None:
+        return pyarrow.string()
+
+    if field.is_relation:
+        # values() returns the primary key of related objects
+        try:
+            return _get_arrow_type(field.target_field)
+        except (AttributeError, FieldError):
+            return pyarrow.string()
+
+    internal_type = field.get_internal_type()
+
+    if internal_type == 'DecimalField' and field.max_digits is not None:
+        return pyarrow.decimal128(field.max_digits, field.decimal_places)
+
+    if internal_type == 'ArrayField':
+        return pyarrow.list_(_get_arrow_type(field.base_field))
+
+    # Anything else (e.g. JSON fields) is converted to a string
+    return _ARROW_TYPES_BY_FIELD_TYPE.get(internal_type, pyarrow.string())
+
+
+def _get_value_converter(arrow_type):
+    if pyarrow.types.is_string(arrow_type):
+        return _to_string
+
+    if pyarrow.types.is_timestamp(arrow_type):
+        return _to_utc
+
+    if pyarrow.types.is_list(arrow_type):
+        item_converter = _get_value_converter(arrow_type.value_type)
+        return lambda value: None if value is None else [item_converter(item) for item in value]
+
+    return _identity
+
+
+def _to_string(value):
+    if value is None or isinstance(value, str):
+        return value
+
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+
+    return str(value)
+
+
+def _to_utc(value):
+    if value is None or value.tzinfo is None:
+        return value
+
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _identity(value):
+    return value
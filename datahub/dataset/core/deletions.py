@@ -0,0 +1,42 @@
+from django.contrib.contenttypes.models import ContentType
+
+from datahub.company.models import Company, Contact
+from datahub.dataset.models import DeletedObject
+from datahub.interaction.models import Interaction
+from datahub.investment.project.models import InvestmentProject
+from datahub.omis.order.models import Order
+
+# Models whose deletions are recorded (as DeletedObject instances) so that they can be
+# reported by dataset endpoints
+DELETION_TRACKED_MODELS = (
+    Company,
+    Contact,
+    Interaction,
+    InvestmentProject,
+    Order,
+)
+
+
+def get_deleted_object_ids(model, deleted_since):
+    """
+    Gets the IDs (as strings) of objects of a model that were deleted on or after deleted_since.
+
+    Deletions are only recorded from when recording was introduced, so deletions before then
+    are not returned.
+
+    None is returned if deletions of the model aren't recorded.
+    """
+    if model not in DELETION_TRACKED_MODELS:
+        return None
+
+    deleted_object_ids = DeletedObject.objects.filter(
+        content_type=ContentType.objects.get_for_model(model),
+        deleted_on__gte=deleted_since,
+    ).order_by(
+        'object_id',
+    ).values_list(
+        'object_id',
+        flat=True,
+    ).distinct()
+
+    return list(deleted_object_ids)
@@ -1,4 +1,12 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
 
 
 class DatasetCursorPagination(CursorPagination):
@@ -14,3 +22,136 @@ class DatasetCursorPagination(CursorPagination):
     # is greater than the `offset_cutoff` the `next_page` in the response would
     # point to the current page creating an infinite loop.
     offset_cutoff = None
+
+
+class DatasetKeysetPagination:
+    """
+    Keyset pagination for dataset endpoints (used for NDJSON responses).
+
+    Unlike DatasetCursorPagination, no offsets are used: each page is fetched using a filter on
+    the ordering fields of the last record of the previous page, so all pages take roughly the
+    same time to query (however far into the dataset they are). Records are fetched using a
+    server-side cursor.
+
+    The last ordering field must be unique and not nullable (e.g. the primary key). Other
+    ordering fields can be nullable (null values are sorted last, as in PostgreSQL).
+    """
+
+    cursor_query_param = 'after'
+    page_size_query_param = 'page_size'
+    # Number of rows fetched from the server-side cursor at a time
+    chunk_size = 2000
+
+    def __init__(self, ordering):
+        """Initialises the paginator with the fields used for ordering."""
+        self.ordering = ordering
+        self.next_key = None
+        self._keyset_names = [f'dataset_keyset_{index}' for index in range(len(ordering))]
+
+    def iterate_page(self, queryset, request):
+        """
+        Yields the records of the page requested.
+
+        Once all the records have been yielded, self.next_key is set if there are further pages.
+        """
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+
+        queryset = queryset.annotate(
+            **{name: F(field) for name, field in zip(self._keyset_names, self.ordering)},
+        ).order_by(*self.ordering)
+
+        if cursor:
+            queryset = queryset.filter(
+                _get_keyset_filter(self.ordering, self._decode_cursor(cursor)),
+            )
+
+        self.next_key = None
+        last_key = None
+        records = queryset[:page_size + 1].iterator(chunk_size=self.chunk_size)
+
+        for index, record in enumerate(records):
+            key = _get_keyset_values(record, self._keyset_names)
+
+            if index == page_size:
+                self.next_key = last_key
+                break
+
+            last_key = key
+            yield record
+
+    def get_page_size(self, request):
+        """Gets the page size from the query string (defaulting to the configured page size)."""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return settings.DATASET_KEYSET_PAGE_SIZE
+
+        return min(max(page_size, 1), settings.DATASET_KEYSET_MAX_PAGE_SIZE)
+
+    def get_next_link(self, request):
+        """Gets the URL of the next page (or None if this is the last page)."""
+        if self.next_key is None:
+            return None
+
+        return replace_query_param(
+            request.build_absolute_uri(),
+            self.cursor_query_param,
+            self._encode_cursor(self.next_key),
+        )
+
+    @staticmethod
+    def _encode_cursor(key):
+        serialised_key = json.dumps(key, default=_serialise_key_value)
+        return urlsafe_b64encode(serialised_key.encode('utf-8')).decode('ascii')
+
+    def _decode_cursor(self, cursor):
+        try:
+            key = json.loads(urlsafe_b64decode(cursor.encode('ascii')))
+        except (TypeError, ValueError):
+            raise NotFound('Invalid cursor.')
+
+        if not isinstance(key, list) or len(key) != len(self.ordering):
+            raise NotFound('Invalid cursor.')
+
+        return key
+
+
+def _get_keyset_filter(fields, values):
+    """
+    Gets a filter for records that are after a particular key (in ascending order).
+
+    As in PostgreSQL, null values are treated as greater than all other values.
+    """
+    field, value = fields[0], values[0]
+
+    if len(fields) == 1:
+        return Q(**{f'{field}__gt': value})
+
+    remaining_filter = _get_keyset_filter(fields[1:], values[1:])
+
+    if value is None:
+        return Q(**{f'{field}__isnull': True}) & remaining_filter
+
+    return (
+        Q(**{f'{field}__gt': value})
+        | Q(**{f'{field}__isnull': True})
+        | (Q(**{field: value}) & remaining_filter)
+    )
+
+
+def _get_keyset_values(record, names):
+    # Records are dicts for values() query sets and model instances otherwise
+    if isinstance(record, dict):
+        return [record.pop(name) for name in names]
+
+    return [getattr(record, name) for name in names]
+
+
+def _serialise_key_value(value):
+    # Unlike DjangoJSONEncoder, this keeps the full precision of datetimes (which is required for
+    # equality comparisons)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+
+    return str(value)
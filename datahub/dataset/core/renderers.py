@@ -0,0 +1,98 @@
+import json
+
+import pyarrow
+import pyarrow.parquet
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from datahub.dataset.core.arrow import get_arrow_schema, iter_record_batches
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Renders an iterable of records as newline-delimited JSON (one JSON object per line).
+
+    Records are encoded one at a time (so that an iterator over a server-side database cursor
+    can be passed without loading all the records into memory first). Already-rendered content
+    (bytes) is returned unchanged.
+    """
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Renders the records."""
+        if data is None:
+            return b''
+
+        if isinstance(data, bytes):
+            return data
+
+        return b''.join(
+            json.dumps(record, cls=JSONEncoder, ensure_ascii=False).encode('utf-8') + b'\n'
+            for record in data
+        )
+
+
+class _BaseArrowRenderer(BaseRenderer):
+    """
+    Base class for renderers that write records as typed Arrow record batches.
+
+    The Arrow schema is derived from the query set in the renderer context (so that column types
+    don't depend on the values on a particular page).
+    """
+
+    charset = None
+    render_style = 'binary'
+    # Number of records per record batch (or Parquet row group)
+    batch_size = 5000
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Renders the records."""
+        if data is None:
+            return b''
+
+        if isinstance(data, bytes):
+            return data
+
+        schema = get_arrow_schema(renderer_context['queryset'])
+        sink = pyarrow.BufferOutputStream()
+        self.write_batches(sink, schema, iter_record_batches(data, schema, self.batch_size))
+        return sink.getvalue().to_pybytes()
+
+    def write_batches(self, sink, schema, batches):
+        """Writes record batches to a sink."""
+        raise NotImplementedError
+
+
+class ArrowRenderer(_BaseArrowRenderer):
+    """Renders records in the Arrow IPC streaming format."""
+
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+
+    def write_batches(self, sink, schema, batches):
+        """Writes record batches to a sink."""
+        writer = pyarrow.RecordBatchStreamWriter(sink, schema)
+
+        for batch in batches:
+            writer.write_batch(batch)
+
+        writer.close()
+
+
+class ParquetRenderer(_BaseArrowRenderer):
+    """Renders records as a Parquet file (with one row group per record batch)."""
+
+    media_type = 'application/vnd.apache.parquet'
+    format = 'parquet'
+
+    def write_batches(self, sink, schema, batches):
+        """Writes record batches to a sink."""
+        writer = pyarrow.parquet.ParquetWriter(sink, schema)
+
+        for batch in batches:
+            writer.write_table(pyarrow.Table.from_batches([batch]))
+
+        writer.close()
@@ -1,6 +1,11 @@
+import json
 from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
+import pyarrow
+import pyarrow.parquet
 import pytest
+from freezegun import freeze_time
 from rest_framework import status
 
 
@@ -58,3 +63,123 @@ class BaseDatasetViewTest:
         response = data_flow_api_client.get(self.view_url)
         assert response.status_code == status.HTTP_200_OK
         assert response.json()['next'] is not None
+
+    def test_ndjson_pagination(self, data_flow_api_client):
+        """
+        Test that NDJSON responses contain one record per line, and that all records are returned
+        exactly once by following the next page links.
+        """
+        self.factory.create_batch(3)
+        params = {'format': 'ndjson', 'page_size': 2}
+        records = []
+
+        for expected_num_records in (2, 1):
+            response = data_flow_api_client.get(self.view_url, params=params)
+            assert response.status_code == status.HTTP_200_OK
+            assert response['Content-Type'] == 'application/x-ndjson'
+
+            page_records = [json.loads(line) for line in response.content.splitlines()]
+            assert len(page_records) == expected_num_records
+            records.extend(page_records)
+
+            if 'Link' in response:
+                next_url = response['Link'].split(';')[0].strip('<>')
+                params = {
+                    key: values[0] for key, values in parse_qs(urlparse(next_url).query).items()
+                }
+
+        assert 'Link' not in response
+        assert len({json.dumps(record, sort_keys=True) for record in records}) == 3
+
+    def test_ndjson_not_modified(self, data_flow_api_client):
+        """Test that 304 is returned if the ETag of an NDJSON page matches If-None-Match."""
+        self.factory.create_batch(2)
+        params = {'format': 'ndjson'}
+        response = data_flow_api_client.get(self.view_url, params=params)
+        etag = response['ETag']
+
+        response = data_flow_api_client.get(self.view_url, params=params, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b''
+
+    def test_ndjson_invalid_cursor(self, data_flow_api_client):
+        """Test that 404 is returned for an invalid NDJSON page cursor."""
+        response = data_flow_api_client.get(
+            self.view_url,
+            params={'format': 'ndjson', 'after': 'invalid'},
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.parametrize(
+        'format_,read_table',
+        (
+            ('arrow', lambda content: pyarrow.ipc.open_stream(content).read_all()),
+            ('parquet', lambda content: pyarrow.parquet.read_table(pyarrow.BufferReader(content))),
+        ),
+    )
+    def test_columnar_formats(self, data_flow_api_client, format_, read_table):
+        """
+        Test that Arrow and Parquet responses contain the same columns and records as JSON
+        responses.
+        """
+        self.factory.create_batch(2)
+        json_results = data_flow_api_client.get(self.view_url).json()['results']
+
+        response = data_flow_api_client.get(self.view_url, params={'format': format_})
+        assert response.status_code == status.HTTP_200_OK
+
+        table = read_table(response.content)
+        assert set(table.column_names) == set(json_results[0])
+        assert {str(result['id']) for result in json_results} <= {
+            str(id_) for id_ in table.column('id').to_pylist()
+        }
+
+
+class IncrementalDatasetViewTestMixin:
+    """Tests for dataset views that support the updated_since query parameter."""
+
+    def test_updated_since(self, data_flow_api_client):
+        """Test that only records modified since updated_since are returned."""
+        with freeze_time('2020-01-01 12:00:00'):
+            self.factory()
+        with freeze_time('2020-01-03 12:00:00'):
+            modified_obj = self.factory()
+
+        response = data_flow_api_client.get(
+            self.view_url,
+            params={'updated_since': '2020-01-02T00:00:00Z'},
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        results = response.json()['results']
+        assert [result['id'] for result in results] == [str(modified_obj.pk)]
+
+    def test_updated_since_reports_deletions(self, data_flow_api_client):
+        """Test that the IDs of records deleted since updated_since are returned."""
+        with freeze_time('2020-01-01 12:00:00'):
+            self.factory().delete()
+        with freeze_time('2020-01-03 12:00:00'):
+            deleted_obj = self.factory()
+            deleted_obj_id = str(deleted_obj.pk)
+            deleted_obj.delete()
+
+        response = data_flow_api_client.get(
+            self.view_url,
+            params={'updated_since': '2020-01-02T00:00:00Z'},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['deleted'] == [deleted_obj_id]
+
+        response = data_flow_api_client.get(
+            self.view_url,
+            params={'updated_since': '2020-01-02T00:00:00Z', 'format': 'ndjson'},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        first_line = response.content.decode().splitlines()[0]
+        assert json.loads(first_line) == {'id': deleted_obj_id, 'deleted': True}
+
+    def test_invalid_updated_since(self, data_flow_api_client):
+        """Test that 400 is returned if updated_since is not a valid date/time."""
+        response = data_flow_api_client.get(self.view_url, params={'updated_since': 'invalid'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {'updated_since': ['Enter a valid date/time.']}
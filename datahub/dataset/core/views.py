@@ -1,3 +1,12 @@
+from hashlib import sha256
+from itertools import chain
+
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, make_aware, utc
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
 from config.settings.types import HawkScope
@@ -7,27 +16,138 @@ from datahub.core.hawk_receiver import (
     HawkResponseSigningMixin,
     HawkScopePermission,
 )
-from datahub.dataset.core.pagination import DatasetCursorPagination
+from datahub.dataset.core.deletions import get_deleted_object_ids
+from datahub.dataset.core.pagination import DatasetCursorPagination, DatasetKeysetPagination
+from datahub.dataset.core.renderers import ArrowRenderer, NDJSONRenderer, ParquetRenderer
+
+KEYSET_PAGINATED_FORMATS = {
+    NDJSONRenderer.format,
+    ArrowRenderer.format,
+    ParquetRenderer.format,
+}
 
 
 class BaseDatasetView(HawkResponseSigningMixin, APIView):
     """
     Base API view to be used for creating endpoints for consumption
     by Data Flow and insertion into Data Workspace.
+
+    Records are returned as paginated JSON by default. If NDJSON, an Arrow IPC stream or Parquet
+    is requested (e.g. using ?format=ndjson, ?format=arrow or ?format=parquet, or an
+    appropriate Accept header), keyset pagination is used instead, with larger pages, the next
+    page URL in a Link header and an ETag header.
+
+    If updated_since_field is set, an updated_since query parameter can be used to only
+    return records changed since a particular time (ordered by that field). The IDs of records
+    deleted since then are also returned on the first page (if deletions of the model are
+    recorded): as a deleted list for JSON responses, or as {"id": ..., "deleted": true}
+    lines for NDJSON responses. (Deletions are not included in Arrow and Parquet responses.)
     """
 
     authentication_classes = (PaaSIPAuthentication, HawkAuthentication)
     permission_classes = (HawkScopePermission, )
     required_hawk_scope = HawkScope.data_flow_api
     pagination_class = DatasetCursorPagination
+    renderer_classes = (
+        *api_settings.DEFAULT_RENDERER_CLASSES,
+        NDJSONRenderer,
+        ArrowRenderer,
+        ParquetRenderer,
+    )
+    updated_since_field = None
 
     def get(self, request):
         """Endpoint which serves all records for a specific Dataset"""
         dataset = self.get_dataset()
+        ordering = self.pagination_class.ordering
+        deleted_ids = None
+        updated_since = self._get_updated_since(request)
+
+        if updated_since:
+            dataset = dataset.filter(**{f'{self.updated_since_field}__gte': updated_since})
+            ordering = (self.updated_since_field, 'pk')
+
+            if not self._is_subsequent_page(request):
+                deleted_ids = get_deleted_object_ids(dataset.model, updated_since)
+
+        if request.accepted_renderer.format in KEYSET_PAGINATED_FORMATS:
+            return self._get_keyset_paginated_response(dataset, request, ordering, deleted_ids)
+
         paginator = self.pagination_class()
+        paginator.ordering = ordering
         page = paginator.paginate_queryset(dataset, request, view=self)
-        return paginator.get_paginated_response(page)
+        response = paginator.get_paginated_response(page)
+
+        if deleted_ids is not None:
+            response.data['deleted'] = deleted_ids
+
+        return response
+
+    def _get_keyset_paginated_response(self, dataset, request, ordering, deleted_ids):
+        paginator = DatasetKeysetPagination(ordering)
+        records = self.format_records(paginator.iterate_page(dataset, request))
+
+        if deleted_ids and request.accepted_renderer.format == NDJSONRenderer.format:
+            records = chain(({'id': id_, 'deleted': True} for id_ in deleted_ids), records)
+
+        # The page is rendered in full (rather than streamed) as response signing needs the
+        # whole body. Records are still fetched and encoded incrementally.
+        content = request.accepted_renderer.render(
+            records,
+            renderer_context={'queryset': dataset},
+        )
+        etag = f'"{sha256(content).hexdigest()}"'
+
+        headers = {'ETag': etag}
+        next_link = paginator.get_next_link(request)
+        if next_link:
+            headers['Link'] = f'<{next_link}>; rel="next"'
+
+        if etag in _parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        return Response(content, headers=headers)
+
+    def _get_updated_since(self, request):
+        value = request.query_params.get('updated_since')
+
+        if not value or not self.updated_since_field:
+            return None
+
+        try:
+            updated_since = parse_datetime(value)
+        except ValueError:
+            updated_since = None
+
+        if not updated_since:
+            raise ValidationError({'updated_since': ['Enter a valid date/time.']})
+
+        return make_aware(updated_since, utc) if is_naive(updated_since) else updated_since
+
+    @staticmethod
+    def _is_subsequent_page(request):
+        return any(
+            param in request.query_params
+            for param in (
+                DatasetCursorPagination.cursor_query_param,
+                DatasetKeysetPagination.cursor_query_param,
+            )
+        )
 
     def get_dataset(self):
         """Return a list of records"""
         raise NotImplementedError
+
+    def format_records(self, records):
+        """
+        Formats records for NDJSON responses.
+
+        This can be overridden when get_dataset() doesn't return a values() query set. (Such
+        views should not include ArrowRenderer or ParquetRenderer in renderer_classes, as
+        the Arrow schema is derived from the values() query set.)
+        """
+        return records
+
+
+def _parse_etags(header_value):
+    return {etag.strip() for etag in header_value.split(',')}
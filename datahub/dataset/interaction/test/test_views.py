@@ -4,7 +4,7 @@ from freezegun import freeze_time
 from rest_framework import status
 
 from datahub.core.test_utils import format_date_or_datetime, get_attr_or_none
-from datahub.dataset.core.test import BaseDatasetViewTest
+from datahub.dataset.core.test import BaseDatasetViewTest, IncrementalDatasetViewTestMixin
 from datahub.interaction.test.factories import (
     CompanyInteractionFactory,
     CompanyInteractionFactoryWithPolicyFeedback,
@@ -75,7 +75,7 @@ def get_expected_data_from_interaction(interaction):
 
 
 @pytest.mark.django_db
-class TestInteractionsDatasetViewSet(BaseDatasetViewTest):
+class TestInteractionsDatasetViewSet(IncrementalDatasetViewTestMixin, BaseDatasetViewTest):
     """
     Tests for InteractionsDatasetView
     """
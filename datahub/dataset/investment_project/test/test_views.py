@@ -9,7 +9,7 @@ from datahub.core.test_utils import (
     get_attr_or_none,
     str_or_none,
 )
-from datahub.dataset.core.test import BaseDatasetViewTest
+from datahub.dataset.core.test import BaseDatasetViewTest, IncrementalDatasetViewTestMixin
 from datahub.investment.project.proposition.models import PropositionDocument
 from datahub.investment.project.proposition.test.factories import PropositionFactory
 from datahub.investment.project.test.factories import (
@@ -189,7 +189,7 @@ def get_expected_data_from_project(project):
 
 
 @pytest.mark.django_db
-class TestInvestmentProjectsDatasetViewSet(BaseDatasetViewTest):
+class TestInvestmentProjectsDatasetViewSet(IncrementalDatasetViewTestMixin, BaseDatasetViewTest):
     """
     Tests for InvestmentProjectsDatasetView
     """
@@ -261,6 +261,12 @@ class TestInvestmentProjectsActivityDatasetViewSet(BaseDatasetViewTest):
     view_url = reverse('api-v4:dataset:investment-projects-activity-dataset')
     factory = InvestmentProjectFactory
 
+    @pytest.mark.parametrize('format_', ('arrow', 'parquet'))
+    def test_columnar_formats(self, data_flow_api_client, format_):
+        """Test that Arrow and Parquet are not supported."""
+        response = data_flow_api_client.get(self.view_url, params={'format': format_})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
     def test_propositions_are_being_formatted(self, data_flow_api_client, propositions):
         """Test that returned propositions are being formatted correctly."""
         response = data_flow_api_client.get(self.view_url)
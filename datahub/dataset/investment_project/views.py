@@ -1,4 +1,5 @@
 from django.contrib.postgres.aggregates import ArrayAgg
+from rest_framework.settings import api_settings
 
 from datahub.core.query_utils import (
     get_aggregate_subquery,
@@ -7,10 +8,12 @@ from datahub.core.query_utils import (
 from datahub.core.query_utils import (
     get_array_agg_subquery,
 )
+from datahub.dataset.core.renderers import NDJSONRenderer
 from datahub.dataset.core.views import BaseDatasetView
 from datahub.dataset.investment_project.pagination import (
     InvestmentProjectActivityDatasetViewCursorPagination,
 )
+from datahub.dataset.investment_project.spi import SPIReportFormatter
 from datahub.investment.project.models import InvestmentProject
 from datahub.investment.project.query_utils import get_project_code_expression
 from datahub.investment.project.report.spi import get_spi_report_queryset
@@ -26,6 +29,8 @@ class InvestmentProjectsDatasetView(BaseDatasetView):
     and let analyst to work on denormalized table to get more meaningful insight.
     """
 
+    updated_since_field = 'modified_on'
+
     def get_dataset(self):
         """Returns list of Investment Projects Dataset records"""
         return InvestmentProject.objects.annotate(
@@ -149,7 +154,13 @@ class InvestmentProjectsActivityDatasetView(BaseDatasetView):
     """
 
     pagination_class = InvestmentProjectActivityDatasetViewCursorPagination
+    # Arrow and Parquet are not supported as get_dataset() doesn't return a values() query set
+    renderer_classes = (*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer)
 
     def get_dataset(self):
         """Get dataset."""
         return get_spi_report_queryset()
+
+    def format_records(self, records):
+        """Formats records for NDJSON responses in the same way as the pagination class."""
+        return SPIReportFormatter().format(records)
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db import models
+
+
+class DeletedObject(models.Model):
+    """
+    A record of an object having been deleted.
+
+    These are recorded for the models in DELETION_TRACKED_MODELS (in
+    datahub.dataset.core.deletions) so that dataset endpoints can report deletions to
+    consumers that only fetch the records that have changed since a particular time.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    content_type = models.ForeignKey('contenttypes.ContentType', on_delete=models.CASCADE)
+    # The primary key of the deleted object (as a string, as in django-reversion)
+    object_id = models.CharField(max_length=settings.CHAR_FIELD_MAX_LENGTH)
+    deleted_on = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['content_type', 'deleted_on']),
+        ]
+        default_permissions = ()
+
+    def __str__(self):
+        """Human-readable representation."""
+        return f'{self.content_type} {self.object_id} (deleted on {self.deleted_on})'
@@ -8,7 +8,7 @@ from datahub.core.test_utils import (
     get_attr_or_none,
     join_attr_values,
 )
-from datahub.dataset.core.test import BaseDatasetViewTest
+from datahub.dataset.core.test import BaseDatasetViewTest, IncrementalDatasetViewTestMixin
 from datahub.omis.order.test.factories import (
     OrderCancelledFactory,
     OrderCompleteFactory,
@@ -62,7 +62,7 @@ def get_expected_data_from_order(order):
 
 
 @pytest.mark.django_db
-class TestOMISDatasetViewSet(BaseDatasetViewTest):
+class TestOMISDatasetViewSet(IncrementalDatasetViewTestMixin, BaseDatasetViewTest):
     """
     Tests for OMISDatasetView
     """
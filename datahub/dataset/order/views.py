@@ -15,6 +15,8 @@ class OMISDatasetView(BaseDatasetView):
     more meaningful insight.
     """
 
+    updated_since_field = 'modified_on'
+
     def get_dataset(self):
         """Returns list of OMIS Dataset records"""
         return Order.objects.annotate(
@@ -0,0 +1,21 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import post_delete
+
+from datahub.dataset.core.deletions import DELETION_TRACKED_MODELS
+from datahub.dataset.models import DeletedObject
+
+
+def record_deletion(sender, instance, **kwargs):
+    """Records the deletion of an object so that it can be reported by dataset endpoints."""
+    DeletedObject.objects.create(
+        content_type=ContentType.objects.get_for_model(sender),
+        object_id=str(instance.pk),
+    )
+
+
+for model in DELETION_TRACKED_MODELS:
+    post_delete.connect(
+        record_deletion,
+        sender=model,
+        dispatch_uid=f'dataset_{model._meta.label_lower}_post_delete',
+    )
@@ -1,7 +1,6 @@
 from datetime import datetime, time, timedelta
 
 from celery import shared_task
-from celery.result import ResultSet
 from celery.utils.log import get_task_logger
 from django.conf import settings
 from django.db.models import F, Max, Q
@@ -13,6 +12,7 @@ from datahub.company.models import Company
 from datahub.core.utils import log_to_sentry
 from datahub.dnb_api.constants import FEATURE_FLAG_DNB_COMPANY_UPDATES
 from datahub.dnb_api.utils import (
+    bulk_update_companies_from_dnb,
     DNBServiceConnectionError,
     DNBServiceError,
     DNBServiceTimeoutError,
@@ -36,7 +36,10 @@ def _sync_company_with_dnb(
     dh_company = Company.objects.get(id=company_id)
 
     try:
-        dnb_company = get_company(dh_company.duns_number)
+        dnb_company = get_company(
+            dh_company.duns_number,
+            rate_limit_max_wait=settings.DNB_SERVICE_RATE_LIMIT_MAX_WAIT,
+        )
     except DNBServiceError as exc:
         if is_server_error(exc.status_code) and retry_failures:
             raise task.retry(exc=exc, countdown=60)
@@ -86,7 +89,9 @@ def sync_company_with_dnb(
     acks_late=True,
     priority=9,
     max_retries=3,
-    rate_limit=1,  # Run this task at most once per worker per second
+    # Run this task at most once per worker per second, unless the global dnb-service rate limit
+    # is enabled (in which case requests are already limited across all workers)
+    rate_limit=None if settings.DNB_SERVICE_RATE_LIMIT_QPS else 1,
     queue='long-running',
 )
 def sync_company_with_dnb_rate_limited(
@@ -101,6 +106,9 @@ def sync_company_with_dnb_rate_limited(
     A rate limited wrapper around the sync_company_with_dnb task. This task
     can be used for bulk tasks to ensure that we do not exceed our agreed
     rate limit with D&B.
+
+    If settings.DNB_SERVICE_RATE_LIMIT_QPS is set, the shared rate limit in
+    wait_for_dnb_service_rate_limit() is used instead of a per-worker Celery rate limit.
     """
     message = f'Syncing dnb-linked company: {company_id}'
     if simulate:
@@ -157,7 +165,7 @@ def sync_outdated_companies_with_dnb(
         )
 
 
-def _record_audit(update_results, producer_task, start_time):
+def _record_audit(update_reports, producer_task, start_time):
     """
     Record an audit log for the get_company_updates task which expresses the number
     of companies successfully updates, failures, ids of companies updated, celery
@@ -165,18 +173,20 @@ def _record_audit(update_results, producer_task, start_time):
     """
     audit = {
         'success_count': 0,
+        'changed_count': 0,
         'failure_count': 0,
         'updated_company_ids': [],
         'producer_task_id': producer_task.request.id,
         'start_time': start_time.isoformat(),
         'end_time': now().isoformat(),
     }
-    for result in update_results:
-        if result.successful():
-            audit['success_count'] += 1
-            audit['updated_company_ids'].append(result.result)
-        else:
-            audit['failure_count'] += 1
+    for report in update_reports:
+        audit['success_count'] += len(report.successful_company_ids)
+        audit['changed_count'] += len(report.changed_company_ids)
+        audit['failure_count'] += report.failure_count
+        audit['updated_company_ids'].extend(
+            str(company_id) for company_id in report.successful_company_ids
+        )
     log_to_sentry('get_company_updates task completed.', extra=audit)
 
 
@@ -199,7 +209,7 @@ def _get_company_updates(task, last_updated_after, fields_to_update):
     last_updated_after = last_updated_after or midnight_yesterday.isoformat()
     next_page = None
     updates_remaining = settings.DNB_AUTOMATIC_UPDATE_LIMIT
-    update_results = []
+    update_reports = []
     start_time = now()
     logger.info('Started get_company_updates task')
     update_descriptor = f'celery:get_company_updates:{task.request.id}'
@@ -211,16 +221,13 @@ def _get_company_updates(task, last_updated_after, fields_to_update):
 
         dnb_company_updates = dnb_company_updates[:updates_remaining]
 
-        # Spawn tasks that update Data Hub companies
-        for data in dnb_company_updates:
-            result = update_company_from_dnb_data.apply_async(
-                args=(data,),
-                kwargs={
-                    'fields_to_update': fields_to_update,
-                    'update_descriptor': update_descriptor,
-                },
-            )
-            update_results.append(result)
+        # Update the Data Hub companies on this page in bulk
+        update_report = bulk_update_companies_from_dnb(
+            dnb_company_updates,
+            fields_to_update=fields_to_update,
+            update_descriptor=update_descriptor,
+        )
+        update_reports.append(update_report)
 
         if updates_remaining is not None:
             updates_remaining -= len(dnb_company_updates)
@@ -231,12 +238,7 @@ def _get_company_updates(task, last_updated_after, fields_to_update):
         if next_page is None:
             break
 
-    # Wait for all update tasks to finish...
-    ResultSet(results=update_results).join(
-        propagate=False,
-        disable_sync_subtasks=False,
-    )
-    _record_audit(update_results, task, start_time)
+    _record_audit(update_reports, task, start_time)
     logger.info('Finished get_company_updates task')
 
 
@@ -252,8 +254,8 @@ def get_company_updates(self, last_updated_after=None, fields_to_update=None):
     Gets the lastest updates for D&B companies from dnb-service.
 
     The `dnb-service` exposes these updates as a cursor-paginated list. This
-    task goes through the pages and spawns tasks that update the records in
-    Data Hub.
+    task goes through the pages and updates the records in Data Hub (in bulk, one
+    page at a time).
     """
     # TODO: remove this feature flag after a reasonable period after going live
     # with unlimited company updates
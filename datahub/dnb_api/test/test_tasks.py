@@ -22,6 +22,7 @@ from datahub.dnb_api.tasks import (
 )
 from datahub.dnb_api.test.utils import model_to_dict_company
 from datahub.dnb_api.utils import (
+    CompanyUpdateBatchReport,
     DNBServiceConnectionError,
     DNBServiceError,
     DNBServiceTimeoutError,
@@ -391,10 +392,10 @@ class TestGetCompanyUpdates:
             'datahub.dnb_api.tasks.get_company_update_page',
             mock_get_company_update_page,
         )
-        mock_update_company = mock.Mock()
+        mock_bulk_update = mock.Mock(return_value=CompanyUpdateBatchReport())
         monkeypatch.setattr(
-            'datahub.dnb_api.tasks.update_company_from_dnb_data',
-            mock_update_company,
+            'datahub.dnb_api.tasks.bulk_update_companies_from_dnb',
+            mock_bulk_update,
         )
         task_result = get_company_updates.apply(kwargs={'fields_to_update': fields_to_update})
 
@@ -408,23 +409,14 @@ class TestGetCompanyUpdates:
             'http://foo.bar/companies?cursor=page2',
         )
 
-        assert mock_update_company.apply_async.call_count == 3
         expected_kwargs = {
             'fields_to_update': fields_to_update,
             'update_descriptor': f'celery:get_company_updates:{task_result.id}',
         }
-        mock_update_company.apply_async.assert_any_call(
-            args=({'foo': 1},),
-            kwargs=expected_kwargs,
-        )
-        mock_update_company.apply_async.assert_any_call(
-            args=({'bar': 2},),
-            kwargs=expected_kwargs,
-        )
-        mock_update_company.apply_async.assert_any_call(
-            args=({'baz': 3},),
-            kwargs=expected_kwargs,
-        )
+        assert mock_bulk_update.call_args_list == [
+            mock.call([{'foo': 1}, {'bar': 2}], **expected_kwargs),
+            mock.call([{'baz': 3}], **expected_kwargs),
+        ]
 
     @pytest.mark.parametrize(
         'lock_acquired, call_count',
@@ -501,26 +493,24 @@ class TestGetCompanyUpdates:
             'datahub.dnb_api.tasks.get_company_update_page',
             mock_get_company_update_page,
         )
-        mock_update_company = mock.Mock()
+        mock_bulk_update = mock.Mock(return_value=CompanyUpdateBatchReport())
         monkeypatch.setattr(
-            'datahub.dnb_api.tasks.update_company_from_dnb_data',
-            mock_update_company,
+            'datahub.dnb_api.tasks.bulk_update_companies_from_dnb',
+            mock_bulk_update,
         )
         task_result = get_company_updates.apply()
 
-        assert mock_update_company.apply_async.call_count == 2
         expected_kwargs = {
             'fields_to_update': None,
             'update_descriptor': f'celery:get_company_updates:{task_result.id}',
         }
-        mock_update_company.apply_async.assert_any_call(
-            args=({'foo': 1},),
-            kwargs=expected_kwargs,
-        )
-        mock_update_company.apply_async.assert_any_call(
-            args=({'bar': 2},),
-            kwargs=expected_kwargs,
-        )
+        updated_records = [
+            record
+            for call in mock_bulk_update.call_args_list
+            for record in call[0][0]
+        ]
+        assert updated_records == [{'foo': 1}, {'bar': 2}]
+        assert all(call[1] == expected_kwargs for call in mock_bulk_update.call_args_list)
 
     @mock.patch('datahub.dnb_api.tasks.log_to_sentry')
     @freeze_time('2019-01-02T2:00:00')
@@ -553,6 +543,7 @@ class TestGetCompanyUpdates:
             'get_company_updates task completed.',
             extra={
                 'success_count': 1,
+                'changed_count': 1,
                 'failure_count': 0,
                 'updated_company_ids': [str(company.pk)],
                 'producer_task_id': task_result.id,
@@ -592,6 +583,7 @@ class TestGetCompanyUpdates:
             'get_company_updates task completed.',
             extra={
                 'success_count': 1,
+                'changed_count': 1,
                 'failure_count': 0,
                 'updated_company_ids': [str(company.pk)],
                 'producer_task_id': task_result.id,
@@ -637,6 +629,7 @@ class TestGetCompanyUpdates:
             'get_company_updates task completed.',
             extra={
                 'success_count': 1,
+                'changed_count': 1,
                 'failure_count': 1,
                 'updated_company_ids': [str(company.pk)],
                 'producer_task_id': task_result.id,
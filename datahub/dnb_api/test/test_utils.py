@@ -1,9 +1,11 @@
+from unittest import mock
 from urllib.parse import urljoin
 from uuid import UUID
 
 import pytest
 import reversion
 from django.conf import settings
+from django.db.models.signals import post_save
 from django.utils.timezone import now
 from freezegun import freeze_time
 from requests.exceptions import (
@@ -20,6 +22,8 @@ from datahub.company.test.factories import AdviserFactory, CompanyFactory
 from datahub.dnb_api.constants import ALL_DNB_UPDATED_MODEL_FIELDS
 from datahub.dnb_api.test.utils import model_to_dict_company
 from datahub.dnb_api.utils import (
+    bulk_update_companies_from_dnb,
+    CompanyUpdateBatchReport,
     DNBServiceConnectionError,
     DNBServiceError,
     DNBServiceInvalidRequest,
@@ -30,7 +34,9 @@ from datahub.dnb_api.utils import (
     get_company_update_page,
     RevisionNotFoundError,
     rollback_dnb_company_update,
+    search_dnb,
     update_company_from_dnb,
+    wait_for_dnb_service_rate_limit,
 )
 from datahub.metadata.models import Country
 
@@ -218,6 +224,70 @@ def test_get_company_valid(
     }
 
 
+@pytest.mark.usefixtures('local_memory_cache')
+class TestSearchDNBCache:
+    """
+    Test caching of dnb-service responses by search_dnb.
+    """
+
+    def test_caches_responses(self, requests_mock, dnb_response_uk):
+        """Test that responses for the same (normalised) query are cached."""
+        requests_mock.post(DNB_SEARCH_URL, json=dnb_response_uk)
+
+        first_response = search_dnb({'search_term': 'foo', 'page_size': 10})
+        second_response = search_dnb({'page_size': 10, 'search_term': ' foo '})
+
+        assert requests_mock.call_count == 1
+        assert second_response.status_code == first_response.status_code
+        assert second_response.json() == first_response.json()
+        assert second_response.headers['content-type'] == 'application/json'
+
+    @pytest.mark.parametrize(
+        'response_kwargs,not_found_cache_ttl,expected_call_count',
+        (
+            ({'json': {'results': []}}, 60, 1),
+            ({'json': {'results': []}}, 0, 2),
+            ({'status_code': status.HTTP_404_NOT_FOUND, 'json': {}}, 60, 1),
+            ({'status_code': status.HTTP_500_INTERNAL_SERVER_ERROR, 'text': 'error'}, 60, 2),
+        ),
+    )
+    def test_caching_of_other_responses(
+        self,
+        requests_mock,
+        settings,
+        response_kwargs,
+        not_found_cache_ttl,
+        expected_call_count,
+    ):
+        """
+        Test that not found responses are cached using the not found TTL and that errors are not
+        cached.
+        """
+        settings.DNB_SERVICE_NOT_FOUND_CACHE_TTL = not_found_cache_ttl
+        requests_mock.post(DNB_SEARCH_URL, **response_kwargs)
+
+        search_dnb({'duns_number': '123456789'})
+        search_dnb({'duns_number': '123456789'})
+
+        assert requests_mock.call_count == expected_call_count
+
+    @pytest.mark.usefixtures('synchronous_on_commit')
+    def test_update_company_from_dnb_invalidates_cache(
+        self,
+        requests_mock,
+        dnb_response_uk,
+    ):
+        """Test that updating a company from D&B discards the cached response for its DUNS."""
+        requests_mock.post(DNB_SEARCH_URL, json=dnb_response_uk)
+        company = CompanyFactory(duns_number='123456789')
+
+        dnb_company = get_company('123456789')
+        update_company_from_dnb(company, dnb_company)
+        get_company('123456789')
+
+        assert requests_mock.call_count == 2
+
+
 class TestUpdateCompanyFromDNB:
     """
     Test update_company_from_dnb utility function.
@@ -409,6 +479,194 @@ class TestUpdateCompanyFromDNB:
             assert str(excinfo) == 'Data from D&B did not pass the Data Hub validation checks.'
 
 
+class TestWaitForDNBServiceRateLimit:
+    """
+    Test wait_for_dnb_service_rate_limit utility function.
+    """
+
+    @pytest.fixture
+    def mock_token_bucket(self, monkeypatch, settings):
+        """Enables the rate limit and mocks the token bucket script."""
+        settings.DNB_SERVICE_RATE_LIMIT_QPS = 5
+        settings.DNB_SERVICE_RATE_LIMIT_BURST = 10
+        settings.DNB_SERVICE_RATE_LIMIT_MAX_WAIT = 30
+        mock_redis = mock.Mock()
+        monkeypatch.setattr('datahub.dnb_api.utils.get_redis_connection', lambda: mock_redis)
+        return mock_redis.register_script.return_value
+
+    @pytest.fixture
+    def mock_sleep(self, monkeypatch):
+        """Patches sleep() so that tests don't wait."""
+        mock_sleep = mock.Mock()
+        monkeypatch.setattr('datahub.dnb_api.utils.sleep', mock_sleep)
+        return mock_sleep
+
+    def test_disabled(self, monkeypatch, settings):
+        """Test that Redis is not used if the rate limit is not enabled."""
+        settings.DNB_SERVICE_RATE_LIMIT_QPS = None
+        mock_get_redis_connection = mock.Mock()
+        monkeypatch.setattr(
+            'datahub.dnb_api.utils.get_redis_connection',
+            mock_get_redis_connection,
+        )
+
+        wait_for_dnb_service_rate_limit()
+
+        mock_get_redis_connection.assert_not_called()
+
+    @pytest.mark.parametrize('wait', ('0', '0.25'))
+    def test_waits_for_token(self, mock_token_bucket, mock_sleep, wait):
+        """Test that the caller waits for as long as required by the token bucket."""
+        mock_token_bucket.return_value = wait.encode()
+
+        wait_for_dnb_service_rate_limit()
+
+        assert mock_token_bucket.call_args[1]['args'][:2] == [5, 10]
+        if float(wait):
+            mock_sleep.assert_called_once_with(float(wait))
+        else:
+            mock_sleep.assert_not_called()
+
+    def test_raises_if_wait_too_long(self, mock_token_bucket, mock_sleep):
+        """Test that an error is raised if the wait would exceed the maximum wait."""
+        mock_token_bucket.return_value = b'-1'
+
+        with pytest.raises(DNBServiceTimeoutError):
+            wait_for_dnb_service_rate_limit()
+
+        mock_sleep.assert_not_called()
+
+    @pytest.mark.parametrize(
+        'max_wait,expected_max_wait',
+        (
+            (None, 30),
+            (0, 0),
+            (2, 2),
+        ),
+    )
+    def test_max_wait(self, mock_token_bucket, mock_sleep, max_wait, expected_max_wait):
+        """
+        Test that the maximum wait defaults to settings.DNB_SERVICE_RATE_LIMIT_MAX_WAIT and
+        can be overridden.
+        """
+        mock_token_bucket.return_value = b'0'
+
+        wait_for_dnb_service_rate_limit(max_wait=max_wait)
+
+        assert mock_token_bucket.call_args[1]['args'][3] == expected_max_wait
+
+    @pytest.mark.parametrize(
+        'rate_limit_max_wait,expected_max_wait',
+        (
+            (None, 1),
+            (30, 30),
+        ),
+    )
+    def test_search_dnb_uses_rate_limit(
+        self,
+        monkeypatch,
+        requests_mock,
+        settings,
+        rate_limit_max_wait,
+        expected_max_wait,
+    ):
+        """
+        Test that search_dnb() waits for the rate limit before making a request, by default
+        only for up to settings.DNB_SERVICE_INTERACTIVE_RATE_LIMIT_MAX_WAIT seconds.
+        """
+        settings.DNB_SERVICE_INTERACTIVE_RATE_LIMIT_MAX_WAIT = 1
+        mock_wait = mock.Mock()
+        monkeypatch.setattr('datahub.dnb_api.utils.wait_for_dnb_service_rate_limit', mock_wait)
+        requests_mock.post(DNB_SEARCH_URL, json={'results': []})
+
+        search_dnb({'search_term': 'foo'}, rate_limit_max_wait=rate_limit_max_wait)
+
+        mock_wait.assert_called_once_with(max_wait=expected_max_wait)
+
+    def test_get_company_passes_rate_limit_max_wait(self, monkeypatch):
+        """Test that get_company() passes rate_limit_max_wait to search_dnb()."""
+        mock_search_dnb = mock.Mock(side_effect=DNBServiceTimeoutError('Timed out'))
+        monkeypatch.setattr('datahub.dnb_api.utils.search_dnb', mock_search_dnb)
+
+        with pytest.raises(DNBServiceTimeoutError):
+            get_company('123456789', rate_limit_max_wait=30)
+
+        mock_search_dnb.assert_called_once_with(
+            {'duns_number': '123456789'},
+            rate_limit_max_wait=30,
+        )
+
+
+class TestBulkUpdateCompaniesFromDNB:
+    """
+    Test bulk_update_companies_from_dnb utility function.
+    """
+
+    @freeze_time('2019-01-01 11:12:13')
+    def test_updates_changed_companies(self, dnb_response_uk):
+        """
+        Test that changed companies are updated with a single revision, that companies with no
+        changes only have their D&B sync status updated and that failures are counted.
+        """
+        dnb_company = dnb_response_uk['results'][0]
+        changed_company = CompanyFactory(
+            duns_number=dnb_company['duns_number'],
+            pending_dnb_investigation=True,
+        )
+        unchanged_company = CompanyFactory(duns_number='987654321', name='Unchanged Ltd')
+        original_modified_on = changed_company.modified_on
+        dnb_companies = [
+            dnb_company,
+            {**dnb_company, 'duns_number': '987654321', 'primary_name': 'Unchanged Ltd'},
+            {**dnb_company, 'duns_number': '111111111'},
+            {**dnb_company, 'duns_number': '222222222', 'primary_name': None},
+        ]
+        CompanyFactory(duns_number='222222222')
+
+        report = bulk_update_companies_from_dnb(
+            dnb_companies,
+            fields_to_update=['name'],
+            update_descriptor='foo',
+        )
+
+        assert report == CompanyUpdateBatchReport(
+            successful_company_ids=(changed_company.pk, unchanged_company.pk),
+            changed_company_ids=(changed_company.pk,),
+            failure_count=2,
+        )
+
+        changed_company.refresh_from_db()
+        assert changed_company.name == dnb_company['primary_name']
+        assert not changed_company.pending_dnb_investigation
+        assert changed_company.dnb_modified_on == now()
+        assert changed_company.modified_on == original_modified_on
+
+        versions = list(Version.objects.get_for_object(changed_company))
+        assert len(versions) == 1
+        assert versions[0].revision.comment == 'Updated from D&B [foo]'
+        assert versions[0].field_dict['name'] == dnb_company['primary_name']
+
+        unchanged_company.refresh_from_db()
+        assert unchanged_company.dnb_modified_on == now()
+        assert not Version.objects.get_for_object(unchanged_company).exists()
+
+    def test_sends_post_save(self, dnb_response_uk):
+        """Test that post_save is sent for changed companies (so that they are synced to ES)."""
+        dnb_company = dnb_response_uk['results'][0]
+        company = CompanyFactory(duns_number=dnb_company['duns_number'])
+        receiver = mock.Mock()
+        post_save.connect(receiver, sender=Company, dispatch_uid='test_sends_post_save')
+
+        try:
+            bulk_update_companies_from_dnb([dnb_company], fields_to_update=['name'])
+        finally:
+            post_save.disconnect(sender=Company, dispatch_uid='test_sends_post_save')
+
+        receiver.assert_called_once()
+        assert receiver.call_args[1]['instance'].pk == company.pk
+        assert receiver.call_args[1]['created'] is False
+
+
 class TestGetCompanyUpdatePage:
     """
     Test for the `get_company_update_page` utility function.
@@ -8,7 +8,7 @@ from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.test.utils import override_settings
 from freezegun import freeze_time
-from requests.exceptions import ConnectionError
+from requests.exceptions import ConnectionError, Timeout
 from rest_framework import status
 from rest_framework.reverse import reverse
 
@@ -17,7 +17,7 @@ from datahub.company.test.factories import CompanyFactory
 from datahub.core.serializers import AddressSerializer
 from datahub.core.test_utils import APITestMixin, create_test_user
 from datahub.dnb_api.constants import ALL_DNB_UPDATED_SERIALIZER_FIELDS
-from datahub.dnb_api.utils import format_dnb_company
+from datahub.dnb_api.utils import DNBServiceTimeoutError, format_dnb_company
 from datahub.interaction.models import InteractionPermission
 from datahub.metadata.models import Country
 
@@ -336,6 +336,26 @@ class TestDNBCompanySearchAPI(APITestMixin):
             f'dnb.search.{response_status_code}',
         )
 
+    def test_post_rate_limit_timeout(self, monkeypatch, requests_mock):
+        """
+        Test that a 503 is returned if the dnb-service rate limit would require too long a
+        wait.
+        """
+        mock_wait = Mock(side_effect=DNBServiceTimeoutError('Timed out'))
+        monkeypatch.setattr('datahub.dnb_api.utils.wait_for_dnb_service_rate_limit', mock_wait)
+        requests_mock.post(DNB_SEARCH_URL, json={'results': []})
+
+        response = self.api_client.post(
+            reverse('api-v4:dnb-api:company-search'),
+            data={'search_term': 'foo'},
+        )
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert not requests_mock.called
+        mock_wait.assert_called_once_with(
+            max_wait=settings.DNB_SERVICE_INTERACTIVE_RATE_LIMIT_MAX_WAIT,
+        )
+
 
 class TestDNBCompanyCreateAPI(APITestMixin):
     """
@@ -816,6 +836,28 @@ class TestDNBCompanyCreateAPI(APITestMixin):
 
         assert response.status_code == status.HTTP_502_BAD_GATEWAY
 
+    def test_post_dnb_service_timeout(
+        self,
+        requests_mock,
+    ):
+        """
+        Test that the create-company endpoint returns 503 if there is a timeout interacting with
+        dnb-service.
+        """
+        requests_mock.post(
+            DNB_SEARCH_URL,
+            exc=Timeout('Timed out'),
+        )
+
+        response = self.api_client.post(
+            reverse('api-v4:dnb-api:company-create'),
+            data={
+                'duns_number': 123456789,
+            },
+        )
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
     @pytest.mark.parametrize(
         'permissions',
         (
@@ -1191,6 +1233,27 @@ class TestCompanyLinkView(APITestMixin):
 
         assert response.status_code == status.HTTP_502_BAD_GATEWAY
 
+    def test_dnb_service_timeout(self, requests_mock):
+        """
+        Test that the company-link endpoint returns 503 if there is a timeout interacting with
+        dnb-service.
+        """
+        company = CompanyFactory()
+        requests_mock.post(
+            DNB_SEARCH_URL,
+            exc=Timeout('Timed out'),
+        )
+
+        response = self.api_client.post(
+            reverse('api-v4:dnb-api:company-link'),
+            data={
+                'company_id': company.id,
+                'duns_number': 123456789,
+            },
+        )
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
     def test_already_linked(self):
         """
         Test that the endpoint returns 400 for a company that is already linked.
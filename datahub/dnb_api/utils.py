@@ -1,13 +1,24 @@
+import json
 import logging
+from hashlib import sha256
+from time import sleep, time
+from typing import NamedTuple
 
 import reversion
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import post_save
 from django.utils.timezone import now
+from django_redis import get_redis_connection
+from requests import Response
 from requests.exceptions import ConnectionError, Timeout
 from rest_framework import serializers, status
 from reversion.models import Version
 
+from datahub.company.models import Company
 from datahub.core import statsd
 from datahub.core.api_client import APIClient, TokenAuth
 from datahub.core.serializers import AddressSerializer
@@ -28,6 +39,41 @@ api_client = APIClient(
     default_timeout=settings.DNB_SERVICE_TIMEOUT,
 )
 
+RATE_LIMIT_BUCKET_KEY = 'dnb-service-rate-limit'
+SEARCH_CACHE_KEY_PREFIX = 'dnb-service-search'
+
+# Token bucket shared by all processes (so that the rate limit applies globally).
+#
+# Tokens are added at `rate` per second up to `burst`. A caller always takes a token, even if
+# that makes the number of tokens negative; the returned value is the number of seconds the caller
+# must wait before making its request (so that callers are served in order). If the wait would
+# exceed `max_wait`, no token is taken and -1 is returned.
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local max_wait = tonumber(ARGV[4])
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or burst
+local updated_at = tonumber(state[2]) or now
+
+tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+
+local wait = 0
+if tokens < 1 then
+    wait = (1 - tokens) / rate
+end
+
+if wait > max_wait then
+    return '-1'
+end
+
+redis.call('HMSET', KEYS[1], 'tokens', tostring(tokens - 1), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate + max_wait) + 1)
+return tostring(wait)
+"""
+
 
 class DNBServiceException(Exception):
     """
@@ -78,15 +124,94 @@ class RevisionNotFoundError(Exception):
     """
 
 
-def search_dnb(query_params):
+class CompanyUpdateBatchReport(NamedTuple):
+    """
+    Outcome of bulk_update_companies_from_dnb().
+    """
+
+    # IDs of all companies that were successfully synced (whether or not any fields changed)
+    successful_company_ids: tuple = ()
+    # IDs of companies that had at least one field changed
+    changed_company_ids: tuple = ()
+    failure_count: int = 0
+
+
+def wait_for_dnb_service_rate_limit(max_wait=None):
+    """
+    Waits until a request can be made to dnb-service without exceeding the global rate limit.
+
+    The rate limit is shared by all processes using a token bucket in Redis, and is configured
+    using settings.DNB_SERVICE_RATE_LIMIT_QPS (requests per second) and
+    settings.DNB_SERVICE_RATE_LIMIT_BURST. The rate limit is disabled if
+    settings.DNB_SERVICE_RATE_LIMIT_QPS is not set.
+
+    :param max_wait: the maximum number of seconds to wait (defaults to
+        settings.DNB_SERVICE_RATE_LIMIT_MAX_WAIT)
+    :raises DNBServiceTimeoutError: if the wait would exceed max_wait seconds
+    """
+    rate = settings.DNB_SERVICE_RATE_LIMIT_QPS
+    if not rate:
+        return
+
+    if max_wait is None:
+        max_wait = settings.DNB_SERVICE_RATE_LIMIT_MAX_WAIT
+
+    token_bucket = get_redis_connection().register_script(_TOKEN_BUCKET_SCRIPT)
+    wait = float(
+        token_bucket(
+            keys=[RATE_LIMIT_BUCKET_KEY],
+            args=[
+                rate,
+                settings.DNB_SERVICE_RATE_LIMIT_BURST,
+                time(),
+                max_wait,
+            ],
+        ),
+    )
+
+    if wait < 0:
+        statsd.incr('dnb.rate-limit.rejected')
+        error_message = 'Timed out waiting for the DNB service rate limit'
+        logger.error(error_message)
+        raise DNBServiceTimeoutError(error_message)
+
+    if wait > 0:
+        statsd.incr('dnb.rate-limit.throttled')
+        statsd.statsd().timing('dnb.rate-limit.wait', wait * 1000)
+        sleep(wait)
+
+
+def search_dnb(query_params, rate_limit_max_wait=None):
     """
     Queries the dnb-service with the given query_params. E.g.:
 
         {"duns_number": "29393217", "page_size": 1}
         {"search_term": "brompton", "page_size": 10}
+
+    Responses are cached (keyed on the normalised query parameters) for
+    settings.DNB_SERVICE_CACHE_TTL seconds, or settings.DNB_SERVICE_NOT_FOUND_CACHE_TTL seconds
+    if nothing was found. Error responses are not cached.
+
+    As this is mostly called while handling a request, by default it waits for at most
+    settings.DNB_SERVICE_INTERACTIVE_RATE_LIMIT_MAX_WAIT seconds for the rate limit (see
+    wait_for_dnb_service_rate_limit()). Background tasks can wait for longer by passing
+    rate_limit_max_wait.
     """
     if not settings.DNB_SERVICE_BASE_URL:
         raise ImproperlyConfigured('The setting DNB_SERVICE_BASE_URL has not been set')
+
+    cache_key = _get_search_cache_key(query_params)
+    if settings.DNB_SERVICE_CACHE_TTL:
+        cached_response_data = cache.get(cache_key)
+        if cached_response_data is not None:
+            statsd.incr('dnb.search.cache.hit')
+            return _build_response(**cached_response_data)
+        statsd.incr('dnb.search.cache.miss')
+
+    if rate_limit_max_wait is None:
+        rate_limit_max_wait = settings.DNB_SERVICE_INTERACTIVE_RATE_LIMIT_MAX_WAIT
+
+    wait_for_dnb_service_rate_limit(max_wait=rate_limit_max_wait)
     response = api_client.request(
         'POST',
         'companies/search/',
@@ -94,10 +219,73 @@ def search_dnb(query_params):
         timeout=3.0,
     )
     statsd.incr(f'dnb.search.{response.status_code}')
+
+    cache_ttl = _get_search_response_cache_ttl(response)
+    if cache_ttl:
+        # Only the parts of the response that are used are cached (so that e.g. the request
+        # headers with the dnb-service token are not stored in the cache)
+        cached_response_data = {
+            'status_code': response.status_code,
+            'content': response.content,
+            'headers': dict(response.headers),
+        }
+        cache.set(cache_key, cached_response_data, timeout=cache_ttl)
+
+    return response
+
+
+def invalidate_dnb_company_cache(*duns_numbers):
+    """
+    Discards cached dnb-service responses for the given DUNS numbers (as used by get_company()).
+
+    Note that cached results of searches by search term are not discarded (and expire normally).
+    """
+    cache.delete_many(
+        [_get_search_cache_key({'duns_number': duns_number}) for duns_number in duns_numbers],
+    )
+
+
+def _get_search_cache_key(query_params):
+    normalised_query_params = {
+        key: value.strip() if isinstance(value, str) else value
+        for key, value in query_params.items()
+    }
+    serialised_query_params = json.dumps(
+        normalised_query_params,
+        sort_keys=True,
+        cls=DjangoJSONEncoder,
+    )
+    digest = sha256(serialised_query_params.encode('utf-8')).hexdigest()
+    return f'{SEARCH_CACHE_KEY_PREFIX}:{digest}'
+
+
+def _build_response(status_code, content, headers):
+    response = Response()
+    response.status_code = status_code
+    response._content = content
+    response.headers.update(headers)
     return response
 
 
-def get_company(duns_number):
+def _get_search_response_cache_ttl(response):
+    if response.status_code == status.HTTP_404_NOT_FOUND:
+        return settings.DNB_SERVICE_NOT_FOUND_CACHE_TTL
+
+    if response.status_code != status.HTTP_200_OK:
+        return 0
+
+    try:
+        has_results = bool(response.json().get('results'))
+    except ValueError:
+        return 0
+
+    if has_results:
+        return settings.DNB_SERVICE_CACHE_TTL
+
+    return min(settings.DNB_SERVICE_CACHE_TTL, settings.DNB_SERVICE_NOT_FOUND_CACHE_TTL)
+
+
+def get_company(duns_number, rate_limit_max_wait=None):
     """
     Pull data for the company with the given duns_number from DNB and
     returns a dict formatted for use with serializer of type CompanySerializer.
@@ -105,9 +293,14 @@ def get_company(duns_number):
     Raises exceptions if the company is not found, if multiple companies are
     found or if the `duns_number` for the company is not the same as the one
     we searched for.
+
+    rate_limit_max_wait is passed to search_dnb().
     """
     try:
-        dnb_response = search_dnb({'duns_number': duns_number})
+        dnb_response = search_dnb(
+            {'duns_number': duns_number},
+            rate_limit_max_wait=rate_limit_max_wait,
+        )
     except ConnectionError as exc:
         error_message = 'Encountered an error connecting to DNB service'
         logger.error(error_message)
@@ -294,10 +487,139 @@ def update_company_from_dnb(
             # a user
             company_serializer.partial_save(**company_kwargs)
 
-        update_comment = 'Updated from D&B'
-        if update_descriptor:
-            update_comment = f'{update_comment} [{update_descriptor}]'
-        reversion.set_comment(update_comment)
+        reversion.set_comment(_get_update_comment(update_descriptor))
+
+    transaction.on_commit(lambda: invalidate_dnb_company_cache(dh_company.duns_number))
+
+
+def bulk_update_companies_from_dnb(
+    dnb_companies_data,
+    fields_to_update=None,
+    update_descriptor='',
+):
+    """
+    Updates the companies matching a batch of company records from dnb-service (in the format
+    returned by the dnb-service API).
+
+    This is equivalent to calling update_company_from_dnb() for each record, but matching
+    companies are loaded using a single query and only changed fields are written (using a
+    single bulk update). One revision is created for all companies that had at least one field
+    changed. Companies with no changes only have their D&B sync status updated.
+
+    Records that don't match a company or that don't pass validation are logged and counted as
+    failures without stopping the rest of the batch.
+    """
+    fields_to_update = fields_to_update or ALL_DNB_UPDATED_SERIALIZER_FIELDS
+    dnb_companies = [format_dnb_company(data) for data in dnb_companies_data]
+    companies_by_duns_number = Company.objects.in_bulk(
+        [dnb_company['duns_number'] for dnb_company in dnb_companies],
+        field_name='duns_number',
+    )
+
+    changed_companies = {}
+    changed_fields = set()
+    successful_company_ids = []
+    failure_count = 0
+
+    for dnb_company in dnb_companies:
+        duns_number = dnb_company['duns_number']
+        dh_company = companies_by_duns_number.get(duns_number)
+
+        if not dh_company:
+            logger.error(
+                'Company matching duns_number was not found',
+                extra={
+                    'duns_number': duns_number,
+                    'dnb_company': dnb_company,
+                },
+            )
+            failure_count += 1
+            continue
+
+        company_data = {field: dnb_company[field] for field in fields_to_update}
+        company_serializer = DNBCompanySerializer(dh_company, data=company_data, partial=True)
+
+        if not company_serializer.is_valid():
+            logger.error(
+                'Data from D&B did not pass the Data Hub validation checks.',
+                extra={'dnb_company': company_data, 'errors': company_serializer.errors},
+            )
+            failure_count += 1
+            continue
+
+        for field, value in company_serializer.validated_data.items():
+            if getattr(dh_company, field) != value:
+                setattr(dh_company, field, value)
+                changed_fields.add(field)
+                changed_companies[dh_company.pk] = dh_company
+
+        successful_company_ids.append(dh_company.pk)
+
+    unchanged_company_ids = set(successful_company_ids) - changed_companies.keys()
+    _save_bulk_company_updates(
+        list(changed_companies.values()),
+        changed_fields,
+        unchanged_company_ids,
+        update_descriptor,
+    )
+
+    duns_numbers = [dnb_company['duns_number'] for dnb_company in dnb_companies]
+    transaction.on_commit(lambda: invalidate_dnb_company_cache(*duns_numbers))
+
+    return CompanyUpdateBatchReport(
+        successful_company_ids=tuple(successful_company_ids),
+        changed_company_ids=tuple(changed_companies.keys()),
+        failure_count=failure_count,
+    )
+
+
+def _save_bulk_company_updates(
+    changed_companies,
+    changed_fields,
+    unchanged_company_ids,
+    update_descriptor,
+):
+    sync_status_fields = {
+        'pending_dnb_investigation': False,
+        'dnb_modified_on': now(),
+    }
+
+    with transaction.atomic():
+        if changed_companies:
+            for dh_company in changed_companies:
+                for field, value in sync_status_fields.items():
+                    setattr(dh_company, field, value)
+
+            update_fields = [*sorted(changed_fields), *sync_status_fields.keys()]
+
+            with reversion.create_revision():
+                Company.objects.bulk_update(changed_companies, update_fields)
+
+                for dh_company in changed_companies:
+                    reversion.add_to_revision(dh_company)
+
+                reversion.set_comment(_get_update_comment(update_descriptor))
+
+            # bulk_update() doesn't send post_save, which is needed to e.g. sync the companies
+            # to Elasticsearch
+            for dh_company in changed_companies:
+                post_save.send(
+                    sender=Company,
+                    instance=dh_company,
+                    created=False,
+                    raw=False,
+                    using=transaction.get_connection().alias,
+                    update_fields=frozenset(update_fields),
+                )
+
+        Company.objects.filter(pk__in=unchanged_company_ids).update(**sync_status_fields)
+
+
+def _get_update_comment(update_descriptor):
+    update_comment = 'Updated from D&B'
+    if update_descriptor:
+        update_comment = f'{update_comment} [{update_descriptor}]'
+    return update_comment
 
 
 def get_company_update_page(last_updated_after, next_page=None):
@@ -327,6 +649,8 @@ def get_company_update_page(last_updated_after, next_page=None):
         }
         url = 'companies/'
 
+    wait_for_dnb_service_rate_limit()
+
     try:
         response = api_client.request(
             'GET',
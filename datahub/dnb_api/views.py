@@ -12,7 +12,11 @@ from rest_framework.views import APIView
 from datahub.company.models import CompanyPermission
 from datahub.company.serializers import CompanySerializer
 from datahub.core import statsd
-from datahub.core.exceptions import APIBadRequestException, APIUpstreamException
+from datahub.core.exceptions import (
+    APIBadRequestException,
+    APIServiceUnavailableException,
+    APIUpstreamException,
+)
 from datahub.core.permissions import HasPermissions
 from datahub.core.view_utils import enforce_request_content_type
 from datahub.dnb_api.link_company import CompanyAlreadyDNBLinkedException, link_company_with_dnb
@@ -29,6 +33,7 @@ from datahub.dnb_api.utils import (
     DNBServiceError,
     DNBServiceInvalidRequest,
     DNBServiceInvalidResponse,
+    DNBServiceTimeoutError,
     format_dnb_company_investigation,
     get_company,
     search_dnb,
@@ -59,7 +64,11 @@ class DNBCompanySearchView(APIView):
         with Data Hub company details if the company exists (and can be matched)
         on Data Hub.
         """
-        upstream_response = search_dnb(request.data)
+        try:
+            upstream_response = search_dnb(request.data)
+
+        except DNBServiceTimeoutError as exc:
+            raise APIServiceUnavailableException(str(exc))
 
         if upstream_response.status_code == status.HTTP_200_OK:
             response_body = upstream_response.json()
@@ -174,6 +183,9 @@ class DNBCompanyCreateView(APIView):
         except (DNBServiceConnectionError, DNBServiceError, DNBServiceInvalidResponse) as exc:
             raise APIUpstreamException(str(exc))
 
+        except DNBServiceTimeoutError as exc:
+            raise APIServiceUnavailableException(str(exc))
+
         except DNBServiceInvalidRequest as exc:
             raise APIBadRequestException(str(exc))
 
@@ -294,6 +306,9 @@ class DNBCompanyLinkView(APIView):
         ) as exc:
             raise APIUpstreamException(str(exc))
 
+        except DNBServiceTimeoutError as exc:
+            raise APIServiceUnavailableException(str(exc))
+
         except (
             DNBServiceInvalidRequest,
             CompanyAlreadyDNBLinkedException,
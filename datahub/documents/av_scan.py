@@ -1,15 +1,23 @@
+from contextlib import contextmanager
+from functools import lru_cache
 from logging import getLogger
+from time import perf_counter
 
 import requests
 from django.conf import settings
+from django_pglocks import advisory_lock
+from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError
 from requests_toolbelt.multipart.encoder import MultipartEncoder
 
+from datahub.core import statsd
 from datahub.documents.exceptions import VirusScanException
 from datahub.documents.utils import get_document_by_pk
 
 logger = getLogger(__name__)
 
+BYTES_PER_MB = 1024 * 1024
+
 
 class StreamWrapper:
     """Stream wrapper that plays nice with MultipartEncoder."""
@@ -34,6 +42,37 @@ class StreamWrapper:
         return self._remaining_bytes
 
 
+@lru_cache()
+def get_http_session():
+    """
+    Gets the HTTP session used for downloading and scanning documents.
+
+    The same session is used for all scans in a process so that connections are reused.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=settings.AV_V2_SERVICE_MAX_CONCURRENT_SCANS)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+@contextmanager
+def scan_slot():
+    """
+    Context manager that acquires one of AV_V2_SERVICE_MAX_CONCURRENT_SCANS scan slots.
+
+    Slots are advisory locks, so that the number of concurrent scans is limited across all
+    workers. Yields whether a slot was acquired (without waiting for one).
+    """
+    for slot in range(settings.AV_V2_SERVICE_MAX_CONCURRENT_SCANS):
+        with advisory_lock(f'av-scan-slot-{slot}', wait=False) as acquired:
+            if acquired:
+                yield True
+                return
+
+    yield False
+
+
 def perform_virus_scan(document_pk: str, download_url: str):
     """
     Virus scans an uploaded document.
@@ -77,8 +116,15 @@ def perform_virus_scan(document_pk: str, download_url: str):
 
 
 def _download_and_scan_file(document_pk: str, download_url: str):
-    """Virus scans a file stored on remote server."""
-    with requests.get(download_url, stream=True) as response:
+    """
+    Virus scans a file stored on remote server.
+
+    The file is streamed from the remote server to the AV service (without being held in
+    memory in its entirety).
+    """
+    start_time = perf_counter()
+
+    with get_http_session().get(download_url, stream=True, timeout=_get_timeout()) as response:
         try:
             response.raise_for_status()
         except HTTPError as exc:
@@ -86,8 +132,34 @@ def _download_and_scan_file(document_pk: str, download_url: str):
                 f'Unable to download the document with ID {document_pk} '
                 f'for scanning (status_code={exc.response.status_code}).',
             ) from exc
-        content = StreamWrapper(response.raw, response.headers['content-length'])
-        return _scan_stream(document_pk, content, response.headers['content-type'])
+        content_length = int(response.headers['content-length'])
+        content = StreamWrapper(response.raw, content_length)
+        result = _scan_stream(document_pk, content, response.headers['content-type'])
+
+    _record_scan_metrics(document_pk, content_length, perf_counter() - start_time)
+    return result
+
+
+def _get_timeout():
+    return (
+        settings.AV_V2_SERVICE_CONNECT_TIMEOUT,
+        settings.AV_V2_SERVICE_READ_TIMEOUT,
+    )
+
+
+def _record_scan_metrics(document_pk, num_bytes, elapsed_time):
+    size_in_mb = num_bytes / BYTES_PER_MB
+
+    with statsd.statsd().pipeline() as pipeline:
+        pipeline.incr('documents.av-scan.bytes', num_bytes)
+        pipeline.timing('documents.av-scan.duration', elapsed_time * 1000)
+        if num_bytes:
+            pipeline.timing('documents.av-scan.duration-per-mb', elapsed_time * 1000 / size_in_mb)
+
+    logger.info(
+        f'Scanned {size_in_mb:.2f} MB for document with ID {document_pk} in '
+        f'{elapsed_time:.2f} seconds.',
+    )
 
 
 def _multipart_encoder(document_pk, content, content_type):
@@ -105,12 +177,13 @@ def _multipart_encoder(document_pk, content, content_type):
 def _scan_stream(document_pk, content, content_type):
     """Virus scans a file-like object."""
     encoder = _multipart_encoder(document_pk, content, content_type)
-    response = requests.post(
+    response = get_http_session().post(
         # Assumes HTTP Basic auth in URL
         # see: https://github.com/uktrade/dit-clamav-rest
         settings.AV_V2_SERVICE_URL,
         data=encoder,
         headers={'Content-Type': encoder.content_type},
+        timeout=_get_timeout(),
     )
     response.raise_for_status()
     result = response.json()
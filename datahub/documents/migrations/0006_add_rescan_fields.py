@@ -0,0 +1,23 @@
+# Generated by Django 3.0.3 on 2020-02-17 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0005_switch_to_booleanfield_with_null_kwarg'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='num_rescans',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='rescan_scheduled_on',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -39,6 +39,11 @@ class Document(BaseModel, ArchivableModel):
     scanned_on = models.DateTimeField(
         null=True, blank=True,
     )
+    # When a failed or stuck scan was last rescheduled by the rescan_documents task
+    rescan_scheduled_on = models.DateTimeField(
+        null=True, blank=True,
+    )
+    num_rescans = models.PositiveSmallIntegerField(default=0)
 
     av_clean = models.BooleanField(null=True, db_index=True)
     av_reason = models.TextField(blank=True)
@@ -84,6 +89,18 @@ class Document(BaseModel, ArchivableModel):
 
         return self.status
 
+    def schedule_av_rescan(self):
+        """Resets the state of a failed or stuck AV scan and schedules another AV scan."""
+        self.scan_initiated_on = None
+        self.av_reason = ''
+        self.rescan_scheduled_on = now()
+        self.num_rescans += 1
+        self._update_status(UploadStatus.VIRUS_SCANNING_SCHEDULED)
+
+        virus_scan_document.apply_async(args=(str(self.pk),))
+
+        return self.status
+
     def mark_deletion_pending(self):
         """Marks document as scheduled for deletion."""
         return self._update_status(UploadStatus.DELETION_PENDING)
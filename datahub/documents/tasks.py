@@ -1,14 +1,22 @@
+from datetime import timedelta
 from logging import getLogger
 
 from celery import shared_task
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
 from django_pglocks import advisory_lock
 
-from datahub.documents.av_scan import perform_virus_scan
+from datahub.documents.av_scan import perform_virus_scan, scan_slot
 from datahub.documents.utils import get_document_by_pk, perform_delete_document
 
 logger = getLogger(__name__)
 
+# Number of seconds to wait before trying again when all scan slots are in use
+SCAN_SLOT_RETRY_COUNTDOWN = 30
+
 
 @shared_task
 @transaction.atomic
@@ -23,16 +31,67 @@ def delete_document(document_pk):
         raise
 
 
-@shared_task
-def virus_scan_document(document_pk: str):
+@shared_task(bind=True, max_retries=100)
+def virus_scan_document(self, document_pk: str):
     """Virus scans an uploaded document.
 
     The file is streamed from S3 to the anti-virus service.
 
+    If the maximum number of concurrent scans has been reached, the scan is retried later.
+
     Any errors are logged and sent to Sentry.
     """
-    with advisory_lock(f'av-scan-{document_pk}'):
+    with advisory_lock(f'av-scan-{document_pk}'), scan_slot() as slot_acquired:
+        if not slot_acquired:
+            raise self.retry(countdown=SCAN_SLOT_RETRY_COUNTDOWN)
+
         document = get_document_by_pk(document_pk)
         if document:
             download_url = document.get_signed_url(allow_unsafe=True)
             perform_virus_scan(document_pk, download_url)
+
+
+@shared_task(acks_late=True, priority=9)
+def rescan_documents():
+    """
+    Schedules virus scans for documents whose previous scans failed or got stuck.
+
+    Scans are considered stuck if they have been scheduled or in progress for longer than
+    AV_V2_SERVICE_STUCK_SCAN_THRESHOLD. Failed scans are also only rescheduled if they were not
+    rescheduled within that time.
+
+    Documents are rescanned at most AV_V2_SERVICE_MAX_RESCANS times, so that documents that
+    can never be scanned are not rescanned forever.
+    """
+    with advisory_lock('rescan_documents', wait=False) as lock_held:
+        if not lock_held:
+            logger.warning('Another rescan_documents task is in progress. Aborting...')
+            return
+
+        from datahub.documents.models import Document, UploadStatus
+
+        stuck_threshold = now() - timedelta(seconds=settings.AV_V2_SERVICE_STUCK_SCAN_THRESHOLD)
+        not_recently_rescheduled = (
+            Q(rescan_scheduled_on__isnull=True) | Q(rescan_scheduled_on__lt=stuck_threshold)
+        )
+        documents = Document.objects.annotate(
+            scheduled_on=Coalesce('rescan_scheduled_on', 'uploaded_on'),
+        ).filter(
+            (Q(status=UploadStatus.VIRUS_SCANNING_FAILED) & not_recently_rescheduled)
+            | Q(status=UploadStatus.VIRUS_SCANNING_SCHEDULED, scheduled_on__lt=stuck_threshold)
+            | Q(
+                status=UploadStatus.VIRUS_SCANNING_IN_PROGRESS,
+                scan_initiated_on__lt=stuck_threshold,
+            ),
+            num_rescans__lt=settings.AV_V2_SERVICE_MAX_RESCANS,
+        )
+        num_rescheduled = 0
+
+        for document in documents.iterator():
+            # Skip documents that are being scanned at the moment
+            with advisory_lock(f'av-scan-{document.pk}', wait=False) as document_lock_held:
+                if document_lock_held:
+                    document.schedule_av_rescan()
+                    num_rescheduled += 1
+
+        logger.info(f'Scheduled virus scans for {num_rescheduled} documents.')
@@ -0,0 +1,44 @@
+import pytest
+from django.conf import settings
+from requests_toolbelt.multipart.decoder import MultipartDecoder
+
+# The EICAR anti-virus test file (which anti-virus software detects as malware)
+EICAR_TEST_FILE = rb'X5O!P%@AP[4\PZX54(P^)7CC)7}$EICAR-STANDARD-ANTIVIRUS-TEST-FILE!$H+H*'
+
+
+class FakeAVService:
+    """
+    Local stand-in for the AV service.
+
+    Files containing the EICAR test file are reported as malware. The contents of all scanned
+    files are recorded in scanned_files.
+    """
+
+    def __init__(self):
+        """Initialises the service."""
+        self.scanned_files = []
+
+    def scan(self, request, context):
+        """Scans the file in a multipart request (as a requests_mock callback)."""
+        body = request.body
+        if hasattr(body, 'read'):
+            body = body.read()
+
+        decoder = MultipartDecoder(body, request.headers['Content-Type'])
+        content = decoder.parts[0].content
+        self.scanned_files.append(content)
+
+        is_malware = EICAR_TEST_FILE in content
+        return {
+            'malware': is_malware,
+            'reason': 'Eicar-Test-Signature' if is_malware else None,
+            'time': 0.1,
+        }
+
+
+@pytest.fixture
+def fake_av_service(requests_mock):
+    """Mocks the AV service with a FakeAVService."""
+    av_service = FakeAVService()
+    requests_mock.post(settings.AV_V2_SERVICE_URL, json=av_service.scan)
+    yield av_service
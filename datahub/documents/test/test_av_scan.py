@@ -1,14 +1,22 @@
+from contextlib import contextmanager
 from io import BytesIO
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
 from requests.exceptions import HTTPError
 from requests_toolbelt.multipart.decoder import MultipartDecoder
 from rest_framework import status
 
-from datahub.documents.av_scan import _multipart_encoder, StreamWrapper, VirusScanException
+from datahub.documents.av_scan import (
+    _multipart_encoder,
+    get_http_session,
+    scan_slot,
+    StreamWrapper,
+    VirusScanException,
+)
 from datahub.documents.models import Document, UploadStatus
 from datahub.documents.tasks import virus_scan_document
+from datahub.documents.test.conftest import EICAR_TEST_FILE
 from datahub.documents.test.factories import DocumentFactory
 
 pytestmark = pytest.mark.django_db
@@ -160,3 +168,93 @@ def test_file_is_being_encoded():
     decoder = MultipartDecoder(response_data, form.content_type)
 
     assert decoder.parts[0].content == data
+
+
+@pytest.mark.parametrize(
+    'content,expected_av_clean',
+    (
+        (b'hello!', True),
+        (b'hello!' + EICAR_TEST_FILE, False),
+    ),
+)
+@patch.object(Document, 'get_signed_url')
+def test_virus_scan_document_streams_file_to_av_service(
+    get_signed_url_mock,
+    content,
+    expected_av_clean,
+    requests_mock,
+    fake_av_service,
+):
+    """Tests that the downloaded file is streamed to the AV service in its entirety."""
+    get_signed_url_mock.return_value = 'http://url'
+    document = DocumentFactory()
+    requests_mock.get(
+        'http://url',
+        content=content,
+        headers={
+            'Content-Type': 'text/plain',
+            'Content-Length': str(len(content)),
+        },
+    )
+
+    virus_scan_document.apply(args=(str(document.id), )).get()
+    document.refresh_from_db()
+
+    assert fake_av_service.scanned_files == [content]
+    assert document.av_clean is expected_av_clean
+    assert document.status == UploadStatus.VIRUS_SCANNED
+
+
+@patch.object(Document, 'get_signed_url')
+def test_virus_scan_document_uses_timeouts(get_signed_url_mock, requests_mock, settings):
+    """Tests that timeouts are used when downloading and scanning files."""
+    settings.AV_V2_SERVICE_CONNECT_TIMEOUT = 2
+    settings.AV_V2_SERVICE_READ_TIMEOUT = 30
+    get_signed_url_mock.return_value = 'http://url'
+    document = DocumentFactory()
+    requests_mock.get(
+        'http://url',
+        text='hello!',
+        headers={
+            'Content-Type': 'text/plain',
+            'Content-Length': '6',
+        },
+    )
+    requests_mock.post('http://av-service/', json={'malware': False})
+
+    virus_scan_document.apply(args=(str(document.id), )).get()
+
+    assert [request.timeout for request in requests_mock.request_history] == [(2, 30), (2, 30)]
+
+
+@patch('datahub.documents.tasks.perform_virus_scan')
+def test_virus_scan_document_retries_if_no_scan_slot_available(
+    perform_virus_scan_mock,
+    monkeypatch,
+):
+    """Tests that the scan is retried later if all scan slots are in use."""
+    slot_availability = iter((False, True))
+
+    @contextmanager
+    def _scan_slot():
+        yield next(slot_availability)
+
+    scan_slot_mock = Mock(side_effect=_scan_slot)
+    monkeypatch.setattr('datahub.documents.tasks.scan_slot', scan_slot_mock)
+    document = DocumentFactory()
+
+    virus_scan_document.apply(args=(str(document.id), )).get()
+
+    assert scan_slot_mock.call_count == 2
+    assert perform_virus_scan_mock.call_count == 1
+
+
+def test_scan_slot():
+    """Tests that a scan slot is acquired if one is available."""
+    with scan_slot() as acquired:
+        assert acquired
+
+
+def test_get_http_session_reuses_session():
+    """Tests that the same HTTP session is used for all scans."""
+    assert get_http_session() is get_http_session()
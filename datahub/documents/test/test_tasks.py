@@ -1,7 +1,13 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
 import pytest
-from django.utils.timezone import now
+from django.utils.timezone import now, utc
+from freezegun import freeze_time
 
-from datahub.documents.tasks import delete_document
+from datahub.documents.models import UploadStatus
+from datahub.documents.tasks import delete_document, rescan_documents
+from datahub.documents.test.factories import DocumentFactory
 from datahub.documents.test.my_entity_document.models import MyEntityDocument
 from datahub.documents.utils import get_bucket_name
 
@@ -67,3 +73,137 @@ def test_delete_document_s3_failure(s3_stubber):
 
     qs = MyEntityDocument.objects.include_objects_deletion_pending()
     assert qs.filter(pk=entity_document.pk).exists() is True
+
+
+@freeze_time('2020-02-01 12:00:00')
+@patch('datahub.documents.models.virus_scan_document')
+def test_rescan_documents(virus_scan_document_mock, settings):
+    """Tests that failed and stuck virus scans are rescheduled."""
+    settings.AV_V2_SERVICE_STUCK_SCAN_THRESHOLD = 60 * 60
+    recent_datetime = datetime(2020, 2, 1, 11, 30, tzinfo=utc)
+    old_datetime = datetime(2020, 2, 1, 10, 30, tzinfo=utc)
+
+    documents_to_rescan = [
+        DocumentFactory(
+            status=UploadStatus.VIRUS_SCANNING_FAILED,
+            scan_initiated_on=recent_datetime,
+            av_reason='Error',
+        ),
+        DocumentFactory(
+            status=UploadStatus.VIRUS_SCANNING_SCHEDULED,
+            uploaded_on=old_datetime,
+        ),
+        DocumentFactory(
+            status=UploadStatus.VIRUS_SCANNING_IN_PROGRESS,
+            scan_initiated_on=old_datetime,
+        ),
+    ]
+    documents_to_ignore = [
+        DocumentFactory(
+            status=UploadStatus.VIRUS_SCANNING_SCHEDULED,
+            uploaded_on=recent_datetime,
+        ),
+        DocumentFactory(
+            status=UploadStatus.VIRUS_SCANNING_IN_PROGRESS,
+            scan_initiated_on=recent_datetime,
+        ),
+        DocumentFactory(
+            status=UploadStatus.VIRUS_SCANNED,
+            scan_initiated_on=old_datetime,
+            scanned_on=old_datetime + timedelta(seconds=1),
+        ),
+    ]
+
+    rescan_documents.apply()
+
+    for document in documents_to_rescan:
+        document.refresh_from_db()
+        assert document.status == UploadStatus.VIRUS_SCANNING_SCHEDULED
+        assert document.scan_initiated_on is None
+        assert document.av_reason == ''
+        assert document.rescan_scheduled_on == now()
+        assert document.num_rescans == 1
+
+    for document in documents_to_ignore:
+        original_status = document.status
+        document.refresh_from_db()
+        assert document.status == original_status
+
+    scheduled_document_pks = {
+        call[1]['args'][0] for call in virus_scan_document_mock.apply_async.call_args_list
+    }
+    assert scheduled_document_pks == {str(document.pk) for document in documents_to_rescan}
+
+
+@freeze_time('2020-02-01 12:00:00')
+@patch('datahub.documents.models.virus_scan_document')
+def test_rescan_documents_ignores_recently_rescheduled_documents(
+    virus_scan_document_mock,
+    settings,
+):
+    """
+    Tests that documents whose scans were rescheduled within the stuck scan threshold are not
+    rescheduled again (even if they were uploaded before the threshold).
+    """
+    settings.AV_V2_SERVICE_STUCK_SCAN_THRESHOLD = 60 * 60
+    recent_datetime = datetime(2020, 2, 1, 11, 30, tzinfo=utc)
+    old_datetime = datetime(2020, 2, 1, 10, 30, tzinfo=utc)
+
+    document_to_rescan = DocumentFactory(
+        status=UploadStatus.VIRUS_SCANNING_SCHEDULED,
+        uploaded_on=old_datetime - timedelta(hours=1),
+        rescan_scheduled_on=old_datetime,
+        num_rescans=1,
+    )
+    # E.g. waiting for a scan slot
+    DocumentFactory(
+        status=UploadStatus.VIRUS_SCANNING_SCHEDULED,
+        uploaded_on=old_datetime,
+        rescan_scheduled_on=recent_datetime,
+        num_rescans=1,
+    )
+    DocumentFactory(
+        status=UploadStatus.VIRUS_SCANNING_FAILED,
+        uploaded_on=old_datetime,
+        rescan_scheduled_on=recent_datetime,
+        num_rescans=1,
+    )
+
+    rescan_documents.apply()
+
+    virus_scan_document_mock.apply_async.assert_called_once_with(
+        args=(str(document_to_rescan.pk),),
+    )
+    document_to_rescan.refresh_from_db()
+    assert document_to_rescan.rescan_scheduled_on == now()
+    assert document_to_rescan.num_rescans == 2
+
+
+@freeze_time('2020-02-01 12:00:00')
+@patch('datahub.documents.models.virus_scan_document')
+def test_rescan_documents_stops_after_max_rescans(virus_scan_document_mock, settings):
+    """Tests that documents are not rescheduled once they have been rescanned too many times."""
+    settings.AV_V2_SERVICE_STUCK_SCAN_THRESHOLD = 60 * 60
+    settings.AV_V2_SERVICE_MAX_RESCANS = 3
+    old_datetime = datetime(2020, 2, 1, 10, 30, tzinfo=utc)
+
+    document_to_rescan = DocumentFactory(
+        status=UploadStatus.VIRUS_SCANNING_FAILED,
+        rescan_scheduled_on=old_datetime,
+        num_rescans=2,
+    )
+    document_to_ignore = DocumentFactory(
+        status=UploadStatus.VIRUS_SCANNING_FAILED,
+        rescan_scheduled_on=old_datetime,
+        num_rescans=3,
+        av_reason='Error',
+    )
+
+    rescan_documents.apply()
+
+    virus_scan_document_mock.apply_async.assert_called_once_with(
+        args=(str(document_to_rescan.pk),),
+    )
+    document_to_ignore.refresh_from_db()
+    assert document_to_ignore.status == UploadStatus.VIRUS_SCANNING_FAILED
+    assert document_to_ignore.num_rescans == 3
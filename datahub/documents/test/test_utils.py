@@ -0,0 +1,86 @@
+import gzip
+import os
+from unittest.mock import Mock
+
+import pytest
+
+from datahub.documents.utils import get_bucket_name, upload_gzipped_stream_to_s3
+
+
+@pytest.fixture
+def mock_s3_client(monkeypatch):
+    """Returns a mock S3 client."""
+    mock_client = Mock()
+    mock_client.create_multipart_upload.return_value = {'UploadId': 'upload-id'}
+    mock_client.upload_part.side_effect = lambda **kwargs: {
+        'ETag': f'etag-{kwargs["PartNumber"]}',
+    }
+    monkeypatch.setattr(
+        'datahub.documents.utils.get_s3_client_for_bucket',
+        lambda bucket_id: mock_client,
+    )
+    return mock_client
+
+
+class TestUploadGzippedStreamToS3:
+    """Tests for upload_gzipped_stream_to_s3()."""
+
+    def test_uploads_in_parts(self, monkeypatch, mock_s3_client):
+        """Test that data is compressed and uploaded in parts of at least the minimum size."""
+        part_size = 64 * 1024
+        monkeypatch.setattr('datahub.documents.utils.MULTIPART_UPLOAD_PART_SIZE', part_size)
+        bucket_name = get_bucket_name('default')
+        # Random data is used so that the compressed data is not much smaller than the input
+        chunks = [os.urandom(10 * 1024) for _ in range(30)]
+
+        upload_gzipped_stream_to_s3(
+            'default',
+            'test/file.csv.gz',
+            iter(chunks),
+            ContentType='application/gzip',
+        )
+
+        mock_s3_client.create_multipart_upload.assert_called_once_with(
+            Bucket=bucket_name,
+            Key='test/file.csv.gz',
+            ContentType='application/gzip',
+        )
+
+        upload_part_kwargs = [call[1] for call in mock_s3_client.upload_part.call_args_list]
+        bodies = [kwargs['Body'] for kwargs in upload_part_kwargs]
+
+        assert len(bodies) > 1
+        assert all(len(body) >= part_size for body in bodies[:-1])
+        assert [kwargs['PartNumber'] for kwargs in upload_part_kwargs] == list(
+            range(1, len(bodies) + 1),
+        )
+        assert gzip.decompress(b''.join(bodies)) == b''.join(chunks)
+
+        mock_s3_client.complete_multipart_upload.assert_called_once_with(
+            Bucket=bucket_name,
+            Key='test/file.csv.gz',
+            MultipartUpload={
+                'Parts': [
+                    {'ETag': f'etag-{part_number}', 'PartNumber': part_number}
+                    for part_number in range(1, len(bodies) + 1)
+                ],
+            },
+            UploadId='upload-id',
+        )
+        mock_s3_client.abort_multipart_upload.assert_not_called()
+
+    def test_aborts_upload_on_error(self, mock_s3_client):
+        """Test that the multipart upload is aborted if an error occurs."""
+        def _failing_chunks():
+            yield b'data'
+            raise ValueError
+
+        with pytest.raises(ValueError):
+            upload_gzipped_stream_to_s3('default', 'test/file.csv.gz', _failing_chunks())
+
+        mock_s3_client.abort_multipart_upload.assert_called_once_with(
+            Bucket=get_bucket_name('default'),
+            Key='test/file.csv.gz',
+            UploadId='upload-id',
+        )
+        mock_s3_client.complete_multipart_upload.assert_not_called()
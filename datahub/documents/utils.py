@@ -1,4 +1,6 @@
+import zlib
 from functools import lru_cache
+from io import BytesIO
 from logging import getLogger
 
 import boto3
@@ -11,6 +13,9 @@ from datahub.documents.exceptions import DocumentDeleteException
 
 logger = getLogger(__name__)
 
+# S3 requires all parts of a multipart upload apart from the last to be at least 5 MiB
+MULTIPART_UPLOAD_PART_SIZE = 5 * 1024 * 1024
+
 
 def get_document_by_pk(document_pk):
     """
@@ -68,6 +73,62 @@ def sign_s3_url(bucket_id, key, method='get_object', expires=3600):
     )
 
 
+def upload_gzipped_stream_to_s3(bucket_id, key, chunks, **extra_args):
+    """
+    Compresses an iterable of byte strings using gzip and uploads the result to S3.
+
+    A multipart upload is used so that the data never has to be held in memory or on disk in its
+    entirety. The upload is aborted if an error occurs.
+
+    Any extra keyword arguments are passed to create_multipart_upload (e.g. ContentType).
+    """
+    client = get_s3_client_for_bucket(bucket_id)
+    bucket_name = get_bucket_name(bucket_id)
+
+    upload_id = client.create_multipart_upload(
+        Bucket=bucket_name,
+        Key=key,
+        **extra_args,
+    )['UploadId']
+    parts = []
+
+    def _upload_part(body):
+        part_number = len(parts) + 1
+        response = client.upload_part(
+            Body=body,
+            Bucket=bucket_name,
+            Key=key,
+            PartNumber=part_number,
+            UploadId=upload_id,
+        )
+        parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+
+    # wbits=16 + MAX_WBITS produces a gzip (rather than zlib) stream
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    buffer = BytesIO()
+
+    try:
+        for chunk in chunks:
+            buffer.write(compressor.compress(chunk))
+
+            if buffer.tell() >= MULTIPART_UPLOAD_PART_SIZE:
+                _upload_part(buffer.getvalue())
+                buffer = BytesIO()
+
+        buffer.write(compressor.flush())
+        _upload_part(buffer.getvalue())
+
+        client.complete_multipart_upload(
+            Bucket=bucket_name,
+            Key=key,
+            MultipartUpload={'Parts': parts},
+            UploadId=upload_id,
+        )
+    except Exception:
+        client.abort_multipart_upload(Bucket=bucket_name, Key=key, UploadId=upload_id)
+        raise
+
+
 def perform_delete_document(document_pk):
     """
     Deletes Document and corresponding S3 file.
@@ -532,6 +532,8 @@ class InvestmentProject(
         indexes = [
             # For activity stream
             models.Index(fields=('created_on', 'id')),
+            # For incremental (updated_since) dataset API requests
+            models.Index(fields=('modified_on', 'id')),
         ]
 
     def get_associated_advisers(self):
@@ -9,14 +9,15 @@ from datahub.investment.project.report.models import SPIReport
 class SPIReportAdmin(admin.ModelAdmin):
     """SPI Report admin."""
 
-    fields = ('id', 'created_on')
+    fields = ('id', 'created_on', 'rows_refreshed_on', 'is_full_refresh')
     readonly_fields = fields
 
     list_display = (
-        'created_on', 'report',
+        'created_on', 'rows_refreshed_on', 'is_full_refresh', 'report',
     )
     list_filter = (
         'created_on',
+        'is_full_refresh',
     )
     date_hierarchy = 'created_on'
 
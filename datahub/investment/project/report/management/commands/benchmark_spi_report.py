@@ -0,0 +1,155 @@
+from copy import copy
+from logging import getLogger
+from time import perf_counter
+from uuid import uuid4
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.base import ModelState
+from django.db.transaction import atomic
+
+from datahub.core.constants import InvestmentProjectStage as Stage
+from datahub.core.exceptions import SimulationRollback
+from datahub.interaction.models import Interaction
+from datahub.investment.project.models import InvestmentProject, InvestmentProjectStageLog
+from datahub.investment.project.report.spi import (
+    ALL_SPI_SERVICE_IDS,
+    refresh_spi_report_rows,
+    write_report,
+)
+
+logger = getLogger(__name__)
+
+BATCH_SIZE = 1000
+BYTES_PER_MB = 1024 * 1024
+
+
+class _CountingSink:
+    """Stands in for the report file (and only counts what is written to it)."""
+
+    def __init__(self):
+        """Initialises the counts."""
+        self.num_lines = 0
+        self.num_bytes = 0
+
+    def write(self, line):
+        """Counts a line of the report."""
+        self.num_lines += 1
+        self.num_bytes += len(line)
+
+
+class Command(BaseCommand):
+    """Command for measuring the speed of generating the SPI report."""
+
+    help = """Measures how long it takes to refresh all SPI report rows and to generate the SPI
+report from them with a large number of investment projects.
+
+The investment projects are copies of the oldest existing investment project (including its SPI
+interactions), and are each given a stage log entry for being moved to won. They are created in
+a transaction that is rolled back once the report has been generated.
+"""
+    confirm_msg = """
+This temporarily adds investment projects to the database.
+Are you sure you want to do this?
+
+    Type 'yes' to continue, or 'no' to cancel: """
+
+    def add_arguments(self, parser):
+        """Define extra arguments."""
+        parser.add_argument(
+            '--num-projects',
+            type=int,
+            default=50000,
+            help='Number of investment projects to generate.',
+        )
+        parser.add_argument(
+            '--noinput', '--no-input', action='store_false', dest='interactive',
+            help='Tells Django to NOT prompt the user for input of any kind.',
+        )
+
+    def handle(self, *args, **options):
+        """Executes the command."""
+        if options['interactive'] and input(self.confirm_msg) != 'yes':
+            logger.info('Command cancelled')
+            return
+
+        template = InvestmentProject.objects.order_by('created_on').first()
+        if not template:
+            raise CommandError('At least one investment project is needed as a template.')
+
+        num_projects = options['num_projects']
+
+        try:
+            with atomic():
+                _generate_investment_projects(template, num_projects)
+
+                start_time = perf_counter()
+                num_refreshed = refresh_spi_report_rows()
+                elapsed_time = perf_counter() - start_time
+
+                logger.info(
+                    f'Refreshing all SPI report rows with {num_projects} generated investment '
+                    f'projects took {elapsed_time:.2f} seconds ({num_refreshed} rows, '
+                    f'{num_refreshed / elapsed_time:.0f} rows per second).',
+                )
+
+                sink = _CountingSink()
+                start_time = perf_counter()
+                write_report(sink)
+                elapsed_time = perf_counter() - start_time
+
+                # The byte order mark and the header are not counted as rows
+                num_rows = sink.num_lines - 2
+                logger.info(
+                    f'Generating the SPI report with {num_projects} generated investment projects '
+                    f'took {elapsed_time:.2f} seconds ({num_rows} rows, '
+                    f'{sink.num_bytes / BYTES_PER_MB:.1f} MB, '
+                    f'{num_rows / elapsed_time:.0f} rows per second).',
+                )
+
+                raise SimulationRollback()
+        except SimulationRollback:
+            logger.info('The generated investment projects have been rolled back.')
+
+
+def _generate_investment_projects(template, num_projects):
+    # bulk_create() is used so that signal receivers (e.g. for syncing to Elasticsearch) are not
+    # called
+    template_interactions = list(
+        Interaction.objects.filter(
+            investment_project=template,
+            service_id__in=ALL_SPI_SERVICE_IDS,
+        ),
+    )
+
+    for start in range(0, num_projects, BATCH_SIZE):
+        projects = [
+            _copy_with_new_pk(template)
+            for _ in range(min(BATCH_SIZE, num_projects - start))
+        ]
+        InvestmentProject.objects.bulk_create(projects)
+
+        InvestmentProjectStageLog.objects.bulk_create(
+            InvestmentProjectStageLog(
+                investment_project=project,
+                stage_id=Stage.won.value.id,
+                created_on=project.created_on,
+            )
+            for project in projects
+        )
+
+        interactions = []
+        for project in projects:
+            for template_interaction in template_interactions:
+                interaction = _copy_with_new_pk(template_interaction)
+                interaction.investment_project = project
+                interactions.append(interaction)
+
+        Interaction.objects.bulk_create(interactions)
+
+
+def _copy_with_new_pk(obj):
+    obj_copy = copy(obj)
+    # The copy gets its own state (as otherwise cached related objects would be shared)
+    obj_copy._state = ModelState()
+    obj_copy.pk = uuid4()
+    return obj_copy
@@ -0,0 +1,34 @@
+# Generated by Django 3.0.3 on 2020-02-17 10:00
+
+import django.contrib.postgres.fields.jsonb
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investment', '0002_add_modified_on_id_index'),
+        ('report', '0002_rename_change_permissions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='spireport',
+            name='rows_refreshed_on',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='SPIReportRow',
+            fields=[
+                ('investment_project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='spi_report_row', serialize=False, to='investment.InvestmentProject')),
+                ('data', django.contrib.postgres.fields.jsonb.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('refreshed_on', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'SPI report row',
+                'default_permissions': (),
+            },
+        ),
+    ]
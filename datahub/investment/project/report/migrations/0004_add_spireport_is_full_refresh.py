@@ -0,0 +1,18 @@
+# Generated by Django 3.0.3 on 2020-02-17 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report', '0003_add_spireportrow'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='spireport',
+            name='is_full_refresh',
+            field=models.BooleanField(default=True),
+        ),
+    ]
@@ -1,6 +1,8 @@
 import uuid
 
 from django.conf import settings
+from django.contrib.postgres.fields import JSONField
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 from datahub.core.models import BaseModel
@@ -30,6 +32,12 @@ class SPIReport(BaseModel):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
 
     s3_key = models.CharField(max_length=MAX_LENGTH)
+    # When the SPI report rows that the report was assembled from were refreshed (this is null
+    # for reports generated before SPI report rows were introduced)
+    rows_refreshed_on = models.DateTimeField(null=True, blank=True)
+    # Whether all SPI report rows were refreshed before the report was assembled (only the
+    # latest report generated after an incremental refresh is kept)
+    is_full_refresh = models.BooleanField(default=True)
 
     class Meta:
         verbose_name = 'SPI report'
@@ -40,3 +48,31 @@ class SPIReport(BaseModel):
     def get_absolute_url(self):
         """Generate pre-signed download URL."""
         return sign_s3_url('report', self.s3_key)
+
+
+class SPIReportRow(models.Model):
+    """
+    The SPI report values for an investment project.
+
+    These are refreshed by the generate_spi_report task (only for investment projects that
+    have changed since the previous report, apart from during full refreshes) and SPI reports
+    are assembled from them.
+    """
+
+    investment_project = models.OneToOneField(
+        'investment.InvestmentProject',
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='spi_report_row',
+    )
+    # The values of the row, keyed by column title
+    data = JSONField(encoder=DjangoJSONEncoder)
+    refreshed_on = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'SPI report row'
+        default_permissions = ()
+
+    def __str__(self):
+        """Human-readable representation."""
+        return f'SPI report row for {self.investment_project_id}'
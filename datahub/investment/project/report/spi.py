@@ -11,22 +11,33 @@ SPI3        - formatted list of propositions, only created by IST
 SPI5_START  - when project has been moved to won
 SPI5_END    - earliest interaction when aftercare was offered, only for new investor,
               only for IST managed projects
+
+All the values are calculated by the database in the report query set (using subqueries),
+rather than by running further queries for each investment project.
+
+The rows of the report are stored (as SPIReportRow objects) and only refreshed for investment
+projects that have changed since the previous refresh. Reports are assembled from the stored rows.
 """
 from dateutil.parser import parse as dateutil_parse
-from django.db.models import Q
+from django.db.models import F, Min, OuterRef, Q, Subquery
+from django.db.transaction import atomic
+from django.utils.timezone import now
 
 from datahub.core.constants import InvestmentProjectStage as Stage, Service
 from datahub.core.csv import csv_iterator
 from datahub.core.query_utils import (
+    get_aggregate_subquery,
     get_array_agg_subquery,
     get_full_name_expression,
     JSONBBuildObject,
 )
+from datahub.core.utils import slice_iterable_into_chunks
 from datahub.interaction.models import Interaction
 from datahub.investment.project.constants import InvestorType
-from datahub.investment.project.models import InvestmentProject
+from datahub.investment.project.models import InvestmentProject, InvestmentProjectStageLog
 from datahub.investment.project.proposition.constants import PropositionStatus
 from datahub.investment.project.proposition.models import Proposition
+from datahub.investment.project.report.models import SPIReportRow
 from datahub.metadata.models import Team
 from datahub.metadata.query_utils import get_service_name_subquery
 
@@ -52,6 +63,8 @@ SPI5_END_SERVICE_IDS = {
 
 ALL_SPI_SERVICE_IDS = SPI1_END_SERVICE_IDS | SPI2_START_SERVICE_IDS | SPI5_END_SERVICE_IDS
 
+SPI_REPORT_ROW_BATCH_SIZE = 1000
+
 
 def format_date(d):
     """Date format used in the report."""
@@ -61,12 +74,99 @@ def format_date(d):
 
 
 def write_report(file):
-    """Write CSV report."""
-    spi_report = SPIReport()
-    for line in csv_iterator(spi_report.rows(), spi_report.field_titles):
+    """
+    Write CSV report.
+
+    The report is assembled from the stored SPI report rows (so refresh_spi_report_rows() should
+    be called first).
+    """
+    rows = SPIReportRow.objects.order_by(
+        'investment_project__created_on',
+    ).values_list(
+        'data',
+        flat=True,
+    )
+    for line in csv_iterator(rows.iterator(), SPIReport.field_titles):
         file.write(line)
 
 
+def refresh_spi_report_rows(modified_since=None, refreshed_on=None):
+    """
+    Refreshes the stored SPI report rows.
+
+    If modified_since is specified, only the rows of investment projects that have changed (or
+    whose interactions, stage log or propositions have changed) since then, or that don't have
+    a stored row yet, are refreshed. Otherwise, all rows are refreshed.
+
+    Changes that aren't recorded against any of these (such as deleted interactions or
+    renamed advisers) are only picked up by full refreshes. Similarly, when an interaction is
+    moved to another investment project, only the row of the new project is refreshed, so the
+    row of the old project keeps stale SPI1, SPI2 and SPI5 values until the next full refresh.
+
+    Returns the number of rows refreshed.
+    """
+    if refreshed_on is None:
+        refreshed_on = now()
+
+    queryset = get_spi_report_queryset()
+    if modified_since:
+        queryset = queryset.filter(_get_changed_since_filter(modified_since))
+
+    spi_report = SPIReport()
+    spi_report_rows = (
+        SPIReportRow(
+            investment_project_id=investment_project.pk,
+            data=_get_storable_row(spi_report.get_row(investment_project)),
+            refreshed_on=refreshed_on,
+        )
+        for investment_project in queryset.iterator()
+    )
+
+    num_refreshed = 0
+    for batch in slice_iterable_into_chunks(spi_report_rows, SPI_REPORT_ROW_BATCH_SIZE):
+        with atomic():
+            SPIReportRow.objects.filter(pk__in=[row.pk for row in batch]).delete()
+            SPIReportRow.objects.bulk_create(batch)
+
+        num_refreshed += len(batch)
+
+    return num_refreshed
+
+
+def _get_changed_since_filter(modified_since):
+    """
+    Gets a filter for investment projects with SPI values that may have changed since the
+    specified date and time.
+    """
+    changed_interactions = Interaction.objects.filter(
+        investment_project_id__isnull=False,
+        modified_on__gte=modified_since,
+    ).values('investment_project_id')
+    new_stage_log_entries = InvestmentProjectStageLog.objects.filter(
+        created_on__gte=modified_since,
+    ).values('investment_project_id')
+    changed_propositions = Proposition.objects.filter(
+        modified_on__gte=modified_since,
+    ).values('investment_project_id')
+
+    return (
+        Q(modified_on__gte=modified_since)
+        | Q(spi_report_row__isnull=True)
+        | Q(pk__in=changed_interactions)
+        | Q(pk__in=new_stage_log_entries)
+        | Q(pk__in=changed_propositions)
+    )
+
+
+def _get_storable_row(row):
+    # Advisers are stored using their names (as they are written to CSV files). None is stored
+    # as is (and written as an empty cell by the csv module)
+    return {
+        field: value if value is None or isinstance(value, str) else str(value)
+        for field, value in row.items()
+    }
+
+
 class SPIReport:
     """SPI Report."""
 
@@ -104,41 +204,10 @@ class SPIReport:
         SPI3: SPI3,
     }
 
-    MAPPINGS = (
-        (SPI1_END_SERVICE_IDS, SPI1_END),
-        (SPI2_START_SERVICE_IDS, SPI2_START),
-        (SPI5_END_SERVICE_IDS, SPI5_END),
-    )
-
     def __init__(self, proposition_formatter=None):
         """Initialise the SPI Report."""
         self.proposition_formatter = proposition_formatter
 
-    def _get_spi_interactions(self, investment_project):
-        """
-        Gets SPI interactions for given Investment Project.
-
-        Takes earliest interaction for each SPI, if available.
-        """
-        if investment_project.spi_interactions is None:
-            return {}
-
-        data = {}
-        for interaction in investment_project.spi_interactions:
-            for service_ids, field_name in self.MAPPINGS:
-                if (
-                    str(interaction['service_id']) in service_ids
-                    and field_name not in data
-                ):
-                    data[field_name] = {
-                        'created_by_id': interaction['created_by_id'],
-                        'created_by_name': interaction['created_by_name'],
-                        'service_name': interaction['service_name'],
-                        'created_on': format_date(interaction['created_on']),
-                    }
-
-        return data
-
     def _has_ist_project_manager(self, investment_project):
         """Checks if investment project has an IST project manager."""
         project_manager = investment_project.project_manager
@@ -148,18 +217,6 @@ class SPIReport:
             and Team.Tag.INVESTMENT_SERVICES_TEAM in project_manager.dit_team.tags
         )
 
-    def _find_when_project_moved_to_won(self, investment_project):
-        """
-        Finds when project has been moved to Won stage.
-
-        Earliest date counts.
-        """
-        stage_log = investment_project.stage_log.filter(
-            stage_id=Stage.won.value.id,
-        ).order_by('created_on').first()
-
-        return stage_log.created_on if stage_log else None
-
     def _format_propositions(self, propositions):
         """
         Formats propositions.
@@ -193,27 +250,26 @@ class SPIReport:
         spi_data[self.SPI_NAME] = investment_project.name
         return spi_data
 
-    def get_spi1(self, investment_project, spi_interactions):
+    def get_spi1(self, investment_project):
         """Update data with SPI 1 values."""
         data = {}
 
         data[self.SPI1_START] = format_date(investment_project.created_on)
-        if self.SPI1_END in spi_interactions:
-            spi_interaction = spi_interactions[self.SPI1_END]
-            data[self.SPI1_END] = spi_interaction['created_on']
-            data[self.SPI1_END_INTERACTION_TYPE] = spi_interaction['service_name']
-            data[self.SPI1_END_BY] = spi_interaction['created_by_name']
+        if investment_project.spi1_end_on:
+            data[self.SPI1_END] = format_date(investment_project.spi1_end_on)
+            data[self.SPI1_END_INTERACTION_TYPE] = investment_project.spi1_end_service_name
+            data[self.SPI1_END_BY] = investment_project.spi1_end_by_name
 
         return data
 
-    def get_spi2(self, investment_project, spi_interactions):
+    def get_spi2(self, investment_project):
         """Update data with SPI 2 dates and adviser."""
         data = {}
 
         has_ist_pm = self._has_ist_project_manager(investment_project)
 
-        if self.SPI2_START in spi_interactions:
-            data[self.SPI2_START] = spi_interactions[self.SPI2_START]['created_on']
+        if investment_project.spi2_start_on:
+            data[self.SPI2_START] = format_date(investment_project.spi2_start_on)
 
         if has_ist_pm and investment_project.project_manager_first_assigned_on:
             data[self.SPI2_END] = format_date(investment_project.project_manager_first_assigned_on)
@@ -236,7 +292,7 @@ class SPIReport:
         data[self.SPI3] = formatter(investment_project.spi_propositions)
         return data
 
-    def get_spi5(self, investment_project, spi_interactions):
+    def get_spi5(self, investment_project):
         """Update data with SPI 5 dates."""
         data = {}
 
@@ -245,24 +301,25 @@ class SPIReport:
         is_new_investor = str(investment_project.investor_type_id) == new_investor_id
 
         if has_ist_pm and is_new_investor:
-            moved_to_won = self._find_when_project_moved_to_won(investment_project)
-            if moved_to_won:
-                data[self.SPI5_START] = format_date(moved_to_won)
+            if investment_project.spi5_start_on:
+                data[self.SPI5_START] = format_date(investment_project.spi5_start_on)
 
-            if self.SPI5_END in spi_interactions:
-                data[self.SPI5_END] = spi_interactions[self.SPI5_END]['created_on']
+            if investment_project.spi5_end_on:
+                data[self.SPI5_END] = format_date(investment_project.spi5_end_on)
 
         return data
 
     def get_spi_data_for_investment_project(self, investment_project):
-        """Gets all SPI data for investment project."""
-        spi_interaction_dates = self._get_spi_interactions(investment_project)
+        """
+        Gets all SPI data for investment project.
 
+        The investment project must come from get_spi_report_queryset().
+        """
         data = {}
-        data.update(self.get_spi1(investment_project, spi_interaction_dates))
-        data.update(self.get_spi2(investment_project, spi_interaction_dates))
+        data.update(self.get_spi1(investment_project))
+        data.update(self.get_spi2(investment_project))
         data.update(self.get_spi3(investment_project))
-        data.update(self.get_spi5(investment_project, spi_interaction_dates))
+        data.update(self.get_spi5(investment_project))
 
         return data
 
@@ -283,6 +340,7 @@ def get_spi_report_queryset():
     return InvestmentProject.objects.select_related(
         'investmentprojectcode',
         'project_manager__dit_team',
+        'project_manager_first_assigned_by',
     ).annotate(
         spi_propositions=get_array_agg_subquery(
             Proposition,
@@ -296,17 +354,43 @@ def get_spi_report_queryset():
             ),
             ordering=('created_on',),
         ),
-        spi_interactions=get_array_agg_subquery(
-            Interaction,
-            'investment_project',
-            JSONBBuildObject(
-                service_id='service_id',
-                service_name=get_service_name_subquery('service'),
-                created_by_id='created_by_id',
-                created_by_name=get_full_name_expression('created_by'),
-                created_on='created_on',
-            ),
-            filter=Q(service_id__in=ALL_SPI_SERVICE_IDS),
-            ordering=('created_on',),
+        spi1_end_on=_get_earliest_interaction_subquery(SPI1_END_SERVICE_IDS, 'created_on'),
+        spi1_end_service_name=_get_earliest_interaction_subquery(
+            SPI1_END_SERVICE_IDS,
+            get_service_name_subquery('service'),
+        ),
+        spi1_end_by_name=_get_earliest_interaction_subquery(
+            SPI1_END_SERVICE_IDS,
+            get_full_name_expression('created_by'),
+        ),
+        spi2_start_on=_get_earliest_interaction_subquery(SPI2_START_SERVICE_IDS, 'created_on'),
+        spi5_start_on=get_aggregate_subquery(
+            InvestmentProject,
+            Min('stage_log__created_on', filter=Q(stage_log__stage_id=Stage.won.value.id)),
         ),
+        spi5_end_on=_get_earliest_interaction_subquery(SPI5_END_SERVICE_IDS, 'created_on'),
     ).order_by('created_on')
+
+
+def _get_earliest_interaction_subquery(service_ids, expression):
+    """
+    Gets a subquery that gets an expression for the earliest interaction (of one of the given
+    services) of an investment project.
+
+    Ties are broken using the primary key, so that subqueries for different expressions (with
+    the same services) get values from the same interaction.
+    """
+    wrapped_expression = F(expression) if isinstance(expression, str) else expression
+    queryset = Interaction.objects.annotate(
+        _annotated_value=wrapped_expression,
+    ).filter(
+        investment_project=OuterRef('pk'),
+        service_id__in=service_ids,
+    ).order_by(
+        'created_on',
+        'pk',
+    ).values(
+        '_annotated_value',
+    )[:1]
+
+    return Subquery(queryset)
@@ -1,11 +1,17 @@
 import tempfile
+from datetime import timedelta
+from logging import getLogger
 
 from celery.task import task
+from django.conf import settings
 from django.utils.timezone import now
+from django_pglocks import advisory_lock
 
 from datahub.documents.utils import get_bucket_name, get_s3_client_for_bucket
 from datahub.investment.project.report.models import SPIReport
-from datahub.investment.project.report.spi import write_report
+from datahub.investment.project.report.spi import refresh_spi_report_rows, write_report
+
+logger = getLogger(__name__)
 
 
 def _get_report_key():
@@ -14,9 +20,51 @@ def _get_report_key():
     return key
 
 
+def _get_rows_modified_since():
+    latest_report = SPIReport.objects.filter(
+        rows_refreshed_on__isnull=False,
+    ).order_by('-rows_refreshed_on').first()
+
+    if not latest_report:
+        return None
+
+    # Allow for transactions that were still in progress when the previous refresh started
+    overlap = timedelta(seconds=settings.SPI_REPORT_INCREMENTAL_REFRESH_OVERLAP)
+    return latest_report.rows_refreshed_on - overlap
+
+
 @task(acks_late=True)
-def generate_spi_report():
-    """Celery task that generates SPI report."""
+def generate_spi_report(full_refresh=False):
+    """
+    Celery task that generates SPI report.
+
+    The stored SPI report rows are refreshed first. Unless full_refresh is True, only the rows of
+    investment projects that have changed since the previous report are refreshed.
+
+    Only the latest report generated after an incremental refresh is kept (reports generated
+    after full refreshes are all kept).
+    """
+    with advisory_lock('generate_spi_report', wait=False) as lock_held:
+        if not lock_held:
+            logger.warning('Another generate_spi_report task is in progress. Aborting...')
+            return
+
+        rows_refreshed_on = now()
+        modified_since = None if full_refresh else _get_rows_modified_since()
+        num_refreshed = refresh_spi_report_rows(
+            modified_since=modified_since,
+            refreshed_on=rows_refreshed_on,
+        )
+        logger.info(
+            f'Refreshed {num_refreshed} SPI report rows '
+            f'({"incremental" if modified_since else "full"} refresh).',
+        )
+
+        report = _upload_report(rows_refreshed_on, is_full_refresh=not modified_since)
+        _delete_old_incremental_reports(report)
+
+
+def _upload_report(rows_refreshed_on, is_full_refresh):
     with tempfile.TemporaryFile(mode='wb+') as file:
         write_report(file)
 
@@ -35,5 +83,29 @@ def generate_spi_report():
 
         report = SPIReport(
             s3_key=report_key,
+            rows_refreshed_on=rows_refreshed_on,
+            is_full_refresh=is_full_refresh,
         )
         report.save()
+        return report
+
+
+def _delete_old_incremental_reports(latest_report):
+    """
+    Deletes reports generated after incremental refreshes, apart from latest_report.
+
+    Each report is only deleted once its file has been deleted from S3 (so that a failed
+    deletion is retried the next time the task runs).
+    """
+    old_reports = SPIReport.objects.filter(
+        is_full_refresh=False,
+    ).exclude(
+        pk=latest_report.pk,
+    )
+
+    s3_client = get_s3_client_for_bucket('report')
+    bucket_name = get_bucket_name('report')
+
+    for report in old_reports:
+        s3_client.delete_object(Bucket=bucket_name, Key=report.s3_key)
+        report.delete()
@@ -0,0 +1,41 @@
+import pytest
+from django.core import management
+from django.core.management import CommandError
+
+from datahub.core.constants import Service
+from datahub.interaction.models import Interaction
+from datahub.interaction.test.factories import InvestmentProjectInteractionFactory
+from datahub.investment.project.models import InvestmentProject
+from datahub.investment.project.report.management.commands import benchmark_spi_report
+from datahub.investment.project.report.models import SPIReportRow
+from datahub.investment.project.test.factories import InvestmentProjectFactory
+
+# mark the whole module for db use
+pytestmark = pytest.mark.django_db
+
+
+def test_benchmark_spi_report(caplog):
+    """Tests that the timing is logged and that generated records are rolled back afterwards."""
+    caplog.set_level('INFO')
+    InvestmentProjectInteractionFactory(
+        investment_project=InvestmentProjectFactory(),
+        service_id=Service.investment_enquiry_confirmed_prospect.value.id,
+    )
+
+    management.call_command(benchmark_spi_report.Command(), num_projects=5, interactive=False)
+
+    assert (
+        'Refreshing all SPI report rows with 5 generated investment projects took' in caplog.text
+    )
+    assert 'Generating the SPI report with 5 generated investment projects took' in caplog.text
+    assert '(6 rows' in caplog.text
+    assert 'The generated investment projects have been rolled back.' in caplog.text
+    assert InvestmentProject.objects.count() == 1
+    assert Interaction.objects.count() == 1
+    assert not SPIReportRow.objects.exists()
+
+
+def test_benchmark_spi_report_without_investment_projects():
+    """Tests that an error is raised if there isn't an investment project to use as a template."""
+    with pytest.raises(CommandError):
+        management.call_command(benchmark_spi_report.Command(), num_projects=5, interactive=False)
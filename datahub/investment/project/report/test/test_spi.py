@@ -1,3 +1,6 @@
+from csv import DictReader
+from io import BytesIO
+
 import pytest
 from dateutil.parser import parse as dateutil_parse
 from django.utils.timezone import now
@@ -6,19 +9,24 @@ from freezegun import freeze_time
 from datahub.company.test.factories import AdviserFactory, TeamFactory
 from datahub.core.constants import InvestmentProjectStage as InvestmentProjectStageConstant
 from datahub.core.constants import Service as ServiceConstant
+from datahub.core.csv import csv_iterator
 from datahub.core.test_utils import random_obj_for_queryset
 from datahub.interaction.test.factories import InvestmentProjectInteractionFactory
 from datahub.investment.project.constants import InvestorType as InvestorTypeConstant
 from datahub.investment.project.proposition.models import PropositionDocument, PropositionStatus
 from datahub.investment.project.proposition.test.factories import PropositionFactory
+from datahub.investment.project.report.models import SPIReportRow
 from datahub.investment.project.report.spi import ALL_SPI_SERVICE_IDS
+from datahub.investment.project.report.spi import refresh_spi_report_rows
 from datahub.investment.project.report.spi import SPIReport
+from datahub.investment.project.report.spi import write_report
 from datahub.investment.project.test.factories import (
     InvestmentProjectFactory,
     VerifyWinInvestmentProjectFactory,
 )
 from datahub.metadata.models import Service
 from datahub.metadata.models import Team
+from datahub.metadata.query_utils import get_service_name_subquery
 
 pytestmark = pytest.mark.django_db
 
@@ -230,6 +238,43 @@ def test_earliest_interactions_are_being_selected(spi_report, ist_adviser):
     assert rows[0]['Aftercare offered on'] == '2017-03-04T00:00:00+00:00'
 
 
+def test_spi1_values_are_from_the_same_interaction(spi_report, ist_adviser):
+    """
+    Tests that the SPI1 end date, interaction type and adviser are from the same interaction
+    when multiple interactions were created at the same time.
+    """
+    investment_project = InvestmentProjectFactory(
+        project_manager=ist_adviser,
+    )
+
+    with freeze_time('2016-01-01'):
+        interactions = [
+            InvestmentProjectInteractionFactory(
+                investment_project=investment_project,
+                service_id=service_id,
+            )
+            for service_id in (
+                ServiceConstant.investment_enquiry_confirmed_prospect.value.id,
+                ServiceConstant.investment_enquiry_requested_more_information.value.id,
+                ServiceConstant.investment_enquiry_assigned_to_ist_cmc.value.id,
+            )
+        ]
+
+    earliest_interaction = min(interactions, key=lambda interaction: interaction.pk)
+    expected_service_name = Service.objects.annotate(
+        full_name=get_service_name_subquery(),
+    ).get(
+        pk=earliest_interaction.service_id,
+    ).full_name
+
+    rows = list(spi_report.rows())
+
+    assert len(rows) == 1
+    assert rows[0]['Enquiry processed'] == '2016-01-01T00:00:00+00:00'
+    assert rows[0]['Enquiry type'] == expected_service_name
+    assert rows[0]['Enquiry processed by'] == earliest_interaction.created_by.name
+
+
 def test_only_ist_interactions_are_being_selected(spi_report, ist_adviser):
     """Tests that report takes into account IST interactions only."""
     investment_project = InvestmentProjectFactory(
@@ -374,3 +419,87 @@ def test_cannot_get_spi5_start_and_end_for_non_new_investor(
     assert len(rows) == 1
     assert rows[0]['Project moved to won'] == ''
     assert rows[0]['Aftercare offered on'] == ''
+
+
+def test_rows_are_generated_using_a_single_query(
+    spi_report,
+    ist_adviser,
+    propositions,
+    django_assert_num_queries,
+):
+    """Tests that no further queries are made for each investment project."""
+    investment_projects = VerifyWinInvestmentProjectFactory.create_batch(
+        2,
+        project_manager=ist_adviser,
+        project_manager_first_assigned_on=now(),
+        project_manager_first_assigned_by=AdviserFactory(),
+    )
+
+    for investment_project in investment_projects:
+        investment_project.stage_id = InvestmentProjectStageConstant.won.value.id
+        investment_project.save()
+
+        for service_id in ALL_SPI_SERVICE_IDS:
+            InvestmentProjectInteractionFactory(
+                service_id=service_id,
+                investment_project=investment_project,
+            )
+
+    with django_assert_num_queries(1):
+        rows = list(spi_report.rows())
+
+    assert len(rows) == 3
+
+
+def test_can_write_report_from_stored_rows(spi_report, ist_adviser):
+    """Tests that the report is written from the stored rows of all investment projects."""
+    project_manager_assigned_by = AdviserFactory()
+    InvestmentProjectFactory.create_batch(
+        2,
+        project_manager=ist_adviser,
+        project_manager_first_assigned_on=now(),
+        project_manager_first_assigned_by=project_manager_assigned_by,
+    )
+
+    InvestmentProjectFactory(project_manager=ist_adviser)
+
+    assert refresh_spi_report_rows() == 3
+
+    file = BytesIO()
+    write_report(file)
+
+    # The report should be the same as one written directly from the generated rows
+    assert file.getvalue() == b''.join(csv_iterator(spi_report.rows(), SPIReport.field_titles))
+
+    lines = file.getvalue().decode('utf-8-sig').splitlines()
+    rows = list(DictReader(lines))
+    assert len(rows) == 3
+    assert rows[0]['Project manager assigned by'] == project_manager_assigned_by.name
+    assert rows[2]['Project manager assigned by'] == ''
+
+
+def test_stored_rows_keep_missing_values_empty(spi_report, ist_adviser):
+    """
+    Tests that missing values (such as the adviser of an interaction without created_by) are
+    written as empty cells from the stored rows.
+    """
+    investment_project = InvestmentProjectFactory(project_manager=ist_adviser)
+    InvestmentProjectInteractionFactory(
+        investment_project=investment_project,
+        service_id=ServiceConstant.investment_enquiry_confirmed_prospect.value.id,
+        created_by=None,
+    )
+
+    refresh_spi_report_rows()
+
+    stored_row = SPIReportRow.objects.get(investment_project=investment_project)
+    assert stored_row.data['Enquiry processed by'] is None
+
+    file = BytesIO()
+    write_report(file)
+    lines = file.getvalue().decode('utf-8-sig').splitlines()
+    rows = list(DictReader(lines))
+
+    assert len(rows) == 1
+    assert rows[0]['Enquiry processed'] != ''
+    assert rows[0]['Enquiry processed by'] == ''
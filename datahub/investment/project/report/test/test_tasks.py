@@ -1,6 +1,30 @@
+from datetime import datetime
+from unittest.mock import Mock
+
+import pytest
+from django.utils.timezone import utc
 from freezegun import freeze_time
 
-from datahub.investment.project.report.tasks import _get_report_key
+from datahub.core.constants import Service
+from datahub.interaction.test.factories import InvestmentProjectInteractionFactory
+from datahub.investment.project.report.models import SPIReport, SPIReportRow
+from datahub.investment.project.report.tasks import _get_report_key, generate_spi_report
+from datahub.investment.project.test.factories import InvestmentProjectFactory
+
+FIRST_RUN_DATETIME = datetime(2018, 3, 1, 1, tzinfo=utc)
+SECOND_RUN_DATETIME = datetime(2018, 3, 1, 2, tzinfo=utc)
+THIRD_RUN_DATETIME = datetime(2018, 3, 1, 3, tzinfo=utc)
+
+
+@pytest.fixture
+def mock_s3_client(monkeypatch):
+    """Mocks the S3 client used to upload reports."""
+    s3_client = Mock()
+    monkeypatch.setattr(
+        'datahub.investment.project.report.tasks.get_s3_client_for_bucket',
+        Mock(return_value=s3_client),
+    )
+    yield s3_client
 
 
 @freeze_time('2018-03-01 01:02:03')
@@ -8,3 +32,96 @@ def test_get_report_key():
     """Test that the report key is built from current date and time."""
     key = _get_report_key()
     assert key == 'spi-reports/SPI Report 2018-03-01 010203.csv'
+
+
+@pytest.mark.django_db
+class TestGenerateSPIReport:
+    """Tests for the generate_spi_report task."""
+
+    def test_refreshes_rows_and_uploads_report(self, mock_s3_client):
+        """Test that rows are stored for all investment projects and that a report is saved."""
+        investment_projects = InvestmentProjectFactory.create_batch(2)
+
+        with freeze_time(FIRST_RUN_DATETIME):
+            generate_spi_report()
+
+        assert set(SPIReportRow.objects.values_list('investment_project_id', flat=True)) == {
+            investment_project.pk for investment_project in investment_projects
+        }
+        assert mock_s3_client.upload_fileobj.call_count == 1
+
+        report = SPIReport.objects.get()
+        assert report.rows_refreshed_on == FIRST_RUN_DATETIME
+        assert report.s3_key == 'spi-reports/SPI Report 2018-03-01 010000.csv'
+
+    @pytest.mark.parametrize(
+        'full_refresh,expected_refreshed_on',
+        (
+            (False, FIRST_RUN_DATETIME),
+            (True, SECOND_RUN_DATETIME),
+        ),
+    )
+    def test_only_refreshes_changed_rows_unless_full_refresh(
+        self,
+        mock_s3_client,
+        full_refresh,
+        expected_refreshed_on,
+    ):
+        """
+        Test that only the rows of changed or new investment projects are refreshed (unless a
+        full refresh is requested).
+        """
+        with freeze_time(FIRST_RUN_DATETIME):
+            changed_investment_project, unchanged_investment_project = (
+                InvestmentProjectFactory.create_batch(2)
+            )
+            generate_spi_report()
+
+        with freeze_time(SECOND_RUN_DATETIME):
+            new_investment_project = InvestmentProjectFactory()
+            interaction = InvestmentProjectInteractionFactory(
+                investment_project=changed_investment_project,
+                service_id=Service.investment_enquiry_confirmed_prospect.value.id,
+            )
+            generate_spi_report(full_refresh=full_refresh)
+
+        rows = {row.investment_project_id: row for row in SPIReportRow.objects.all()}
+
+        assert rows[new_investment_project.pk].refreshed_on == SECOND_RUN_DATETIME
+        assert rows[changed_investment_project.pk].refreshed_on == SECOND_RUN_DATETIME
+        assert rows[changed_investment_project.pk].data['Enquiry processed'] == (
+            interaction.created_on.isoformat()
+        )
+        assert rows[unchanged_investment_project.pk].refreshed_on == expected_refreshed_on
+        assert SPIReport.objects.count() == 2
+
+    def test_only_keeps_latest_incremental_report(self, mock_s3_client):
+        """
+        Test that reports generated after incremental refreshes are deleted (along with their
+        S3 files) once a newer report has been generated, and that reports generated after full
+        refreshes are kept.
+        """
+        InvestmentProjectFactory()
+
+        with freeze_time(FIRST_RUN_DATETIME):
+            generate_spi_report(full_refresh=True)
+
+        with freeze_time(SECOND_RUN_DATETIME):
+            generate_spi_report()
+
+        second_report = SPIReport.objects.get(is_full_refresh=False)
+        assert not mock_s3_client.delete_object.called
+
+        with freeze_time(THIRD_RUN_DATETIME):
+            generate_spi_report()
+
+        mock_s3_client.delete_object.assert_called_once_with(
+            Bucket='foo',
+            Key=second_report.s3_key,
+        )
+
+        reports = SPIReport.objects.order_by('rows_refreshed_on')
+        assert [(report.rows_refreshed_on, report.is_full_refresh) for report in reports] == [
+            (FIRST_RUN_DATETIME, True),
+            (THIRD_RUN_DATETIME, False),
+        ]
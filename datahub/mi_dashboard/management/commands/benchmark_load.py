@@ -0,0 +1,110 @@
+from datetime import date
+from decimal import Decimal
+from logging import getLogger
+from time import perf_counter
+from uuid import uuid4
+
+from django.core.management.base import BaseCommand
+
+from datahub.core.utils import slice_iterable_into_chunks
+from datahub.mi_dashboard.models import MIInvestmentProject
+from datahub.mi_dashboard.pipelines import ETLInvestmentProjects
+
+logger = getLogger(__name__)
+
+GENERATED_VALUES_BY_FIELD_TYPE = {
+    'BooleanField': False,
+    'CharField': 'benchmark',
+    'DateField': date(2020, 1, 1),
+    'DecimalField': Decimal(1000000),
+    'IntegerField': 10,
+    'TextField': 'benchmark',
+}
+
+
+class _GeneratedRows:
+    """Stands in for the source query set (with generated rows)."""
+
+    def __init__(self, rows):
+        """Initialises the instance with the generated rows."""
+        self.rows = rows
+
+    def iterator(self, chunk_size=None):
+        """Returns an iterator over the generated rows."""
+        return iter(self.rows)
+
+
+class _GeneratedRowsETL(ETLInvestmentProjects):
+    """Loads generated rows instead of investment projects."""
+
+    def __init__(self, rows, **kwargs):
+        """Initialises the pipeline with the generated rows."""
+        super().__init__(**kwargs)
+        self.rows = rows
+
+    def get_rows(self, modified_since=None):
+        """Gets the generated rows."""
+        return _GeneratedRows(self.rows)
+
+
+class Command(BaseCommand):
+    """Command for measuring the speed of loading rows into the MI database."""
+
+    help = """Measures how long it takes to load generated investment projects into the MI
+database (both as new records and as updates to existing records).
+
+The generated records are deleted afterwards.
+"""
+    confirm_msg = """
+This temporarily adds records to the MI database.
+Are you sure you want to do this?
+
+    Type 'yes' to continue, or 'no' to cancel: """
+
+    def add_arguments(self, parser):
+        """Define extra arguments."""
+        parser.add_argument(
+            '--num-projects',
+            type=int,
+            default=100000,
+            help='Number of investment projects to generate.',
+        )
+        parser.add_argument(
+            '--noinput', '--no-input', action='store_false', dest='interactive',
+            help='Tells Django to NOT prompt the user for input of any kind.',
+        )
+
+    def handle(self, *args, **options):
+        """Executes the command."""
+        if options['interactive'] and input(self.confirm_msg) != 'yes':
+            logger.info('Command cancelled')
+            return
+
+        rows = _generate_rows(options['num_projects'])
+        etl = _GeneratedRowsETL(rows, destination=MIInvestmentProject)
+
+        try:
+            for description in ('Creating', 'Updating'):
+                start_time = perf_counter()
+                updated, created = etl.load()
+                elapsed_time = perf_counter() - start_time
+
+                logger.info(
+                    f'{description} {len(rows)} investment projects took {elapsed_time:.2f} '
+                    f'seconds ({len(rows) / elapsed_time:.0f} per second, updated "{updated}" '
+                    f'and created "{created}").',
+                )
+        finally:
+            pks = [row['dh_fdi_project_id'] for row in rows]
+            for batch in slice_iterable_into_chunks(pks, ETLInvestmentProjects.BATCH_SIZE):
+                MIInvestmentProject.objects.filter(pk__in=batch).delete()
+
+
+def _generate_rows(num_rows):
+    template = {
+        column: GENERATED_VALUES_BY_FIELD_TYPE.get(
+            MIInvestmentProject._meta.get_field(column).get_internal_type(),
+        )
+        for column in ETLInvestmentProjects.COLUMNS
+    }
+    return [{**template, 'dh_fdi_project_id': uuid4()} for _ in range(num_rows)]
@@ -0,0 +1,24 @@
+# Generated by Django 3.0.3 on 2020-02-17 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datahub.mi_dashboard', '0004_add_index_for_financial_year'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MIPipelineState',
+            fields=[
+                ('pipeline_name', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('last_run_started_on', models.DateTimeField()),
+                ('reference_data_fingerprint', models.CharField(max_length=255)),
+            ],
+            options={
+                'db_table': 'mi_dashboard_mipipelinestate',
+            },
+        ),
+    ]
@@ -71,3 +71,21 @@ class MIInvestmentProject(models.Model):
         indexes = [
             models.Index(fields=('financial_year',)),
         ]
+
+
+class MIPipelineState(models.Model):
+    """
+    State of an MI dashboard pipeline, used for incremental runs.
+
+    A row is saved after each successful run of a pipeline. Incremental runs only load source
+    records modified since the previous run started (unless the reference data used by the
+    pipeline has changed since, in which case all records are loaded).
+    """
+
+    pipeline_name = models.CharField(primary_key=True, max_length=settings.CHAR_FIELD_MAX_LENGTH)
+    last_run_started_on = models.DateTimeField()
+    reference_data_fingerprint = models.CharField(max_length=settings.CHAR_FIELD_MAX_LENGTH)
+
+    class Meta:
+        # See MIInvestmentProject.Meta
+        db_table = 'mi_dashboard_mipipelinestate'
@@ -1,8 +1,15 @@
-from typing import Tuple, Type
+from datetime import datetime, timedelta
+from hashlib import sha256
+from logging import getLogger
+from typing import Optional, Tuple, Type
 
-from django.db.models import F, Model, Value
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import F, Model, Q, Value
 from django.db.models.functions import Coalesce
 from django.db.models.query import QuerySet
+from django.utils.timezone import now
+from psycopg2.extras import execute_values
 
 from datahub.core.query_utils import (
     get_choices_as_case_expression,
@@ -10,15 +17,26 @@ from datahub.core.query_utils import (
     get_front_end_url_expression,
     get_string_agg_subquery,
 )
-from datahub.investment.project.models import InvestmentProject
+from datahub.core.utils import slice_iterable_into_chunks
+from datahub.investment.project.models import InvestmentProject, Involvement
 from datahub.investment.project.query_utils import get_project_code_expression
+from datahub.metadata.models import (
+    Country,
+    FDIValue,
+    InvestmentProjectStage,
+    InvestmentType,
+    OverseasRegion,
+    Sector,
+    SectorCluster,
+    UKRegion,
+)
 from datahub.metadata.query_utils import get_sector_name_subquery
 from datahub.mi_dashboard.constants import (
     NO_FDI_VALUE_ASSIGNED,
     NO_SECTOR_ASSIGNED,
     NO_UK_REGION_ASSIGNED,
 )
-from datahub.mi_dashboard.models import MIInvestmentProject
+from datahub.mi_dashboard.models import MIInvestmentProject, MIPipelineState
 from datahub.mi_dashboard.query_utils import (
     get_collapse_status_name_expression,
     get_country_url,
@@ -29,6 +47,8 @@ from datahub.mi_dashboard.query_utils import (
     get_top_level_sector_expression,
 )
 
+logger = getLogger(__name__)
+
 
 class ETLBase:
     """
@@ -47,10 +67,22 @@ class ETLBase:
 
     For each dictionary assertion is being made that its keys equal COLUMNS.
 
-    Each dictionary representing a row is then updated or created on the destination database.
+    Rows are then updated or created on the destination database in batches (using
+    INSERT ... ON CONFLICT DO UPDATE).
+
+    The `run` method loads the data and then deletes destination records that no longer exist in
+    the source. When run incrementally, only source records matching the filter returned by
+    `get_modified_since_filter` are loaded, unless the pipeline hasn't run before or any of the
+    REFERENCE_DATA_MODELS (which don't record when they were modified) have changed since the
+    previous run.
     """
 
     COLUMNS = {}
+    BATCH_SIZE = 2000
+    # Used to store the state of the pipeline between runs
+    NAME = None
+    # Models the transformed data depends on, other than the models of the source query
+    REFERENCE_DATA_MODELS = ()
 
     def __init__(self, destination: Type[Model], **kwargs):
         """Initialise the destination.
@@ -69,42 +101,188 @@ class ETLBase:
         """
         raise NotImplementedError
 
-    def get_rows(self) -> QuerySet:
+    def get_modified_since_filter(self, modified_since) -> Q:
+        """
+        Get a filter for the source query matching records whose rows may have changed since
+        the given date and time.
+        """
+        raise NotImplementedError
+
+    def get_rows(self, modified_since=None) -> QuerySet:
         """
         Get rows ready to load.
 
+        :param modified_since: if specified, only rows that may have changed since then are
+            returned
         :returns: a QuerySet that returns dictionaries when used as iterable.
         """
-        return self.get_source_query().values(*self.COLUMNS)
+        queryset = self.get_source_query()
+        if modified_since is not None:
+            queryset = queryset.filter(self.get_modified_since_filter(modified_since))
+        return queryset.values(*self.COLUMNS)
 
-    def load(self) -> Tuple[int, int]:
+    def get_reference_data_fingerprint(self) -> str:
+        """Get a hash of all rows of the REFERENCE_DATA_MODELS."""
+        digest = sha256()
+        for model in self.REFERENCE_DATA_MODELS:
+            digest.update(model._meta.label.encode('utf-8'))
+            for row in model.objects.order_by('pk').values_list().iterator():
+                digest.update(repr(row).encode('utf-8'))
+        return digest.hexdigest()
+
+    def run(self, incremental=False) -> Tuple[int, int]:
+        """
+        Load data to the destination table and delete records no longer in the source.
+
+        :param incremental: if True, only rows that may have changed since the previous
+            run are loaded (where possible)
+        :returns: a tuple with number of updated and created records
+        """
+        started_on = now()
+        fingerprint = self.get_reference_data_fingerprint()
+        modified_since = self._get_modified_since(fingerprint) if incremental else None
+
+        updated, created = self.load(modified_since=modified_since)
+        deleted = self.delete_removed()
+
+        MIPipelineState.objects.update_or_create(
+            pipeline_name=self.NAME,
+            defaults={
+                'last_run_started_on': started_on,
+                'reference_data_fingerprint': fingerprint,
+            },
+        )
+
+        logger.info(
+            f'{self.NAME} pipeline run ({"incremental" if modified_since else "full"}): '
+            f'updated {updated}, created {created} and deleted {deleted} records.',
+        )
+        return updated, created
+
+    def load(self, modified_since=None) -> Tuple[int, int]:
         """
         Load data to the destination table.
 
         Existing records should be updated.
 
+        Rows are loaded in batches of BATCH_SIZE, each using one query to find which rows
+        already exist and one INSERT ... ON CONFLICT DO UPDATE query.
+
+        :param modified_since: if specified, only rows that may have changed since then are
+            loaded
         :raises: AssertionError if row.keys() != COLUMNS
         :returns: a tuple with number of updated and created records
         """
         updated = 0
         created = 0
-        for row in self.get_rows().iterator():
-            assert row.keys() == self.COLUMNS, 'Row keys do not match COLUMNS.'
+        rows = self.get_rows(modified_since=modified_since).iterator(chunk_size=self.BATCH_SIZE)
 
-            pk = row.pop(self.destination._meta.pk.name)
-            _, is_created = self.destination.objects.update_or_create(
-                pk=pk,
-                defaults=row,
-            )
-            updated += int(not is_created)
-            created += int(is_created)
+        for batch in slice_iterable_into_chunks(rows, self.BATCH_SIZE):
+            for row in batch:
+                assert row.keys() == self.COLUMNS, 'Row keys do not match COLUMNS.'
+
+            batch_updated, batch_created = self._upsert(batch)
+            updated += batch_updated
+            created += batch_created
 
         return updated, created
 
+    def delete_removed(self) -> int:
+        """
+        Delete records from the destination table that no longer exist in the source.
+
+        The destination table is in a different database to the source, so this can't be done
+        using a subquery. Instead, destination primary keys are fetched in batches of BATCH_SIZE
+        (in primary key order) and the source is queried for the ones that still exist, so that
+        only one batch of primary keys is held in memory at a time.
+
+        :returns: the number of deleted records
+        """
+        pk_name = self.destination._meta.pk.name
+        deleted = 0
+        last_pk = None
+
+        while True:
+            destination_query = self.destination.objects.order_by('pk')
+            if last_pk is not None:
+                destination_query = destination_query.filter(pk__gt=last_pk)
+
+            batch = list(destination_query.values_list('pk', flat=True)[:self.BATCH_SIZE])
+            if not batch:
+                break
+
+            last_pk = batch[-1]
+            existing_pks = set(
+                self.get_source_query().filter(
+                    **{f'{pk_name}__in': batch},
+                ).values_list(pk_name, flat=True),
+            )
+            removed_pks = [pk for pk in batch if pk not in existing_pks]
+
+            if removed_pks:
+                self.destination.objects.filter(pk__in=removed_pks).delete()
+                deleted += len(removed_pks)
+
+        return deleted
+
+    def _get_modified_since(self, reference_data_fingerprint) -> Optional[datetime]:
+        state = MIPipelineState.objects.filter(pipeline_name=self.NAME).first()
+
+        if not state or state.reference_data_fingerprint != reference_data_fingerprint:
+            return None
+
+        # Allow for transactions that were still in progress when the previous run started
+        overlap = timedelta(seconds=settings.MI_DASHBOARD_INCREMENTAL_RUN_OVERLAP)
+        return state.last_run_started_on - overlap
+
+    def _upsert(self, rows):
+        pk_name = self.destination._meta.pk.name
+        pks = [row[pk_name] for row in rows]
+        db_alias = router.db_for_write(self.destination)
+        num_existing = self.destination.objects.using(db_alias).filter(pk__in=pks).count()
+
+        connection = connections[db_alias]
+        fields = [self.destination._meta.get_field(column) for column in sorted(self.COLUMNS)]
+        quote_name = connection.ops.quote_name
+        column_names = [quote_name(field.column) for field in fields]
+        update_assignments = [
+            f'{column_name} = EXCLUDED.{column_name}'
+            for field, column_name in zip(fields, column_names)
+            if not field.primary_key
+        ]
+        sql = (
+            f'INSERT INTO {quote_name(self.destination._meta.db_table)} '
+            f'({", ".join(column_names)}) VALUES %s '
+            f'ON CONFLICT ({quote_name(self.destination._meta.pk.column)}) '
+            f'DO UPDATE SET {", ".join(update_assignments)}'
+        )
+        values = [
+            [field.get_db_prep_save(row[field.name], connection) for field in fields]
+            for row in rows
+        ]
+
+        with connection.cursor() as cursor:
+            execute_values(cursor.cursor, sql, values, page_size=len(values))
+
+        return num_existing, len(rows) - num_existing
+
 
 class ETLInvestmentProjects(ETLBase):
     """Extract, Transform and Load Investment Projects."""
 
+    NAME = 'investment_projects'
+    REFERENCE_DATA_MODELS = (
+        Country,
+        FDIValue,
+        InvestmentProjectStage,
+        InvestmentType,
+        Involvement,
+        OverseasRegion,
+        Sector,
+        SectorCluster,
+        UKRegion,
+    )
+
     # Columns must exist both in the source query and the destination model.
     COLUMNS = {
         'dh_fdi_project_id',
@@ -139,6 +317,16 @@ class ETLInvestmentProjects(ETLBase):
         'estimated_land_date',
     }
 
+    def get_modified_since_filter(self, modified_since):
+        """
+        Get a filter matching projects that may have changed since the given date and time.
+
+        The investor company is also checked as its country is used in some of the columns.
+        """
+        return Q(modified_on__gte=modified_since) | Q(
+            investor_company__modified_on__gte=modified_since,
+        )
+
     def get_source_query(self):
         """Get the query set."""
         return InvestmentProject.objects.annotate(
@@ -201,7 +389,12 @@ class ETLInvestmentProjects(ETLBase):
         )
 
 
-def run_mi_investment_project_etl_pipeline():
-    """Runs FDI dashboard data load."""
+def run_mi_investment_project_etl_pipeline(incremental=False):
+    """
+    Runs FDI dashboard data load.
+
+    :param incremental: if True, only projects that may have changed since the previous run
+        are loaded (unless reference data has changed since then)
+    """
     pipeline = ETLInvestmentProjects(destination=MIInvestmentProject)
-    return pipeline.load()
+    return pipeline.run(incremental=incremental)
@@ -19,9 +19,12 @@ logger = get_task_logger(__name__)
     retry_backoff=60,
     queue='long-running',
 )
-def mi_investment_project_etl_pipeline(self):
+def mi_investment_project_etl_pipeline(self, incremental=False):
     """
     Completes MI dashboard feed.
+
+    If incremental is True, only investment projects modified since the previous run are
+    loaded (where possible).
     """
     with advisory_lock(f'leeloo-mi_investment_project_etl_pipeline', wait=False) as lock_held:
         if not lock_held:
@@ -33,7 +36,7 @@ def mi_investment_project_etl_pipeline(self):
         logger.info('Started MI dashboard feed.')
 
         start_time = perf_counter()
-        updated, created = run_mi_investment_project_etl_pipeline()
+        updated, created = run_mi_investment_project_etl_pipeline(incremental=incremental)
         elapsed_time = perf_counter() - start_time
         if elapsed_time > settings.MI_FDI_DASHBOARD_TASK_DURATION_WARNING_THRESHOLD:
             logger.warning((
@@ -0,0 +1,21 @@
+import pytest
+from django.core import management
+
+from datahub.mi_dashboard.management.commands import benchmark_load
+from datahub.mi_dashboard.models import MIInvestmentProject
+
+# mark the whole module for db use
+pytestmark = pytest.mark.django_db
+
+
+def test_benchmark_load(caplog):
+    """Tests that timings are logged and that generated records are deleted afterwards."""
+    caplog.set_level('INFO')
+
+    management.call_command(benchmark_load.Command(), num_projects=5, interactive=False)
+
+    assert 'Creating 5 investment projects took' in caplog.text
+    assert 'updated "0" and created "5"' in caplog.text
+    assert 'Updating 5 investment projects took' in caplog.text
+    assert 'updated "5" and created "0"' in caplog.text
+    assert not MIInvestmentProject.objects.exists()
@@ -1,13 +1,17 @@
-from datetime import date
+from datetime import date, datetime, timedelta
 
 import pytest
 from django.conf import settings
 from django.core.exceptions import FieldDoesNotExist, FieldError
+from django.utils.timezone import utc
+from freezegun import freeze_time
 
 from datahub.company.test.factories import CompanyFactory
 from datahub.core.constants import Country, FDIValue, Sector, SectorCluster, UKRegion
 from datahub.dbmaintenance.utils import parse_uuid
+from datahub.investment.project.models import InvestmentProject
 from datahub.investment.project.test.factories import InvestmentProjectFactory
+from datahub.metadata.models import Sector as SectorModel
 from datahub.metadata.test.factories import SectorFactory
 from datahub.mi_dashboard.constants import (
     NO_FDI_VALUE_ASSIGNED,
@@ -15,7 +19,7 @@ from datahub.mi_dashboard.constants import (
     NO_SECTOR_CLUSTER_ASSIGNED,
     NO_UK_REGION_ASSIGNED,
 )
-from datahub.mi_dashboard.models import MIInvestmentProject
+from datahub.mi_dashboard.models import MIInvestmentProject, MIPipelineState
 from datahub.mi_dashboard.pipelines import (
     ETLInvestmentProjects,
     run_mi_investment_project_etl_pipeline,
@@ -92,6 +96,28 @@ def test_investment_projects_get_updated():
         assert source_row == row
 
 
+def test_load_in_batches(monkeypatch):
+    """Tests that new and existing investment projects are counted correctly across batches."""
+    monkeypatch.setattr(ETLInvestmentProjects, 'BATCH_SIZE', 3)
+    existing_investment_projects = InvestmentProjectFactory.create_batch(4)
+    etl = ETLInvestmentProjects(destination=MIInvestmentProject)
+    etl.load()
+
+    for investment_project in existing_investment_projects:
+        investment_project.number_new_jobs = 100
+        investment_project.save()
+    InvestmentProjectFactory.create_batch(3)
+
+    updated, created = etl.load()
+    assert (4, 3) == (updated, created)
+
+    dashboard = MIInvestmentProject.objects.values(*etl.COLUMNS).all()
+    assert len(dashboard) == 7
+    for row in dashboard:
+        source_row = etl.get_rows().get(pk=row['dh_fdi_project_id'])
+        assert source_row == row
+
+
 def test_run_mi_investment_project_etl_pipeline():
     """Tests that run_mi_investment_project_etl_pipeline copy data to MIInvestmentProject table."""
     InvestmentProjectFactory.create_batch(5, actual_land_date=date(2018, 4, 1))
@@ -107,6 +133,111 @@ def test_run_mi_investment_project_etl_pipeline():
         assert source_row == row
 
 
+def test_incremental_run_only_loads_modified_projects(settings):
+    """
+    Tests that an incremental run only loads projects modified since the previous run
+    started (less the overlap).
+    """
+    settings.MI_DASHBOARD_INCREMENTAL_RUN_OVERLAP = 60
+    first_run_time = datetime(2020, 2, 1, 12, 0, tzinfo=utc)
+
+    with freeze_time(first_run_time - timedelta(hours=1)):
+        modified_project, unmodified_project = InvestmentProjectFactory.create_batch(2)
+
+    with freeze_time(first_run_time):
+        assert run_mi_investment_project_etl_pipeline(incremental=True) == (0, 2)
+
+    with freeze_time(first_run_time + timedelta(hours=1)):
+        modified_project.number_new_jobs = 10
+        modified_project.save()
+        new_project = InvestmentProjectFactory()
+        # This is not picked up as modified_on is not updated
+        InvestmentProject.objects.filter(pk=unmodified_project.pk).update(number_new_jobs=20)
+
+        assert run_mi_investment_project_etl_pipeline(incremental=True) == (1, 1)
+
+    state = MIPipelineState.objects.get(pipeline_name=ETLInvestmentProjects.NAME)
+    assert state.last_run_started_on == first_run_time + timedelta(hours=1)
+    assert MIInvestmentProject.objects.get(pk=modified_project.pk).number_new_jobs == 10
+    assert MIInvestmentProject.objects.get(pk=unmodified_project.pk).number_new_jobs is None
+    assert MIInvestmentProject.objects.filter(pk=new_project.pk).exists()
+
+
+def test_incremental_run_loads_projects_with_modified_investor_companies():
+    """Tests that an incremental run loads projects whose investor company was modified."""
+    first_run_time = datetime(2020, 2, 1, 12, 0, tzinfo=utc)
+
+    with freeze_time(first_run_time - timedelta(hours=1)):
+        investment_project = InvestmentProjectFactory()
+        InvestmentProjectFactory()
+
+    with freeze_time(first_run_time):
+        run_mi_investment_project_etl_pipeline(incremental=True)
+
+    with freeze_time(first_run_time + timedelta(hours=1)):
+        investor_company = investment_project.investor_company
+        investor_company.address_country_id = Country.france.value.id
+        investor_company.save()
+
+        assert run_mi_investment_project_etl_pipeline(incremental=True) == (1, 0)
+
+    mi_investment_project = MIInvestmentProject.objects.get(pk=investment_project.pk)
+    assert mi_investment_project.investor_company_country == Country.france.value.name
+
+
+def test_incremental_run_loads_all_projects_if_reference_data_changed():
+    """Tests that all projects are loaded if reference data has changed since the last run."""
+    first_run_time = datetime(2020, 2, 1, 12, 0, tzinfo=utc)
+
+    with freeze_time(first_run_time - timedelta(hours=1)):
+        investment_project = InvestmentProjectFactory(
+            sector_id=Sector.renewable_energy_wind.value.id,
+        )
+        InvestmentProjectFactory()
+
+    with freeze_time(first_run_time):
+        run_mi_investment_project_etl_pipeline(incremental=True)
+
+    with freeze_time(first_run_time + timedelta(hours=1)):
+        SectorModel.objects.filter(pk=Sector.renewable_energy_wind.value.id).update(
+            segment='Wind (renamed)',
+        )
+
+        assert run_mi_investment_project_etl_pipeline(incremental=True) == (2, 0)
+
+    mi_investment_project = MIInvestmentProject.objects.get(pk=investment_project.pk)
+    assert mi_investment_project.sector_name.endswith('Wind (renamed)')
+
+
+@pytest.mark.parametrize('incremental', (False, True))
+def test_run_deletes_removed_projects(incremental):
+    """Tests that MI records of deleted investment projects are deleted."""
+    kept_project, deleted_project = InvestmentProjectFactory.create_batch(2)
+    run_mi_investment_project_etl_pipeline(incremental=incremental)
+
+    deleted_project.delete()
+    run_mi_investment_project_etl_pipeline(incremental=incremental)
+
+    assert set(MIInvestmentProject.objects.values_list('pk', flat=True)) == {kept_project.pk}
+
+
+def test_delete_removed_in_batches(monkeypatch):
+    """Tests that MI records of deleted investment projects are deleted across batches."""
+    monkeypatch.setattr(ETLInvestmentProjects, 'BATCH_SIZE', 2)
+    investment_projects = InvestmentProjectFactory.create_batch(7)
+    etl = ETLInvestmentProjects(destination=MIInvestmentProject)
+    etl.load()
+
+    deleted_projects = investment_projects[::2]
+    for investment_project in deleted_projects:
+        investment_project.delete()
+
+    assert etl.delete_removed() == len(deleted_projects)
+    assert set(MIInvestmentProject.objects.values_list('pk', flat=True)) == {
+        investment_project.pk for investment_project in investment_projects[1::2]
+    }
+
+
 @pytest.mark.parametrize(
     'fdi_value_id,expected',
     (
@@ -22,6 +22,22 @@ def test_mi_dashboard_feed(monkeypatch):
     assert run_mi_investment_project_etl_pipeline_mock.call_count == 1
 
 
+@pytest.mark.parametrize('incremental', (False, True))
+def test_mi_dashboard_feed_incremental(incremental, monkeypatch):
+    """Test that the incremental argument is passed to the pipeline."""
+    run_mi_investment_project_etl_pipeline_mock = Mock(side_effect=[(0, 0)])
+    monkeypatch.setattr(
+        'datahub.mi_dashboard.tasks.run_mi_investment_project_etl_pipeline',
+        run_mi_investment_project_etl_pipeline_mock,
+    )
+
+    mi_investment_project_etl_pipeline.apply(kwargs={'incremental': incremental})
+
+    run_mi_investment_project_etl_pipeline_mock.assert_called_once_with(
+        incremental=incremental,
+    )
+
+
 def test_mi_dashboard_feed_retries_on_error(monkeypatch):
     """Test that the mi_dashboard_feed task retries on error."""
     run_mi_investment_project_etl_pipeline_mock = Mock(side_effect=[AssertionError, (0, 0)])
@@ -302,6 +302,8 @@ class Order(BaseModel):
         indexes = [
             # For activity stream
             models.Index(fields=('created_on', 'id')),
+            # For incremental (updated_since) dataset API requests
+            models.Index(fields=('modified_on', 'id')),
         ]
 
     def __str__(self):
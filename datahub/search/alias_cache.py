@@ -0,0 +1,66 @@
+from threading import Lock
+from time import monotonic
+from typing import Any, NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from datahub.core import statsd
+
+# Shared (via the Django cache) counter that is incremented whenever aliases are changed, so that
+# other processes discard their cached alias state without waiting for it to expire
+GENERATION_CACHE_KEY = 'search-alias-cache-generation'
+
+_entries = {}
+_lock = Lock()
+
+
+class _CacheEntry(NamedTuple):
+    value: Any
+    generation: int
+    expires_at: float
+
+
+def get_cached_alias_state(key, fetch):
+    """
+    Returns cached alias state for a key, calling fetch() if no valid cached value is available.
+
+    Cached values expire after settings.SEARCH_ALIAS_CACHE_TTL seconds and are discarded as soon
+    as invalidate_alias_cache() is called in any process.
+    """
+    generation = cache.get(GENERATION_CACHE_KEY, 0)
+    entry = _entries.get(key)
+
+    if entry and entry.generation == generation and entry.expires_at > monotonic():
+        statsd.incr('search.alias-cache.hit')
+        return entry.value
+
+    statsd.incr('search.alias-cache.miss')
+    value = fetch()
+
+    with _lock:
+        _entries[key] = _CacheEntry(
+            value=value,
+            generation=generation,
+            expires_at=monotonic() + settings.SEARCH_ALIAS_CACHE_TTL,
+        )
+
+    return value
+
+
+def invalidate_alias_cache():
+    """
+    Discards cached alias state in this process and (by incrementing the shared generation
+    counter) in all other processes.
+
+    This must be called whenever aliases are modified.
+    """
+    with _lock:
+        _entries.clear()
+
+    try:
+        cache.incr(GENERATION_CACHE_KEY)
+    except ValueError:
+        cache.set(GENERATION_CACHE_KEY, 1, timeout=None)
+
+    statsd.incr('search.alias-cache.invalidation')
@@ -17,7 +17,12 @@ class SearchApp:
     bulk_batch_size = 2000
 
     queryset = None
+    # Field used by incremental syncs to find objects that have changed since the previous sync
+    watermark_field = 'modified_on'
     exclude_from_global_search = False
+    # Number of seconds search results are cached for when ENABLE_SEARCH_RESULT_CACHE is True
+    # (None means settings.SEARCH_RESULT_CACHE_TTL and 0 disables caching for this app)
+    search_result_cache_ttl = None
     # A sequence of permissions. The user must have one of these permissions to perform searches.
     view_permissions = None
     # A single permission. The user must have this permission and a permission in view_permissions
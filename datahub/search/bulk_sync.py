@@ -1,74 +1,309 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from logging import getLogger
+from typing import NamedTuple
 
-from datahub.core.utils import slice_iterable_into_chunks
-from datahub.search.elasticsearch import bulk
+from django.core.cache import cache
+from django.db import connections
+
+from datahub.core.exceptions import DataHubException
+from datahub.search.apps import get_search_app
+from datahub.search.bulk_writer import index_documents
+from datahub.search.elasticsearch import reset_connection
+from datahub.search.result_cache import invalidate_search_results
 
 logger = getLogger(__name__)
 
 PROGRESS_INTERVAL = 20000
-BULK_INDEX_TIMEOUT_SECS = 300
+CHECKPOINT_TIMEOUT_SECS = 24 * 60 * 60
+# Maximum number of per-document errors to log for each batch
+MAX_ERRORS_TO_LOG = 10
 
 
-def sync_app(search_app, batch_size=None, post_batch_callback=None):
-    """Syncs objects for an app to ElasticSearch in batches of batch_size."""
-    model_name = search_app.es_model.__name__
+class SyncReport(NamedTuple):
+    """Summary of a (full or partial) sync of a search app."""
+
+    num_rows_processed: int = 0
+    num_objects_synced: int = 0
+    # Number of documents that Elasticsearch failed to index
+    num_errors: int = 0
+
+
+def combine_sync_reports(reports):
+    """Sums a number of sync reports (e.g. one per partition) into a single report."""
+    return SyncReport(
+        num_rows_processed=sum(report.num_rows_processed for report in reports),
+        num_objects_synced=sum(report.num_objects_synced for report in reports),
+        num_errors=sum(report.num_errors for report in reports),
+    )
+
+
+def get_pk_partitions(queryset, num_partitions):
+    """
+    Splits the primary keys of a query set into approximately equally-sized ranges.
+
+    Returns a list of (lower_pk, upper_pk) tuples. Lower bounds are inclusive and upper bounds
+    are exclusive. None is used for the lower bound of the first range and the upper bound of
+    the last range, so that objects created after the partitions were calculated are still
+    included.
+    """
+    pk_queryset = queryset.order_by('pk').values_list('pk', flat=True)
+    total_rows = pk_queryset.count()
+
+    if num_partitions <= 1 or total_rows <= num_partitions:
+        return [(None, None)]
+
+    partition_size = -(-total_rows // num_partitions)
+    boundaries = [
+        None,
+        *(pk_queryset[offset] for offset in range(partition_size, total_rows, partition_size)),
+        None,
+    ]
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def sync_app(
+    search_app,
+    batch_size=None,
+    post_batch_callback=None,
+    pk_range=None,
+    resumable=False,
+    queryset=None,
+):
+    """
+    Syncs objects for an app to ElasticSearch in batches of batch_size.
+
+    Objects are fetched in primary key order (using keyset pagination) with one query per batch.
+    Each batch is indexed in a background thread while the next batch is being fetched from the
+    database.
+
+    pk_range can optionally be used to only sync objects in a (lower_pk, upper_pk) range, as
+    returned by get_pk_partitions().
+
+    queryset can optionally be used to only sync a subset of objects. It should be derived from
+    search_app.queryset (which is used by default).
+
+    If resumable is True, the primary key of the last object in each indexed batch is saved as a
+    checkpoint (in the cache). If the sync is then interrupted (e.g. by a worker restart) and
+    started again, objects up to the checkpoint are skipped. Checkpoints are specific to the write
+    index, so a checkpoint is never used for a sync to a different index.
+
+    Documents that Elasticsearch fails to index are logged and counted in the returned report,
+    but don't stop the sync. They are not passed to post_batch_callback.
+    """
+    es_model = search_app.es_model
+    model_name = es_model.__name__
     batch_size = batch_size or search_app.bulk_batch_size
-    logger.info(f'Processing {model_name} records, using batch size {batch_size}')
+    read_indices, write_index = es_model.get_read_and_write_indices()
 
-    read_indices, write_index = search_app.es_model.get_read_and_write_indices()
+    checkpoint_key = _get_checkpoint_key(write_index, pk_range) if resumable else None
+    checkpoint_pk = cache.get(checkpoint_key) if checkpoint_key else None
+
+    queryset = search_app.queryset if queryset is None else queryset
+    queryset = _filter_by_pk_range(queryset, pk_range).order_by('pk')
+    if checkpoint_pk is not None:
+        logger.info(f'Resuming {model_name} sync after checkpoint {checkpoint_pk}')
+        queryset = queryset.filter(pk__gt=checkpoint_pk)
+
+    logger.info(f'Processing {model_name} records, using batch size {batch_size}')
 
     num_source_rows_processed = 0
     num_objects_synced = 0
-    total_rows = search_app.queryset.count()
-    it = search_app.queryset.values_list('pk', flat=True).iterator(chunk_size=batch_size)
-    batches = slice_iterable_into_chunks(it, batch_size)
-    for batch in batches:
-        objs = search_app.queryset.filter(pk__in=batch)
-
-        num_actions = sync_objects(
-            search_app.es_model,
-            objs,
-            read_indices,
-            write_index,
-            post_batch_callback=post_batch_callback,
-        )
+    num_errors = 0
+    total_rows = queryset.count()
 
-        emit_progress = (
-            (num_source_rows_processed + num_actions) // PROGRESS_INTERVAL
-            - num_source_rows_processed // PROGRESS_INTERVAL
-            > 0
-        )
+    def _wait_for_indexing(pending_indexing, last_pk):
+        nonlocal num_errors
+        num_errors += pending_indexing.result()
 
-        num_source_rows_processed += len(batch)
-        num_objects_synced += num_actions
+        # The checkpoint is not moved past documents that could not be indexed, so that they are
+        # retried if the sync is interrupted and resumed
+        if checkpoint_key and not num_errors:
+            cache.set(checkpoint_key, last_pk, timeout=CHECKPOINT_TIMEOUT_SECS)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending_indexing = None
+        pending_last_pk = None
+
+        for batch in _iterate_in_batches(queryset, batch_size):
+            actions = list(es_model.db_objects_to_es_documents(batch, index=write_index))
+
+            # Wait for the previous batch so that at most one batch is being indexed at a time
+            if pending_indexing:
+                _wait_for_indexing(pending_indexing, pending_last_pk)
+
+            pending_last_pk = batch[-1].pk
+            pending_indexing = executor.submit(
+                _index_actions,
+                actions,
+                read_indices,
+                write_index,
+                post_batch_callback,
+            )
 
-        if emit_progress:
-            logger.info(
-                f'{model_name} rows processed: {num_source_rows_processed}/{total_rows} '
-                f'{num_source_rows_processed*100//total_rows}%',
+            num_actions = len(actions)
+            emit_progress = (
+                (num_source_rows_processed + num_actions) // PROGRESS_INTERVAL
+                - num_source_rows_processed // PROGRESS_INTERVAL
+                > 0
             )
 
+            num_source_rows_processed += len(batch)
+            num_objects_synced += num_actions
+
+            if emit_progress:
+                logger.info(
+                    f'{model_name} rows processed: {num_source_rows_processed}/{total_rows} '
+                    f'{num_source_rows_processed*100//total_rows}%',
+                )
+
+        if pending_indexing:
+            _wait_for_indexing(pending_indexing, pending_last_pk)
+
     logger.info(f'{model_name} rows processed: {num_source_rows_processed}/{total_rows} 100%.')
-    if num_source_rows_processed != num_objects_synced:
-        logger.warning(
-            f'{num_source_rows_processed - num_objects_synced} deleted objects detected while '
-            f'syncing model {model_name}',
-        )
+
+    if num_errors:
+        logger.error(f'{num_errors} {model_name} documents could not be indexed')
+
+    if checkpoint_key:
+        cache.delete(checkpoint_key)
+
+    return SyncReport(
+        num_rows_processed=num_source_rows_processed,
+        num_objects_synced=num_objects_synced - num_errors,
+        num_errors=num_errors,
+    )
+
+
+def sync_app_in_process_pool(search_app, num_partitions, batch_size=None):
+    """
+    Syncs objects for an app to Elasticsearch using a pool of worker processes (one per
+    partition of the primary key space).
+
+    This is intended for use by management commands running in the foreground. (Celery
+    workers can't start child processes, and use sub-tasks instead.)
+    """
+    model_name = search_app.es_model.__name__
+    partitions = get_pk_partitions(search_app.queryset, num_partitions)
+    logger.info(f'Syncing {model_name} records using {len(partitions)} partition(s)')
+
+    # Connections must not be shared with the child processes
+    connections.close_all()
+
+    with ProcessPoolExecutor(
+        max_workers=len(partitions),
+        mp_context=multiprocessing.get_context('fork'),
+        initializer=_init_sync_process,
+    ) as executor:
+        futures = [
+            executor.submit(_sync_partition, search_app.name, pk_range, batch_size)
+            for pk_range in partitions
+        ]
+        report = combine_sync_reports([future.result() for future in futures])
+
+    logger.info(
+        f'{model_name} partitioned sync complete: {report.num_objects_synced} objects synced '
+        f'from {report.num_rows_processed} rows',
+    )
+    return report
 
 
 def sync_objects(es_model, model_objects, read_indices, write_index, post_batch_callback=None):
-    """Syncs an iterable of model instances to Elasticsearch."""
+    """
+    Syncs an iterable of model instances to Elasticsearch.
+
+    :raises DataHubException: if any documents could not be indexed
+    """
     actions = list(
         es_model.db_objects_to_es_documents(model_objects, index=write_index),
     )
-    num_actions = len(actions)
-    bulk(
-        actions=actions,
-        chunk_size=num_actions,
-        request_timeout=BULK_INDEX_TIMEOUT_SECS,
-    )
+    num_errors = _index_actions(actions, read_indices, write_index, post_batch_callback)
+
+    if num_errors:
+        raise DataHubException(
+            f'{num_errors} {es_model.__name__} documents could not be indexed',
+        )
+
+    return len(actions)
+
+
+def _index_actions(actions, read_indices, write_index, post_batch_callback):
+    """
+    Indexes a batch of actions and returns the number of documents that failed.
+
+    post_batch_callback is only passed the actions for documents that were successfully indexed.
+    """
+    report = index_documents(actions=actions)
+
+    for doc_type in {action['_type'] for action in actions}:
+        invalidate_search_results(doc_type)
+
+    for error in report.errors[:MAX_ERRORS_TO_LOG]:
+        logger.error(f'Error indexing document: {error!r}')
 
     if post_batch_callback:
-        post_batch_callback(read_indices, write_index, actions)
+        post_batch_callback(read_indices, write_index, _exclude_failed_actions(actions, report))
+
+    return len(report.errors)
+
+
+def _exclude_failed_actions(actions, report):
+    if not report.errors:
+        return actions
+
+    # The actions in a batch are all for the same search model, so IDs are unique within a batch
+    failed_ids = {
+        str(result.get('_id'))
+        for error in report.errors
+        for result in error.values()
+    }
+    return [action for action in actions if str(action['_id']) not in failed_ids]
+
+
+def _get_checkpoint_key(write_index, pk_range):
+    lower_pk, upper_pk = pk_range or (None, None)
+    return f'search-sync-checkpoint:{write_index}:{lower_pk}:{upper_pk}'
+
+
+def _iterate_in_batches(queryset, batch_size):
+    """
+    Yields lists of objects from a query set ordered by primary key.
+
+    Keyset pagination is used so that each batch is fetched with a single query, and so that
+    changes made to objects while the sync is in progress are picked up.
+    """
+    batch_queryset = queryset
+
+    while True:
+        batch = list(batch_queryset[:batch_size])
+        if not batch:
+            break
+
+        yield batch
+
+        if len(batch) < batch_size:
+            break
+
+        batch_queryset = queryset.filter(pk__gt=batch[-1].pk)
+
+
+def _filter_by_pk_range(queryset, pk_range):
+    lower_pk, upper_pk = pk_range or (None, None)
+
+    if lower_pk is not None:
+        queryset = queryset.filter(pk__gte=lower_pk)
+
+    if upper_pk is not None:
+        queryset = queryset.filter(pk__lt=upper_pk)
+
+    return queryset
+
+
+def _init_sync_process():
+    connections.close_all()
+    reset_connection()
+
 
-    return num_actions
+def _sync_partition(search_app_name, pk_range, batch_size):
+    search_app = get_search_app(search_app_name)
+    return sync_app(search_app, batch_size=batch_size, pk_range=pk_range)
@@ -0,0 +1,171 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from time import sleep
+from typing import NamedTuple
+
+from django.conf import settings
+from elasticsearch import TransportError
+from elasticsearch.helpers import expand_action
+
+from datahub.search.elasticsearch import get_client
+
+logger = getLogger(__name__)
+
+# Status codes indicating that Elasticsearch is overloaded (and that the request or document
+# should be retried after a delay)
+RETRYABLE_STATUS_CODES = (429, 503)
+BULK_INDEX_TIMEOUT_SECS = 300
+
+
+class BulkIndexReport(NamedTuple):
+    """Result of indexing documents using index_documents()."""
+
+    num_indexed: int = 0
+    # Per-document errors (in the same format as elasticsearch.helpers.bulk())
+    errors: tuple = ()
+
+
+class _ChunkItem(NamedTuple):
+    action: dict
+    lines: tuple
+    num_bytes: int
+
+
+def index_documents(
+    actions,
+    chunk_size=None,
+    max_chunk_bytes=None,
+    max_in_flight_requests=None,
+    max_retries=None,
+):
+    """
+    Sends documents to Elasticsearch using bulk requests.
+
+    Actions are split into chunks limited both by the number of documents and by size in bytes.
+    Up to max_in_flight_requests chunks are sent in parallel; further actions are not consumed
+    until a request has completed, so memory usage is bounded when actions is a generator.
+
+    Requests and individual documents rejected because Elasticsearch is overloaded (status 429
+    or 503) are retried with exponential backoff. Other per-document errors don't stop the
+    remaining documents from being indexed, and are returned in the report instead.
+
+    Errors for whole requests (other than 429 and 503) are raised.
+    """
+    chunk_size = chunk_size or settings.ES_BULK_CHUNK_SIZE
+    max_chunk_bytes = max_chunk_bytes or settings.ES_BULK_MAX_CHUNK_BYTES
+    max_in_flight_requests = max_in_flight_requests or settings.ES_BULK_MAX_IN_FLIGHT_REQUESTS
+    max_retries = settings.ES_BULK_MAX_RETRIES if max_retries is None else max_retries
+
+    client = get_client()
+    chunks = _chunk_actions(client, actions, chunk_size, max_chunk_bytes)
+
+    num_indexed = 0
+    errors = []
+
+    with ThreadPoolExecutor(max_workers=max_in_flight_requests) as executor:
+        in_flight = deque()
+
+        def _collect_oldest_result():
+            nonlocal num_indexed
+            chunk_num_indexed, chunk_errors = in_flight.popleft().result()
+            num_indexed += chunk_num_indexed
+            errors.extend(chunk_errors)
+
+        for chunk in chunks:
+            if len(in_flight) >= max_in_flight_requests:
+                _collect_oldest_result()
+
+            in_flight.append(executor.submit(_send_chunk, client, chunk, max_retries))
+
+        while in_flight:
+            _collect_oldest_result()
+
+    return BulkIndexReport(num_indexed=num_indexed, errors=tuple(errors))
+
+
+def _chunk_actions(client, actions, chunk_size, max_chunk_bytes):
+    serializer = client.transport.serializer
+    chunk = []
+    chunk_bytes = 0
+
+    for action in actions:
+        operation, data = expand_action(action)
+        lines = (
+            serializer.dumps(operation),
+            *((serializer.dumps(data),) if data is not None else ()),
+        )
+        # + 1 for each newline
+        num_bytes = sum(len(line.encode('utf-8')) + 1 for line in lines)
+
+        if chunk and (len(chunk) >= chunk_size or chunk_bytes + num_bytes > max_chunk_bytes):
+            yield chunk
+            chunk = []
+            chunk_bytes = 0
+
+        chunk.append(_ChunkItem(action, lines, num_bytes))
+        chunk_bytes += num_bytes
+
+    if chunk:
+        yield chunk
+
+
+def _send_chunk(client, chunk, max_retries):
+    """
+    Sends a chunk of actions, retrying the request or documents rejected with a 429 or 503
+    status.
+
+    Returns the number of documents indexed and a list of per-document errors.
+    """
+    num_indexed = 0
+    errors = []
+    pending = chunk
+
+    for attempt in range(max_retries + 1):
+        if attempt:
+            sleep(_get_backoff_delay(attempt))
+
+        can_retry = attempt < max_retries
+        body = ''.join(f'{line}\n' for item in pending for line in item.lines)
+
+        try:
+            response = client.bulk(body=body, request_timeout=BULK_INDEX_TIMEOUT_SECS)
+        except TransportError as exc:
+            if can_retry and exc.status_code in RETRYABLE_STATUS_CODES:
+                logger.warning(
+                    f'Elasticsearch bulk request rejected with status {exc.status_code}, '
+                    f'retrying (attempt {attempt + 1} of {max_retries})',
+                )
+                continue
+            raise
+
+        rejected = []
+
+        for item, response_item in zip(pending, response['items']):
+            op_type, result = next(iter(response_item.items()))
+            status = result.get('status', 500)
+
+            if 200 <= status < 300:
+                num_indexed += 1
+            elif can_retry and status in RETRYABLE_STATUS_CODES:
+                rejected.append(item)
+            else:
+                errors.append({op_type: result})
+
+        if not rejected:
+            break
+
+        logger.warning(
+            f'{len(rejected)} documents rejected by Elasticsearch, retrying (attempt '
+            f'{attempt + 1} of {max_retries})',
+        )
+        pending = rejected
+
+    return num_indexed, errors
+
+
+def _get_backoff_delay(attempt):
+    return min(
+        settings.ES_BULK_INITIAL_BACKOFF_SECS * 2 ** (attempt - 1),
+        settings.ES_BULK_MAX_BACKOFF_SECS,
+    )
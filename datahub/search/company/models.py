@@ -163,6 +163,22 @@ class Company(BaseESModel):
         'uk_region': dict_utils.id_name_dict,
     }
 
+    PREFETCH_RELATED_LOOKUPS = (
+        'address_country',
+        'archived_by',
+        'business_type',
+        'employee_range',
+        'export_countries__country',
+        'export_experience_category',
+        'global_headquarters__one_list_account_owner',
+        'headquarter_type',
+        'one_list_account_owner',
+        'registered_address_country',
+        'sector__parent__parent',
+        'turnover_range',
+        'uk_region',
+    )
+
     SEARCH_FIELDS = (
         'id',
         'name',  # to find 2-letter words
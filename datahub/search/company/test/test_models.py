@@ -5,7 +5,9 @@ import pytest
 from datahub.company.test.factories import CompanyFactory
 from datahub.core.constants import Country as CountryConstant
 from datahub.search.apps import get_search_app
+from datahub.search.company import CompanySearchApp
 from datahub.search.company.models import Company as ESCompany, get_suggestions
+from datahub.search.test.utils import get_num_queries_for_document_batch
 
 pytestmark = pytest.mark.django_db
 
@@ -136,3 +138,20 @@ class TestCompanyElasticModel:
 
         else:
             assert Counter(result) == Counter(expected_input_suggestions)
+
+
+def test_num_queries_does_not_depend_on_batch_size():
+    """
+    Test that the number of queries made when converting objects into documents does not
+    depend on the number of objects in the batch.
+    """
+    num_queries_for_one = get_num_queries_for_document_batch(
+        CompanySearchApp,
+        [CompanyFactory()],
+    )
+    num_queries_for_many = get_num_queries_for_document_batch(
+        CompanySearchApp,
+        CompanyFactory.create_batch(3),
+    )
+
+    assert num_queries_for_one == num_queries_for_many
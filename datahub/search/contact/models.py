@@ -77,6 +77,17 @@ class Contact(BaseESModel):
         'company_uk_region': dict_utils.computed_nested_id_name_dict('company.uk_region'),
     }
 
+    PREFETCH_RELATED_LOOKUPS = (
+        'address_country',
+        'adviser',
+        'archived_by',
+        'company__address_country',
+        'company__sector__parent__parent',
+        'company__uk_region',
+        'created_by__dit_team',
+        'title',
+    )
+
     SEARCH_FIELDS = (
         'id',
         'name',
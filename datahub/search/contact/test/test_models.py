@@ -2,7 +2,9 @@ import pytest
 
 from datahub.company.models import Contact
 from datahub.company.test.factories import ContactFactory
+from datahub.search.contact import ContactSearchApp
 from datahub.search.contact.models import Contact as ESContact
+from datahub.search.test.utils import get_num_queries_for_document_batch
 
 pytestmark = pytest.mark.django_db
 
@@ -73,3 +75,20 @@ def test_contact_dbmodels_to_es_documents_without_country(es):
     result = ESContact.es_document(contact)
 
     assert '_source' in result
+
+
+def test_num_queries_does_not_depend_on_batch_size():
+    """
+    Test that the number of queries made when converting objects into documents does not
+    depend on the number of objects in the batch.
+    """
+    num_queries_for_one = get_num_queries_for_document_batch(
+        ContactSearchApp,
+        [ContactFactory()],
+    )
+    num_queries_for_many = get_num_queries_for_document_batch(
+        ContactSearchApp,
+        ContactFactory.create_batch(3),
+    )
+
+    assert num_queries_for_one == num_queries_for_many
@@ -77,9 +77,6 @@ class SearchContactAPIView(SearchContactAPIViewMixin, SearchAPIView):
 class SearchContactExportAPIView(SearchContactAPIViewMixin, SearchExportAPIView):
     """Company search export view."""
 
-    db_sort_by_remappings = {
-        'address_country.name': 'computed_country_name',
-    }
     queryset = DBContact.objects.annotate(
         name=get_full_name_expression(),
         link=get_front_end_url_expression('contact', 'pk'),
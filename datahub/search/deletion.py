@@ -7,6 +7,7 @@ from django.db.models.signals import post_delete, pre_delete
 from datahub.core.exceptions import DataHubException
 from datahub.search.apps import get_search_app_by_model, get_search_apps
 from datahub.search.elasticsearch import bulk
+from datahub.search.result_cache import invalidate_search_results
 from datahub.search.signals import SignalReceiver
 
 
@@ -20,10 +21,14 @@ def delete_documents(index, es_docs):
 
     :raises DataHubException: in case of non 404 errors
     """
-    delete_actions = (
-        _create_delete_action(index, es_doc['_type'], es_doc['_id'])
-        for es_doc in es_docs
-    )
+    doc_types = set()
+
+    def _get_delete_actions():
+        for es_doc in es_docs:
+            doc_types.add(es_doc['_type'])
+            yield _create_delete_action(index, es_doc['_type'], es_doc['_id'])
+
+    delete_actions = _get_delete_actions()
 
     _, errors = bulk(
         actions=delete_actions,
@@ -32,6 +37,9 @@ def delete_documents(index, es_docs):
         raise_on_error=False,
     )
 
+    for doc_type in doc_types:
+        invalidate_search_results(doc_type)
+
     non_404_errors = [error for error in errors if error['delete']['status'] != 404]
     if non_404_errors:
         raise DataHubException(
@@ -156,7 +164,7 @@ def update_es_after_deletions():
 
 
 def delete_document(model, document_id, indices=None, ignore_404_responses=True):
-    """Deletes specified model's document."""
+    """Deletes specified model's document (and invalidates cached search results)."""
     if indices is None:
         indices = [model.get_write_alias()]
     ignored_response_statuses = (404,) if ignore_404_responses else ()
@@ -164,3 +172,5 @@ def delete_document(model, document_id, indices=None, ignore_404_responses=True)
 
     for index in indices:
         doc.delete(index=index, ignore=ignored_response_statuses)
+
+    invalidate_search_results(model._doc_type.name)
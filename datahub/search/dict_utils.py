@@ -195,10 +195,27 @@ def sector_dict(obj):
         'name': obj.name,
         'ancestors': [{
             'id': str(ancestor.id),
-        } for ancestor in obj.get_ancestors()],
+        } for ancestor in _get_ancestors_using_parent(obj)],
     }
 
 
+def _get_ancestors_using_parent(obj):
+    """
+    Gets the ancestors of a tree node (root first) by following parent references.
+
+    This is used instead of get_ancestors() so that no query is made when the parents have
+    already been loaded (e.g. using select_related()).
+    """
+    ancestors = []
+    parent = obj.parent
+
+    while parent:
+        ancestors.append(parent)
+        parent = parent.parent
+
+    return reversed(ancestors)
+
+
 def _list_of_dicts(dict_factory, manager):
     """Creates a list of dicts with ID and name keys from a manager."""
     return [dict_factory(obj) for obj in manager.all()]
@@ -146,6 +146,16 @@ def configure_connection():
     connections.configure(default=connections_default)
 
 
+def reset_connection():
+    """
+    Discards the cached Elasticsearch client and configures a new one.
+
+    This is used in forked processes, which must not reuse the connections of the parent process.
+    """
+    connections.remove_connection('default')
+    configure_connection()
+
+
 def get_client():
     """Gets an instance of the Elasticsearch client from the connection cache."""
     return connections.get_connection()
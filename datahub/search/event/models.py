@@ -52,6 +52,18 @@ class Event(BaseESModel):
 
     COMPUTED_MAPPINGS = {}
 
+    PREFETCH_RELATED_LOOKUPS = (
+        'address_country',
+        'event_type',
+        'lead_team',
+        'location_type',
+        'organiser',
+        'related_programmes',
+        'service__parent__parent',
+        'teams',
+        'uk_region',
+    )
+
     SEARCH_FIELDS = (
         'id',
         'name',
@@ -1,7 +1,9 @@
 import pytest
 
 from datahub.event.test.factories import EventFactory
+from datahub.search.event import EventSearchApp
 from datahub.search.event.models import Event as ESEvent
+from datahub.search.test.utils import get_num_queries_for_document_batch
 
 pytestmark = pytest.mark.django_db
 
@@ -47,3 +49,20 @@ def test_event_dbmodels_to_es_documents(es):
     result = ESEvent.db_objects_to_es_documents(events)
 
     assert len(list(result)) == len(events)
+
+
+def test_num_queries_does_not_depend_on_batch_size():
+    """
+    Test that the number of queries made when converting objects into documents does not
+    depend on the number of objects in the batch.
+    """
+    num_queries_for_one = get_num_queries_for_document_batch(
+        EventSearchApp,
+        [EventFactory()],
+    )
+    num_queries_for_many = get_num_queries_for_document_batch(
+        EventSearchApp,
+        EventFactory.create_batch(3),
+    )
+
+    assert num_queries_for_one == num_queries_for_many
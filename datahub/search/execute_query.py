@@ -1,7 +1,12 @@
+import json
+from hashlib import sha256
 from logging import getLogger
+from random import random
+from time import perf_counter
 
 from django.conf import settings
 
+from datahub.core import statsd
 from datahub.core.utils import log_to_sentry
 from datahub.search.query_builder import build_autocomplete_query
 
@@ -23,22 +28,101 @@ def execute_autocomplete_query(es_model, keyword_search, limit, fields_to_includ
     return results.suggest.autocomplete[0].options
 
 
-def execute_search_query(query):
+def execute_search_query(query, search_app=None):
     """
     Executes an Elasticsearch query using the globally configured request timeout.
 
-    (A warning is also logged if the query takes longer than a set threshold.)
+    Timings and the number of hits are sent to StatsD under search.query.<search app name> (or
+    search.query.global if search_app is None).
+
+    A warning is also logged if the query takes longer than a set threshold. If the query was
+    sampled for profiling (see settings.ES_SEARCH_PROFILE_SAMPLE_RATE), the output of the
+    Elasticsearch profile API is included in the data sent to Sentry.
     """
-    response = query.params(request_timeout=settings.ES_SEARCH_REQUEST_TIMEOUT).execute()
+    label = _get_query_label(search_app)
+    query = query.params(request_timeout=settings.ES_SEARCH_REQUEST_TIMEOUT)
+
+    is_profiled = random() < settings.ES_SEARCH_PROFILE_SAMPLE_RATE
+    # The profile flag is left out of the original query so that it doesn't affect the fingerprint
+    executed_query = query.extra(profile=True) if is_profiled else query
+
+    start_time = perf_counter()
+    response = executed_query.execute()
+    round_trip_ms = (perf_counter() - start_time) * 1000
+
+    with statsd.statsd().pipeline() as pipeline:
+        pipeline.timing(f'search.query.{label}.took', response.took)
+        pipeline.timing(f'search.query.{label}.round-trip', round_trip_ms)
+        # timing() is used so that the distribution of hit counts is recorded
+        pipeline.timing(f'search.query.{label}.hits', response.hits.total)
 
     if response.took >= settings.ES_SEARCH_REQUEST_WARNING_THRESHOLD * 1000:
-        logger.warning(f'Elasticsearch query took a long time ({response.took/1000:.2f} seconds)')
+        query_dict = query.to_dict()
+        fingerprint = get_query_fingerprint(query_dict)
+
+        logger.warning(
+            f'Elasticsearch query took a long time ({response.took/1000:.2f} seconds, '
+            f'search app: {label}, fingerprint: {fingerprint})',
+        )
+        statsd.incr(f'search.query.slow.{fingerprint}')
 
         log_data = {
-            'query': query.to_dict(),
+            'query': query_dict,
             'took': response.took,
             'timed_out': response.timed_out,
+            'round_trip_ms': round_trip_ms,
+            'hits': response.hits.total,
+            'search_app': label,
+            'fingerprint': fingerprint,
         }
+        if is_profiled:
+            log_data['profile'] = response.to_dict().get('profile')
+
         log_to_sentry('Elasticsearch query took a long time', extra=log_data)
 
     return response
+
+
+def serialise_hits(response, search_app=None):
+    """
+    Converts the hits in a search response to dicts.
+
+    The time taken is sent to StatsD under search.query.<search app name>.serialisation.
+    """
+    start_time = perf_counter()
+    hits = [hit.to_dict() for hit in response.hits]
+    serialisation_ms = (perf_counter() - start_time) * 1000
+
+    statsd.statsd().timing(
+        f'search.query.{_get_query_label(search_app)}.serialisation',
+        serialisation_ms,
+    )
+    return hits
+
+
+def get_query_fingerprint(query_dict):
+    """
+    Gets a short hash of the shape of a query.
+
+    Values (including lists of values) are ignored, so that queries that only differ in the
+    search term, filter values or pagination have the same fingerprint.
+    """
+    shape = _get_query_shape(query_dict)
+    serialised_shape = json.dumps(shape, sort_keys=True)
+    return sha256(serialised_shape.encode('utf-8')).hexdigest()[:12]
+
+
+def _get_query_shape(value):
+    if isinstance(value, dict):
+        return {key: _get_query_shape(item) for key, item in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        if all(not isinstance(item, (dict, list, tuple)) for item in value):
+            return ['?']
+        return [_get_query_shape(item) for item in value]
+
+    return '?'
+
+
+def _get_query_label(search_app):
+    return search_app.name if search_app else 'global'
@@ -12,6 +12,8 @@ class ExportCountryHistoryApp(SearchApp):
     name = 'export-country-history'
     es_model = ExportCountryHistory
     exclude_from_global_search = True
+    # History records are never modified
+    watermark_field = 'history_date'
     view_permissions = (f'company.{CompanyPermission.view_company}',)
     queryset = DBCompanyExportCountryHistory.objects.select_related(
         'history_user',
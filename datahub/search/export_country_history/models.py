@@ -28,6 +28,12 @@ class ExportCountryHistory(BaseESModel):
         'id': lambda obj: obj.history_id,  # Id required for indexing
     }
 
+    PREFETCH_RELATED_LOOKUPS = (
+        'company',
+        'country',
+        'history_user',
+    )
+
     class Meta:
         """Default document meta data."""
 
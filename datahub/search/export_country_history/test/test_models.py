@@ -1,7 +1,9 @@
 import pytest
 
 from datahub.company.test.factories import CompanyExportCountryHistoryFactory
+from datahub.search.export_country_history import ExportCountryHistoryApp
 from datahub.search.export_country_history.models import ExportCountryHistory
+from datahub.search.test.utils import get_num_queries_for_document_batch
 
 pytestmark = pytest.mark.django_db
 
@@ -29,3 +31,20 @@ def test_export_country_history_to_dict(es):
         },
         'status': export_country_history.status,
     }
+
+
+def test_num_queries_does_not_depend_on_batch_size():
+    """
+    Test that the number of queries made when converting objects into documents does not
+    depend on the number of objects in the batch.
+    """
+    num_queries_for_one = get_num_queries_for_document_batch(
+        ExportCountryHistoryApp,
+        [CompanyExportCountryHistoryFactory()],
+    )
+    num_queries_for_many = get_num_queries_for_document_batch(
+        ExportCountryHistoryApp,
+        CompanyExportCountryHistoryFactory.create_batch(3),
+    )
+
+    assert num_queries_for_one == num_queries_for_many
@@ -0,0 +1,199 @@
+"""
+Asynchronous search exports.
+
+Export jobs are run by a Celery task which writes a gzipped CSV file to S3. The state of each
+job is kept in the cache so that the client can poll for it (and obtain a download URL once the
+job has completed).
+"""
+from datetime import timedelta
+from logging import getLogger
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.utils.module_loading import import_string
+from django.utils.timezone import now
+
+from datahub.core.csv import csv_iterator
+from datahub.core.utils import StrEnum
+from datahub.documents.utils import (
+    get_bucket_name,
+    get_s3_client_for_bucket,
+    sign_s3_url,
+    upload_gzipped_stream_to_s3,
+)
+
+logger = getLogger(__name__)
+
+EXPORT_JOB_BUCKET_ID = 'default'
+EXPORT_JOB_KEY_PREFIX = 'search-exports'
+EXPORT_JOB_TIMEOUT = timedelta(days=1)
+EXPORT_JOB_TIMEOUT_SECS = int(EXPORT_JOB_TIMEOUT.total_seconds())
+DOWNLOAD_URL_EXPIRY_SECS = 60 * 60
+
+
+class ExportJobStatus(StrEnum):
+    """Statuses of export jobs."""
+
+    pending = 'pending'
+    in_progress = 'in_progress'
+    complete = 'complete'
+    failed = 'failed'
+
+
+def create_export_job(adviser, view_cls, data, base_filename, api_url_path):
+    """
+    Saves a new export job in the cache and returns it.
+
+    The request data is stored as-is, and is validated again when the job runs. api_url_path
+    is the path of the export request (which is recorded in the user event for the export).
+    """
+    job_id = str(uuid4())
+    job = {
+        'id': job_id,
+        'status': ExportJobStatus.pending.value,
+        'adviser_id': str(adviser.pk),
+        'api_url_path': api_url_path,
+        'view': f'{view_cls.__module__}.{view_cls.__qualname__}',
+        'data': data,
+        'filename': f'{base_filename}.csv.gz',
+        's3_key': f'{EXPORT_JOB_KEY_PREFIX}/{job_id}/{base_filename}.csv.gz',
+    }
+    _save_export_job(job)
+    return job
+
+
+def get_export_job(job_id):
+    """Gets an export job from the cache (returning None if it doesn't exist or has expired)."""
+    return cache.get(_get_cache_key(job_id))
+
+
+def get_export_job_status_data(job):
+    """Returns the data returned to the client for an export job."""
+    is_complete = job['status'] == ExportJobStatus.complete
+    download_url = (
+        sign_s3_url(EXPORT_JOB_BUCKET_ID, job['s3_key'], expires=DOWNLOAD_URL_EXPIRY_SECS)
+        if is_complete else None
+    )
+
+    return {
+        'id': job['id'],
+        'status': job['status'],
+        'download_url': download_url,
+    }
+
+
+def run_export_job(job_id):
+    """
+    Generates the CSV file for an export job and uploads it to S3.
+
+    The view that created the job is used to generate the rows so that exactly the same query
+    and permission filters are used as for synchronous exports. A user event is recorded for
+    the export once the file has been uploaded.
+
+    The number of results is limited by settings.SEARCH_EXPORT_ASYNC_MAX_RESULTS (rather than
+    settings.SEARCH_EXPORT_MAX_RESULTS, as the request timeout does not apply here).
+    """
+    job = get_export_job(job_id)
+    if not job:
+        logger.warning(f'Search export job {job_id} not found, it may have expired')
+        return
+
+    _update_export_job_status(job, ExportJobStatus.in_progress)
+
+    try:
+        view = import_string(job['view'])()
+        request = _make_request(job)
+
+        validated_data = view.validate_data(job['data'])
+        base_query = view.get_base_query(request, validated_data)
+        num_results, ids = view._start_scroll(
+            view._get_es_query(base_query),
+            settings.SEARCH_EXPORT_ASYNC_MAX_RESULTS,
+        )
+        rows = view._get_rows(ids)
+
+        upload_gzipped_stream_to_s3(
+            EXPORT_JOB_BUCKET_ID,
+            job['s3_key'],
+            csv_iterator(rows, view.field_titles),
+            ContentType='application/gzip',
+            ContentDisposition=f'attachment; filename="{job["filename"]}"',
+            ServerSideEncryption='AES256',
+        )
+
+        view._record_user_event(request, validated_data, num_results)
+    except Exception:
+        _update_export_job_status(job, ExportJobStatus.failed)
+        raise
+
+    _update_export_job_status(job, ExportJobStatus.complete)
+
+
+def delete_expired_export_files():
+    """
+    Deletes export files in S3 that are older than EXPORT_JOB_TIMEOUT.
+
+    The jobs for these files have expired from the cache, so the files can no longer be
+    downloaded.
+
+    Returns the number of files deleted.
+    """
+    client = get_s3_client_for_bucket(EXPORT_JOB_BUCKET_ID)
+    bucket_name = get_bucket_name(EXPORT_JOB_BUCKET_ID)
+    expiry_threshold = now() - EXPORT_JOB_TIMEOUT
+    num_deleted = 0
+
+    paginator = client.get_paginator('list_objects_v2')
+    pages = paginator.paginate(Bucket=bucket_name, Prefix=f'{EXPORT_JOB_KEY_PREFIX}/')
+
+    # Each page contains at most 1,000 objects, which is also the most that delete_objects()
+    # accepts
+    for page in pages:
+        expired_keys = [
+            obj['Key'] for obj in page.get('Contents', [])
+            if obj['LastModified'] < expiry_threshold
+        ]
+        if not expired_keys:
+            continue
+
+        client.delete_objects(
+            Bucket=bucket_name,
+            Delete={
+                'Objects': [{'Key': key} for key in expired_keys],
+                'Quiet': True,
+            },
+        )
+        num_deleted += len(expired_keys)
+
+    logger.info(f'{num_deleted} expired search export files deleted')
+    return num_deleted
+
+
+def _make_request(job):
+    """
+    Creates a request for the adviser who created a job.
+
+    This is used when applying permission filters (which are based on the user and the request
+    method) and when recording the user event for the export.
+    """
+    request = HttpRequest()
+    request.method = 'POST'
+    request.path = job['api_url_path']
+    request.user = get_user_model().objects.get(pk=job['adviser_id'])
+    return request
+
+
+def _update_export_job_status(job, status):
+    job['status'] = status.value
+    _save_export_job(job)
+
+
+def _save_export_job(job):
+    cache.set(_get_cache_key(job['id']), job, timeout=EXPORT_JOB_TIMEOUT_SECS)
+
+
+def _get_cache_key(job_id):
+    return f'search-export-job:{job_id}'
@@ -97,6 +97,22 @@ class Interaction(BaseESModel):
         'is_event': attrgetter('is_event'),
     }
 
+    PREFETCH_RELATED_LOOKUPS = (
+        'communication_channel',
+        'company__global_headquarters__one_list_tier',
+        'company__one_list_tier',
+        'company__sector__parent__parent',
+        'contacts',
+        'dit_participants__adviser',
+        'dit_participants__team',
+        'event',
+        'investment_project__sector__parent__parent',
+        'policy_areas',
+        'policy_issue_types',
+        'service__parent__parent',
+        'service_delivery_status',
+    )
+
     SEARCH_FIELDS = (
         'id',
         'company.name',
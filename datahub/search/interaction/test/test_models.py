@@ -8,7 +8,9 @@ from datahub.interaction.test.factories import (
     InvestmentProjectInteractionFactory,
     ServiceDeliveryFactory,
 )
+from datahub.search.interaction import InteractionSearchApp
 from datahub.search.interaction.models import Interaction
+from datahub.search.test.utils import get_num_queries_for_document_batch
 
 pytestmark = pytest.mark.django_db
 
@@ -203,3 +205,20 @@ def test_interactions_to_es_documents(es):
     result = Interaction.db_objects_to_es_documents(interactions)
 
     assert {item['_id'] for item in result} == {item.pk for item in interactions}
+
+
+def test_num_queries_does_not_depend_on_batch_size():
+    """
+    Test that the number of queries made when converting objects into documents does not
+    depend on the number of objects in the batch.
+    """
+    num_queries_for_one = get_num_queries_for_document_batch(
+        InteractionSearchApp,
+        [CompanyInteractionFactory()],
+    )
+    num_queries_for_many = get_num_queries_for_document_batch(
+        InteractionSearchApp,
+        CompanyInteractionFactory.create_batch(3),
+    )
+
+    assert num_queries_for_one == num_queries_for_many
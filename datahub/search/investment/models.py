@@ -173,6 +173,41 @@ class InvestmentProject(BaseESModel):
         ],
     }
 
+    PREFETCH_RELATED_LOOKUPS = (
+        'actual_uk_regions',
+        'archived_by',
+        'associated_non_fdi_r_and_d_project',
+        'average_salary',
+        'business_activities',
+        'client_contacts',
+        'client_relationship_manager__dit_team',
+        'country_investment_originates_from',
+        'country_lost_to',
+        'created_by__dit_team',
+        'delivery_partners',
+        'fdi_type',
+        'fdi_value',
+        'intermediate_company',
+        'investment_type',
+        'investmentprojectcode',
+        'investor_company__address_country',
+        'investor_type',
+        'level_of_involvement',
+        'likelihood_to_land',
+        'project_assurance_adviser__dit_team',
+        'project_manager__dit_team',
+        'referral_source_activity',
+        'referral_source_activity_marketing',
+        'referral_source_activity_website',
+        'referral_source_adviser',
+        'sector__parent__parent',
+        'specific_programme',
+        'stage',
+        'team_members__adviser__dit_team',
+        'uk_company',
+        'uk_region_locations',
+    )
+
     SEARCH_FIELDS = (
         'id',
         'name',
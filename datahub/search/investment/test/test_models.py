@@ -13,7 +13,9 @@ from datahub.investment.project.test.factories import (
     GVAMultiplierFactory,
     InvestmentProjectFactory,
 )
+from datahub.search.investment import InvestmentSearchApp
 from datahub.search.investment.models import InvestmentProject as ESInvestmentProject
+from datahub.search.test.utils import get_num_queries_for_document_batch
 
 pytestmark = pytest.mark.django_db
 
@@ -201,3 +203,20 @@ def test_max_values_of_doubles_gross_value_added_and_foreign_equity_investment(
         == less_accurate_expected_foreign_equity_investment_value
     )
     assert project_in_es['gross_value_added'] == less_accurate_expected_gross_value_added
+
+
+def test_num_queries_does_not_depend_on_batch_size():
+    """
+    Test that the number of queries made when converting objects into documents does not
+    depend on the number of objects in the batch.
+    """
+    num_queries_for_one = get_num_queries_for_document_batch(
+        InvestmentSearchApp,
+        [InvestmentProjectFactory()],
+    )
+    num_queries_for_many = get_num_queries_for_document_batch(
+        InvestmentSearchApp,
+        InvestmentProjectFactory.create_batch(3),
+    )
+
+    assert num_queries_for_one == num_queries_for_many
@@ -84,6 +84,24 @@ class LargeInvestorProfile(BaseESModel):
         **_LOCATION_FIELD_MAPPINGS,
     }
 
+    PREFETCH_RELATED_LOOKUPS = (
+        'asset_classes_of_interest',
+        'construction_risks',
+        'created_by__dit_team',
+        'deal_ticket_sizes',
+        'desired_deal_roles',
+        'investment_types',
+        'investor_company__address_country',
+        'investor_type',
+        'minimum_equity_percentage',
+        'minimum_return_rate',
+        'other_countries_being_considered',
+        'required_checks_conducted',
+        'restrictions',
+        'time_horizons',
+        'uk_region_locations',
+    )
+
     class Meta:
         """Default document meta data."""
 
@@ -1,9 +1,11 @@
 import pytest
 
 from datahub.investment.investor_profile.test.factories import LargeCapitalInvestorProfileFactory
+from datahub.search.large_investor_profile import LargeInvestorProfileSearchApp
 from datahub.search.large_investor_profile.models import (
     LargeInvestorProfile as ESLargeInvestorProfile,
 )
+from datahub.search.test.utils import get_num_queries_for_document_batch
 
 pytestmark = pytest.mark.django_db
 
@@ -50,3 +52,20 @@ class TestLargeInvestorProfileElasticModel:
         result = ESLargeInvestorProfile.db_objects_to_es_documents(large_profiles)
 
         assert len(list(result)) == len(large_profiles)
+
+
+def test_num_queries_does_not_depend_on_batch_size():
+    """
+    Test that the number of queries made when converting objects into documents does not
+    depend on the number of objects in the batch.
+    """
+    num_queries_for_one = get_num_queries_for_document_batch(
+        LargeInvestorProfileSearchApp,
+        [LargeCapitalInvestorProfileFactory()],
+    )
+    num_queries_for_many = get_num_queries_for_document_batch(
+        LargeInvestorProfileSearchApp,
+        LargeCapitalInvestorProfileFactory.create_batch(3),
+    )
+
+    assert num_queries_for_one == num_queries_for_many
@@ -1,8 +1,10 @@
 from logging import getLogger, WARNING
 
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 
 from datahub.search.apps import are_apps_initialised, get_search_apps, get_search_apps_by_name
+from datahub.search.bulk_sync import sync_app_in_process_pool
 from datahub.search.tasks import sync_model
 
 logger = getLogger(__name__)
@@ -27,6 +29,13 @@ class Command(BaseCommand):
             help='If specified, the command runs in the foreground without needing Celery '
                  'running. (By default, it runs asynchronously using Celery.)',
         )
+        parser.add_argument(
+            '--partitions',
+            type=int,
+            help='The number of primary key ranges to split each search app into. Ranges are '
+                 'synced in parallel using Celery sub-tasks (or a pool of processes when '
+                 '--foreground is specified). Defaults to settings.SEARCH_SYNC_NUM_PARTITIONS.',
+        )
 
     def handle(self, *args, **options):
         """Handle."""
@@ -40,12 +49,16 @@ class Command(BaseCommand):
                 f'Index and mapping not initialised, please run `migrate_es` first.',
             )
 
+        num_partitions = options['partitions'] or settings.SEARCH_SYNC_NUM_PARTITIONS
+
         for app in apps:
             task_args = (app.name,)
 
-            if options['foreground']:
+            if options['foreground'] and num_partitions > 1:
+                sync_app_in_process_pool(app, num_partitions)
+            elif options['foreground']:
                 sync_model.apply(args=task_args, throw=True)
             else:
-                sync_model.apply_async(args=task_args)
+                sync_model.apply_async(args=task_args, kwargs={'num_partitions': num_partitions})
 
         logger.info('Elasticsearch sync complete!')
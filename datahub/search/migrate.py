@@ -1,6 +1,7 @@
 from logging import getLogger
 
 from datahub.core.exceptions import DataHubException
+from datahub.search.alias_cache import invalidate_alias_cache
 from datahub.search.elasticsearch import create_index, start_alias_transaction
 from datahub.search.tasks import complete_model_migration, sync_model
 
@@ -63,6 +64,8 @@ def _perform_migration(search_app):
         alias_transaction.associate_indices_with_alias(write_alias_name, [new_index_name])
         alias_transaction.dissociate_indices_from_alias(write_alias_name, [current_write_index])
 
+    invalidate_alias_cache()
+
     _schedule_resync(search_app)
 
 
@@ -1,6 +1,9 @@
 from logging import getLogger
 
+from django.core.cache import cache
+
 from datahub.core.exceptions import DataHubException
+from datahub.search.alias_cache import invalidate_alias_cache
 from datahub.search.bulk_sync import sync_app
 from datahub.search.deletion import delete_documents
 from datahub.search.elasticsearch import (
@@ -11,6 +14,9 @@ from datahub.search.elasticsearch import (
 
 
 BULK_DELETION_TIMEOUT_SECS = 300
+# Safety net in case a partitioned resync stops without its callback or error callback running
+# (e.g. if a sub-task is lost)
+PARTITIONED_RESYNC_IN_PROGRESS_TIMEOUT_SECS = 24 * 60 * 60
 logger = getLogger(__name__)
 
 
@@ -18,18 +24,47 @@ def resync_after_migrate(search_app):
     """
     Completes a migration by performing a full resync, updating aliases and removing old indices.
     """
-    if not search_app.es_model.was_migration_started():
-        logger.warning(
-            f'No pending migration detected for the {search_app.name} search app, aborting '
-            f'resync...',
-        )
+    if not is_resync_after_migrate_needed(search_app):
         return
 
-    sync_app(search_app, post_batch_callback=delete_from_secondary_indices_callback)
-    _clean_up_aliases_and_indices(search_app)
+    report = sync_app(
+        search_app,
+        post_batch_callback=delete_from_secondary_indices_callback,
+        resumable=True,
+    )
+
+    if not is_clean_up_after_resync_safe(search_app, report):
+        return
 
+    clean_up_aliases_and_indices(search_app)
 
-def _clean_up_aliases_and_indices(search_app):
+
+def is_clean_up_after_resync_safe(search_app, report):
+    """
+    Checks (and logs an error if not) whether all documents were indexed by a resync after a
+    migration.
+
+    If any documents could not be indexed, the indices being migrated from are kept (so that
+    those documents remain searchable) and the migration is left incomplete.
+    """
+    if report.num_errors:
+        logger.error(
+            f'{report.num_errors} documents could not be indexed when resyncing the '
+            f'{search_app.name} search app after a migration. The old indices have been kept and '
+            f'the migration has not been completed.',
+        )
+        return False
+
+    return True
+
+
+def clean_up_aliases_and_indices(search_app):
+    """
+    Removes indices being migrated from from the read alias (and deletes them if they are no
+    longer referenced by any alias).
+
+    This is the final step of a migration and must only be called once a resync has completed.
+    """
     es_model = search_app.es_model
     read_alias = es_model.get_read_alias()
     read_indices, write_index = es_model.get_read_and_write_indices()
@@ -42,6 +77,8 @@ def _clean_up_aliases_and_indices(search_app):
     if indices_to_remove:
         with start_alias_transaction() as alias_transaction:
             alias_transaction.dissociate_indices_from_alias(read_alias, indices_to_remove)
+
+        invalidate_alias_cache()
     else:
         logger.warning(f'No indices to remove for the {read_alias} alias')
 
@@ -50,6 +87,41 @@ def _clean_up_aliases_and_indices(search_app):
             delete_index(index)
 
 
+def is_resync_after_migrate_needed(search_app):
+    """Checks (and logs a warning if not) whether a migration is pending for a search app."""
+    if not search_app.es_model.was_migration_started():
+        logger.warning(
+            f'No pending migration detected for the {search_app.name} search app, aborting '
+            f'resync...',
+        )
+        return False
+
+    return True
+
+
+def mark_partitioned_resync_in_progress(search_app):
+    """
+    Records that a partitioned resync after a migration has been scheduled for a search app.
+
+    Returns False if one is already in progress (in which case another one should not be
+    scheduled).
+    """
+    return cache.add(
+        _get_partitioned_resync_in_progress_key(search_app),
+        True,
+        timeout=PARTITIONED_RESYNC_IN_PROGRESS_TIMEOUT_SECS,
+    )
+
+
+def clear_partitioned_resync_in_progress(search_app):
+    """Records that a partitioned resync after a migration has finished (or failed)."""
+    cache.delete(_get_partitioned_resync_in_progress_key(search_app))
+
+
+def _get_partitioned_resync_in_progress_key(search_app):
+    return f'search-partitioned-resync-in-progress:{search_app.name}'
+
+
 def delete_from_secondary_indices_callback(read_indices, write_index, actions):
     """
     Callback for sync_app() and sync_objects() that deletes synced documents from any indices
@@ -1,10 +1,13 @@
+from functools import partial
 from hashlib import blake2b
 from logging import getLogger
 
 from django.conf import settings
+from django.db.models import prefetch_related_objects
 from elasticsearch_dsl import Document, MetaField
 
 from datahub.core.exceptions import DataHubException
+from datahub.search.alias_cache import get_cached_alias_state, invalidate_alias_cache
 from datahub.search.elasticsearch import (
     alias_exists,
     associate_index_with_alias,
@@ -24,6 +27,13 @@ class BaseESModel(Document):
 
     COMPUTED_MAPPINGS = {}
 
+    # Related objects used by MAPPINGS and COMPUTED_MAPPINGS (as prefetch_related() lookups).
+    # These are loaded in bulk for each batch of objects converted into documents, so that the
+    # number of queries does not depend on the number of objects. (Relations that have already
+    # been loaded, e.g. using select_related() in the search app queryset, are not fetched
+    # again.)
+    PREFETCH_RELATED_LOOKUPS = ()
+
     SEARCH_FIELDS = ()
 
     # Fields that have been renamed in some way, and were used as part of a filter.
@@ -54,8 +64,20 @@ class BaseESModel(Document):
         return _get_write_index(indices)
 
     @classmethod
-    def get_read_and_write_indices(cls):
-        """Gets the indices currently referenced by the read and write aliases."""
+    def get_read_and_write_indices(cls, use_cache=False):
+        """
+        Gets the indices currently referenced by the read and write aliases.
+
+        If use_cache is True, a recently fetched result may be returned (see
+        datahub.search.alias_cache). This is intended for syncing individual objects; operations
+        that modify aliases should not use the cache.
+        """
+        if use_cache:
+            return get_cached_alias_state(
+                cls.get_write_alias(),
+                partial(cls.get_read_and_write_indices, use_cache=False),
+            )
+
         read_indices, write_indices = get_indices_for_aliases(
             cls.get_read_alias(), cls.get_write_alias(),
         )
@@ -115,6 +137,7 @@ class BaseESModel(Document):
             index_name = cls.get_target_index_name()
             alias_names = (cls.get_write_alias(), cls.get_read_alias())
             create_index(index_name, cls._doc_type.mapping, alias_names=alias_names)
+            invalidate_alias_cache()
             return True
 
         # Should not normally happen
@@ -123,6 +146,7 @@ class BaseESModel(Document):
                 f'Missing read alias {cls.get_read_alias()} detected, recreating the alias...',
             )
             associate_index_with_alias(cls.get_read_alias(), cls.get_write_index())
+            invalidate_alias_cache()
 
         return False
 
@@ -165,7 +189,15 @@ class BaseESModel(Document):
 
     @classmethod
     def db_objects_to_es_documents(cls, db_objects, index=None):
-        """Converts DB model objects to Elasticsearch documents."""
+        """
+        Converts a batch of DB model objects to Elasticsearch documents.
+
+        Related objects listed in PREFETCH_RELATED_LOOKUPS are loaded for the whole batch before
+        any documents are created.
+        """
+        db_objects = list(db_objects)
+        prefetch_related_objects(db_objects, *cls.PREFETCH_RELATED_LOOKUPS)
+
         for db_object in db_objects:
             yield cls.es_document(db_object, index=index)
 
@@ -96,6 +96,23 @@ class Order(BaseESModel):
         'payment_due_date': lambda x: x.invoice.payment_due_date if x.invoice else None,
     }
 
+    PREFETCH_RELATED_LOOKUPS = (
+        'assignees__adviser__dit_team',
+        'billing_address_country',
+        'cancellation_reason',
+        'cancelled_by',
+        'company',
+        'completed_by',
+        'contact',
+        'created_by__dit_team',
+        'invoice',
+        'primary_market',
+        'sector__parent__parent',
+        'service_types',
+        'subscribers__adviser__dit_team',
+        'uk_region',
+    )
+
     SEARCH_FIELDS = (
         'id',
         'reference.trigram',
@@ -9,7 +9,9 @@ from datahub.omis.order.test.factories import (
     OrderSubscriberFactory,
     OrderWithAcceptedQuoteFactory,
 )
+from datahub.search.omis import OrderSearchApp
 from datahub.search.omis.models import Order as ESOrder
+from datahub.search.test.utils import get_num_queries_for_document_batch
 
 pytestmark = pytest.mark.django_db
 
@@ -168,3 +170,20 @@ def test_orders_to_es_documents():
     result = ESOrder.db_objects_to_es_documents(orders)
 
     assert {item['_id'] for item in result} == {item.pk for item in orders}
+
+
+def test_num_queries_does_not_depend_on_batch_size():
+    """
+    Test that the number of queries made when converting objects into documents does not
+    depend on the number of objects in the batch.
+    """
+    num_queries_for_one = get_num_queries_for_document_batch(
+        OrderSearchApp,
+        [OrderWithAcceptedQuoteFactory()],
+    )
+    num_queries_for_many = get_num_queries_for_document_batch(
+        OrderSearchApp,
+        OrderWithAcceptedQuoteFactory.create_batch(3),
+    )
+
+    assert num_queries_for_one == num_queries_for_many
@@ -0,0 +1,160 @@
+"""
+Incremental syncing and reconciliation of search indices.
+
+These are cheaper alternatives to periodically re-indexing every object of every search app:
+
+- sync_changed_objects() only re-indexes objects modified since the previous run (using a
+  per-app high-water mark)
+- reconcile_search_app() compares the primary keys in the database with the document IDs in
+  Elasticsearch, indexes any objects that are missing (e.g. because a signal was lost) and
+  deletes any orphaned documents
+
+Note that changes made without updating the watermark field (e.g. using QuerySet.update())
+are not picked up by sync_changed_objects().
+"""
+from datetime import timedelta
+from logging import getLogger
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import now
+
+from datahub.core.utils import slice_iterable_into_chunks
+from datahub.search.bulk_sync import sync_app, sync_objects
+from datahub.search.deletion import delete_documents
+from datahub.search.elasticsearch import get_client
+from datahub.search.migrate_utils import delete_from_secondary_indices_callback
+
+logger = getLogger(__name__)
+
+WATERMARK_CACHE_KEY_PREFIX = 'search-sync-watermark'
+
+
+class ReconciliationReport(NamedTuple):
+    """Summary of a reconciliation of a search app."""
+
+    num_missing: int = 0
+    num_orphaned: int = 0
+
+
+def sync_changed_objects(search_app):
+    """
+    Re-indexes objects that have been modified since the previous call for the same search app.
+
+    A full sync is performed if there is no watermark (e.g. on the first run). Returns the sync
+    report.
+
+    The watermark is moved back by settings.SEARCH_INCREMENTAL_SYNC_OVERLAP to allow for
+    transactions that were not committed when the previous run started.
+
+    The watermark is not advanced if any documents could not be indexed, so that they are
+    retried by the next run.
+    """
+    watermark_field = search_app.watermark_field
+    watermark = get_watermark(search_app)
+    started_on = now()
+
+    queryset = search_app.queryset
+    if watermark:
+        lower_bound = watermark - timedelta(seconds=settings.SEARCH_INCREMENTAL_SYNC_OVERLAP)
+        queryset = queryset.filter(**{f'{watermark_field}__gte': lower_bound})
+
+    logger.info(
+        f'Syncing {search_app.name} objects modified since '
+        f'{watermark.isoformat() if watermark else "the beginning"}',
+    )
+    report = sync_app(search_app, queryset=queryset)
+
+    if report.num_errors:
+        logger.warning(
+            f'{report.num_errors} {search_app.name} documents could not be indexed, the '
+            'watermark has not been advanced',
+        )
+        return report
+
+    _set_watermark(search_app, started_on)
+    return report
+
+
+def reconcile_search_app(search_app):
+    """
+    Makes sure that the documents in the write index of a search app match the objects in the
+    database.
+
+    Objects without a document are indexed and documents without an object are deleted.
+    Primary keys and document IDs are compared in chunks so that memory usage doesn't depend on
+    the number of objects.
+    """
+    es_model = search_app.es_model
+    read_indices, write_index = es_model.get_read_and_write_indices()
+    chunk_size = settings.SEARCH_RECONCILIATION_CHUNK_SIZE
+
+    num_missing = 0
+    pks = search_app.queryset.order_by('pk').values_list('pk', flat=True).iterator()
+    for pk_chunk in slice_iterable_into_chunks(pks, chunk_size):
+        missing_pks = _get_pks_without_documents(search_app, write_index, pk_chunk)
+        if missing_pks:
+            sync_objects(
+                es_model,
+                search_app.queryset.filter(pk__in=missing_pks),
+                read_indices,
+                write_index,
+                post_batch_callback=delete_from_secondary_indices_callback,
+            )
+            num_missing += len(missing_pks)
+
+    num_orphaned = 0
+    document_ids = _scan_document_ids(search_app, write_index)
+    for id_chunk in slice_iterable_into_chunks(document_ids, chunk_size):
+        orphaned_ids = _get_ids_without_objects(search_app, id_chunk)
+        if orphaned_ids:
+            es_docs = [{'_type': es_model._doc_type.name, '_id': id_} for id_ in orphaned_ids]
+            for index in {*read_indices, write_index}:
+                delete_documents(index, es_docs)
+            num_orphaned += len(orphaned_ids)
+
+    report = ReconciliationReport(num_missing=num_missing, num_orphaned=num_orphaned)
+    logger.info(
+        f'Reconciliation of the {search_app.name} search app complete: {report.num_missing} '
+        f'missing objects indexed, {report.num_orphaned} orphaned documents deleted',
+    )
+    return report
+
+
+def get_watermark(search_app):
+    """Gets the time the previous incremental sync of a search app started (or None)."""
+    return cache.get(_get_watermark_cache_key(search_app))
+
+
+def _set_watermark(search_app, value):
+    cache.set(_get_watermark_cache_key(search_app), value, timeout=None)
+
+
+def _get_watermark_cache_key(search_app):
+    return f'{WATERMARK_CACHE_KEY_PREFIX}:{search_app.name}'
+
+
+def _get_pks_without_documents(search_app, index, pks):
+    response = get_client().mget(
+        index=index,
+        doc_type=search_app.es_model._doc_type.name,
+        body={'ids': [str(pk) for pk in pks]},
+        _source=False,
+    )
+    found_ids = {doc['_id'] for doc in response['docs'] if doc.get('found')}
+    return [pk for pk in pks if str(pk) not in found_ids]
+
+
+def _scan_document_ids(search_app, index):
+    search = search_app.es_model.search(index=index).source(False).params(
+        size=settings.SEARCH_RECONCILIATION_CHUNK_SIZE,
+    )
+    for hit in search.scan():
+        yield hit.meta.id
+
+
+def _get_ids_without_objects(search_app, ids):
+    existing_pks = search_app.queryset.filter(pk__in=ids).values_list('pk', flat=True)
+    existing_ids = {str(pk) for pk in existing_pks}
+    return [id_ for id_ in ids if id_ not in existing_ids]
@@ -0,0 +1,110 @@
+"""
+Short-lived cache of search results.
+
+Cached results are keyed on the Elasticsearch query (which includes any permission filters) and
+on a set of generation counters stored in the Django cache:
+
+- the alias cache generation, which changes whenever aliases are modified (e.g. at the end of a
+  migration)
+- a per-search-app generation, which is incremented whenever documents of that search app are
+  indexed or deleted
+
+Incrementing a generation counter hence makes all previously cached results for that search app
+unreachable (they then expire normally).
+
+Note that Elasticsearch only makes changes visible once an index has been refreshed, so a result
+cached just after a change can still be stale for up to the TTL.
+"""
+import json
+from hashlib import sha256
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from datahub.core import statsd
+from datahub.search.alias_cache import GENERATION_CACHE_KEY as ALIAS_GENERATION_CACHE_KEY
+
+RESULT_CACHE_KEY_PREFIX = 'search-result'
+WRITE_GENERATION_CACHE_KEY_PREFIX = 'search-result-cache-generation'
+
+
+def get_result_cache_ttl(search_app):
+    """
+    Gets the number of seconds search results for a search app should be cached for.
+
+    0 means that search results should not be cached.
+    """
+    if not settings.ENABLE_SEARCH_RESULT_CACHE:
+        return 0
+
+    ttl = search_app.search_result_cache_ttl
+    return settings.SEARCH_RESULT_CACHE_TTL if ttl is None else ttl
+
+
+def get_or_execute_search(query, search_apps, execute):
+    """
+    Returns cached response data for a query, calling execute() if there is no cached data.
+
+    search_apps should contain all the search apps whose documents the query can return. The
+    shortest TTL of those search apps is used (and nothing is cached if caching is disabled for
+    any of them).
+    """
+    ttl = min((get_result_cache_ttl(search_app) for search_app in search_apps), default=0)
+    if not ttl:
+        return execute()
+
+    key = _get_result_cache_key(query, search_apps)
+    data = cache.get(key)
+
+    if data is not None:
+        statsd.incr('search.result-cache.hit')
+        return data
+
+    statsd.incr('search.result-cache.miss')
+    data = execute()
+    cache.set(key, data, timeout=ttl)
+    return data
+
+
+def invalidate_search_results(doc_type):
+    """
+    Makes cached search results that could include documents of a particular type unreachable.
+
+    This must be called whenever documents are indexed or deleted.
+    """
+    if not settings.ENABLE_SEARCH_RESULT_CACHE:
+        return
+
+    key = _get_write_generation_cache_key(doc_type)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+    statsd.incr('search.result-cache.invalidation')
+
+
+def _get_result_cache_key(query, search_apps):
+    generation_keys = [
+        ALIAS_GENERATION_CACHE_KEY,
+        *sorted(
+            _get_write_generation_cache_key(search_app.es_model._doc_type.name)
+            for search_app in search_apps
+        ),
+    ]
+    generations = cache.get_many(generation_keys)
+
+    key_data = {
+        'index': query._index,
+        'query': query.to_dict(),
+        'generations': [generations.get(key, 0) for key in generation_keys],
+    }
+    serialised_key_data = json.dumps(key_data, sort_keys=True, cls=DjangoJSONEncoder)
+    digest = sha256(serialised_key_data.encode('utf-8')).hexdigest()
+    return f'{RESULT_CACHE_KEY_PREFIX}:{digest}'
+
+
+def _get_write_generation_cache_key(doc_type):
+    return f'{WRITE_GENERATION_CACHE_KEY_PREFIX}:{doc_type}'
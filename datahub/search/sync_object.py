@@ -1,8 +1,15 @@
 from logging import getLogger
 
+from django.conf import settings
+
 from datahub.search.bulk_sync import sync_objects
 from datahub.search.migrate_utils import delete_from_secondary_indices_callback
-from datahub.search.tasks import sync_object_task, sync_related_objects_task
+from datahub.search.sync_queue import (
+    add_to_sync_queue,
+    is_sync_queue_enabled,
+    mark_drain_scheduled,
+)
+from datahub.search.tasks import drain_sync_queue, sync_object_task, sync_related_objects_task
 
 logger = getLogger(__name__)
 
@@ -15,7 +22,7 @@ def sync_object(search_app, pk):
     new index and then deleted from the old index.
     """
     es_model = search_app.es_model
-    read_indices, write_index = es_model.get_read_and_write_indices()
+    read_indices, write_index = es_model.get_read_and_write_indices(use_cache=True)
 
     obj = search_app.queryset.get(pk=pk)
     sync_objects(
@@ -27,6 +34,28 @@ def sync_object(search_app, pk):
     )
 
 
+def sync_objects_by_pk(search_app, pks):
+    """
+    Syncs a batch of objects to Elasticsearch using a single bulk request.
+
+    Objects that no longer exist are ignored. Returns the number of objects synced.
+
+    This function is migration-safe – if a migration is in progress, the objects are added to the
+    new index and then deleted from the old index.
+    """
+    es_model = search_app.es_model
+    read_indices, write_index = es_model.get_read_and_write_indices(use_cache=True)
+
+    objs = search_app.queryset.filter(pk__in=pks)
+    return sync_objects(
+        es_model,
+        objs,
+        read_indices,
+        write_index,
+        post_batch_callback=delete_from_secondary_indices_callback,
+    )
+
+
 def sync_object_async(search_app, pk):
     """
     Syncs a single object to Elasticsearch asynchronously (by scheduling a Celery task).
@@ -34,9 +63,16 @@ def sync_object_async(search_app, pk):
     This function is normally used by signal receivers to copy new or updated objects to
     Elasticsearch.
 
+    If settings.ENABLE_SEARCH_SYNC_QUEUE is True, the object is instead added to the sync queue of
+    the search app, and synced in a batch with other pending objects.
+
     Syncing an object is migration-safe – if a migration is in progress, the object is
     added to the new index and then deleted from the old index.
     """
+    if is_sync_queue_enabled():
+        queue_objects_for_sync(search_app, [pk])
+        return
+
     result = sync_object_task.apply_async(args=(search_app.name, pk))
     logger.info(
         f'Task {result.id} scheduled to synchronise object {pk} for search app '
@@ -71,3 +107,28 @@ def sync_related_objects_async(related_obj, related_obj_field_name, related_obj_
         f'Task {result.id} scheduled to synchronise {related_obj_field_name} for object'
         f' {related_obj.pk}',
     )
+
+
+def queue_objects_for_sync(search_app, pks):
+    """
+    Adds objects to the sync queue of a search app.
+
+    A drain task is scheduled straight away if the queue has reached
+    settings.SEARCH_SYNC_QUEUE_DRAIN_THRESHOLD (otherwise, the queue is drained by the periodic
+    drain_all_sync_queues task).
+    """
+    queue_length = add_to_sync_queue(search_app, pks)
+
+    if queue_length >= settings.SEARCH_SYNC_QUEUE_DRAIN_THRESHOLD:
+        schedule_sync_queue_drain(search_app)
+
+
+def schedule_sync_queue_drain(search_app):
+    """Schedules a task to drain the sync queue of a search app (unless one is already pending)."""
+    if not mark_drain_scheduled(search_app):
+        return
+
+    result = drain_sync_queue.apply_async(args=(search_app.name,))
+    logger.info(
+        f'Task {result.id} scheduled to drain the sync queue for search app {search_app.name}',
+    )
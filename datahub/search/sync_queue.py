@@ -0,0 +1,152 @@
+from time import time
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+QUEUE_KEY_PREFIX = 'search-sync-queue'
+PROCESSING_KEY_PREFIX = 'search-sync-queue-processing'
+PROCESSING_INDEX_KEY_PREFIX = 'search-sync-queue-processing-index'
+DRAIN_SCHEDULED_KEY_PREFIX = 'search-sync-queue-drain-scheduled'
+# Safety net in case a scheduled drain task is lost
+DRAIN_SCHEDULED_TIMEOUT_SECS = 5 * 60
+# Time after which objects claimed by a drain task that has not completed (e.g. because its
+# worker was killed) are put back in the queue
+CLAIM_TIMEOUT_SECS = 15 * 60
+
+
+def is_sync_queue_enabled():
+    """Whether objects should be added to the sync queue rather than synced by individual tasks."""
+    return settings.ENABLE_SEARCH_SYNC_QUEUE
+
+
+def add_to_sync_queue(search_app, pks):
+    """
+    Adds primary keys to the sync queue (a Redis set) of a search app.
+
+    As a set is used, primary keys that are already pending are coalesced.
+
+    Returns the number of objects pending in the queue.
+    """
+    pks = [str(pk) for pk in pks]
+    if not pks:
+        return 0
+
+    queue_key = _get_queue_key(search_app)
+    with get_redis_connection().pipeline() as pipeline:
+        pipeline.sadd(queue_key, *pks)
+        pipeline.scard(queue_key)
+        _, queue_length = pipeline.execute()
+
+    return queue_length
+
+
+def claim_from_sync_queue(search_app, count, claim_id):
+    """
+    Moves up to `count` primary keys from the sync queue of a search app to a processing set
+    (identified by claim_id, e.g. a task ID), and returns them.
+
+    The primary keys stay in the processing set until complete_sync_queue_claim() or
+    release_sync_queue_claim() is called, so that they are not lost if the worker is killed
+    while syncing them. (Claims that are not completed are put back in the queue by
+    requeue_stale_sync_queue_claims().)
+    """
+    redis = get_redis_connection()
+    queue_key = _get_queue_key(search_app)
+    processing_key = _get_processing_key(search_app, claim_id)
+
+    candidate_pks = redis.srandmember(queue_key, count)
+    if not candidate_pks:
+        return []
+
+    # The claim is recorded (or its time updated) before any primary keys are moved, so that
+    # they can always be found by requeue_stale_sync_queue_claims()
+    redis.zadd(_get_processing_index_key(search_app), {claim_id: time()})
+
+    # Primary keys moved by another drain task in the meantime are skipped
+    with redis.pipeline() as pipeline:
+        for pk in candidate_pks:
+            pipeline.smove(queue_key, processing_key, pk)
+        moved = pipeline.execute()
+
+    return [pk.decode() for pk, was_moved in zip(candidate_pks, moved) if was_moved]
+
+
+def complete_sync_queue_claim(search_app, claim_id):
+    """Removes the primary keys in a processing set once they have been synced."""
+    with get_redis_connection().pipeline() as pipeline:
+        pipeline.delete(_get_processing_key(search_app, claim_id))
+        pipeline.zrem(_get_processing_index_key(search_app), claim_id)
+        pipeline.execute()
+
+
+def release_sync_queue_claim(search_app, claim_id):
+    """Puts the primary keys in a processing set back in the sync queue of a search app."""
+    queue_key = _get_queue_key(search_app)
+    processing_key = _get_processing_key(search_app, claim_id)
+
+    with get_redis_connection().pipeline() as pipeline:
+        pipeline.sunionstore(queue_key, [queue_key, processing_key])
+        pipeline.delete(processing_key)
+        pipeline.zrem(_get_processing_index_key(search_app), claim_id)
+        pipeline.execute()
+
+
+def requeue_stale_sync_queue_claims(search_app):
+    """
+    Puts primary keys claimed by drain tasks that have not completed within
+    CLAIM_TIMEOUT_SECS back in the sync queue of a search app.
+
+    Returns the number of stale claims.
+    """
+    stale_claim_ids = get_redis_connection().zrangebyscore(
+        _get_processing_index_key(search_app),
+        '-inf',
+        time() - CLAIM_TIMEOUT_SECS,
+    )
+
+    for claim_id in stale_claim_ids:
+        release_sync_queue_claim(search_app, claim_id.decode())
+
+    return len(stale_claim_ids)
+
+
+def get_sync_queue_length(search_app):
+    """Returns the number of objects pending in the sync queue of a search app."""
+    return get_redis_connection().scard(_get_queue_key(search_app))
+
+
+def mark_drain_scheduled(search_app):
+    """
+    Records that a task to drain the sync queue of a search app has been scheduled.
+
+    Returns False if one was already scheduled (in which case another one is not needed).
+    """
+    return bool(
+        get_redis_connection().set(
+            _get_drain_scheduled_key(search_app),
+            1,
+            nx=True,
+            ex=DRAIN_SCHEDULED_TIMEOUT_SECS,
+        ),
+    )
+
+
+def clear_drain_scheduled(search_app):
+    """Records that a drain task for a search app has started (and is no longer pending)."""
+    get_redis_connection().delete(_get_drain_scheduled_key(search_app))
+
+
+def _get_queue_key(search_app):
+    return f'{QUEUE_KEY_PREFIX}:{search_app.name}'
+
+
+def _get_processing_key(search_app, claim_id):
+    return f'{PROCESSING_KEY_PREFIX}:{search_app.name}:{claim_id}'
+
+
+def _get_processing_index_key(search_app):
+    return f'{PROCESSING_INDEX_KEY_PREFIX}:{search_app.name}'
+
+
+def _get_drain_scheduled_key(search_app):
+    return f'{DRAIN_SCHEDULED_KEY_PREFIX}:{search_app.name}'
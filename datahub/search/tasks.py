@@ -1,11 +1,37 @@
-from celery import shared_task
+from celery import chord, shared_task
 from celery.utils.log import get_task_logger
 from django.apps import apps
+from django.conf import settings
 from django_pglocks import advisory_lock
 
+from datahub.core.utils import slice_iterable_into_chunks
 from datahub.search.apps import get_search_app, get_search_app_by_model, get_search_apps
-from datahub.search.bulk_sync import sync_app
-from datahub.search.migrate_utils import resync_after_migrate
+from datahub.search.bulk_sync import (
+    combine_sync_reports,
+    get_pk_partitions,
+    sync_app,
+    SyncReport,
+)
+from datahub.search.export_jobs import delete_expired_export_files, run_export_job
+from datahub.search.migrate_utils import (
+    clean_up_aliases_and_indices,
+    clear_partitioned_resync_in_progress,
+    delete_from_secondary_indices_callback,
+    is_clean_up_after_resync_safe,
+    is_resync_after_migrate_needed,
+    mark_partitioned_resync_in_progress,
+    resync_after_migrate,
+)
+from datahub.search.reconciliation import reconcile_search_app, sync_changed_objects
+from datahub.search.sync_queue import (
+    claim_from_sync_queue,
+    clear_drain_scheduled,
+    complete_sync_queue_claim,
+    get_sync_queue_length,
+    is_sync_queue_enabled,
+    release_sync_queue_claim,
+    requeue_stale_sync_queue_claims,
+)
 
 
 logger = get_task_logger(__name__)
@@ -27,16 +53,212 @@ def sync_all_models():
 
 
 @shared_task(acks_late=True, priority=9, queue='long-running')
-def sync_model(search_app_name):
+def sync_model(search_app_name, num_partitions=None):
     """
     Task that syncs a single model to Elasticsearch.
 
-    acks_late is set to True so that the task restarts if interrupted.
+    If num_partitions (which defaults to settings.SEARCH_SYNC_NUM_PARTITIONS) is greater than
+    one, the primary keys of the model are split into that many ranges, and each range is synced
+    by a separate sub-task.
+
+    acks_late is set to True so that the task restarts if interrupted. The sync is resumable, so
+    a restarted task continues from the last batch that was indexed.
 
     priority is set to the lowest priority (for Redis, 0 is the highest priority).
     """
     search_app = get_search_app(search_app_name)
-    sync_app(search_app)
+    num_partitions = num_partitions or settings.SEARCH_SYNC_NUM_PARTITIONS
+
+    if num_partitions > 1:
+        schedule_partitioned_sync(search_app, num_partitions)
+        return
+
+    sync_app(search_app, resumable=True)
+
+
+@shared_task(acks_late=True, priority=9, queue='long-running')
+def sync_model_partition(search_app_name, lower_pk, upper_pk, is_resync_after_migrate=False):
+    """
+    Task that syncs a range of primary keys of a model to Elasticsearch.
+
+    This is a sub-task of a partitioned sync (see schedule_partitioned_sync()). The lower bound
+    is inclusive and the upper bound is exclusive (None meaning unbounded).
+
+    If is_resync_after_migrate is True, synced documents are also deleted from any indices being
+    migrated from.
+
+    Returns the sync report as a dict so that it can be combined with those of other partitions.
+    """
+    search_app = get_search_app(search_app_name)
+    post_batch_callback = (
+        delete_from_secondary_indices_callback if is_resync_after_migrate else None
+    )
+    report = sync_app(
+        search_app,
+        post_batch_callback=post_batch_callback,
+        pk_range=(lower_pk, upper_pk),
+        resumable=True,
+    )
+    return report._asdict()
+
+
+@shared_task(acks_late=True, priority=9)
+def complete_partitioned_sync(partition_reports, search_app_name, is_resync_after_migrate=False):
+    """
+    Task that runs once all the sub-tasks of a partitioned sync have completed.
+
+    It logs a combined report for all partitions and, if the sync was part of a migration,
+    updates the read alias and removes old indices.
+    """
+    search_app = get_search_app(search_app_name)
+    report = combine_sync_reports(
+        [SyncReport(**partition_report) for partition_report in partition_reports],
+    )
+
+    logger.info(
+        f'Partitioned sync of the {search_app_name} search app complete: '
+        f'{report.num_objects_synced} objects synced from {report.num_rows_processed} rows in '
+        f'{len(partition_reports)} partition(s) ({report.num_errors} documents could not be '
+        f'indexed)',
+    )
+
+    if not is_resync_after_migrate:
+        return
+
+    try:
+        if is_clean_up_after_resync_safe(search_app, report):
+            clean_up_aliases_and_indices(search_app)
+    finally:
+        clear_partitioned_resync_in_progress(search_app)
+
+
+@shared_task(acks_late=True, priority=9)
+def handle_partitioned_sync_error(
+    request,
+    exc,
+    traceback,
+    search_app_name,
+    is_resync_after_migrate=False,
+):
+    """
+    Error callback for partitioned syncs, called if any of the sub-tasks fail (in which case
+    complete_partitioned_sync is not called).
+
+    If the sync was part of a migration, the migration is left incomplete (so that it is
+    completed the next time migrate_es is run).
+    """
+    search_app = get_search_app(search_app_name)
+
+    if not is_resync_after_migrate:
+        logger.error(f'Partitioned sync of the {search_app_name} search app failed: {exc!r}')
+        return
+
+    logger.error(
+        f'Partitioned resync of the {search_app_name} search app failed: {exc!r}. The '
+        f'migration has not been completed.',
+    )
+    clear_partitioned_resync_in_progress(search_app)
+
+
+def schedule_partitioned_sync(search_app, num_partitions, is_resync_after_migrate=False):
+    """
+    Splits the primary keys of a search app into ranges and schedules a sub-task to sync each
+    range.
+
+    A chord is used so that the reports of all sub-tasks are combined (and, for migrations, the
+    migration is completed) by complete_partitioned_sync once all of them have completed. If any
+    of them fail, handle_partitioned_sync_error is called instead.
+    """
+    partitions = get_pk_partitions(search_app.queryset, num_partitions)
+    sub_tasks = [
+        sync_model_partition.si(
+            search_app.name,
+            _serialise_pk(lower_pk),
+            _serialise_pk(upper_pk),
+            is_resync_after_migrate=is_resync_after_migrate,
+        )
+        for lower_pk, upper_pk in partitions
+    ]
+    callback = complete_partitioned_sync.s(
+        search_app.name,
+        is_resync_after_migrate=is_resync_after_migrate,
+    ).on_error(
+        handle_partitioned_sync_error.s(
+            search_app.name,
+            is_resync_after_migrate=is_resync_after_migrate,
+        ),
+    )
+
+    logger.info(
+        f'Scheduling a sync of the {search_app.name} search app in {len(sub_tasks)} '
+        f'partition(s)',
+    )
+    chord(sub_tasks)(callback)
+
+
+@shared_task(acks_late=True, priority=9)
+def sync_changed_objects_for_all_models():
+    """
+    Task that starts sub-tasks to sync objects modified since the previous incremental sync
+    (for all search apps).
+
+    This is a much cheaper alternative to sync_all_models(), and is used together with
+    reconcile_all_models() to catch changes missed by signal receivers.
+    """
+    for search_app in get_search_apps():
+        sync_changed_objects_for_model.apply_async(
+            args=(search_app.name,),
+        )
+
+
+@shared_task(acks_late=True, priority=9, queue='long-running')
+def sync_changed_objects_for_model(search_app_name):
+    """
+    Task that syncs objects of a single model that have been modified since the previous
+    incremental sync.
+
+    An advisory lock is used so that the watermark isn't updated by overlapping runs.
+    """
+    search_app = get_search_app(search_app_name)
+
+    with advisory_lock(f'leeloo-incremental-search-sync-{search_app_name}', wait=False) as lock:
+        if not lock:
+            logger.warning(
+                f'Another incremental sync is in progress for the {search_app_name} search app. '
+                f'Aborting...',
+            )
+            return
+
+        sync_changed_objects(search_app)
+
+
+@shared_task(acks_late=True, priority=9)
+def reconcile_all_models():
+    """Task that starts sub-tasks to reconcile the search indices of all search apps."""
+    for search_app in get_search_apps():
+        reconcile_model.apply_async(
+            args=(search_app.name,),
+        )
+
+
+@shared_task(acks_late=True, priority=9, queue='long-running')
+def reconcile_model(search_app_name):
+    """
+    Task that indexes missing objects and deletes orphaned documents for a single search app.
+
+    Reconciliation is skipped while a migration is in progress (as the migration performs a
+    full resync).
+    """
+    search_app = get_search_app(search_app_name)
+
+    if search_app.es_model.was_migration_started():
+        logger.warning(
+            f'A migration is in progress for the {search_app_name} search app. Skipping '
+            f'reconciliation...',
+        )
+        return
+
+    reconcile_search_app(search_app)
 
 
 @shared_task(acks_late=True, max_retries=15, autoretry_for=(Exception,), retry_backoff=1)
@@ -95,10 +317,89 @@ def sync_related_objects_task(
     queryset = manager.values_list('pk', flat=True)
     search_app = get_search_app_by_model(manager.model)
 
+    if is_sync_queue_enabled():
+        from datahub.search.sync_object import queue_objects_for_sync
+
+        chunks = slice_iterable_into_chunks(
+            queryset.iterator(),
+            settings.SEARCH_SYNC_QUEUE_BATCH_SIZE,
+        )
+        for pks in chunks:
+            queue_objects_for_sync(search_app, pks)
+        return
+
     for pk in queryset:
         sync_object_task.apply_async(args=(search_app.name, pk), priority=self.priority)
 
 
+@shared_task(
+    bind=True,
+    acks_late=True,
+    max_retries=15,
+    autoretry_for=(Exception,),
+    retry_backoff=1,
+)
+def drain_sync_queue(self, search_app_name):
+    """
+    Syncs the objects in the sync queue of a search app to Elasticsearch.
+
+    Objects are synced in batches of settings.SEARCH_SYNC_QUEUE_BATCH_SIZE (one bulk request per
+    batch) until the queue is empty. Each batch is moved to a processing set (specific to this
+    task) while it's being synced, and only removed from Redis once it has been synced. If a
+    batch fails, its objects are put back in the queue and the task is retried with an
+    exponential back-off. (If the worker is killed, drain_all_sync_queues puts them back in the
+    queue later.)
+    """
+    from datahub.search.sync_object import sync_objects_by_pk
+
+    search_app = get_search_app(search_app_name)
+    batch_size = settings.SEARCH_SYNC_QUEUE_BATCH_SIZE
+    claim_id = self.request.id
+
+    # Clear the flag first so that objects queued from now on trigger another drain if needed
+    clear_drain_scheduled(search_app)
+
+    while True:
+        pks = claim_from_sync_queue(search_app, batch_size, claim_id)
+        if not pks:
+            break
+
+        try:
+            sync_objects_by_pk(search_app, pks)
+        except Exception:
+            release_sync_queue_claim(search_app, claim_id)
+            raise
+
+        complete_sync_queue_claim(search_app, claim_id)
+
+        if len(pks) < batch_size:
+            break
+
+
+@shared_task(acks_late=True)
+def drain_all_sync_queues():
+    """
+    Task that schedules sub-tasks to drain the sync queues of all search apps with pending
+    objects.
+
+    This is run periodically so that objects are synced even if the drain threshold isn't reached.
+    Objects claimed by drain tasks that did not complete (e.g. because their worker was killed)
+    are put back in the queues first.
+    """
+    from datahub.search.sync_object import schedule_sync_queue_drain
+
+    for search_app in get_search_apps():
+        num_stale_claims = requeue_stale_sync_queue_claims(search_app)
+        if num_stale_claims:
+            logger.warning(
+                f'{num_stale_claims} stale claim(s) put back in the sync queue for search app '
+                f'{search_app.name}',
+            )
+
+        if get_sync_queue_length(search_app):
+            schedule_sync_queue_drain(search_app)
+
+
 @shared_task(
     bind=True,
     acks_late=True,
@@ -130,4 +431,49 @@ Rescheduling the {search_app_name} search app migration to attempt to resolve th
             )
             return
 
+        num_partitions = settings.SEARCH_SYNC_NUM_PARTITIONS
+
+        if num_partitions > 1:
+            if is_resync_after_migrate_needed(search_app):
+                _schedule_partitioned_resync_after_migrate(search_app, num_partitions)
+            return
+
         resync_after_migrate(search_app)
+
+
+def _schedule_partitioned_resync_after_migrate(search_app, num_partitions):
+    # The sub-tasks and the callback of a partitioned resync run after the advisory lock has
+    # been released, so an in-progress marker (cleared by the callback or the error callback)
+    # is used to stop a duplicate or retried task from starting another resync
+    if not mark_partitioned_resync_in_progress(search_app):
+        logger.warning(
+            f'A partitioned resync is already in progress for the {search_app.name} search app. '
+            f'Aborting...',
+        )
+        return
+
+    try:
+        schedule_partitioned_sync(search_app, num_partitions, is_resync_after_migrate=True)
+    except Exception:
+        clear_partitioned_resync_in_progress(search_app)
+        raise
+
+
+@shared_task(acks_late=True, priority=9, queue='long-running')
+def generate_search_export(job_id):
+    """
+    Task that generates the CSV file for an asynchronous search export and uploads it to S3.
+
+    acks_late is set to True so that the task restarts if interrupted.
+    """
+    run_export_job(job_id)
+
+
+@shared_task(acks_late=True)
+def delete_expired_search_export_files():
+    """Task that deletes search export files in S3 whose jobs have expired."""
+    delete_expired_export_files()
+
+
+def _serialise_pk(pk):
+    return str(pk) if pk is not None else None
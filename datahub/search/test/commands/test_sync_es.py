@@ -66,6 +66,40 @@ def test_sync_synchronously(sync_model_mock):
     assert not sync_model_mock.apply_async.called
 
 
+@mock.patch('datahub.search.management.commands.sync_es.sync_app_in_process_pool')
+@mock.patch('datahub.search.management.commands.sync_es.sync_model')
+@mock.patch(
+    'datahub.search.apps.index_exists',
+    mock.Mock(return_value=True),
+)
+def test_sync_synchronously_with_partitions(sync_model_mock, sync_app_in_process_pool_mock):
+    """
+    Test that --foreground and --partitions can be used to sync using a pool of processes.
+    """
+    app = get_search_apps()[0]
+    management.call_command(sync_es.Command(), model=[app.name], foreground=True, partitions=4)
+
+    sync_app_in_process_pool_mock.assert_called_once_with(app, 4)
+    assert not sync_model_mock.apply.called
+    assert not sync_model_mock.apply_async.called
+
+
+@mock.patch('datahub.search.management.commands.sync_es.sync_model')
+@mock.patch(
+    'datahub.search.apps.index_exists',
+    mock.Mock(return_value=True),
+)
+def test_sync_with_partitions(sync_model_mock):
+    """Test that --partitions is passed on to the sync_model task."""
+    app = get_search_apps()[0]
+    management.call_command(sync_es.Command(), model=[app.name], partitions=4)
+
+    sync_model_mock.apply_async.assert_called_once_with(
+        args=(app.name,),
+        kwargs={'num_partitions': 4},
+    )
+
+
 @mock.patch('datahub.search.management.commands.sync_es.sync_model')
 @mock.patch(
     'datahub.search.apps.index_exists',
@@ -0,0 +1,102 @@
+from unittest.mock import Mock
+
+import pytest
+from django.core.cache import cache
+
+from datahub.search.alias_cache import (
+    GENERATION_CACHE_KEY,
+    get_cached_alias_state,
+    invalidate_alias_cache,
+)
+from datahub.search.test.search_support.simplemodel import SimpleModelSearchApp
+
+
+@pytest.fixture
+def mock_statsd(monkeypatch):
+    """Returns a mock statsd module."""
+    mock_statsd = Mock()
+    monkeypatch.setattr('datahub.search.alias_cache.statsd', mock_statsd)
+    return mock_statsd
+
+
+@pytest.fixture
+def mock_monotonic(monkeypatch):
+    """Returns a mock monotonic() function (starting at 0)."""
+    mock_monotonic = Mock(return_value=0)
+    monkeypatch.setattr('datahub.search.alias_cache.monotonic', mock_monotonic)
+    return mock_monotonic
+
+
+@pytest.fixture(autouse=True)
+def clear_alias_cache(local_memory_cache, settings):
+    """Enables the cache and makes sure that each test starts with it empty."""
+    settings.SEARCH_ALIAS_CACHE_TTL = 30
+    invalidate_alias_cache()
+
+
+@pytest.mark.usefixtures('mock_monotonic')
+class TestGetCachedAliasState:
+    """Tests for get_cached_alias_state()."""
+
+    def test_caches_value(self, mock_statsd):
+        """Test that fetch() is only called once for repeated lookups."""
+        fetch = Mock(return_value=({'index-a'}, 'index-a'))
+
+        assert get_cached_alias_state('key', fetch) == ({'index-a'}, 'index-a')
+        assert get_cached_alias_state('key', fetch) == ({'index-a'}, 'index-a')
+
+        fetch.assert_called_once()
+        assert [call[0][0] for call in mock_statsd.incr.call_args_list] == [
+            'search.alias-cache.miss',
+            'search.alias-cache.hit',
+        ]
+
+    def test_value_expires(self, mock_monotonic, settings):
+        """Test that cached values are fetched again once the TTL has passed."""
+        settings.SEARCH_ALIAS_CACHE_TTL = 10
+        fetch = Mock(side_effect=['value-1', 'value-2'])
+
+        assert get_cached_alias_state('key', fetch) == 'value-1'
+        mock_monotonic.return_value = 9
+        assert get_cached_alias_state('key', fetch) == 'value-1'
+        mock_monotonic.return_value = 11
+        assert get_cached_alias_state('key', fetch) == 'value-2'
+
+    def test_invalidation(self, mock_statsd):
+        """Test that invalidate_alias_cache() discards cached values."""
+        fetch = Mock(side_effect=['value-1', 'value-2'])
+
+        assert get_cached_alias_state('key', fetch) == 'value-1'
+        invalidate_alias_cache()
+        assert get_cached_alias_state('key', fetch) == 'value-2'
+
+        mock_statsd.incr.assert_any_call('search.alias-cache.invalidation')
+
+    def test_invalidation_by_another_process(self):
+        """
+        Test that cached values are discarded when the shared generation counter is incremented
+        (as would happen if another process called invalidate_alias_cache()).
+        """
+        fetch = Mock(side_effect=['value-1', 'value-2'])
+
+        assert get_cached_alias_state('key', fetch) == 'value-1'
+        cache.incr(GENERATION_CACHE_KEY)
+        assert get_cached_alias_state('key', fetch) == 'value-2'
+
+
+def test_get_read_and_write_indices_uses_cache(monkeypatch, mock_monotonic):
+    """Test that BaseESModel.get_read_and_write_indices() only uses the cache when requested."""
+    get_indices_for_aliases_mock = Mock(return_value=({'index-a'}, {'index-a'}))
+    monkeypatch.setattr(
+        'datahub.search.models.get_indices_for_aliases',
+        get_indices_for_aliases_mock,
+    )
+    es_model = SimpleModelSearchApp.es_model
+
+    for _ in range(2):
+        assert es_model.get_read_and_write_indices(use_cache=True) == ({'index-a'}, 'index-a')
+
+    assert get_indices_for_aliases_mock.call_count == 1
+
+    es_model.get_read_and_write_indices()
+    assert get_indices_for_aliases_mock.call_count == 2
@@ -4,8 +4,16 @@ import pytest
 
 from datahub.company.models import Company
 from datahub.company.test.factories import CompanyFactory
+from datahub.core.exceptions import DataHubException
 from datahub.core.test_utils import MockQuerySet
-from datahub.search.bulk_sync import sync_app, sync_objects
+from datahub.search.bulk_sync import (
+    combine_sync_reports,
+    get_pk_partitions,
+    sync_app,
+    sync_objects,
+    SyncReport,
+)
+from datahub.search.bulk_writer import BulkIndexReport
 from datahub.search.company import CompanySearchApp
 from datahub.search.signals import disable_search_signal_receivers
 from datahub.search.test.utils import create_mock_search_app
@@ -13,11 +21,11 @@ from datahub.search.test.utils import create_mock_search_app
 
 def test_sync_app_with_default_batch_size(monkeypatch):
     """Tests syncing an app to Elasticsearch with the default batch size."""
-    bulk_mock = Mock()
-    monkeypatch.setattr('datahub.search.bulk_sync.bulk', bulk_mock)
+    bulk_mock = Mock(return_value=BulkIndexReport())
+    monkeypatch.setattr('datahub.search.bulk_sync.index_documents', bulk_mock)
 
     search_app = create_mock_search_app(
-        queryset=MockQuerySet([Mock(id=1), Mock(id=2)]),
+        queryset=MockQuerySet([Mock(id=1, pk=1), Mock(id=2, pk=2)]),
     )
     sync_app(search_app)
 
@@ -26,11 +34,11 @@ def test_sync_app_with_default_batch_size(monkeypatch):
 
 def test_sync_app_with_overridden_batch_size(monkeypatch):
     """Tests syncing an app to Elasticsearch with an overridden batch size."""
-    bulk_mock = Mock()
-    monkeypatch.setattr('datahub.search.bulk_sync.bulk', bulk_mock)
+    bulk_mock = Mock(return_value=BulkIndexReport())
+    monkeypatch.setattr('datahub.search.bulk_sync.index_documents', bulk_mock)
 
     search_app = create_mock_search_app(
-        queryset=MockQuerySet([Mock(id=1), Mock(id=2)]),
+        queryset=MockQuerySet([Mock(id=1, pk=1), Mock(id=2, pk=2)]),
     )
     sync_app(search_app, batch_size=1)
 
@@ -39,14 +47,14 @@ def test_sync_app_with_overridden_batch_size(monkeypatch):
 
 def test_sync_app_logic(monkeypatch):
     """Tests syncing an app to Elasticsearch during a mapping migration."""
-    bulk_mock = Mock()
-    monkeypatch.setattr('datahub.search.bulk_sync.bulk', bulk_mock)
+    bulk_mock = Mock(return_value=BulkIndexReport())
+    monkeypatch.setattr('datahub.search.bulk_sync.index_documents', bulk_mock)
     search_app = create_mock_search_app(
         current_mapping_hash='mapping-hash',
         target_mapping_hash='mapping-hash',
         read_indices=('index1', 'index2'),
         write_index='index1',
-        queryset=MockQuerySet([Mock(id=1), Mock(id=2)]),
+        queryset=MockQuerySet([Mock(id=1, pk=1), Mock(id=2, pk=2)]),
     )
     sync_app(search_app, batch_size=1000)
     assert bulk_mock.call_args_list[0][1]['actions'] == [
@@ -64,32 +72,263 @@ def test_sync_app_logic(monkeypatch):
     assert bulk_mock.call_count == 1
 
 
+def test_sync_app_with_pk_range(monkeypatch):
+    """Tests that pk_range restricts the objects synced."""
+    bulk_mock = Mock(return_value=BulkIndexReport())
+    monkeypatch.setattr('datahub.search.bulk_sync.index_documents', bulk_mock)
+
+    search_app = create_mock_search_app(
+        queryset=MockQuerySet([Mock(id=n, pk=n) for n in range(1, 6)]),
+    )
+    report = sync_app(search_app, pk_range=(2, 4))
+
+    assert report == SyncReport(num_rows_processed=2, num_objects_synced=2)
+    assert [action['_id'] for action in bulk_mock.call_args_list[0][1]['actions']] == [2, 3]
+
+
+@pytest.mark.parametrize(
+    'num_objects,num_partitions,expected_partitions',
+    (
+        (0, 3, [(None, None)]),
+        (5, 1, [(None, None)]),
+        (2, 3, [(None, None)]),
+        (5, 2, [(None, 4), (4, None)]),
+        (9, 3, [(None, 4), (4, 7), (7, None)]),
+    ),
+)
+def test_get_pk_partitions(num_objects, num_partitions, expected_partitions):
+    """Tests that primary keys are split into the expected ranges."""
+    queryset = MockQuerySet([Mock(id=n, pk=n) for n in range(num_objects, 0, -1)])
+    assert get_pk_partitions(queryset, num_partitions) == expected_partitions
+
+
+def test_get_pk_partitions_covers_all_objects(monkeypatch):
+    """Tests that syncing each partition results in every object being synced exactly once."""
+    bulk_mock = Mock(return_value=BulkIndexReport())
+    monkeypatch.setattr('datahub.search.bulk_sync.index_documents', bulk_mock)
+
+    search_app = create_mock_search_app(
+        queryset=MockQuerySet([Mock(id=n, pk=n) for n in range(1, 12)]),
+    )
+    partitions = get_pk_partitions(search_app.queryset, 4)
+    reports = [sync_app(search_app, pk_range=pk_range) for pk_range in partitions]
+
+    synced_ids = [
+        action['_id']
+        for call in bulk_mock.call_args_list
+        for action in call[1]['actions']
+    ]
+    assert sorted(synced_ids) == list(range(1, 12))
+    assert combine_sync_reports(reports) == SyncReport(
+        num_rows_processed=11,
+        num_objects_synced=11,
+    )
+
+
 @pytest.mark.django_db
 @disable_search_signal_receivers(Company)
 def test_sync_app_uses_latest_data(monkeypatch, es):
     """Test that sync_app() picks up updates made to records between batches."""
     CompanyFactory.create_batch(2, name='old name')
 
-    def sync_objects_side_effect(*args, **kwargs):
-        nonlocal mock_sync_objects
+    es_model = CompanySearchApp.es_model
+    original_db_objects_to_es_documents = es_model.db_objects_to_es_documents
 
-        ret = sync_objects(*args, **kwargs)
+    def db_objects_to_es_documents_side_effect(*args, **kwargs):
+        ret = list(original_db_objects_to_es_documents(*args, **kwargs))
 
-        if mock_sync_objects.call_count == 1:
+        if mock_db_objects_to_es_documents.call_count == 1:
             Company.objects.update(name='new name')
 
         return ret
 
-    mock_sync_objects = Mock(side_effect=sync_objects_side_effect)
-    monkeypatch.setattr('datahub.search.bulk_sync.sync_objects', mock_sync_objects)
+    mock_db_objects_to_es_documents = Mock(side_effect=db_objects_to_es_documents_side_effect)
+    monkeypatch.setattr(es_model, 'db_objects_to_es_documents', mock_db_objects_to_es_documents)
     sync_app(CompanySearchApp, batch_size=1)
 
     es.indices.refresh()
 
-    company = mock_sync_objects.call_args_list[1][0][1][0]
+    company = mock_db_objects_to_es_documents.call_args_list[1][0][0][0]
     fetched_company = es.get(
         index=CompanySearchApp.es_model.get_read_alias(),
         doc_type=CompanySearchApp.name,
         id=company.pk,
     )
     assert fetched_company['_source']['name'] == 'new name'
+
+
+def test_sync_app_reports_document_errors(monkeypatch):
+    """Tests that documents that fail to be indexed are counted but don't stop the sync."""
+    error = {'index': {'_id': 1, 'status': 400}}
+    bulk_mock = Mock(
+        side_effect=[
+            BulkIndexReport(num_indexed=0, errors=(error,)),
+            BulkIndexReport(num_indexed=1),
+        ],
+    )
+    monkeypatch.setattr('datahub.search.bulk_sync.index_documents', bulk_mock)
+
+    search_app = create_mock_search_app(
+        queryset=MockQuerySet([Mock(id=1, pk=1), Mock(id=2, pk=2)]),
+    )
+    report = sync_app(search_app, batch_size=1)
+
+    assert report == SyncReport(num_rows_processed=2, num_objects_synced=1, num_errors=1)
+
+
+def test_sync_app_only_passes_indexed_documents_to_callback(monkeypatch):
+    """Tests that documents that fail to be indexed are not passed to post_batch_callback."""
+    error = {'index': {'_id': 1, 'status': 400}}
+    bulk_mock = Mock(return_value=BulkIndexReport(num_indexed=1, errors=(error,)))
+    monkeypatch.setattr('datahub.search.bulk_sync.index_documents', bulk_mock)
+    callback_mock = Mock()
+
+    search_app = create_mock_search_app(
+        queryset=MockQuerySet([Mock(id=1, pk=1), Mock(id=2, pk=2)]),
+    )
+    sync_app(search_app, post_batch_callback=callback_mock)
+
+    callback_mock.assert_called_once()
+    callback_actions = callback_mock.call_args[0][2]
+    assert [action['_id'] for action in callback_actions] == [2]
+
+
+@pytest.mark.usefixtures('local_memory_cache')
+class TestResumableSyncApp:
+    """Tests for resuming syncs using checkpoints."""
+
+    def test_resumes_from_checkpoint(self, monkeypatch):
+        """
+        Tests that if a resumable sync is interrupted, running it again skips the batches that
+        were already indexed.
+        """
+        bulk_mock = Mock(
+            side_effect=[
+                BulkIndexReport(num_indexed=2),
+                BulkIndexReport(num_indexed=2),
+                ValueError,
+            ],
+        )
+        monkeypatch.setattr('datahub.search.bulk_sync.index_documents', bulk_mock)
+        search_app = create_mock_search_app(
+            queryset=MockQuerySet([Mock(id=n, pk=n) for n in range(1, 8)]),
+        )
+
+        with pytest.raises(ValueError):
+            sync_app(search_app, batch_size=2, resumable=True)
+
+        bulk_mock.reset_mock(side_effect=True)
+        bulk_mock.return_value = BulkIndexReport(num_indexed=2)
+        report = sync_app(search_app, batch_size=2, resumable=True)
+
+        synced_ids = [
+            action['_id']
+            for call in bulk_mock.call_args_list
+            for action in call[1]['actions']
+        ]
+        assert synced_ids == [5, 6, 7]
+        assert report == SyncReport(num_rows_processed=3, num_objects_synced=3)
+
+    def test_checkpoint_not_moved_past_document_errors(self, monkeypatch):
+        """
+        Tests that if a resumable sync is interrupted after a document could not be indexed,
+        running it again retries the batch containing that document.
+        """
+        error = {'index': {'_id': 3, 'status': 400}}
+        bulk_mock = Mock(
+            side_effect=[
+                BulkIndexReport(num_indexed=2),
+                BulkIndexReport(num_indexed=1, errors=(error,)),
+                BulkIndexReport(num_indexed=2),
+                ValueError,
+            ],
+        )
+        monkeypatch.setattr('datahub.search.bulk_sync.index_documents', bulk_mock)
+        search_app = create_mock_search_app(
+            queryset=MockQuerySet([Mock(id=n, pk=n) for n in range(1, 10)]),
+        )
+
+        with pytest.raises(ValueError):
+            sync_app(search_app, batch_size=2, resumable=True)
+
+        bulk_mock.reset_mock(side_effect=True)
+        bulk_mock.return_value = BulkIndexReport(num_indexed=2)
+        sync_app(search_app, batch_size=2, resumable=True)
+
+        synced_ids = [
+            action['_id']
+            for call in bulk_mock.call_args_list
+            for action in call[1]['actions']
+        ]
+        assert synced_ids == [3, 4, 5, 6, 7, 8, 9]
+
+    def test_checkpoint_cleared_on_completion(self, monkeypatch):
+        """Tests that a completed resumable sync starts from the beginning when run again."""
+        bulk_mock = Mock(return_value=BulkIndexReport(num_indexed=2))
+        monkeypatch.setattr('datahub.search.bulk_sync.index_documents', bulk_mock)
+        search_app = create_mock_search_app(
+            queryset=MockQuerySet([Mock(id=n, pk=n) for n in range(1, 3)]),
+        )
+
+        sync_app(search_app, resumable=True)
+        report = sync_app(search_app, resumable=True)
+
+        assert report == SyncReport(num_rows_processed=2, num_objects_synced=2)
+
+    def test_checkpoint_not_used_for_other_write_index(self, monkeypatch):
+        """Tests that a checkpoint is ignored once the write index has changed."""
+        bulk_mock = Mock(side_effect=[BulkIndexReport(num_indexed=1), ValueError])
+        monkeypatch.setattr('datahub.search.bulk_sync.index_documents', bulk_mock)
+        queryset = MockQuerySet([Mock(id=n, pk=n) for n in range(1, 3)])
+
+        with pytest.raises(ValueError):
+            sync_app(
+                create_mock_search_app(queryset=queryset, write_index='index-a'),
+                batch_size=1,
+                resumable=True,
+            )
+
+        bulk_mock.reset_mock(side_effect=True)
+        bulk_mock.return_value = BulkIndexReport(num_indexed=1)
+        report = sync_app(
+            create_mock_search_app(queryset=queryset, write_index='index-b'),
+            batch_size=1,
+            resumable=True,
+        )
+
+        assert report.num_rows_processed == 2
+
+
+def test_sync_objects_raises_on_document_errors(monkeypatch):
+    """Tests that sync_objects() raises an error if any documents could not be indexed."""
+    error = {'index': {'_id': 1, 'status': 400}}
+    bulk_mock = Mock(return_value=BulkIndexReport(num_indexed=1, errors=(error,)))
+    monkeypatch.setattr('datahub.search.bulk_sync.index_documents', bulk_mock)
+    es_model = create_mock_search_app().es_model
+
+    with pytest.raises(DataHubException):
+        sync_objects(es_model, [Mock(id=1, pk=1), Mock(id=2, pk=2)], {'index'}, 'index')
+
+
+def test_sync_objects_only_passes_indexed_documents_to_callback(monkeypatch):
+    """
+    Tests that sync_objects() does not pass documents that could not be indexed to
+    post_batch_callback.
+    """
+    error = {'index': {'_id': 1, 'status': 400}}
+    bulk_mock = Mock(return_value=BulkIndexReport(num_indexed=1, errors=(error,)))
+    monkeypatch.setattr('datahub.search.bulk_sync.index_documents', bulk_mock)
+    callback_mock = Mock()
+    es_model = create_mock_search_app().es_model
+
+    with pytest.raises(DataHubException):
+        sync_objects(
+            es_model,
+            [Mock(id=1, pk=1), Mock(id=2, pk=2)],
+            {'index'},
+            'index',
+            post_batch_callback=callback_mock,
+        )
+
+    callback_actions = callback_mock.call_args[0][2]
+    assert [action['_id'] for action in callback_actions] == [2]
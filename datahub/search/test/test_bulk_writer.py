@@ -0,0 +1,141 @@
+import json
+from unittest.mock import Mock
+
+import pytest
+from elasticsearch import TransportError
+from elasticsearch.serializer import JSONSerializer
+
+from datahub.search.bulk_writer import BulkIndexReport, index_documents
+
+
+def _make_actions(num_actions):
+    return [
+        {
+            '_index': 'test-index',
+            '_type': 'test-type',
+            '_id': str(index),
+            '_source': {'name': f'name {index}'},
+        }
+        for index in range(num_actions)
+    ]
+
+
+def _get_ids_from_body(body):
+    """Gets the document IDs from the body of a bulk request."""
+    lines = [json.loads(line) for line in body.splitlines()]
+    return [line['index']['_id'] for line in lines if 'index' in line]
+
+
+def _make_response(body, statuses=None):
+    ids = _get_ids_from_body(body)
+    statuses = statuses or {}
+    return {
+        'items': [
+            {'index': {'_id': id_, 'status': statuses.get(id_, 201)}}
+            for id_ in ids
+        ],
+    }
+
+
+@pytest.fixture
+def mock_client(mock_es_client):
+    """Returns a mock Elasticsearch client that successfully indexes all documents."""
+    client = mock_es_client.return_value
+    client.transport.serializer = JSONSerializer()
+    client.bulk.side_effect = lambda body, **kwargs: _make_response(body)
+    return client
+
+
+@pytest.fixture
+def mock_sleep(monkeypatch):
+    """Patches sleep() so that tests don't wait between retries."""
+    mock_sleep = Mock()
+    monkeypatch.setattr('datahub.search.bulk_writer.sleep', mock_sleep)
+    return mock_sleep
+
+
+class TestIndexDocuments:
+    """Tests for index_documents()."""
+
+    def test_chunks_by_number_of_documents(self, mock_client):
+        """Test that actions are split into chunks of at most chunk_size documents."""
+        report = index_documents(_make_actions(5), chunk_size=2)
+
+        assert report == BulkIndexReport(num_indexed=5)
+        chunk_ids = [
+            _get_ids_from_body(call[1]['body']) for call in mock_client.bulk.call_args_list
+        ]
+        assert sorted(chunk_ids) == [['0', '1'], ['2', '3'], ['4']]
+
+    def test_chunks_by_size(self, mock_client):
+        """Test that actions are split into chunks of at most max_chunk_bytes bytes."""
+        report = index_documents(_make_actions(3), chunk_size=100, max_chunk_bytes=50)
+
+        assert report == BulkIndexReport(num_indexed=3)
+        assert mock_client.bulk.call_count == 3
+
+    def test_retries_rejected_documents(self, mock_client, mock_sleep):
+        """Test that only documents rejected with a 429 status are retried."""
+        responses = iter([{'1': 429}, {}])
+        mock_client.bulk.side_effect = lambda body, **kwargs: _make_response(
+            body,
+            statuses=next(responses),
+        )
+
+        report = index_documents(_make_actions(2), max_retries=3)
+
+        assert report == BulkIndexReport(num_indexed=2)
+        assert _get_ids_from_body(mock_client.bulk.call_args_list[1][1]['body']) == ['1']
+        mock_sleep.assert_called_once()
+
+    def test_retries_rejected_requests(self, mock_client, mock_sleep):
+        """Test that requests rejected with a 503 status are retried."""
+        mock_client.bulk.side_effect = [
+            TransportError(503, 'unavailable'),
+            TransportError(503, 'unavailable'),
+            {'items': [{'index': {'_id': '0', 'status': 201}}]},
+        ]
+
+        report = index_documents(_make_actions(1), max_retries=3)
+
+        assert report == BulkIndexReport(num_indexed=1)
+        assert mock_client.bulk.call_count == 3
+        assert [call[0][0] for call in mock_sleep.call_args_list] == [2, 4]
+
+    def test_raises_other_request_errors(self, mock_client, mock_sleep):
+        """Test that request errors other than 429 and 503 are raised without retrying."""
+        mock_client.bulk.side_effect = TransportError(500, 'error')
+
+        with pytest.raises(TransportError):
+            index_documents(_make_actions(1), max_retries=3)
+
+        assert mock_client.bulk.call_count == 1
+
+    def test_collects_document_errors(self, mock_client):
+        """Test that per-document errors are returned without stopping other documents."""
+        mock_client.bulk.side_effect = lambda body, **kwargs: _make_response(
+            body,
+            statuses={'1': 400},
+        )
+
+        report = index_documents(_make_actions(3))
+
+        assert report == BulkIndexReport(
+            num_indexed=2,
+            errors=({'index': {'_id': '1', 'status': 400}},),
+        )
+
+    def test_reports_documents_still_rejected_after_retries(self, mock_client, mock_sleep):
+        """Test that documents are reported as errors once the retries have been used up."""
+        mock_client.bulk.side_effect = lambda body, **kwargs: _make_response(
+            body,
+            statuses={'0': 429},
+        )
+
+        report = index_documents(_make_actions(1), max_retries=2)
+
+        assert report == BulkIndexReport(
+            num_indexed=0,
+            errors=({'index': {'_id': '0', 'status': 429}},),
+        )
+        assert mock_client.bulk.call_count == 3
@@ -9,6 +9,7 @@ from datahub.search.deletion import (
     BULK_CHUNK_SIZE,
     BULK_DELETION_TIMEOUT_SECS,
     Collector,
+    delete_document,
     delete_documents,
     update_es_after_deletions,
 )
@@ -73,6 +74,23 @@ def test_delete_documents_with_errors(es_bulk, mock_es_client):
     )
 
 
+def test_delete_document_invalidates_search_results(monkeypatch):
+    """Test that delete_document() invalidates cached search results for the model."""
+    mock_invalidate_search_results = mock.Mock()
+    monkeypatch.setattr(
+        'datahub.search.deletion.invalidate_search_results',
+        mock_invalidate_search_results,
+    )
+    mock_model = mock.Mock()
+    mock_model._doc_type.name = 'model'
+
+    delete_document(mock_model, 1, indices=['test-index'])
+
+    mock_model.assert_called_once_with(_id=1)
+    mock_model.return_value.delete.assert_called_once_with(index='test-index', ignore=(404,))
+    mock_invalidate_search_results.assert_called_once_with('model')
+
+
 @pytest.mark.django_db
 @pytest.mark.usefixtures('synchronous_thread_pool')
 def test_collector(monkeypatch, es_with_signals):
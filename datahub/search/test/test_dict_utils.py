@@ -394,3 +394,19 @@ def test_computed_field_function_not_a_function():
 
     with raises(ValueError):
         dict_utils.computed_field_function('get_cats_name', dict_utils.id_name_dict)(obj)
+
+
+def test_sector_dict():
+    """Tests that sector_dict() includes the ancestors of the sector (root first)."""
+    root = construct_mock(id='root', parent=None)
+    parent = construct_mock(id='parent', parent=root)
+    obj = construct_mock(id='sector', name='Root : Parent : Sector', parent=parent)
+
+    assert dict_utils.sector_dict(obj) == {
+        'id': 'sector',
+        'name': 'Root : Parent : Sector',
+        'ancestors': [
+            {'id': 'root'},
+            {'id': 'parent'},
+        ],
+    }
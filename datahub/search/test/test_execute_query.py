@@ -1,6 +1,13 @@
 from unittest import mock
 
-from datahub.search.execute_query import execute_autocomplete_query
+import pytest
+
+from datahub.search.execute_query import (
+    execute_autocomplete_query,
+    execute_search_query,
+    get_query_fingerprint,
+    serialise_hits,
+)
 from datahub.search.test.search_support.simplemodel.apps import SimpleModelSearchApp
 
 
@@ -23,3 +30,93 @@ class TestExecuteQueryBuilder:
             )
         assert result == fake_result
         assert mock_es_execute.called
+
+
+class TestExecuteSearchQuery:
+    """Tests for execute_search_query()."""
+
+    @pytest.mark.parametrize('is_slow', (True, False))
+    def test_instrumentation(self, monkeypatch, settings, is_slow):
+        """
+        Test that timings are sent to StatsD, and that slow queries are logged to Sentry with
+        the query fingerprint and the profile output.
+        """
+        settings.ES_SEARCH_REQUEST_WARNING_THRESHOLD = 1
+        settings.ES_SEARCH_PROFILE_SAMPLE_RATE = 1
+        mock_statsd = mock.Mock()
+        monkeypatch.setattr('datahub.search.execute_query.statsd', mock_statsd)
+        mock_log_to_sentry = mock.Mock()
+        monkeypatch.setattr('datahub.search.execute_query.log_to_sentry', mock_log_to_sentry)
+
+        took = 1500 if is_slow else 10
+        mocked_es_response = mock.MagicMock(took=took, timed_out=False)
+        mocked_es_response.hits.total = 3
+        mocked_es_response.to_dict.return_value = {'profile': {'shards': []}}
+        query = SimpleModelSearchApp.es_model.search().query('match', name='test')
+
+        with mock.patch('elasticsearch_dsl.Search.execute') as mock_es_execute:
+            mock_es_execute.return_value = mocked_es_response
+            response = execute_search_query(query, search_app=SimpleModelSearchApp)
+
+        assert response == mocked_es_response
+
+        pipeline = mock_statsd.statsd.return_value.pipeline.return_value.__enter__.return_value
+        stats = {call[0][0]: call[0][1] for call in pipeline.timing.call_args_list}
+        assert stats.keys() == {
+            'search.query.simplemodel.took',
+            'search.query.simplemodel.round-trip',
+            'search.query.simplemodel.hits',
+        }
+        assert stats['search.query.simplemodel.took'] == took
+        assert stats['search.query.simplemodel.hits'] == 3
+
+        assert mock_log_to_sentry.called == is_slow
+        if is_slow:
+            log_data = mock_log_to_sentry.call_args[1]['extra']
+            fingerprint = get_query_fingerprint(query.to_dict())
+            assert log_data['fingerprint'] == fingerprint
+            assert log_data['search_app'] == 'simplemodel'
+            assert log_data['profile'] == {'shards': []}
+            mock_statsd.incr.assert_called_once_with(f'search.query.slow.{fingerprint}')
+
+
+def test_serialise_hits(monkeypatch):
+    """Test that hits are converted to dicts and that the time taken is sent to StatsD."""
+    mock_statsd = mock.Mock()
+    monkeypatch.setattr('datahub.search.execute_query.statsd', mock_statsd)
+    hits = [mock.Mock(to_dict=mock.Mock(return_value={'id': index})) for index in range(2)]
+    response = mock.Mock(hits=hits)
+
+    assert serialise_hits(response) == [{'id': 0}, {'id': 1}]
+    mock_timing = mock_statsd.statsd.return_value.timing
+    assert mock_timing.call_args[0][0] == 'search.query.global.serialisation'
+
+
+@pytest.mark.parametrize(
+    'query_a,query_b,should_match',
+    (
+        (
+            {'query': {'match': {'name': 'a'}}, 'from': 0, 'size': 10},
+            {'query': {'match': {'name': 'b'}}, 'from': 10, 'size': 20},
+            True,
+        ),
+        (
+            {'query': {'terms': {'id': ['1', '2']}}},
+            {'query': {'terms': {'id': ['3']}}},
+            True,
+        ),
+        (
+            {'query': {'match': {'name': 'a'}}},
+            {'query': {'match': {'address': 'a'}}},
+            False,
+        ),
+        (
+            {'query': {'bool': {'filter': [{'term': {'name': 'a'}}]}}},
+            {'query': {'bool': {'filter': [{'term': {'name': 'a'}}, {'term': {'id': '1'}}]}}},
+            False,
+        ),
+    ),
+)
+def test_get_query_fingerprint(query_a, query_b, should_match):
+    """Test that queries with the same shape (but different values) have the same fingerprint."""
+    assert (get_query_fingerprint(query_a) == get_query_fingerprint(query_b)) == should_match
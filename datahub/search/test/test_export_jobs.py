@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import pytest
+from django.utils.timezone import utc
+from freezegun import freeze_time
+
+from datahub.search.export_jobs import delete_expired_export_files
+
+
+@freeze_time('2020-02-17 12:00:00')
+@pytest.mark.parametrize(
+    'contents,expected_deleted_keys',
+    (
+        # No objects
+        ([], []),
+        # Only recent objects
+        (
+            [
+                {
+                    'Key': 'search-exports/1/export.csv.gz',
+                    'LastModified': datetime(2020, 2, 17, 11, 0, tzinfo=utc),
+                },
+            ],
+            [],
+        ),
+        # A mixture of recent and expired objects
+        (
+            [
+                {
+                    'Key': 'search-exports/1/export.csv.gz',
+                    'LastModified': datetime(2020, 2, 15, 9, 0, tzinfo=utc),
+                },
+                {
+                    'Key': 'search-exports/2/export.csv.gz',
+                    'LastModified': datetime(2020, 2, 17, 11, 0, tzinfo=utc),
+                },
+                {
+                    'Key': 'search-exports/3/export.csv.gz',
+                    'LastModified': datetime(2020, 2, 16, 11, 59, tzinfo=utc),
+                },
+            ],
+            ['search-exports/1/export.csv.gz', 'search-exports/3/export.csv.gz'],
+        ),
+    ),
+)
+def test_delete_expired_export_files(s3_stubber, contents, expected_deleted_keys):
+    """Tests that only export files older than the job timeout are deleted."""
+    s3_stubber.add_response(
+        'list_objects_v2',
+        {
+            'Contents': contents,
+            'IsTruncated': False,
+        },
+        expected_params={
+            'Bucket': 'foo',
+            'Prefix': 'search-exports/',
+        },
+    )
+
+    if expected_deleted_keys:
+        s3_stubber.add_response(
+            'delete_objects',
+            {},
+            expected_params={
+                'Bucket': 'foo',
+                'Delete': {
+                    'Objects': [{'Key': key} for key in expected_deleted_keys],
+                    'Quiet': True,
+                },
+            },
+        )
+
+    assert delete_expired_export_files() == len(expected_deleted_keys)
+    s3_stubber.assert_no_pending_responses()
@@ -4,6 +4,8 @@ import pytest
 
 from datahub.core.exceptions import DataHubException
 from datahub.core.test_utils import MockQuerySet
+from datahub.search.bulk_sync import SyncReport
+from datahub.search.bulk_writer import BulkIndexReport
 from datahub.search.migrate_utils import (
     delete_from_secondary_indices_callback,
     resync_after_migrate,
@@ -19,9 +21,9 @@ class TestResyncAfterMigrate:
         Test that resync_after_migrate() resyncs the app, updates the read alias and deletes the
         old index.
         """
-        index_bulk_mock = Mock()
+        index_bulk_mock = Mock(return_value=BulkIndexReport())
         delete_bulk_mock = Mock(return_value=(True, ({'delete': {'status': 404}},)))
-        monkeypatch.setattr('datahub.search.bulk_sync.bulk', index_bulk_mock)
+        monkeypatch.setattr('datahub.search.bulk_sync.index_documents', index_bulk_mock)
         monkeypatch.setattr('datahub.search.deletion.bulk', delete_bulk_mock)
 
         get_aliases_for_index_mock = Mock(return_value=set())
@@ -36,7 +38,7 @@ class TestResyncAfterMigrate:
         mock_app = create_mock_search_app(
             read_indices=read_indices,
             write_index=write_index,
-            queryset=MockQuerySet([Mock(id=1), Mock(id=2)]),
+            queryset=MockQuerySet([Mock(id=1, pk=1), Mock(id=2, pk=2)]),
         )
 
         resync_after_migrate(mock_app)
@@ -94,14 +96,46 @@ class TestResyncAfterMigrate:
         assert mock_client.indices.delete.call_count == 1
         mock_client.indices.delete.assert_any_call('index2')
 
+    def test_resync_with_document_error(self, monkeypatch, mock_es_client):
+        """
+        Test that if a document can't be indexed, resync_after_migrate() does not delete it from
+        the old index, and keeps the old index in the read alias (so that the document is still
+        readable).
+        """
+        error = {'index': {'_id': 2, 'status': 400}}
+        index_bulk_mock = Mock(return_value=BulkIndexReport(num_indexed=1, errors=(error,)))
+        delete_bulk_mock = Mock(return_value=(True, ()))
+        monkeypatch.setattr('datahub.search.bulk_sync.index_documents', index_bulk_mock)
+        monkeypatch.setattr('datahub.search.deletion.bulk', delete_bulk_mock)
+
+        mock_client = mock_es_client.return_value
+        mock_app = create_mock_search_app(
+            read_indices={'index1', 'index2'},
+            write_index='index1',
+            queryset=MockQuerySet([Mock(id=1, pk=1), Mock(id=2, pk=2)]),
+        )
+
+        resync_after_migrate(mock_app)
+
+        assert list(delete_bulk_mock.call_args_list[0][1]['actions']) == [
+            {
+                '_index': 'index2',
+                '_id': 1,
+                '_op_type': 'delete',
+                '_type': 'test-type',
+            },
+        ]
+        mock_client.indices.update_aliases.assert_not_called()
+        mock_client.indices.delete.assert_not_called()
+
     def test_resync_with_deletion_error(self, monkeypatch, mock_es_client):
         """
         Test that resync_after_migrate() raises an exception when there is an error deleting
         documents.
         """
-        index_bulk_mock = Mock()
+        index_bulk_mock = Mock(return_value=BulkIndexReport())
         delete_bulk_mock = Mock(return_value=(True, ({'delete': {'status': 500}},)))
-        monkeypatch.setattr('datahub.search.bulk_sync.bulk', index_bulk_mock)
+        monkeypatch.setattr('datahub.search.bulk_sync.index_documents', index_bulk_mock)
         monkeypatch.setattr('datahub.search.deletion.bulk', delete_bulk_mock)
 
         get_aliases_for_index_mock = Mock(return_value=set())
@@ -115,7 +149,7 @@ class TestResyncAfterMigrate:
         mock_app = create_mock_search_app(
             read_indices=read_indices,
             write_index=write_index,
-            queryset=MockQuerySet([Mock(id=1), Mock(id=2)]),
+            queryset=MockQuerySet([Mock(id=1, pk=1), Mock(id=2, pk=2)]),
         )
 
         with pytest.raises(DataHubException):
@@ -125,7 +159,7 @@ class TestResyncAfterMigrate:
         """
         Test that if the old index is still referenced, resync_after_migrate() does not delete it.
         """
-        sync_app_mock = Mock()
+        sync_app_mock = Mock(return_value=SyncReport())
         monkeypatch.setattr('datahub.search.migrate_utils.sync_app', sync_app_mock)
 
         get_aliases_for_index_mock = Mock(return_value={'another-index'})
@@ -147,6 +181,7 @@ class TestResyncAfterMigrate:
         sync_app_mock.assert_called_once_with(
             mock_app,
             post_batch_callback=delete_from_secondary_indices_callback,
+            resumable=True,
         )
 
         mock_client.indices.update_aliases.assert_called_once_with(
@@ -168,7 +203,7 @@ class TestResyncAfterMigrate:
         """
         Test that the function aborts if the there is only a single read index.
         """
-        sync_app_mock = Mock()
+        sync_app_mock = Mock(return_value=SyncReport())
         monkeypatch.setattr('datahub.search.migrate_utils.sync_app', sync_app_mock)
 
         get_aliases_for_index_mock = Mock(return_value=set())
@@ -197,7 +232,7 @@ class TestResyncAfterMigrate:
         Test that if the there is only a single read index, no aliases are updated and no indices
         are deleted.
         """
-        sync_app_mock = Mock()
+        sync_app_mock = Mock(return_value=SyncReport())
         monkeypatch.setattr('datahub.search.migrate_utils.sync_app', sync_app_mock)
 
         get_aliases_for_index_mock = Mock(return_value=set())
@@ -221,4 +256,5 @@ class TestResyncAfterMigrate:
         sync_app_mock.assert_called_once_with(
             mock_app,
             post_batch_callback=delete_from_secondary_indices_callback,
+            resumable=True,
         )
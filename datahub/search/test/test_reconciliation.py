@@ -0,0 +1,114 @@
+from datetime import timedelta
+from unittest.mock import Mock
+
+import pytest
+from django.utils.timezone import now
+from freezegun import freeze_time
+
+from datahub.search.bulk_sync import SyncReport
+from datahub.search.reconciliation import (
+    get_watermark,
+    reconcile_search_app,
+    ReconciliationReport,
+    sync_changed_objects,
+)
+from datahub.search.signals import disable_search_signal_receivers
+from datahub.search.sync_object import sync_object
+from datahub.search.test.search_support.models import SimpleModel
+from datahub.search.test.search_support.simplemodel import SimpleModelSearchApp
+from datahub.search.test.utils import doc_exists
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('local_memory_cache')
+class TestSyncChangedObjects:
+    """Tests for sync_changed_objects()."""
+
+    def test_syncs_all_objects_without_watermark(self, monkeypatch):
+        """Test that all objects are synced on the first run, and that the watermark is set."""
+        mock_sync_app = Mock(return_value=SyncReport(2, 2))
+        monkeypatch.setattr('datahub.search.reconciliation.sync_app', mock_sync_app)
+        objs = SimpleModel.objects.bulk_create([SimpleModel(name='1'), SimpleModel(name='2')])
+
+        frozen_now = now()
+        with freeze_time(frozen_now):
+            report = sync_changed_objects(SimpleModelSearchApp)
+
+        assert report == SyncReport(2, 2)
+        queryset = mock_sync_app.call_args[1]['queryset']
+        assert set(queryset) == set(objs)
+        assert get_watermark(SimpleModelSearchApp) == frozen_now
+
+    def test_only_syncs_objects_modified_since_watermark(self, monkeypatch, settings):
+        """
+        Test that only objects modified since the watermark (less the overlap) are synced on
+        subsequent runs.
+        """
+        settings.SEARCH_INCREMENTAL_SYNC_OVERLAP = 60
+        mock_sync_app = Mock(return_value=SyncReport(1, 1))
+        monkeypatch.setattr('datahub.search.reconciliation.sync_app', mock_sync_app)
+
+        first_run_time = now() - timedelta(hours=1)
+        with freeze_time(first_run_time - timedelta(minutes=10)):
+            SimpleModel.objects.create(name='unchanged')
+        with freeze_time(first_run_time - timedelta(seconds=30)):
+            in_overlap_obj = SimpleModel.objects.create(name='in overlap')
+        changed_obj = SimpleModel.objects.create(name='changed')
+
+        with freeze_time(first_run_time):
+            sync_changed_objects(SimpleModelSearchApp)
+
+        sync_changed_objects(SimpleModelSearchApp)
+
+        queryset = mock_sync_app.call_args[1]['queryset']
+        assert set(queryset) == {in_overlap_obj, changed_obj}
+
+    def test_watermark_not_advanced_after_document_errors(self, monkeypatch):
+        """
+        Test that the watermark is not advanced if any documents could not be indexed, so that
+        they are retried by the next run.
+        """
+        mock_sync_app = Mock(return_value=SyncReport(2, 2))
+        monkeypatch.setattr('datahub.search.reconciliation.sync_app', mock_sync_app)
+        SimpleModel.objects.create(name='1')
+
+        first_run_time = now() - timedelta(hours=1)
+        with freeze_time(first_run_time):
+            sync_changed_objects(SimpleModelSearchApp)
+
+        mock_sync_app.return_value = SyncReport(1, 0, num_errors=1)
+        report = sync_changed_objects(SimpleModelSearchApp)
+
+        assert report.num_errors == 1
+        assert get_watermark(SimpleModelSearchApp) == first_run_time
+
+
+@pytest.mark.django_db
+def test_reconcile_search_app(es, settings):
+    """Test that missing objects are indexed and that orphaned documents are deleted."""
+    settings.SEARCH_RECONCILIATION_CHUNK_SIZE = 2
+
+    with disable_search_signal_receivers(SimpleModel):
+        synced_objs = SimpleModel.objects.bulk_create(
+            [SimpleModel(name=str(index)) for index in range(3)],
+        )
+        missing_objs = SimpleModel.objects.bulk_create(
+            [SimpleModel(name=f'missing {index}') for index in range(3)],
+        )
+        orphaned_obj = SimpleModel.objects.create(name='orphaned')
+
+        for obj in [*synced_objs, orphaned_obj]:
+            sync_object(SimpleModelSearchApp, obj.pk)
+
+        orphaned_obj_pk = orphaned_obj.pk
+        orphaned_obj.delete()
+
+    es.indices.refresh()
+
+    report = reconcile_search_app(SimpleModelSearchApp)
+    es.indices.refresh()
+
+    assert report == ReconciliationReport(num_missing=3, num_orphaned=1)
+    assert all(doc_exists(es, SimpleModelSearchApp, obj.pk) for obj in synced_objs)
+    assert all(doc_exists(es, SimpleModelSearchApp, obj.pk) for obj in missing_objs)
+    assert not doc_exists(es, SimpleModelSearchApp, orphaned_obj_pk)
@@ -0,0 +1,111 @@
+from unittest.mock import Mock
+
+import pytest
+from elasticsearch_dsl import Search
+
+from datahub.search.alias_cache import invalidate_alias_cache
+from datahub.search.result_cache import (
+    get_or_execute_search,
+    get_result_cache_ttl,
+    invalidate_search_results,
+)
+
+
+def _create_mock_search_app(doc_type='test-type', search_result_cache_ttl=None):
+    search_app = Mock(search_result_cache_ttl=search_result_cache_ttl)
+    search_app.es_model._doc_type.name = doc_type
+    return search_app
+
+
+def _search(term):
+    return Search(index='test-index').query('match', name=term)
+
+
+@pytest.fixture
+def result_cache_enabled(local_memory_cache, settings):
+    """Enables the search result cache (using a local memory cache)."""
+    settings.ENABLE_SEARCH_RESULT_CACHE = True
+    settings.SEARCH_RESULT_CACHE_TTL = 15
+
+
+@pytest.mark.parametrize(
+    'enabled,app_ttl,expected_ttl',
+    (
+        (False, None, 0),
+        (False, 30, 0),
+        (True, None, 15),
+        (True, 30, 30),
+        (True, 0, 0),
+    ),
+)
+def test_get_result_cache_ttl(settings, enabled, app_ttl, expected_ttl):
+    """Test that the TTL is taken from the search app, falling back to the setting."""
+    settings.ENABLE_SEARCH_RESULT_CACHE = enabled
+    settings.SEARCH_RESULT_CACHE_TTL = 15
+    search_app = _create_mock_search_app(search_result_cache_ttl=app_ttl)
+
+    assert get_result_cache_ttl(search_app) == expected_ttl
+
+
+@pytest.mark.usefixtures('result_cache_enabled')
+class TestGetOrExecuteSearch:
+    """Tests for get_or_execute_search()."""
+
+    def test_returns_cached_data(self):
+        """Test that execute() is only called once for the same query."""
+        search_app = _create_mock_search_app()
+        execute = Mock(return_value={'count': 1})
+
+        assert get_or_execute_search(_search('a'), (search_app,), execute) == {'count': 1}
+        assert get_or_execute_search(_search('a'), (search_app,), execute) == {'count': 1}
+        assert execute.call_count == 1
+
+    def test_does_not_share_data_between_queries(self):
+        """Test that different queries are cached separately."""
+        search_app = _create_mock_search_app()
+        execute = Mock(side_effect=[{'count': 1}, {'count': 2}])
+
+        assert get_or_execute_search(_search('a'), (search_app,), execute) == {'count': 1}
+        assert get_or_execute_search(_search('b'), (search_app,), execute) == {'count': 2}
+
+    def test_does_not_cache_if_disabled_for_any_app(self):
+        """Test that nothing is cached if caching is disabled for any of the search apps."""
+        search_apps = (
+            _create_mock_search_app(doc_type='type-a'),
+            _create_mock_search_app(doc_type='type-b', search_result_cache_ttl=0),
+        )
+        execute = Mock(return_value={'count': 1})
+
+        get_or_execute_search(_search('a'), search_apps, execute)
+        get_or_execute_search(_search('a'), search_apps, execute)
+
+        assert execute.call_count == 2
+
+    @pytest.mark.parametrize(
+        'invalidated_doc_type,should_use_cache',
+        (
+            ('test-type', False),
+            ('other-type', True),
+        ),
+    )
+    def test_invalidate_search_results(self, invalidated_doc_type, should_use_cache):
+        """Test that only cached results for the invalidated document type are discarded."""
+        search_app = _create_mock_search_app()
+        execute = Mock(return_value={'count': 1})
+
+        get_or_execute_search(_search('a'), (search_app,), execute)
+        invalidate_search_results(invalidated_doc_type)
+        get_or_execute_search(_search('a'), (search_app,), execute)
+
+        assert execute.call_count == (1 if should_use_cache else 2)
+
+    def test_discards_cached_data_when_aliases_change(self):
+        """Test that cached results are discarded when aliases are modified."""
+        search_app = _create_mock_search_app()
+        execute = Mock(return_value={'count': 1})
+
+        get_or_execute_search(_search('a'), (search_app,), execute)
+        invalidate_alias_cache()
+        get_or_execute_search(_search('a'), (search_app,), execute)
+
+        assert execute.call_count == 2
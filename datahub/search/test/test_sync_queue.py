@@ -0,0 +1,301 @@
+from collections import defaultdict
+from unittest.mock import Mock
+
+import pytest
+
+from datahub.search.bulk_writer import index_documents
+from datahub.search.sync_object import sync_object_async
+from datahub.search.sync_queue import (
+    add_to_sync_queue,
+    claim_from_sync_queue,
+    CLAIM_TIMEOUT_SECS,
+    get_sync_queue_length,
+    PROCESSING_INDEX_KEY_PREFIX,
+    PROCESSING_KEY_PREFIX,
+    requeue_stale_sync_queue_claims,
+)
+from datahub.search.tasks import (
+    drain_all_sync_queues,
+    drain_sync_queue,
+    sync_related_objects_task,
+)
+from datahub.search.test.search_support.models import RelatedModel, SimpleModel
+from datahub.search.test.search_support.relatedmodel import RelatedModelSearchApp
+from datahub.search.test.search_support.simplemodel import SimpleModelSearchApp
+from datahub.search.test.utils import doc_exists
+
+PROCESSING_INDEX_KEY = f'{PROCESSING_INDEX_KEY_PREFIX}:simplemodel'
+
+
+class _RedisStub:
+    """Minimal in-memory stand-in for the Redis commands used by the sync queue."""
+
+    def __init__(self):
+        """Initialises the stub with no data."""
+        self.sets = defaultdict(set)
+        self.sorted_sets = defaultdict(dict)
+        self.values = {}
+
+    def sadd(self, key, *values):
+        """Adds values to a set."""
+        self.sets[key].update(value.encode() for value in values)
+
+    def scard(self, key):
+        """Returns the size of a set."""
+        return len(self.sets[key])
+
+    def srandmember(self, key, count):
+        """Returns (without removing) up to count values from a set."""
+        return list(self.sets[key])[:count]
+
+    def smove(self, source, destination, value):
+        """Moves a value from one set to another."""
+        if value not in self.sets[source]:
+            return False
+
+        self.sets[source].remove(value)
+        self.sets[destination].add(value)
+        return True
+
+    def sunionstore(self, destination, keys):
+        """Stores the union of a number of sets."""
+        self.sets[destination] = set().union(*(self.sets[key] for key in keys))
+        return len(self.sets[destination])
+
+    def zadd(self, key, mapping):
+        """Adds values (with scores) to a sorted set."""
+        self.sorted_sets[key].update(
+            {value.encode(): score for value, score in mapping.items()},
+        )
+
+    def zrem(self, key, *values):
+        """Removes values from a sorted set."""
+        for value in values:
+            self.sorted_sets[key].pop(value.encode(), None)
+
+    def zrangebyscore(self, key, min_score, max_score):
+        """Returns the values in a sorted set with a score up to max_score."""
+        return [
+            value for value, score in self.sorted_sets[key].items()
+            if score <= max_score
+        ]
+
+    def set(self, key, value, nx=False, ex=None):
+        """Sets a value (if not already set when nx is True)."""
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def delete(self, key):
+        """Deletes a value or a set."""
+        self.values.pop(key, None)
+        self.sets.pop(key, None)
+
+    def pipeline(self):
+        """Returns a pipeline stub."""
+        return _RedisPipelineStub(self)
+
+
+class _RedisPipelineStub:
+    """Pipeline stub that executes queued commands against a _RedisStub."""
+
+    def __init__(self, redis):
+        """Initialises the pipeline with no queued commands."""
+        self.redis = redis
+        self.commands = []
+
+    def __enter__(self):
+        """Returns the pipeline."""
+        return self
+
+    def __exit__(self, *args):
+        """Does nothing."""
+
+    def __getattr__(self, name):
+        """Returns a function that queues a command."""
+        def _queue_command(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+
+        return _queue_command
+
+    def execute(self):
+        """Runs the queued commands."""
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+@pytest.fixture
+def redis_stub(monkeypatch):
+    """Replaces the Redis connection used by the sync queue with an in-memory stub."""
+    stub = _RedisStub()
+    monkeypatch.setattr('datahub.search.sync_queue.get_redis_connection', lambda: stub)
+    yield stub
+
+
+@pytest.fixture
+def sync_queue_enabled(monkeypatch, redis_stub):
+    """Enables the sync queue."""
+    monkeypatch.setattr('django.conf.settings.ENABLE_SEARCH_SYNC_QUEUE', True)
+    yield redis_stub
+
+
+class TestSyncObjectAsync:
+    """Tests for sync_object_async() when the sync queue is enabled."""
+
+    def test_adds_to_queue(self, monkeypatch, sync_queue_enabled):
+        """Test that objects are queued (and coalesced) instead of a task being scheduled."""
+        sync_object_task_mock = Mock()
+        monkeypatch.setattr('datahub.search.sync_object.sync_object_task', sync_object_task_mock)
+        drain_sync_queue_mock = Mock()
+        monkeypatch.setattr('datahub.search.sync_object.drain_sync_queue', drain_sync_queue_mock)
+
+        sync_object_async(SimpleModelSearchApp, 1)
+        sync_object_async(SimpleModelSearchApp, 1)
+        sync_object_async(SimpleModelSearchApp, 2)
+
+        assert get_sync_queue_length(SimpleModelSearchApp) == 2
+        sync_object_task_mock.apply_async.assert_not_called()
+        drain_sync_queue_mock.apply_async.assert_not_called()
+
+    def test_schedules_drain_at_threshold(self, monkeypatch, sync_queue_enabled):
+        """Test that a single drain task is scheduled once the threshold is reached."""
+        monkeypatch.setattr('django.conf.settings.SEARCH_SYNC_QUEUE_DRAIN_THRESHOLD', 2)
+        drain_sync_queue_mock = Mock()
+        monkeypatch.setattr('datahub.search.sync_object.drain_sync_queue', drain_sync_queue_mock)
+
+        for pk in range(4):
+            sync_object_async(SimpleModelSearchApp, pk)
+
+        drain_sync_queue_mock.apply_async.assert_called_once_with(
+            args=(SimpleModelSearchApp.name,),
+        )
+
+
+@pytest.mark.django_db
+class TestDrainSyncQueue:
+    """Tests for the drain_sync_queue task."""
+
+    def test_syncs_queued_objects(self, monkeypatch, es, redis_stub):
+        """Test that all queued objects are synced in batches and the queue is emptied."""
+        monkeypatch.setattr('django.conf.settings.SEARCH_SYNC_QUEUE_BATCH_SIZE', 2)
+        bulk_spy = Mock(wraps=index_documents)
+        monkeypatch.setattr('datahub.search.bulk_sync.index_documents', bulk_spy)
+
+        objs = [SimpleModel.objects.create() for _ in range(3)]
+        add_to_sync_queue(SimpleModelSearchApp, [obj.pk for obj in objs])
+
+        drain_sync_queue.apply(args=(SimpleModelSearchApp.name,))
+        es.indices.refresh()
+
+        assert all(doc_exists(es, SimpleModelSearchApp, obj.pk) for obj in objs)
+        assert get_sync_queue_length(SimpleModelSearchApp) == 0
+        assert bulk_spy.call_count == 2
+
+    def test_requeues_on_error(self, monkeypatch, redis_stub):
+        """Test that objects are put back in the queue if syncing them fails."""
+        sync_objects_by_pk_mock = Mock(side_effect=ValueError)
+        monkeypatch.setattr(
+            'datahub.search.sync_object.sync_objects_by_pk',
+            sync_objects_by_pk_mock,
+        )
+        monkeypatch.setattr(drain_sync_queue, 'max_retries', 0)
+
+        add_to_sync_queue(SimpleModelSearchApp, [1, 2])
+        result = drain_sync_queue.apply(args=(SimpleModelSearchApp.name,))
+
+        with pytest.raises(ValueError):
+            result.get()
+
+        assert get_sync_queue_length(SimpleModelSearchApp) == 2
+        assert not redis_stub.sorted_sets[PROCESSING_INDEX_KEY]
+
+    def test_keeps_objects_in_redis_while_syncing(self, monkeypatch, redis_stub):
+        """
+        Test that objects being synced are kept in a processing set (so that they are not lost
+        if the worker is killed), and that the processing set is removed once they are synced.
+        """
+        processing_sets_during_sync = []
+
+        def _sync_objects_by_pk(search_app, pks):
+            processing_sets_during_sync.append(
+                redis_stub.sets[f'{PROCESSING_KEY_PREFIX}:simplemodel:drain-task'].copy(),
+            )
+
+        monkeypatch.setattr(
+            'datahub.search.sync_object.sync_objects_by_pk',
+            _sync_objects_by_pk,
+        )
+
+        add_to_sync_queue(SimpleModelSearchApp, [1, 2])
+        drain_sync_queue.apply(args=(SimpleModelSearchApp.name,), task_id='drain-task')
+
+        assert processing_sets_during_sync == [{b'1', b'2'}]
+        assert not redis_stub.sets[f'{PROCESSING_KEY_PREFIX}:simplemodel:drain-task']
+        assert not redis_stub.sorted_sets[PROCESSING_INDEX_KEY]
+
+
+def test_requeue_stale_sync_queue_claims(redis_stub):
+    """
+    Test that objects claimed by a drain task that did not complete are put back in the queue
+    once the claim is stale.
+    """
+    add_to_sync_queue(SimpleModelSearchApp, [1, 2])
+    claimed_pks = claim_from_sync_queue(SimpleModelSearchApp, 10, 'killed-task')
+
+    assert sorted(claimed_pks) == ['1', '2']
+    assert get_sync_queue_length(SimpleModelSearchApp) == 0
+    # The claim is not stale yet
+    assert requeue_stale_sync_queue_claims(SimpleModelSearchApp) == 0
+
+    redis_stub.sorted_sets[PROCESSING_INDEX_KEY][b'killed-task'] -= CLAIM_TIMEOUT_SECS
+
+    assert requeue_stale_sync_queue_claims(SimpleModelSearchApp) == 1
+    assert get_sync_queue_length(SimpleModelSearchApp) == 2
+    assert not redis_stub.sets[f'{PROCESSING_KEY_PREFIX}:simplemodel:killed-task']
+    assert not redis_stub.sorted_sets[PROCESSING_INDEX_KEY]
+
+
+def test_drain_all_sync_queues(monkeypatch, redis_stub):
+    """Test that drain tasks are only scheduled for search apps with pending objects."""
+    drain_sync_queue_mock = Mock()
+    monkeypatch.setattr('datahub.search.sync_object.drain_sync_queue', drain_sync_queue_mock)
+
+    add_to_sync_queue(SimpleModelSearchApp, [1])
+    drain_all_sync_queues.apply()
+
+    drain_sync_queue_mock.apply_async.assert_called_once_with(args=(SimpleModelSearchApp.name,))
+
+
+def test_drain_all_sync_queues_requeues_stale_claims(monkeypatch, redis_stub):
+    """Test that objects claimed by drain tasks that did not complete are drained again."""
+    drain_sync_queue_mock = Mock()
+    monkeypatch.setattr('datahub.search.sync_object.drain_sync_queue', drain_sync_queue_mock)
+    monkeypatch.setattr('datahub.search.sync_queue.CLAIM_TIMEOUT_SECS', 0)
+
+    add_to_sync_queue(SimpleModelSearchApp, [1])
+    claim_from_sync_queue(SimpleModelSearchApp, 10, 'lost-task')
+    drain_all_sync_queues.apply()
+
+    assert get_sync_queue_length(SimpleModelSearchApp) == 1
+    drain_sync_queue_mock.apply_async.assert_called_once_with(args=(SimpleModelSearchApp.name,))
+
+
+@pytest.mark.django_db
+def test_sync_related_objects_task_adds_to_queue(monkeypatch, sync_queue_enabled):
+    """Test that related objects are queued when the sync queue is enabled."""
+    sync_object_task_mock = Mock()
+    monkeypatch.setattr('datahub.search.tasks.sync_object_task', sync_object_task_mock)
+
+    simpleton = SimpleModel.objects.create()
+    relations = RelatedModel.objects.bulk_create(
+        [RelatedModel(simpleton=simpleton) for _ in range(3)],
+    )
+    RelatedModel.objects.create()
+
+    sync_related_objects_task.apply(
+        args=(SimpleModel._meta.label, str(simpleton.pk), 'relatedmodel_set'),
+    )
+
+    queue_key = f'search-sync-queue:{RelatedModelSearchApp.name}'
+    assert sync_queue_enabled.sets[queue_key] == {str(obj.pk).encode() for obj in relations}
+    sync_object_task_mock.apply_async.assert_not_called()
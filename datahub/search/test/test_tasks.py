@@ -4,9 +4,18 @@ from uuid import uuid4
 import pytest
 
 from datahub.search.apps import get_search_apps
+from datahub.search.bulk_sync import SyncReport
+from datahub.search.migrate_utils import mark_partitioned_resync_in_progress
 from datahub.search.tasks import (
     complete_model_migration,
+    complete_partitioned_sync,
+    handle_partitioned_sync_error,
+    reconcile_all_models,
+    reconcile_model,
+    schedule_partitioned_sync,
     sync_all_models,
+    sync_changed_objects_for_all_models,
+    sync_changed_objects_for_model,
     sync_model,
     sync_object_task,
     sync_related_objects_task,
@@ -29,7 +38,121 @@ def test_sync_model(monkeypatch):
     sync_model.apply(args=(search_app.name,))
 
     get_search_app_mock.assert_called_once_with(search_app.name)
-    sync_app_mock.assert_called_once_with(get_search_app_mock.return_value)
+    sync_app_mock.assert_called_once_with(get_search_app_mock.return_value, resumable=True)
+
+
+def test_sync_model_with_partitions(monkeypatch):
+    """Test that the sync_model task schedules a partitioned sync when num_partitions > 1."""
+    get_search_app_mock = Mock()
+    monkeypatch.setattr('datahub.search.tasks.get_search_app', get_search_app_mock)
+
+    sync_app_mock = Mock()
+    monkeypatch.setattr('datahub.search.tasks.sync_app', sync_app_mock)
+
+    schedule_partitioned_sync_mock = Mock()
+    monkeypatch.setattr(
+        'datahub.search.tasks.schedule_partitioned_sync',
+        schedule_partitioned_sync_mock,
+    )
+
+    search_app = next(iter(get_search_apps()))
+    sync_model.apply(args=(search_app.name,), kwargs={'num_partitions': 4})
+
+    schedule_partitioned_sync_mock.assert_called_once_with(get_search_app_mock.return_value, 4)
+    sync_app_mock.assert_not_called()
+
+
+@pytest.mark.parametrize('is_resync_after_migrate', (False, True))
+@pytest.mark.django_db
+def test_schedule_partitioned_sync(monkeypatch, es, is_resync_after_migrate):
+    """
+    Test that a partitioned sync syncs all objects, and that aliases are only cleaned up
+    when resyncing after a migration.
+    """
+    clean_up_mock = Mock()
+    monkeypatch.setattr('datahub.search.tasks.clean_up_aliases_and_indices', clean_up_mock)
+
+    objs = [SimpleModel.objects.create() for _ in range(5)]
+    schedule_partitioned_sync(
+        SimpleModelSearchApp,
+        3,
+        is_resync_after_migrate=is_resync_after_migrate,
+    )
+    es.indices.refresh()
+
+    assert all(doc_exists(es, SimpleModelSearchApp, obj.pk) for obj in objs)
+    assert clean_up_mock.called == is_resync_after_migrate
+
+
+def test_schedule_partitioned_sync_sets_error_callback(monkeypatch):
+    """Test that the callback of a partitioned sync has an error callback."""
+    chord_mock = Mock()
+    monkeypatch.setattr('datahub.search.tasks.chord', chord_mock)
+    monkeypatch.setattr(
+        'datahub.search.tasks.get_pk_partitions',
+        Mock(return_value=[(None, 5), (5, None)]),
+    )
+
+    schedule_partitioned_sync(create_mock_search_app(), 2, is_resync_after_migrate=True)
+
+    callback = chord_mock.return_value.call_args[0][0]
+    error_callbacks = callback.options['link_error']
+    assert [error_callback.task for error_callback in error_callbacks] == [
+        handle_partitioned_sync_error.name,
+    ]
+    assert error_callbacks[0].args == ('test-app',)
+    assert error_callbacks[0].kwargs == {'is_resync_after_migrate': True}
+
+
+@pytest.mark.usefixtures('local_memory_cache')
+@pytest.mark.parametrize('num_errors,should_clean_up', ((0, True), (1, False)))
+def test_complete_partitioned_sync_after_migrate(monkeypatch, num_errors, should_clean_up):
+    """
+    Test that aliases and old indices are only cleaned up after a partitioned resync if all
+    documents were indexed, and that the in-progress marker is cleared either way.
+    """
+    clean_up_mock = Mock()
+    monkeypatch.setattr('datahub.search.tasks.clean_up_aliases_and_indices', clean_up_mock)
+    mock_app = create_mock_search_app()
+    monkeypatch.setattr('datahub.search.tasks.get_search_app', Mock(return_value=mock_app))
+    mark_partitioned_resync_in_progress(mock_app)
+
+    partition_reports = [
+        SyncReport(num_rows_processed=2, num_objects_synced=2)._asdict(),
+        SyncReport(
+            num_rows_processed=2,
+            num_objects_synced=2 - num_errors,
+            num_errors=num_errors,
+        )._asdict(),
+    ]
+    complete_partitioned_sync.apply(
+        args=(partition_reports, 'test-app'),
+        kwargs={'is_resync_after_migrate': True},
+    )
+
+    assert clean_up_mock.called == should_clean_up
+    assert mark_partitioned_resync_in_progress(mock_app)
+
+
+@pytest.mark.usefixtures('local_memory_cache')
+@pytest.mark.parametrize('is_resync_after_migrate', (False, True))
+def test_handle_partitioned_sync_error(monkeypatch, caplog, is_resync_after_migrate):
+    """
+    Test that failed partitioned syncs are logged, and that the in-progress marker of a
+    partitioned resync is cleared (so that the migration can be completed later).
+    """
+    caplog.set_level('ERROR')
+    mock_app = create_mock_search_app()
+    monkeypatch.setattr('datahub.search.tasks.get_search_app', Mock(return_value=mock_app))
+    mark_partitioned_resync_in_progress(mock_app)
+
+    handle_partitioned_sync_error.apply(
+        args=(Mock(), ValueError('sub-task failed'), None, 'test-app'),
+        kwargs={'is_resync_after_migrate': is_resync_after_migrate},
+    )
+
+    assert 'search app failed' in caplog.text
+    assert mark_partitioned_resync_in_progress(mock_app) == is_resync_after_migrate
 
 
 def test_sync_all_models(monkeypatch):
@@ -42,6 +165,70 @@ def test_sync_all_models(monkeypatch):
     assert tasks_created == {app.name for app in get_search_apps()}
 
 
+@pytest.mark.parametrize(
+    'task,sub_task_name',
+    (
+        (sync_changed_objects_for_all_models, 'sync_changed_objects_for_model'),
+        (reconcile_all_models, 'reconcile_model'),
+    ),
+)
+def test_tasks_for_all_models(monkeypatch, task, sub_task_name):
+    """Test that tasks for all models start a sub-task for each search app."""
+    sub_task_mock = Mock()
+    monkeypatch.setattr(f'datahub.search.tasks.{sub_task_name}', sub_task_mock)
+
+    task.apply()
+    tasks_created = {call[1]['args'][0] for call in sub_task_mock.apply_async.call_args_list}
+    assert tasks_created == {app.name for app in get_search_apps()}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('lock_held', (True, False))
+def test_sync_changed_objects_for_model(monkeypatch, lock_held):
+    """
+    Test that sync_changed_objects_for_model syncs changed objects unless another incremental
+    sync for the same search app is in progress.
+    """
+    sync_changed_objects_mock = Mock()
+    monkeypatch.setattr('datahub.search.tasks.sync_changed_objects', sync_changed_objects_mock)
+    get_search_app_mock = Mock()
+    monkeypatch.setattr('datahub.search.tasks.get_search_app', get_search_app_mock)
+    advisory_lock_mock = MagicMock()
+    advisory_lock_mock.return_value.__enter__.return_value = lock_held
+    monkeypatch.setattr('datahub.search.tasks.advisory_lock', advisory_lock_mock)
+
+    sync_changed_objects_for_model.apply(args=('test-app',))
+
+    if lock_held:
+        sync_changed_objects_mock.assert_called_once_with(get_search_app_mock.return_value)
+    else:
+        sync_changed_objects_mock.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    'read_indices,should_reconcile',
+    (
+        ({'index1'}, True),
+        ({'index1', 'index2'}, False),
+    ),
+)
+def test_reconcile_model(monkeypatch, read_indices, should_reconcile):
+    """Test that reconcile_model reconciles the search app unless a migration is in progress."""
+    reconcile_search_app_mock = Mock()
+    monkeypatch.setattr('datahub.search.tasks.reconcile_search_app', reconcile_search_app_mock)
+    mock_app = create_mock_search_app(
+        current_mapping_hash='hash',
+        target_mapping_hash='hash',
+        read_indices=read_indices,
+        write_index='index1',
+    )
+    monkeypatch.setattr('datahub.search.tasks.get_search_app', Mock(return_value=mock_app))
+
+    reconcile_model.apply(args=('test-app',))
+
+    assert reconcile_search_app_mock.called == should_reconcile
+
+
 @pytest.mark.django_db
 def test_sync_object_task_syncs(es):
     """Test that the object task syncs an object to Elasticsearch."""
@@ -137,6 +324,41 @@ def test_complete_model_migration_aborts_when_already_in_progress(monkeypatch):
     resync_after_migrate_mock.assert_not_called()
 
 
+@pytest.mark.django_db
+@pytest.mark.usefixtures('local_memory_cache')
+def test_complete_model_migration_with_partitions(monkeypatch):
+    """
+    Test that the complete_model_migration task schedules a partitioned resync when
+    SEARCH_SYNC_NUM_PARTITIONS is greater than one, and that a duplicate task doesn't schedule
+    another one while it is in progress.
+    """
+    monkeypatch.setattr('django.conf.settings.SEARCH_SYNC_NUM_PARTITIONS', 3)
+    resync_after_migrate_mock = Mock()
+    monkeypatch.setattr('datahub.search.tasks.resync_after_migrate', resync_after_migrate_mock)
+    schedule_partitioned_sync_mock = Mock()
+    monkeypatch.setattr(
+        'datahub.search.tasks.schedule_partitioned_sync',
+        schedule_partitioned_sync_mock,
+    )
+    mock_app = create_mock_search_app(
+        read_indices=('index1', 'index2'),
+        write_index='index2',
+        target_mapping_hash='target-hash',
+    )
+    get_search_app_mock = Mock(return_value=mock_app)
+    monkeypatch.setattr('datahub.search.tasks.get_search_app', get_search_app_mock)
+
+    complete_model_migration.apply(args=('test-app', 'target-hash'))
+    complete_model_migration.apply(args=('test-app', 'target-hash'))
+
+    schedule_partitioned_sync_mock.assert_called_once_with(
+        mock_app,
+        3,
+        is_resync_after_migrate=True,
+    )
+    resync_after_migrate_mock.assert_not_called()
+
+
 class MockRetryError(Exception):
     """Mock exception used to test retry behaviour."""
 
@@ -1,4 +1,7 @@
 import datetime
+from csv import DictReader
+from io import StringIO
+from unittest.mock import Mock, patch
 
 import pytest
 from django.utils.timezone import utc
@@ -13,9 +16,14 @@ from datahub.interaction.test.factories import CompanyInteractionFactory
 from datahub.investment.project.test.factories import InvestmentProjectFactory
 from datahub.metadata.test.factories import TeamFactory
 from datahub.omis.order.test.factories import OrderFactory
+from datahub.search.execute_query import execute_search_query
+from datahub.search.export_jobs import create_export_job
 from datahub.search.sync_object import sync_object
 from datahub.search.test.search_support.models import RelatedModel, SimpleModel
 from datahub.search.test.search_support.simplemodel import SimpleModelSearchApp
+from datahub.search.test.search_support.simplemodel.views import (
+    SearchSimpleModelExportAPIView,
+)
 from datahub.user_event_log.constants import UserEventType
 from datahub.user_event_log.models import UserEvent
 
@@ -96,21 +104,6 @@ class TestValidateViewSortByAttributes:
         assert not invalid_fields
 
 
-class TestValidateExportViewAttributes:
-    """Validates the field names specified in class attributes on export views."""
-
-    def test_validate_db_sort_by_remappings_keys(self, search_view):
-        """Validate that the keys of db_sort_by_remappings are valid sort by fields."""
-        if not hasattr(search_view, 'db_sort_by_remappings'):
-            return
-
-        serializer_class = search_view.serializer_class
-        invalid_fields = (
-            search_view.db_sort_by_remappings.keys() - set(serializer_class.SORT_BY_FIELDS)
-        )
-        assert not invalid_fields
-
-
 class TestBasicSearch(APITestMixin):
     """Tests for SearchBasicAPIView."""
 
@@ -484,6 +477,46 @@ class TestEntitySearch(APITestMixin):
             for obj in response_data['results']
         ]
 
+    @pytest.mark.usefixtures('local_memory_cache')
+    def test_caches_results_until_documents_change(
+        self,
+        es_with_collector,
+        search_support_user,
+        monkeypatch,
+        settings,
+    ):
+        """
+        Test that results are cached when the result cache is enabled, and that cached results
+        are not used once documents of the search app have been indexed.
+        """
+        settings.ENABLE_SEARCH_RESULT_CACHE = True
+        execute_search_query_mock = Mock(wraps=execute_search_query)
+        monkeypatch.setattr(
+            'datahub.search.views.execute_search_query',
+            execute_search_query_mock,
+        )
+        SimpleModel.objects.create(name='Mars 1')
+        es_with_collector.flush_and_refresh()
+
+        api_client = self.create_api_client(user=search_support_user)
+        url = reverse('api-v3:search:simplemodel')
+        data = {'original_query': 'Mars'}
+
+        first_response = api_client.post(url, data=data)
+        second_response = api_client.post(url, data=data)
+
+        assert first_response.json() == second_response.json()
+        assert first_response.json()['count'] == 1
+        assert execute_search_query_mock.call_count == 1
+
+        SimpleModel.objects.create(name='Mars 2')
+        es_with_collector.flush_and_refresh()
+
+        third_response = api_client.post(url, data=data)
+
+        assert third_response.json()['count'] == 2
+        assert execute_search_query_mock.call_count == 2
+
 
 class TestSearchExportAPIView(APITestMixin):
     """Tests for SearchExportAPIView."""
@@ -528,3 +561,158 @@ class TestSearchExportAPIView(APITestMixin):
             },
             'num_results': 1,
         }
+
+    def test_streams_rows_in_search_order_across_chunks(self, es_with_collector, monkeypatch):
+        """
+        Tests that rows are fetched in chunks, are in the order of the search results and that
+        objects deleted since they were indexed are skipped.
+        """
+        monkeypatch.setattr('django.conf.settings.SEARCH_EXPORT_SCROLL_CHUNK_SIZE', 2)
+        user = create_test_user(permission_codenames=['view_simplemodel'])
+        api_client = self.create_api_client(user=user)
+
+        names = ['e', 'b', 'd', 'a', 'c']
+        objs = [SimpleModel.objects.create(name=name) for name in names]
+        for obj in objs:
+            sync_object(SimpleModelSearchApp, obj.pk)
+
+        es_with_collector.flush_and_refresh()
+        SimpleModel.objects.filter(name='c').delete()
+
+        url = reverse('api-v3:search:simplemodel-export')
+        response = api_client.post(url, data={'sortby': 'name:desc'})
+
+        assert response.status_code == status.HTTP_200_OK
+        reader = DictReader(StringIO(response.getvalue().decode('utf-8-sig')))
+        assert [row['Name'] for row in reader] == ['e', 'd', 'b', 'a']
+
+    def test_num_results_taken_from_scroll(self, es_with_collector, monkeypatch):
+        """
+        Tests that the number of results recorded in the user event is limited to
+        SEARCH_EXPORT_MAX_RESULTS and is taken from the scroll (rather than a separate count
+        query).
+        """
+        monkeypatch.setattr('django.conf.settings.SEARCH_EXPORT_MAX_RESULTS', 2)
+        user = create_test_user(permission_codenames=['view_simplemodel'])
+        api_client = self.create_api_client(user=user)
+
+        for name in ('c', 'b', 'a'):
+            sync_object(SimpleModelSearchApp, SimpleModel.objects.create(name=name).pk)
+
+        es_with_collector.flush_and_refresh()
+
+        url = reverse('api-v3:search:simplemodel-export')
+        with patch('elasticsearch_dsl.Search.count') as mock_count:
+            response = api_client.post(url, data={'sortby': 'name'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not mock_count.called
+
+        reader = DictReader(StringIO(response.getvalue().decode('utf-8-sig')))
+        assert [row['Name'] for row in reader] == ['a', 'b']
+
+        user_event = UserEvent.objects.get(type=UserEventType.SEARCH_EXPORT)
+        assert user_event.data['num_results'] == 2
+
+    @pytest.mark.usefixtures('local_memory_cache', 'synchronous_on_commit')
+    def test_async_export(self, es_with_collector, monkeypatch):
+        """
+        Tests that an asynchronous export generates the CSV file in a task and that the status
+        of the job (including the download URL once complete) can then be retrieved.
+
+        SEARCH_EXPORT_MAX_RESULTS should not apply to asynchronous exports.
+        """
+        monkeypatch.setattr('django.conf.settings.SEARCH_EXPORT_MAX_RESULTS', 1)
+        uploaded_data = []
+
+        def _upload_gzipped_stream_to_s3(bucket_id, key, chunks, **extra_args):
+            uploaded_data.append(b''.join(chunks))
+
+        monkeypatch.setattr(
+            'datahub.search.export_jobs.upload_gzipped_stream_to_s3',
+            _upload_gzipped_stream_to_s3,
+        )
+        monkeypatch.setattr(
+            'datahub.search.export_jobs.sign_s3_url',
+            lambda bucket_id, key, expires: f'https://s3/{key}',
+        )
+
+        user = create_test_user(permission_codenames=['view_simplemodel'])
+        api_client = self.create_api_client(user=user)
+
+        for name in ('b', 'a'):
+            sync_object(SimpleModelSearchApp, SimpleModel.objects.create(name=name).pk)
+
+        es_with_collector.flush_and_refresh()
+
+        url = reverse('api-v3:search:simplemodel-export')
+        response = api_client.post(f'{url}?async=true', data={'sortby': 'name'})
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job_id = response.json()['id']
+        user_event = UserEvent.objects.get(type=UserEventType.SEARCH_EXPORT)
+        assert user_event.adviser == user
+        assert user_event.api_url_path == '/v3/search/simplemodel/export'
+        assert user_event.data['num_results'] == 2
+
+        reader = DictReader(StringIO(uploaded_data[0].decode('utf-8-sig')))
+        assert [row['Name'] for row in reader] == ['a', 'b']
+
+        job_url = reverse('api-v4:search:export-job', kwargs={'job_id': job_id})
+        response = api_client.get(job_url)
+
+        assert response.status_code == status.HTTP_200_OK
+        response_data = response.json()
+        assert response_data['status'] == 'complete'
+        assert response_data['download_url'].startswith(f'https://s3/search-exports/{job_id}/')
+
+
+@pytest.mark.usefixtures('local_memory_cache')
+class TestSearchExportJobAPIView(APITestMixin):
+    """Tests for SearchExportJobAPIView."""
+
+    def test_returns_pending_job(self):
+        """Tests that the status of a pending job is returned without a download URL."""
+        job = create_export_job(
+            self.user,
+            SearchSimpleModelExportAPIView,
+            {},
+            'filename',
+            '/v3/search/simplemodel/export',
+        )
+
+        url = reverse('api-v4:search:export-job', kwargs={'job_id': job['id']})
+        response = self.api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            'id': job['id'],
+            'status': 'pending',
+            'download_url': None,
+        }
+
+    def test_returns_404_for_job_of_other_user(self):
+        """Tests that advisers cannot see the export jobs of other advisers."""
+        other_user = create_test_user()
+        job = create_export_job(
+            other_user,
+            SearchSimpleModelExportAPIView,
+            {},
+            'filename',
+            '/v3/search/simplemodel/export',
+        )
+
+        url = reverse('api-v4:search:export-job', kwargs={'job_id': job['id']})
+        response = self.api_client.get(url)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_returns_404_for_non_existent_job(self):
+        """Tests that a 404 is returned for a job that does not exist (or has expired)."""
+        url = reverse(
+            'api-v4:search:export-job',
+            kwargs={'job_id': '7a9ab29f-6e35-4e63-b6b7-e8d4b5c6fd1f'},
+        )
+        response = self.api_client.get(url)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
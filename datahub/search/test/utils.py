@@ -1,5 +1,8 @@
 from unittest.mock import Mock
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 
 def create_mock_search_app(
         current_mapping_hash='mapping-hash',
@@ -25,6 +28,21 @@ def create_mock_search_app(
     return mock
 
 
+def get_num_queries_for_document_batch(search_app, db_objects):
+    """
+    Returns the number of queries made when fetching a batch of objects using the search app
+    queryset and converting them into Elasticsearch documents.
+    """
+    pks = [obj.pk for obj in db_objects]
+
+    with CaptureQueriesContext(connection) as context:
+        batch = search_app.queryset.filter(pk__in=pks)
+        documents = list(search_app.es_model.db_objects_to_es_documents(batch))
+
+    assert len(documents) == len(pks)
+    return len(context.captured_queries)
+
+
 def doc_exists(es_client, search_app, id_):
     """Checks if a document exists for a specified search app."""
     return es_client.exists(
@@ -1,7 +1,7 @@
 import json
+from functools import lru_cache
 from typing import NamedTuple
 
-
 from datahub.core.utils import StrEnum
 
 
@@ -34,12 +34,17 @@ def get_model_field_names(es_model):
     return get_model_fields(es_model).keys()
 
 
+@lru_cache(maxsize=None)
 def get_model_non_mapped_field_names(es_model):
-    """Gets the names of fields that are not mapped or computed."""
-    return (
+    """
+    Gets the names of fields that are not mapped or computed.
+
+    The result is cached as it is needed for every object converted into a document.
+    """
+    return frozenset(
         get_model_field_names(es_model)
         - es_model.MAPPINGS.keys()
-        - es_model.COMPUTED_MAPPINGS.keys()
+        - es_model.COMPUTED_MAPPINGS.keys(),
     )
 
 
@@ -1,12 +1,17 @@
 """Search views."""
 from collections import namedtuple
 from enum import auto, Enum
+from functools import partial
 from itertools import islice
 
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404
 from django.utils.text import capfirst
 from django.utils.timezone import now
 from oauth2_provider.contrib.rest_framework.permissions import IsAuthenticatedOrTokenHasScope
+from rest_framework import status
 from rest_framework.generics import ListAPIView
 from rest_framework.response import Response
 from rest_framework.schemas.openapi import AutoSchema
@@ -14,9 +19,20 @@ from rest_framework.views import APIView
 
 from datahub.core.csv import create_csv_response
 from datahub.core.exceptions import DataHubException
+from datahub.core.utils import slice_iterable_into_chunks
 from datahub.oauth.scopes import Scope
-from datahub.search.apps import get_search_apps
-from datahub.search.execute_query import execute_autocomplete_query, execute_search_query
+from datahub.search.apps import get_global_search_apps_as_mapping, get_search_apps
+from datahub.search.elasticsearch import get_client
+from datahub.search.execute_query import (
+    execute_autocomplete_query,
+    execute_search_query,
+    serialise_hits,
+)
+from datahub.search.export_jobs import (
+    create_export_job,
+    get_export_job,
+    get_export_job_status_data,
+)
 from datahub.search.permissions import (
     has_permissions_for_app,
     SearchAndExportPermissions,
@@ -27,11 +43,13 @@ from datahub.search.query_builder import (
     get_search_by_entity_query,
     limit_search_query,
 )
+from datahub.search.result_cache import get_or_execute_search
 from datahub.search.serializers import (
     AutocompleteSearchQuerySerializer,
     BasicSearchQuerySerializer,
     EntitySearchQuerySerializer,
 )
+from datahub.search.tasks import generate_search_export
 from datahub.search.utils import SearchOrdering
 from datahub.user_event_log.constants import UserEventType
 from datahub.user_event_log.utils import record_user_event
@@ -99,6 +117,11 @@ class SearchBasicStubSchema(SearchStubSchema):
 
 EntitySearch = namedtuple('EntitySearch', ['model', 'name'])
 
+# Key used for the primary key of each row when fetching rows for export
+EXPORT_PK_KEY = '_export_pk'
+# How long Elasticsearch keeps the search context of an export scroll between requests
+EXPORT_SCROLL_TIMEOUT = '5m'
+
 v3_view_registry = {}
 v4_view_registry = {}
 
@@ -126,17 +149,24 @@ class SearchBasicAPIView(APIView):
             limit=validated_params['limit'],
         )
 
+        response = get_or_execute_search(
+            query,
+            get_global_search_apps_as_mapping().values(),
+            partial(self._execute_search, query),
+        )
+
+        return Response(data=response)
+
+    def _execute_search(self, query):
         results = execute_search_query(query)
 
-        response = {
+        return {
             'count': results.hits.total,
-            'results': [result.to_dict() for result in results.hits],
+            'results': serialise_hits(results),
             'aggregations': [{'count': x['doc_count'], 'entity': x['key']}
                              for x in results.aggregations['count_by_type']['buckets']],
         }
 
-        return Response(data=response)
-
 
 def _get_permission_filters(request):
     """
@@ -227,16 +257,23 @@ class SearchAPIView(APIView):
             limit=validated_data['limit'],
         )
 
-        results = execute_search_query(limited_query)
+        response = get_or_execute_search(
+            limited_query,
+            (self.search_app,),
+            partial(self._execute_search, limited_query),
+        )
+
+        return Response(data=response)
+
+    def _execute_search(self, query):
+        results = execute_search_query(query, search_app=self.search_app)
 
         response = {
             'count': results.hits.total,
-            'results': [x.to_dict() for x in results.hits],
+            'results': serialise_hits(results, search_app=self.search_app),
         }
 
-        response = self.enhance_response(results, response)
-
-        return Response(data=response)
+        return self.enhance_response(results, response)
 
     def enhance_response(self, results, response):
         """Placeholder for a method to enhance the response with custom data."""
@@ -253,25 +290,56 @@ class SearchExportAPIView(SearchAPIView):
     permission_classes = (IsAuthenticatedOrTokenHasScope, SearchAndExportPermissions)
     queryset = None
     field_titles = None
-    db_sort_by_remappings = {}
 
     def post(self, request, format=None):
         """Performs search and returns CSV file."""
         validated_data = self.validate_data(request.data)
 
-        es_query = self._get_es_query(request, validated_data)
-        ids = tuple(self._get_ids(es_query))
-        db_queryset = self._get_rows(ids, validated_data['sortby'])
+        base_query = self.get_base_query(request, validated_data)
         base_filename = self._get_base_filename()
 
+        if request.query_params.get('async') == 'true':
+            # The user event is recorded by the export job (once the number of results is known)
+            return self._start_export_job(request, base_filename)
+
+        num_results, ids = self._start_scroll(
+            self._get_es_query(base_query),
+            settings.SEARCH_EXPORT_MAX_RESULTS,
+        )
+        self._record_user_event(request, validated_data, num_results)
+
+        rows = self._get_rows(ids)
+        return create_csv_response(rows, self.field_titles, base_filename)
+
+    def _record_user_event(self, request, validated_data, num_results):
+        """Records a user event for an export."""
         user_event_data = {
-            'num_results': len(ids),
+            'num_results': num_results,
             'args': validated_data,
         }
-
         record_user_event(request, UserEventType.SEARCH_EXPORT, data=user_event_data)
 
-        return create_csv_response(db_queryset, self.field_titles, base_filename)
+    def _start_export_job(self, request, base_filename):
+        """
+        Schedules a task to generate the CSV file in the background.
+
+        This is used for large exports, which could otherwise exceed the request timeout. The
+        client polls the returned job using SearchExportJobAPIView.
+        """
+        job = create_export_job(
+            request.user,
+            type(self),
+            request.data,
+            base_filename,
+            request.path,
+        )
+        transaction.on_commit(
+            lambda: generate_search_export.apply_async(args=(job['id'],)),
+        )
+        return Response(
+            get_export_job_status_data(job),
+            status=status.HTTP_202_ACCEPTED,
+        )
 
     def _get_base_filename(self):
         """Gets the filename (without the .csv suffix) for the CSV file download."""
@@ -282,66 +350,110 @@ class SearchExportAPIView(SearchAPIView):
         ]
         return ' - '.join(filename_parts)
 
-    def _get_ids(self, es_query):
+    def _start_scroll(self, es_query, max_results):
         """
-        Gets the document IDs from an Elasticsearch query using the scroll API.
+        Starts scrolling through the results of an Elasticsearch query.
+
+        The first scroll response is fetched straight away, so that the number of results is
+        known without making a separate count request.
+
+        Returns the number of results and a generator of their document IDs (both limited by
+        max_results, if it is not None).
+        """
+        response = es_query.params(scroll=EXPORT_SCROLL_TIMEOUT).execute()
+        num_results = response.hits.total
+        if max_results is not None:
+            num_results = min(num_results, max_results)
+
+        if not num_results:
+            # Nothing will be consumed, so clear the scroll straight away
+            _clear_scroll(get_client(), response._scroll_id)
+            return num_results, iter(())
+
+        return num_results, islice(_iterate_scroll_ids(response), num_results)
 
-        The number of IDs returned is limited by settings.SEARCH_EXPORT_MAX_RESULTS.
+    def _get_es_query(self, base_query):
         """
-        for hit in islice(es_query.scan(), settings.SEARCH_EXPORT_MAX_RESULTS):
-            yield hit.meta.id
-
-    def _get_es_query(self, request, validated_data):
-        """Gets a scannable Elasticsearch query for the current request."""
-        return self.get_base_query(
-            request,
-            validated_data,
-        ).source(
+        Gets an Elasticsearch query for scrolling through the results of a base search query.
+
+        The sort order that the user specified is kept (as sorting by _doc is not added).
+        """
+        return base_query.source(
             # Stops _source from being returned in the responses
             fields=False,
         ).params(
-            # Keeps the sort order that the user specified
-            preserve_order=True,
             # Number of results in each scroll response
             size=settings.SEARCH_EXPORT_SCROLL_CHUNK_SIZE,
         )
 
-    def _get_rows(self, ids, search_ordering):
+    def _get_rows(self, ids):
         """
-        Returns an iterable using QuerySet.iterator() over the search results.
+        Returns a generator of rows for the search results, in the order of the search results.
 
-        The search sort-by value is translated to a value compatible with the Django ORM and
-        applied to the query set to preserve the original sort order.
+        IDs are consumed in chunks of settings.SEARCH_EXPORT_SCROLL_CHUNK_SIZE (i.e. one chunk
+        per scroll response) and the rows for each chunk are fetched using a separate query. This
+        keeps memory usage bounded regardless of the number of results, and means that rows are
+        streamed as soon as the first scroll response has been received.
 
-        At the moment, all rows are fetched in one query (using a server-side cursor) as
-        settings.SEARCH_EXPORT_MAX_RESULTS is set to a (relatively) low value.
+        Rows for objects that have been deleted since they were indexed are skipped.
         """
-        db_ordering = self._translate_search_ordering_to_django_ordering(search_ordering)
+        chunks = slice_iterable_into_chunks(ids, settings.SEARCH_EXPORT_SCROLL_CHUNK_SIZE)
+
+        for id_chunk in chunks:
+            chunk_queryset = self.queryset.filter(
+                pk__in=id_chunk,
+            ).values(
+                *self.field_titles.keys(),
+                **{EXPORT_PK_KEY: F('pk')},
+            )
+            rows_by_id = {str(row.pop(EXPORT_PK_KEY)): row for row in chunk_queryset}
 
-        return self.queryset.filter(
-            pk__in=ids,
-        ).order_by(
-            *db_ordering,
-        ).values(
-            *self.field_titles.keys(),
-        ).iterator()
+            for id_ in id_chunk:
+                if id_ in rows_by_id:
+                    yield rows_by_id[id_]
 
-    def _translate_search_ordering_to_django_ordering(self, ordering):
-        """
-        Converts a sort-by value as used in the search API to a tuple of values that can be
-        passed to QuerySet.order_by().
 
-        Note that this relies on the same field names having been used; if they differ then you
-        should manually specify a remapping in the db_sort_by_remappings class attribute.
-        """
-        if not ordering:
-            return ()
+def _iterate_scroll_ids(first_response):
+    """
+    Yields the document IDs of all the results of a scroll, starting from its first response.
+
+    The scroll is cleared once all results have been consumed (or the generator is closed).
+    """
+    client = get_client()
+    scroll_id = first_response._scroll_id
+    ids = [hit.meta.id for hit in first_response]
+
+    try:
+        while ids:
+            yield from ids
+
+            response = client.scroll(scroll_id=scroll_id, scroll=EXPORT_SCROLL_TIMEOUT)
+            scroll_id = response['_scroll_id']
+            ids = [hit['_id'] for hit in response['hits']['hits']]
+    finally:
+        _clear_scroll(client, scroll_id)
+
+
+def _clear_scroll(client, scroll_id):
+    """Frees the search context of a scroll (if it has not already expired)."""
+    client.clear_scroll(body={'scroll_id': [scroll_id]}, ignore=(404,))
+
+
+class SearchExportJobAPIView(APIView):
+    """Returns the status of an asynchronous search export (and its download URL once complete)."""
+
+    permission_classes = (IsAuthenticatedOrTokenHasScope,)
+    required_scopes = (Scope.internal_front_end,)
+    http_method_names = ('get',)
+
+    def get(self, request, job_id, format=None):
+        """Gets the status of an export job started by the current user."""
+        job = get_export_job(str(job_id))
 
-        auto_translated_field = ordering.field.replace('.', '__')
-        db_field = self.db_sort_by_remappings.get(ordering.field, auto_translated_field)
-        prefix = '-' if ordering.is_descending else ''
+        if not job or job['adviser_id'] != str(request.user.pk):
+            raise Http404
 
-        return f'{prefix}{db_field}', 'pk'
+        return Response(get_export_job_status_data(job))
 
 
 class AutocompleteSearchListAPIView(ListAPIView):